@@ -15,6 +15,9 @@ from src.ocr_process import OCRProcessor
 from src.similarity import similar, compare_images
 from src.database import DatabaseManager
 from src.logging_config import setup_logging
+from src.model.admission import AdmissionController
+from src.image_processing.frame import Frame
+from src.model.cascade import CascadeExecutor, CascadeStage
 import logging
 
 setup_logging()
@@ -23,7 +26,7 @@ logger = logging.getLogger(__name__)
 # --- Flask App for Video Streaming ---
 app = Flask(__name__)
 frame_lock = threading.Lock()
-global_frame = None
+global_frame = None  # Frame ของภาพล่าสุดที่วาด box แล้ว (JPEG ถูก cache ในเฟรม)
 
 env_path = os.path.join(os.path.dirname(__file__), 'src', '.env.production')
 load_dotenv(env_path)
@@ -33,11 +36,11 @@ def flask_video_stream():
     global global_frame
     while True:
         with frame_lock:
-            if global_frame is not None:
-                ret, jpeg = cv2.imencode('.jpg', global_frame)
-                if ret:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+            # เข้ารหัสครั้งเดียวต่อเฟรม ไม่ว่าจะถูกส่งซ้ำกี่รอบ
+            jpeg = global_frame.jpeg(quality=95) if global_frame is not None else None
+        if jpeg is not None:
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
         time.sleep(0.03)
 
 @app.route('/video_feed')
@@ -62,17 +65,89 @@ class DetectionThread(threading.Thread):
         self.should_run = True
         self.prev_ocr_label = None
         self.prev_plate_image = None
+        # คัดเฟรมระหว่างกล้องกับ inference เพื่อไม่ให้ประมวลผลเฟรมเก่าเมื่อทำงานไม่ทัน
+        self.admission = AdmissionController(
+            policy=os.getenv("ADMISSION_POLICY", "latest"),
+            max_queue=2,
+            max_latency=float(os.getenv("ADMISSION_MAX_LATENCY", "1.0")),
+            name="detection"
+        )
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        # vehicle -> plate -> OCR: crop ทั้งหมดของแต่ละขั้นถูกส่งเข้าโมเดลถัดไปเป็น batch เดียว
+        self.cascade = CascadeExecutor([
+            CascadeStage("vehicle", self._detect_vehicles, self._vehicle_crops, max_batch=1),
+            CascadeStage("plate", self._detect_plates, self._plate_crops,
+                         max_batch=int(os.getenv("PLATE_BATCH_SIZE", "8"))),
+            CascadeStage("ocr", self._read_plates, max_batch=int(os.getenv("OCR_BATCH_SIZE", "16"))),
+        ], name="detection")
 
-    def run(self):
-        global global_frame
-        logger.info("Object detection thread started")
+    @staticmethod
+    def _model_size(model):
+        return (model.input_shape[0][1], model.input_shape[0][2])
+
+    def _detect_vehicles(self, frames):
+        size = self._model_size(self.vehicle_model)
+        results = self.vehicle_model.predict_batch([resize_with_letterbox(frame, size) for frame in frames])
+        return [getattr(result, "results", []) for result in results]
+
+    def _vehicle_crops(self, frame, vehicle_boxes):
+        crops = []
+        for vbox in vehicle_boxes:
+            v_crop = crop_license_plates(frame, [vbox])
+            if not v_crop or v_crop[0] is None:
+                continue
+            v_crop_bgr = cv2.cvtColor(v_crop[0], cv2.COLOR_BGRA2BGR) if v_crop[0].shape[2] == 4 else v_crop[0]
+            crops.append({"frame": frame, "crop": v_crop_bgr})
+        return crops
+
+    def _detect_plates(self, vehicles):
+        size = self._model_size(self.lp_detection_model)
+        results = self.lp_detection_model.predict_batch([resize_with_letterbox(v["crop"], size) for v in vehicles])
+        return [getattr(result, "results", []) for result in results]
+
+    def _plate_crops(self, vehicle, lp_boxes):
+        plates = []
+        for lp_box in lp_boxes:
+            lp_crop = crop_license_plates(vehicle["frame"], [lp_box])
+            if not lp_crop or lp_crop[0] is None:
+                continue
+            plates.append({"box": lp_box, "crop": lp_crop[0]})
+        return plates
+
+    def _read_plates(self, plates):
+        return [self.ocr.process_frame(preprocess_for_ocr(plate["crop"]))[1] for plate in plates]
+
+    def _capture_loop(self):
+        """อ่านเฟรมจากกล้องอย่างต่อเนื่อง ห่อเป็น Frame แล้วส่งให้ admission controller"""
+        frame_id = 0
         while self.should_run:
             try:
-                frame, metadata = self.cam_manager.get_request("main") # 'main' Or 'lores' for low resolution
-                if frame is None:
+                image, metadata = self.cam_manager.get_request("main") # 'main' Or 'lores' for low resolution
+                if image is None:
                     logger.error("Failed to get frame from camera.")
                     time.sleep(0.1)
                     continue
+                # preview configuration ของ picamera2 ให้ XBGR8888 (เรียงเป็น RGBA ใน numpy)
+                color = "RGBA" if image.ndim == 3 and image.shape[2] == 4 else "RGB"
+                self.admission.offer(Frame(image, color=color, frame_id=frame_id), tag=metadata)
+                frame_id += 1
+            except Exception as e:
+                logger.error(f"Error getting frame from camera: {e}")
+                time.sleep(0.1)
+        self.admission.close()
+
+    def run(self):
+        global global_frame
+        logger.info("Object detection thread started")
+        self.capture_thread.start()
+        while self.should_run:
+            item = self.admission.take(timeout=1.0)
+            if item is None:
+                continue
+            # Frame ถูกใช้ร่วมกันทุกขั้นของเฟรมนี้ และถูก release เมื่อ admission.done()
+            frame_obj, metadata = item.frame, item.tag
+            try:
+                frame = frame_obj.image
                 logging.debug(f'Captured frame with shape: {frame.shape}, metadata: {metadata}')
 
                 # Convert to BGR if your model expects it (OpenCV default is BGR)
@@ -99,38 +174,18 @@ class DetectionThread(threading.Thread):
                 frame_rgb_path = os.path.join(base_dir, f"frame_rgb_{timestamp}.jpg")
                 cv2.imwrite(frame_rgb_path, frame_rgb)
                 # Perform object detection on frame_bgr
-                # 1. Vehicle Detection
-                resized = resize_with_letterbox(frame, (self.vehicle_model.input_shape[0][1], self.vehicle_model.input_shape[0][2]))
-                vehicle_results = self.vehicle_model(resized)
-                vehicle_boxes = getattr(vehicle_results, "results", [])
+                # 1-3. Vehicle -> License Plate -> OCR (แต่ละขั้นรันเป็น batch เดียวต่อเฟรม)
+                root = self.cascade.run([frame])[0]
+                vehicle_boxes = root.output
+                lp_boxes = [node.input["box"] for node in root.at_stage("ocr")]
 
-                # Draw vehicle bounding boxes
+                # Draw vehicle and license plate bounding boxes
                 frame_with_vehicles = draw_bounding_boxes(frame, vehicle_boxes, color=(0,255,0), thickness=2)
-
-                # 2. License Plate Detection (on each vehicle)
-                lp_boxes = []
-                for vbox in vehicle_boxes:
-                    v_crop = crop_license_plates(frame, [vbox])
-                    if not v_crop or v_crop[0] is None:
-                        continue
-                    if v_crop[0].shape[2] == 4:
-                        v_crop_bgr = cv2.cvtColor(v_crop[0], cv2.COLOR_BGRA2BGR)
-                    else:
-                        v_crop_bgr = v_crop[0]
-                    lp_results = self.lp_detection_model(resize_with_letterbox(v_crop_bgr, (self.lp_detection_model.input_shape[0][1], self.lp_detection_model.input_shape[0][2])))
-                    lp_boxes += getattr(lp_results, "results", [])
-
                 frame_with_lp = draw_bounding_boxes(frame_with_vehicles, lp_boxes, color=(0,0,255), thickness=2)
 
-                # 3. OCR on each license plate
-                for idx, lp_box in enumerate(lp_boxes):
-                    lp_crop = crop_license_plates(frame, [lp_box])
-                    if not lp_crop or lp_crop[0] is None:
-                        continue
-
-                    # Preprocess for OCR
-                    processed_lp = preprocess_for_ocr(lp_crop[0])
-                    ocr_text = self.ocr.process_frame(processed_lp)[1]
+                for idx, ocr_node in enumerate(root.at_stage("ocr")):
+                    lp_crop = [ocr_node.input["crop"]]
+                    ocr_text = ocr_node.output
 
                     # Similarity check
                     text_sim = similar(ocr_text, self.prev_ocr_label) if self.prev_ocr_label else 0
@@ -168,13 +223,15 @@ class DetectionThread(threading.Thread):
 
                 # Update global frame for streaming
                 with frame_lock:
-                    global_frame = frame_with_lp
+                    if global_frame is not None:
+                        global_frame.release()
+                    global_frame = Frame(frame_with_lp, color=frame_obj.color)
 
-                time.sleep(0.05)
             except Exception as e:
-                logger.error(f"Error getting frame from camera: {e}")
-                time.sleep(0.1)
-                continue
+                logger.error(f"Error processing frame: {e}")
+            finally:
+                self.admission.done(item)
+        logger.info(f"Admission stats: {self.admission.get_stats()}")
 
 def main():
     # Camera setup
@@ -10,6 +10,7 @@ from datetime import datetime
 from picamera2 import Picamera2
 from libcamera import controls
 from src.ocr_process import OCRProcessor
+from src.image_processing.frame import Frame
 from difflib import SequenceMatcher
 import requests
 import socket
@@ -51,7 +52,7 @@ def similar(a, b):
     return SequenceMatcher(None, a, b).ratio()
 
 def preprocess_for_ocr(image):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = image.gray if isinstance(image, Frame) else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     gray = cv2.equalizeHist(gray)
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                    cv2.THRESH_BINARY, 31, 15)
@@ -142,7 +143,8 @@ class VehicleLicensePlateDetector:
         conn.close()
 
     def is_scene_changed(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # ใช้ gray ที่ cache ใน Frame ร่วมกับขั้นอื่นของเฟรมเดียวกัน
+        gray = frame.gray if isinstance(frame, Frame) else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         if self.prev_bg_frame is None:
             self.prev_bg_frame = gray
             return False
@@ -176,7 +178,7 @@ class VehicleLicensePlateDetector:
                 with self.lock:
                     frame = self.picam2.capture_array("main")
                 frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                return frame_bgr
+                return Frame(frame_bgr, color="BGR")
             except Exception as e:
                 logging.warning(f"Error capturing video frame: {e}")
                 return None
@@ -187,7 +189,7 @@ class VehicleLicensePlateDetector:
             image_path = self.image_list[self.image_idx]
             image = cv2.imread(image_path)
             self.image_idx += 1
-            return image
+            return Frame(image, color="BGR") if image is not None else None
 
     def save_image(self, image, timestamp, image_type, output_dir="lpr_images"):
         os.makedirs(output_dir, exist_ok=True)
@@ -243,16 +245,21 @@ class VehicleLicensePlateDetector:
         logging.info(f"✅ Saved to database: Plate {license_plate}, Image {vehicle_image_path}")
 
     def process_image(self):
-        image = self.capture_video_frame()
-        if image is None or not isinstance(image, np.ndarray):
+        frame = self.capture_video_frame()
+        if frame is None or not isinstance(frame, Frame):
             logging.warning("Image capture failed or invalid image type!")
             return
-        if self.image_source == "camera" and not self.is_scene_changed(image):
+        # เฟรมเดียวกันถูกใช้ทุกขั้นของรอบนี้ แล้วปล่อย cache เมื่อจบรอบ
+        with frame:
+            self._process_frame(frame)
+
+    def _process_frame(self, frame):
+        if self.image_source == "camera" and not self.is_scene_changed(frame):
             logging.info("No significant scene change detected, skipping detection.")
             return
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         resized_image_array = self.resize_with_letterbox(
-            image, (self.vehicle_model.input_shape[0][1], self.vehicle_model.input_shape[0][2])
+            frame.image, (self.vehicle_model.input_shape[0][1], self.vehicle_model.input_shape[0][2])
         )
         if resized_image_array is None:
             logging.warning("Resized image is None. Skipping detection.")
@@ -314,9 +321,8 @@ class VehicleLicensePlateDetector:
 
 def gen_frames(camera):
     while True:
-        frame = camera.capture_array("lores")
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
+        with Frame(camera.capture_array("lores")) as frame:
+            frame_bytes = frame.jpeg(quality=95)
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
         # time.sleep(0.03)  # Optional: limit FPS
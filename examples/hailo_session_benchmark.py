@@ -0,0 +1,115 @@
+"""
+PWD Vision Works - Hailo Session Benchmark
+เปรียบเทียบ overhead ต่อเฟรมระหว่างการสร้าง vstreams ใหม่ทุกเฟรม (แบบเดิมของ predict)
+กับ HailoSession ที่เปิด VDevice / network group / vstreams ค้างไว้
+
+Usage:
+    python hailo_session_benchmark.py --model models/yolov8n.hef --iterations 200
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import argparse
+import time
+import logging
+from typing import Callable, Dict
+
+import numpy as np
+
+from pwd_library.model.hailo8_processor import HailoSession, hailo
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def measure(step: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """
+    วัด latency ต่อเฟรม
+
+    Args:
+        step: ฟังก์ชันที่ประมวลผลหนึ่งเฟรม
+        iterations: จำนวนรอบ
+
+    Returns:
+        ผลการวัด (ms)
+    """
+    for _ in range(5):
+        step()
+
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+
+    times_ms = np.array(times) * 1000
+    return {
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p99_ms": float(np.percentile(times_ms, 99)),
+        "fps": float(1000.0 / times_ms.mean()),
+    }
+
+
+def run_benchmark(model_path: str, iterations: int, quantized: bool) -> Dict[str, Dict[str, float]]:
+    """
+    รัน benchmark ทั้งสองแบบบน session เดียวกัน
+
+    Args:
+        model_path: พาธของโมเดล .hef
+        iterations: จำนวนรอบ
+        quantized: ส่ง input เป็น uint8 หรือไม่
+
+    Returns:
+        ผลการวัดแยกตามวิธี
+    """
+    with HailoSession(model_path, quantized=quantized) as session:
+        height, width, channels = session.input_shape
+        dtype = np.uint8 if quantized else np.float32
+        frame = np.random.randint(0, 255, (1, height, width, channels)).astype(dtype)
+        inputs = {session.input_names[0]: frame}
+
+        input_params = hailo.InputVStreamParams.make_from_network_group(
+            session.network_group, quantized=quantized,
+            format_type=hailo.FormatType.UINT8 if quantized else hailo.FormatType.FLOAT32)
+        output_params = hailo.OutputVStreamParams.make_from_network_group(
+            session.network_group, quantized=False, format_type=hailo.FormatType.FLOAT32)
+
+        # แบบเดิม: สร้าง vstreams ใหม่ทุกเฟรม (ต้องปิด pipeline ของ session ชั่วคราว)
+        pipeline = session._infer_pipeline
+        pipeline.__exit__(None, None, None)
+
+        def per_frame_vstreams():
+            with hailo.InferVStreams(session.network_group, input_params, output_params) as vstreams:
+                return vstreams.infer(inputs)
+
+        per_frame = measure(per_frame_vstreams, iterations)
+
+        pipeline.__enter__()
+        persistent = measure(lambda: session.infer(inputs), iterations)
+
+    return {
+        "per_frame_vstreams": per_frame,
+        "persistent_session": persistent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HailoSession vs per-frame vstream creation")
+    parser.add_argument("--model", required=True, help="path to .hef model")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--quantized", action="store_true", help="send uint8 input")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.model, args.iterations, args.quantized)
+
+    print(f"Model {args.model}, {args.iterations} iterations")
+    print(f"{'method':<24}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'fps':>10}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['fps']:>10.1f}")
+    overhead = results["per_frame_vstreams"]["mean_ms"] - results["persistent_session"]["mean_ms"]
+    print(f"Per-frame vstream overhead removed: {overhead:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
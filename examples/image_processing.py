@@ -81,8 +81,9 @@ def preprocess_for_ocr(image):
     - Increase contrast
     - Apply adaptive thresholding
     - Optionally, denoise or sharpen
+    Accepts a BGR array or a pwd_library Frame (reuses its cached gray view).
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = image.gray if hasattr(image, "gray") else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     gray = cv2.equalizeHist(gray) # Histogram equalization for contrast
     # Adaptive thresholding for varied lighting
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
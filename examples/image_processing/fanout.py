@@ -0,0 +1,209 @@
+"""
+PWD Vision Works - Fan-out Preprocessing
+เตรียม input ของหลายโมเดล (เช่น vehicle, plate, OCR) จากเฟรมเดียว
+โดยอ่านภาพเต็มเฟรมเพียงครั้งเดียว: ย่อเป็นระดับที่ใหญ่ที่สุดที่ต้องใช้ก่อน
+แล้วใช้ระดับนั้นเป็นต้นทางของ target ที่เล็กกว่า และเขียนผลลง buffer pool ของแต่ละโมเดล
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .preprocessor import ImagePreprocessor, LetterboxTransform
+from ..utils.exceptions import InvalidImageFormatError, PreprocessingError
+
+logger = logging.getLogger(__name__)
+
+
+class ModelInputSpec:
+    """
+    รายละเอียดของ model input หนึ่งตัว
+    """
+
+    def __init__(self,
+                 name: str,
+                 size: Tuple[int, int],
+                 method: str = "zero_one",
+                 layout: str = "NHWC",
+                 dtype: np.dtype = np.float32,
+                 swap_rb: bool = True,
+                 padding_color: Tuple[int, int, int] = (114, 114, 114),
+                 custom_mean: Optional[np.ndarray] = None,
+                 custom_std: Optional[np.ndarray] = None):
+        """
+        Args:
+            name: ชื่อของ input (ใช้เป็น key ของผลลัพธ์)
+            size: ขนาด model input (width, height)
+            method: วิธี normalize (ดู ImagePreprocessor.preprocess_into)
+            layout: "NHWC" หรือ "NCHW"
+            dtype: ชนิดข้อมูลของ buffer (np.float32 หรือ np.uint8)
+            swap_rb: แปลง BGR เป็น RGB หรือไม่
+            padding_color: สีสำหรับ padding (B, G, R)
+            custom_mean: ค่า mean สำหรับ custom normalization
+            custom_std: ค่า std สำหรับ custom normalization
+        """
+        self.name = name
+        self.size = tuple(size)
+        self.method = method
+        self.layout = layout
+        self.dtype = np.dtype(dtype)
+        self.swap_rb = swap_rb
+        self.padding_color = tuple(padding_color)
+        self.custom_mean = custom_mean
+        self.custom_std = custom_std
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "ModelInputSpec":
+        """สร้างจาก dictionary (เช่น จาก config file)"""
+        return cls(**spec)
+
+    def __repr__(self) -> str:
+        return f"ModelInputSpec({self.name}, {self.size[0]}x{self.size[1]}, {self.method}, {self.layout})"
+
+
+class FanOutPreprocessor:
+    """
+    เตรียม model input หลายตัวจากเฟรมเดียว โดยอ่านภาพต้นฉบับครั้งเดียว
+    """
+
+    def __init__(self,
+                 specs: Sequence[Union[ModelInputSpec, Dict[str, Any]]],
+                 preprocessor: Optional[ImagePreprocessor] = None,
+                 pool_size: int = 2,
+                 interpolation: int = cv2.INTER_LINEAR):
+        """
+        เริ่มต้น FanOutPreprocessor
+
+        Args:
+            specs: รายการ ModelInputSpec (หรือ dictionary)
+            preprocessor: ImagePreprocessor ที่ใช้ร่วมกัน (cache geometry และ LUT)
+            pool_size: จำนวน buffer ต่อ input ที่หมุนเวียนใช้ (ผลของเฟรมก่อนหน้ายังใช้ได้
+                       จนกว่าจะเรียก run อีก pool_size ครั้ง)
+            interpolation: วิธี interpolation ของ cv2.resize
+        """
+        if not specs:
+            raise ValueError("At least one model input spec is required")
+        self.specs = [s if isinstance(s, ModelInputSpec) else ModelInputSpec.from_dict(s) for s in specs]
+        names = [s.name for s in self.specs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate model input names: {names}")
+
+        self.preprocessor = preprocessor or ImagePreprocessor(self.specs[0].size)
+        self.pool_size = max(1, pool_size)
+        self.interpolation = interpolation
+        self._pools = {s.name: [] for s in self.specs}
+        self._next_slot = {s.name: 0 for s in self.specs}
+        self._levels = {}
+
+    def _acquire_buffer(self, spec: ModelInputSpec) -> np.ndarray:
+        """buffer ถัดไปจาก pool ของ input นี้"""
+        pool = self._pools[spec.name]
+        slot = self._next_slot[spec.name]
+        if slot >= len(pool):
+            pool.append(self.preprocessor.allocate_input_buffer(spec.size, 3, spec.layout, spec.dtype))
+        self._next_slot[spec.name] = (slot + 1) % self.pool_size
+        return pool[slot]
+
+    def _level_buffer(self, index: int, size: Tuple[int, int]) -> np.ndarray:
+        """buffer uint8 ของภาพที่ย่อแล้วสำหรับ spec ลำดับ index"""
+        shape = (size[1], size[0], 3)
+        level = self._levels.get(index)
+        if level is None or level.shape != shape:
+            level = np.empty(shape, dtype=np.uint8)
+            self._levels[index] = level
+        return level
+
+    def run(self, image) -> Dict[str, Tuple[np.ndarray, LetterboxTransform]]:
+        """
+        เตรียม model input ทั้งหมดจากเฟรมเดียว
+
+        Args:
+            image: เฟรม BGR/BGRA/GRAY (np.ndarray) หรือ Frame (color space ตาม Frame.color;
+                   เฟรม NV12 ไม่ถูกแปลงสีเต็มเฟรม)
+
+        Returns:
+            dictionary {ชื่อ input: (buffer, LetterboxTransform)} โดย transform อยู่ในพิกัดเฟรม
+
+        Raises:
+            PreprocessingError: หากเตรียม input ไม่สำเร็จ
+        """
+        try:
+            frame = image if hasattr(image, "is_yuv") else None
+            if frame is not None and frame.is_yuv:
+                frame_shape = frame.shape
+            else:
+                # Frame ที่ไม่ใช่ YUV ผ่านการแปลงสีเดียวกับ ndarray
+                if frame is not None:
+                    image = self._to_bgr(frame.image, frame.color)
+                    frame = None
+                else:
+                    image = self._to_bgr(image)
+                frame_shape = image.shape
+
+            plans = []
+            for spec in self.specs:
+                transform = self.preprocessor.get_letterbox_transform(frame_shape, spec.size)
+                plans.append((transform.new_width * transform.new_height, spec, transform))
+            # target ใหญ่สุดก่อน เพื่อให้ target ที่เล็กกว่าใช้ภาพที่ย่อแล้วเป็นต้นทาง
+            plans.sort(key=lambda plan: -plan[0])
+
+            results = {}
+            sources: List[np.ndarray] = []
+            for index, (_, spec, transform) in enumerate(plans):
+                new_size = (transform.new_width, transform.new_height)
+                level = self._level_buffer(index, new_size)
+                if sources:
+                    # ภาพที่เล็กที่สุดที่ยังใหญ่กว่าหรือเท่ากับ target
+                    source = min((s for s in sources
+                                  if s.shape[1] >= new_size[0] and s.shape[0] >= new_size[1]),
+                                 key=lambda s: s.shape[0] * s.shape[1], default=sources[0])
+                    cv2.resize(source, new_size, dst=level, interpolation=self.interpolation)
+                elif frame is not None:
+                    y, uv = frame.planes
+                    self.preprocessor.yuv_to_color(y, uv, new_size, full_range=frame.full_range, dst=level)
+                else:
+                    cv2.resize(image, new_size, dst=level, interpolation=self.interpolation)
+                sources.append(level)
+
+                out = self.preprocessor.write_resized_into(
+                    level, self._acquire_buffer(spec), transform, spec.method, spec.layout,
+                    spec.swap_rb, spec.padding_color, spec.custom_mean, spec.custom_std)
+                results[spec.name] = (out, transform)
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Fan-out preprocessing failed: {e}")
+            raise PreprocessingError(f"Failed to prepare model inputs: {e}") from e
+
+    def _to_bgr(self, image: np.ndarray, color: str = "BGR") -> np.ndarray:
+        """ตรวจสอบภาพแล้วแปลงเป็น BGR 3 channels (ขนาดเท่ากับ level buffer)"""
+        self.preprocessor.validate_image(image)
+        if image.dtype != np.uint8:
+            raise InvalidImageFormatError(f"Fan-out requires uint8 images, got {image.dtype}")
+        if image.ndim == 2 or image.shape[2] == 1:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_RGBA2BGR if color == "RGBA" else cv2.COLOR_BGRA2BGR)
+        if color == "RGB":
+            return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        return image
+
+    def get_fanout_info(self) -> Dict[str, Any]:
+        """
+        ดึงข้อมูลการตั้งค่าและ buffer
+
+        Returns:
+            Dictionary ของ specs และขนาด buffer ที่ allocate แล้ว
+        """
+        return {
+            "specs": [repr(s) for s in self.specs],
+            "pool_size": self.pool_size,
+            "buffer_bytes": sum(b.nbytes for pool in self._pools.values() for b in pool),
+            "level_bytes": sum(level.nbytes for level in self._levels.values()),
+        }
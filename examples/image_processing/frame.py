@@ -0,0 +1,415 @@
+"""
+PWD Vision Works - Frame
+ห่อเฟรมจากกล้องพร้อม cache ของภาพที่แปลงแล้ว (gray, pyramid, thumbnail,
+model input, JPEG, histogram) เพื่อให้ทุกส่วนของ pipeline ใช้ร่วมกัน
+แทนการ cvtColor/resize ซ้ำในแต่ละฟังก์ชัน
+
+รองรับเฟรม NV12 (Y + UV planes) จาก ISP โดยตรง: gray ใช้ Y plane
+โดยไม่แปลงสี และ model input ถูกแปลงสีที่ขนาดของ model เท่านั้น
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .preprocessor import ImagePreprocessor, LetterboxTransform
+from ..utils.exceptions import InvalidImageFormatError
+
+logger = logging.getLogger(__name__)
+
+_GRAY_CODES = {
+    "BGR": cv2.COLOR_BGR2GRAY,
+    "RGB": cv2.COLOR_RGB2GRAY,
+    "BGRA": cv2.COLOR_BGRA2GRAY,
+    "RGBA": cv2.COLOR_RGBA2GRAY,
+}
+
+
+class Frame:
+    """
+    เฟรมภาพพร้อม derived views ที่คำนวณเมื่อถูกเรียกครั้งแรกแล้ว cache ไว้
+
+    ขนาด cache ถูกจำกัดด้วย max_cache_bytes (ลบ view ที่ใช้ล่าสุดนานที่สุดก่อน)
+    และถูกล้างทั้งหมดเมื่อเรียก release() หรือออกจาก with block
+    """
+
+    def __init__(self,
+                 image: np.ndarray,
+                 color: str = "BGR",
+                 frame_id: Optional[int] = None,
+                 timestamp: Optional[float] = None,
+                 max_cache_bytes: Optional[int] = None,
+                 preprocessor: Optional[ImagePreprocessor] = None,
+                 uv: Optional[np.ndarray] = None,
+                 full_range: bool = False):
+        """
+        เริ่มต้น Frame
+
+        Args:
+            image: ภาพต้นฉบับ (H, W) หรือ (H, W, C) หรือ Y plane เมื่อระบุ uv
+            color: color space ของภาพ ("BGR", "RGB", "BGRA", "RGBA", "GRAY")
+                   (ถูกตั้งเป็น "NV12" อัตโนมัติเมื่อระบุ uv)
+            frame_id: หมายเลขเฟรม
+            timestamp: เวลาที่จับภาพ (ค่าเริ่มต้น time.time())
+            max_cache_bytes: ขนาด cache สูงสุด (ค่าเริ่มต้น 2 เท่าของขนาดภาพต้นฉบับ)
+            preprocessor: ImagePreprocessor สำหรับ letterbox (ใช้ร่วมกันเพื่อ cache geometry)
+            uv: UV plane แบบ interleaved (H/2, W/2, 2) สำหรับเฟรม NV12 (ดู from_yuv)
+            full_range: YUV เป็น full range หรือไม่ (สำหรับเฟรม NV12)
+        """
+        if image is None or not isinstance(image, np.ndarray) or image.size == 0:
+            raise InvalidImageFormatError("Frame requires a non-empty numpy array")
+
+        self._image = image
+        self._uv = uv
+        self.full_range = full_range
+        self.color = "NV12" if uv is not None else color.upper()
+        self.frame_id = frame_id
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        color_nbytes = image.nbytes * 3 if uv is not None else image.nbytes
+        self.max_cache_bytes = max_cache_bytes if max_cache_bytes is not None else 2 * color_nbytes
+        self.preprocessor = preprocessor
+
+        self._views = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_yuv(cls,
+                 buffer: np.ndarray,
+                 width: int,
+                 height: int,
+                 fmt: str = "NV12",
+                 **kwargs) -> "Frame":
+        """
+        สร้าง Frame จาก buffer YUV 4:2:0 (ดู ImagePreprocessor.split_yuv420)
+
+        Args:
+            buffer: buffer ของเฟรม YUV420 / NV12 / NV21 / YV12
+            width: ความกว้างของภาพ
+            height: ความสูงของภาพ
+            fmt: รูปแบบของ buffer
+            **kwargs: argument อื่นของ Frame
+
+        Returns:
+            Frame แบบ NV12
+        """
+        y, uv = ImagePreprocessor.split_yuv420(buffer, width, height, fmt)
+        return cls(y, uv=uv, **kwargs)
+
+    # ------------------------------------------------------------------ #
+    # Basic properties
+    # ------------------------------------------------------------------ #
+    @property
+    def image(self) -> np.ndarray:
+        """ภาพต้นฉบับ (เฟรม NV12 จะแปลงเป็น BGR เมื่อถูกเรียกครั้งแรก)"""
+        if self._image is None:
+            raise InvalidImageFormatError("Frame has been released")
+        if self.is_yuv:
+            return self.get("bgr", lambda: self._get_preprocessor().yuv_to_color(
+                self._image, self._uv, full_range=self.full_range))
+        return self._image
+
+    @property
+    def is_yuv(self) -> bool:
+        return self._uv is not None
+
+    @property
+    def planes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(Y, UV) planes ของเฟรม NV12"""
+        if not self.is_yuv:
+            raise InvalidImageFormatError("Frame is not a YUV frame")
+        return self._image, self._uv
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self._image is None:
+            raise InvalidImageFormatError("Frame has been released")
+        if self.is_yuv:
+            return self._image.shape + (3,)
+        return self._image.shape
+
+    @property
+    def cache_bytes(self) -> int:
+        """ขนาดรวมของ views ที่ cache ไว้"""
+        return self._cache_bytes
+
+    # ------------------------------------------------------------------ #
+    # Cache
+    # ------------------------------------------------------------------ #
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        ดึง view จาก cache หรือคำนวณด้วย factory แล้วเก็บไว้
+
+        Args:
+            key: key ของ view
+            factory: ฟังก์ชันสร้าง view (เรียกเมื่อยังไม่มีใน cache)
+
+        Returns:
+            view ที่ cache ไว้
+        """
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                self.hits += 1
+                return self._views[key]
+
+            self.misses += 1
+            value = factory()
+            size = self._sizeof(value)
+            if size <= self.max_cache_bytes:
+                self._views[key] = value
+                self._cache_bytes += size
+                self._evict()
+            return value
+
+    def _evict(self) -> None:
+        """ลบ view ที่ไม่ได้ใช้นานที่สุดจนขนาด cache ไม่เกินกำหนด"""
+        while self._cache_bytes > self.max_cache_bytes and self._views:
+            key, value = self._views.popitem(last=False)
+            self._cache_bytes -= self._sizeof(value)
+            logger.debug(f"Frame {self.frame_id}: evicted view {key}")
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, tuple):
+            return sum(Frame._sizeof(v) for v in value)
+        return 0
+
+    def release(self) -> None:
+        """ล้าง cache และปล่อยภาพต้นฉบับ (เรียกเมื่อเฟรมออกจาก pipeline)"""
+        with self._lock:
+            self._views.clear()
+            self._cache_bytes = 0
+            self._image = None
+            self._uv = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    # ------------------------------------------------------------------ #
+    # Derived views
+    # ------------------------------------------------------------------ #
+    @property
+    def gray(self) -> np.ndarray:
+        """ภาพ grayscale"""
+        return self.get("gray", self._make_gray)
+
+    def _make_gray(self) -> np.ndarray:
+        if self.is_yuv:
+            # Y plane คือภาพ grayscale อยู่แล้ว
+            if self._image is None:
+                raise InvalidImageFormatError("Frame has been released")
+            return self._image
+        image = self.image
+        if image.ndim == 2 or self.color == "GRAY":
+            return image
+        if image.shape[2] == 1:
+            return image[:, :, 0]
+        return cv2.cvtColor(image, _GRAY_CODES.get(self.color, cv2.COLOR_BGR2GRAY))
+
+    def pyramid(self, level: int = 1, gray: bool = False) -> np.ndarray:
+        """
+        ภาพย่อขนาดครึ่งหนึ่งต่อระดับ (level 1 = 1/2, level 2 = 1/4, ...)
+        แต่ละระดับสร้างจากระดับก่อนหน้าที่ cache ไว้
+
+        Args:
+            level: ระดับ pyramid (0 = ภาพต้นฉบับ)
+            gray: ใช้ pyramid ของภาพ grayscale หรือไม่
+
+        Returns:
+            ภาพที่ย่อแล้ว
+        """
+        if level <= 0:
+            return self.gray if gray else self.image
+
+        def make() -> np.ndarray:
+            if self.is_yuv and not gray:
+                # แปลงสีที่ขนาดของระดับนั้นโดยตรง ไม่ต้องแปลงภาพเต็มเฟรม
+                h, w = self.shape[:2]
+                return self._get_preprocessor().yuv_to_color(
+                    self._image, self._uv, (max(1, w >> level), max(1, h >> level)),
+                    full_range=self.full_range)
+            previous = self.pyramid(level - 1, gray)
+            h, w = previous.shape[:2]
+            return cv2.resize(previous, (max(1, w // 2), max(1, h // 2)), interpolation=cv2.INTER_AREA)
+
+        return self.get(("pyramid", level, gray), make)
+
+    def thumbnail(self, size: Tuple[int, int] = (128, 128), gray: bool = False) -> np.ndarray:
+        """
+        ภาพขนาดเล็ก (ไม่รักษา aspect ratio) สำหรับเปรียบเทียบความคล้าย
+
+        Args:
+            size: ขนาด (width, height)
+            gray: ใช้ภาพ grayscale หรือไม่
+
+        Returns:
+            ภาพ thumbnail
+        """
+        size = tuple(size)
+
+        def make() -> np.ndarray:
+            # ย่อจากระดับ pyramid ที่เล็กที่สุดที่ยังใหญ่กว่า size (ลดการอ่านข้อมูล)
+            level = 0
+            h, w = self.shape[:2]
+            while w // 2 >= size[0] and h // 2 >= size[1] and level < 4:
+                level += 1
+                w, h = w // 2, h // 2
+            source = self.pyramid(level, gray)
+            return cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+
+        return self.get(("thumbnail", size, gray), make)
+
+    def letterboxed(self,
+                    target_size: Tuple[int, int] = (640, 640),
+                    padding_color: Tuple[int, int, int] = (114, 114, 114)
+                    ) -> Tuple[np.ndarray, LetterboxTransform]:
+        """
+        ภาพที่ letterbox แล้ว (color space เดิม) พร้อม LetterboxTransform
+
+        Args:
+            target_size: ขนาดเป้าหมาย (width, height)
+            padding_color: สีสำหรับ padding
+
+        Returns:
+            (ภาพ, LetterboxTransform)
+        """
+        target_size = tuple(target_size)
+        preprocessor = self._get_preprocessor(target_size)
+
+        def make() -> Tuple[np.ndarray, LetterboxTransform]:
+            if self.is_yuv:
+                out = np.empty((target_size[1], target_size[0], 3), dtype=np.uint8)
+                return preprocessor.preprocess_yuv_into(
+                    self._image, self._uv, out=out, target_size=target_size, method="none",
+                    swap_rb=False, padding_color=padding_color, full_range=self.full_range,
+                    return_transform=True)
+            return preprocessor.resize_with_padding(
+                self.image, target_size, padding_color=padding_color, return_transform=True)
+
+        return self.get(("letterbox", target_size, tuple(padding_color)), make)
+
+    def fill_model_input(self, out: Optional[np.ndarray] = None, **kwargs):
+        """
+        เขียน model input ลงใน buffer ของผู้เรียก (ไม่ cache) ผ่าน preprocess_into
+        หรือ preprocess_yuv_into สำหรับเฟรม NV12 (ไม่ต้องแปลงสีเต็มเฟรม)
+
+        Args:
+            out: buffer ปลายทาง
+            **kwargs: argument ของ ImagePreprocessor.preprocess_into
+
+        Returns:
+            ผลลัพธ์ของ preprocess_into / preprocess_yuv_into
+        """
+        preprocessor = self._get_preprocessor(kwargs.get("target_size"))
+        if self.is_yuv:
+            if self._image is None:
+                raise InvalidImageFormatError("Frame has been released")
+            kwargs.setdefault("full_range", self.full_range)
+            return preprocessor.preprocess_yuv_into(self._image, self._uv, out=out, **kwargs)
+        return preprocessor.preprocess_into(self.image, out=out, **kwargs)
+
+    def _get_preprocessor(self, target_size: Optional[Tuple[int, int]] = None) -> ImagePreprocessor:
+        if self.preprocessor is None:
+            self.preprocessor = ImagePreprocessor(tuple(target_size) if target_size else (640, 640))
+        return self.preprocessor
+
+    def model_input(self, pipeline, key: Optional[Hashable] = None) -> np.ndarray:
+        """
+        model input จาก PreprocessPipeline (หรือ callable ที่รับภาพ)
+
+        Args:
+            pipeline: PreprocessPipeline หรือ callable(image) -> np.ndarray
+            key: key ของ cache (ค่าเริ่มต้นใช้ชื่อ pipeline)
+
+        Returns:
+            tensor สำหรับ model
+        """
+        key = key if key is not None else getattr(pipeline, "name", id(pipeline))
+        return self.get(("model_input", key), lambda: pipeline(self.image))
+
+    def jpeg(self, quality: int = 80) -> bytes:
+        """
+        ภาพเข้ารหัส JPEG สำหรับ MJPEG stream / บันทึกไฟล์
+
+        Args:
+            quality: คุณภาพ JPEG (0-100)
+
+        Returns:
+            bytes ของไฟล์ JPEG
+        """
+        def make() -> bytes:
+            ok, encoded = cv2.imencode(".jpg", self.image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+            if not ok:
+                raise InvalidImageFormatError("JPEG encoding failed")
+            return encoded.tobytes()
+
+        return self.get(("jpeg", int(quality)), make)
+
+    def histogram(self,
+                  channel: Optional[int] = None,
+                  size: Optional[Tuple[int, int]] = None,
+                  bins: int = 256,
+                  normalize: bool = False) -> np.ndarray:
+        """
+        histogram ของภาพ (แบบเดียวกับ compare_images)
+
+        Args:
+            channel: channel ที่ใช้ (None = ภาพ grayscale)
+            size: คำนวณจาก thumbnail ขนาดนี้ (None = ภาพเต็ม)
+            bins: จำนวน bins
+            normalize: normalize ด้วย cv2.normalize (L2) หรือไม่
+
+        Returns:
+            histogram แบบ flatten (float32)
+        """
+        def make() -> np.ndarray:
+            if size is not None:
+                source = self.thumbnail(size, gray=channel is None)
+            else:
+                source = self.gray if channel is None else self.image
+            hist = cv2.calcHist([source], [0 if channel is None else channel], None, [bins], [0, 256])
+            if normalize:
+                hist = cv2.normalize(hist, hist)
+            return hist.flatten()
+
+        key = ("histogram", channel, None if size is None else tuple(size), bins, normalize)
+        return self.get(key, make)
+
+    def get_cache_info(self) -> dict:
+        """
+        ดึงสถิติของ cache
+
+        Returns:
+            Dictionary ของสถิติ
+        """
+        with self._lock:
+            return {
+                "frame_id": self.frame_id,
+                "views": [str(k) for k in self._views],
+                "cache_bytes": self._cache_bytes,
+                "max_cache_bytes": self.max_cache_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __repr__(self) -> str:
+        shape = None if self._image is None else self.shape
+        return f"Frame(id={self.frame_id}, shape={shape}, color={self.color}, views={len(self._views)})"
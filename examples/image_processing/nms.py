@@ -0,0 +1,413 @@
+"""
+PWD Vision Works - Non-Maximum Suppression
+ฟังก์ชัน NMS แบบ vectorized (NumPy) ใช้ร่วมกันระหว่าง postprocessor ต่าง ๆ
+และการรวมผลตรวจจับจากหลาย tile
+
+- nms: greedy NMS หรือ matrix NMS (IoU ทั้ง block ครั้งเดียว) สำหรับ candidate จำนวนน้อย
+- batched_nms: NMS แยกตาม class/กลุ่มในครั้งเดียว (coordinate offset หรือ greedy ทุกกลุ่มพร้อมกัน)
+- multiclass_nms: NMS จาก score matrix (N, C) แบบทุกคู่ (box, class) ที่ผ่าน threshold
+- batch_nms: NMS ของหลายภาพพร้อมกันพร้อมจำกัดจำนวนต่อภาพ
+
+box ที่ score เท่ากันเรียงจาก index มากไปน้อย (ทิศเดียวกับ scores.argsort()[::-1] ของ loop เดิม
+แต่ใช้ stable sort: quicksort ของ NumPy ไม่ stable เมื่อ N > 16 ลำดับของ loop เดิมจึงขึ้นกับ
+implementation ของ sort) และ strict=True ตัด box ที่ overlap เท่ากับ threshold พอดีแบบ iou < thr
+
+postprocessor ของ DeGirum PySDK (examples/postprocessors) ถูก deploy เป็นไฟล์เดี่ยว จึงมี greedy NMS
+แบบเดียวกันอยู่ในไฟล์ของตัวเอง (tests/test_nms.py ตรวจว่าผลตรงกับโมดูลนี้)
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def box_area(boxes: np.ndarray) -> np.ndarray:
+    """
+    พื้นที่ของ boxes แบบ (x1, y1, x2, y2)
+
+    Args:
+        boxes: array ขนาด (N, 4)
+
+    Returns:
+        array ขนาด (N,)
+    """
+    return np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray, metric: str = "iou") -> np.ndarray:
+    """
+    ค่า overlap ระหว่าง boxes ทุกคู่
+
+    Args:
+        boxes_a: array ขนาด (N, 4) แบบ (x1, y1, x2, y2)
+        boxes_b: array ขนาด (M, 4)
+        metric: "iou" (intersection / union) หรือ
+                "ios" (intersection / พื้นที่ของ box ที่เล็กกว่า เหมาะกับ box ที่ถูกตัดที่ขอบ tile)
+
+    Returns:
+        array ขนาด (N, M)
+    """
+    lt = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    rb = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+
+    area_a = box_area(boxes_a)[:, None]
+    area_b = box_area(boxes_b)[None, :]
+    if metric == "iou":
+        denom = area_a + area_b - inter
+    elif metric == "ios":
+        denom = np.minimum(area_a, area_b)
+    else:
+        raise ValueError(f"Unknown overlap metric: {metric}")
+    return inter / np.maximum(denom, 1e-9)
+
+
+# จำนวน candidate สูงสุดที่ method="auto" จะใช้ matrix NMS (IoU matrix ขนาด N x N)
+# วัดด้วย nms_benchmark.py: matrix เร็วกว่า greedy 4-10 เท่าเมื่อ box ส่วนใหญ่ถูกเก็บ
+# แต่เกินจากนี้ greedy เร็วกว่าเมื่อ box กระจุกกันมาก (greedy ตัดทิ้งได้เร็ว)
+MATRIX_NMS_MAX_BOXES = 256
+# batched_nms: greedy ทุกกลุ่มพร้อมกันเร็วกว่า offset + matrix ตั้งแต่ขนาดนี้ขึ้นไป
+BATCHED_MATRIX_NMS_MAX_BOXES = 128
+
+NMS_METHODS = ("auto", "greedy", "matrix")
+
+
+def _as_boxes(boxes: np.ndarray) -> np.ndarray:
+    """แปลง boxes เป็น float (คง float64 ไว้สำหรับพิกัดที่ถูกเลื่อนด้วย offset ขนาดใหญ่)"""
+    boxes = np.asarray(boxes)
+    if boxes.dtype not in (np.float32, np.float64):
+        boxes = boxes.astype(np.float32)
+    return boxes
+
+
+def _descending(scores: np.ndarray) -> np.ndarray:
+    """เรียง index ตาม score จากมากไปน้อย (score เท่ากัน: index มากก่อน)"""
+    return np.argsort(scores, kind="stable")[::-1]
+
+
+def _survivors(overlap: np.ndarray, iou_threshold: float, strict: bool) -> np.ndarray:
+    """mask ของ box ที่ไม่ถูกตัด (overlap <= threshold หรือ < threshold เมื่อ strict)"""
+    return overlap < iou_threshold if strict else overlap <= iou_threshold
+
+
+def _columns(boxes: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """แยก x1, y1, x2, y2 เป็น array ต่อเนื่อง (gather จาก column ของ (N, 4) ช้ากว่า)"""
+    return tuple(np.ascontiguousarray(boxes[:, k]) for k in range(4))
+
+
+def _overlap(x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray, areas: np.ndarray,
+             i, rest: np.ndarray, metric: str) -> np.ndarray:
+    """overlap ระหว่าง box i (index เดียวหรือ array คู่กับ rest) กับ boxes ใน rest"""
+    w = np.minimum(x2[i], x2[rest])
+    w -= np.maximum(x1[i], x1[rest])
+    h = np.minimum(y2[i], y2[rest])
+    h -= np.maximum(y1[i], y1[rest])
+    np.maximum(w, 0, out=w)
+    np.maximum(h, 0, out=h)
+    inter = w * h
+    if metric == "iou":
+        denom = areas[i] + areas[rest] - inter
+    else:
+        denom = np.minimum(areas[i], areas[rest])
+    return inter / np.maximum(denom, 1e-9)
+
+
+def _greedy_nms(boxes: np.ndarray,
+                order: np.ndarray,
+                iou_threshold: float,
+                max_detections: Optional[int],
+                metric: str,
+                strict: bool) -> np.ndarray:
+    """Greedy NMS: overlap ของ box ที่เลือกกับที่เหลือทั้งหมดในแต่ละรอบ"""
+    x1, y1, x2, y2 = _columns(boxes[order])
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    alive = np.arange(len(order))
+    keep = []
+
+    while alive.size > 0:
+        i = alive[0]
+        keep.append(i)
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+        rest = alive[1:]
+        alive = rest[_survivors(_overlap(x1, y1, x2, y2, areas, i, rest, metric), iou_threshold, strict)]
+
+    return order[np.asarray(keep, dtype=np.int64)]
+
+
+def _matrix_nms(boxes: np.ndarray,
+                order: np.ndarray,
+                iou_threshold: float,
+                max_detections: Optional[int],
+                metric: str,
+                strict: bool) -> np.ndarray:
+    """
+    NMS จาก IoU matrix ที่คำนวณครั้งเดียว ผลเหมือน greedy ทุกประการ
+    (แต่ละรอบเหลือแค่การ AND mask หนึ่งแถว จำนวนรอบเท่ากับจำนวน box ที่เก็บ)
+    """
+    x1, y1, x2, y2 = _columns(boxes[order])
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    w = np.minimum.outer(x2, x2)
+    w -= np.maximum.outer(x1, x1)
+    h = np.minimum.outer(y2, y2)
+    h -= np.maximum.outer(y1, y1)
+    np.maximum(w, 0, out=w)
+    np.maximum(h, 0, out=h)
+    inter = np.multiply(w, h, out=w)
+    if metric == "iou":
+        denom = np.add.outer(areas, areas, out=h)
+        denom -= inter
+    else:
+        denom = np.minimum.outer(areas, areas, out=h)
+    np.maximum(denom, 1e-9, out=denom)
+    # หารแบบเดียวกับ _overlap เพื่อให้ค่าที่เท่ากับ threshold พอดีถูกตัดสินเหมือน greedy
+    overlap = np.divide(inter, denom, out=inter)
+    suppress = ~_survivors(overlap, iou_threshold, strict)
+
+    alive = np.ones(len(order), dtype=bool)
+    keep = []
+    while True:
+        i = int(alive.argmax())
+        if not alive[i]:
+            break
+        keep.append(i)
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+        alive &= ~suppress[i]
+        alive[i] = False
+
+    return order[np.asarray(keep, dtype=np.int64)]
+
+
+def nms(boxes: np.ndarray,
+        scores: np.ndarray,
+        iou_threshold: float = 0.45,
+        max_detections: Optional[int] = None,
+        metric: str = "iou",
+        method: str = "auto",
+        strict: bool = False) -> np.ndarray:
+    """
+    NMS แบบ greedy หรือ matrix (ผลลัพธ์เหมือนกัน)
+
+    Args:
+        boxes: array ขนาด (N, 4) แบบ (x1, y1, x2, y2)
+        scores: array ขนาด (N,)
+        iou_threshold: ค่า overlap ที่ถือว่าซ้ำกัน (เก็บ box ที่ overlap <= ค่านี้)
+        max_detections: จำนวน box สูงสุดที่เก็บไว้ (None = ไม่จำกัด)
+        metric: "iou" หรือ "ios" (ดู box_iou)
+        method: "greedy", "matrix" หรือ "auto" (matrix เมื่อ N <= MATRIX_NMS_MAX_BOXES)
+        strict: True = เก็บเฉพาะ box ที่ overlap < iou_threshold
+
+    Returns:
+        index ของ boxes ที่เก็บไว้ เรียงตาม score จากมากไปน้อย (score เท่ากัน: index มากก่อน)
+
+    Raises:
+        ValueError: method หรือ metric ไม่ถูกต้อง
+    """
+    if method not in NMS_METHODS:
+        raise ValueError(f"Unknown NMS method: {method} (expected one of {NMS_METHODS})")
+    if metric not in ("iou", "ios"):
+        raise ValueError(f"Unknown overlap metric: {metric}")
+    if len(boxes) == 0 or max_detections == 0:
+        return np.empty(0, dtype=np.int64)
+
+    boxes = _as_boxes(boxes)
+    order = _descending(np.asarray(scores))
+    if method == "auto":
+        method = "matrix" if len(order) <= MATRIX_NMS_MAX_BOXES else "greedy"
+    if method == "matrix":
+        return _matrix_nms(boxes, order, iou_threshold, max_detections, metric, strict)
+    return _greedy_nms(boxes, order, iou_threshold, max_detections, metric, strict)
+
+
+def _grouped_greedy_nms(boxes: np.ndarray,
+                        scores: np.ndarray,
+                        groups: np.ndarray,
+                        iou_threshold: float,
+                        metric: str,
+                        strict: bool) -> np.ndarray:
+    """
+    Greedy NMS ของทุกกลุ่มไปพร้อมกัน: แต่ละรอบเลือก box score สูงสุดของทุกกลุ่ม
+    แล้วตัด box ในกลุ่มเดียวกันที่ซ้อนกับมัน (จำนวนรอบ = จำนวนที่เก็บของกลุ่มที่มากที่สุด
+    และแต่ละรอบเทียบเฉพาะ box ในกลุ่มเดียวกัน ผลเหมือน greedy แยกทีละกลุ่มทุกประการ)
+    """
+    # กลุ่มเรียงจากมากไปน้อย ภายในกลุ่มเรียงตาม score แล้ว index จากมากไปน้อย
+    order = np.lexsort((scores, groups))[::-1]
+    x1, y1, x2, y2 = _columns(boxes[order])
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    groups = groups[order]
+    alive = np.arange(len(order))
+    keep = []
+
+    while alive.size > 0:
+        alive_groups = groups[alive]
+        is_head = np.empty(alive.size, dtype=bool)
+        is_head[0] = True
+        np.not_equal(alive_groups[1:], alive_groups[:-1], out=is_head[1:])
+        heads = alive[is_head]
+        keep.append(heads)
+
+        rest = alive[~is_head]
+        if rest.size == 0:
+            break
+        head = heads[np.cumsum(is_head)[~is_head] - 1]
+        alive = rest[_survivors(_overlap(x1, y1, x2, y2, areas, head, rest, metric), iou_threshold, strict)]
+
+    keep = np.sort(order[np.concatenate(keep)])
+    return keep[_descending(scores[keep])]
+
+
+def batched_nms(boxes: np.ndarray,
+                scores: np.ndarray,
+                class_ids: np.ndarray,
+                iou_threshold: float = 0.45,
+                max_detections: Optional[int] = None,
+                metric: str = "iou",
+                method: str = "auto",
+                strict: bool = False) -> np.ndarray:
+    """
+    NMS แยกตาม class ในการเรียกครั้งเดียว (boxes ต่าง class ไม่ตัดกันเอง)
+
+    candidate จำนวนน้อยใช้ coordinate offset (เลื่อน boxes ของแต่ละ class ไปคนละตำแหน่ง)
+    แล้วทำ matrix NMS ครั้งเดียว ส่วน candidate จำนวนมากใช้ greedy ที่ทำทุก class
+    ไปพร้อมกัน เพราะ greedy ผ่านเดียวบน boxes ที่เลื่อนแล้วต้องเทียบกับ candidate
+    ของทุก class ในทุกรอบ (ช้ากว่าวนทีละ class หลายสิบเท่าเมื่อมีหลาย class)
+
+    Args:
+        boxes: array ขนาด (N, 4) แบบ (x1, y1, x2, y2)
+        scores: array ขนาด (N,)
+        class_ids: array ขนาด (N,) ของ class id (หรือ group id ใด ๆ ที่ไม่ติดลบ)
+        iou_threshold: ค่า overlap ที่ถือว่าซ้ำกัน
+        max_detections: จำนวน box สูงสุดที่เก็บไว้รวมทุก class (None = ไม่จำกัด)
+        metric: "iou" หรือ "ios" (ดู box_iou)
+        method: "greedy", "matrix" หรือ "auto" (matrix เมื่อ N <= BATCHED_MATRIX_NMS_MAX_BOXES)
+        strict: True = เก็บเฉพาะ box ที่ overlap < iou_threshold
+
+    Returns:
+        index ของ boxes ที่เก็บไว้ เรียงตาม score จากมากไปน้อย (score เท่ากัน: index มากก่อน)
+
+    Raises:
+        ValueError: method หรือ metric ไม่ถูกต้อง
+    """
+    if method not in NMS_METHODS:
+        raise ValueError(f"Unknown NMS method: {method} (expected one of {NMS_METHODS})")
+    if metric not in ("iou", "ios"):
+        raise ValueError(f"Unknown overlap metric: {metric}")
+    if len(boxes) == 0 or max_detections == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if method == "auto":
+        method = "matrix" if len(boxes) <= BATCHED_MATRIX_NMS_MAX_BOXES else "greedy"
+    if method == "greedy":
+        keep = _grouped_greedy_nms(_as_boxes(boxes), np.asarray(scores),
+                                   np.asarray(class_ids, dtype=np.int64), iou_threshold, metric, strict)
+        return keep if max_detections is None else keep[:max_detections]
+
+    # float64: offset * จำนวนกลุ่มอาจสูงถึงหลักแสน ซึ่ง float32 เหลือความละเอียดไม่ถึง 1 pixel
+    boxes = np.asarray(boxes, dtype=np.float64)
+    offset = float(boxes.max() - min(boxes.min(), 0.0)) + 1.0
+    shifted = boxes + (np.asarray(class_ids, dtype=np.float64) * offset)[:, None]
+    return nms(shifted, scores, iou_threshold, max_detections, metric, "matrix", strict)
+
+
+def limit_per_group(keep: np.ndarray, groups: np.ndarray, max_per_group: Optional[int]) -> np.ndarray:
+    """
+    จำกัดจำนวน index ต่อกลุ่ม (เช่นต่อภาพ) และเรียงผลตามกลุ่ม
+
+    Args:
+        keep: index ที่เรียงตาม score จากมากไปน้อยแล้ว (ผลจาก nms)
+        groups: group id ของแต่ละ index ใน keep (ขนาดเท่ากับ keep)
+        max_per_group: จำนวนสูงสุดต่อกลุ่ม (None = ไม่จำกัด)
+
+    Returns:
+        index เรียงตามกลุ่ม และภายในกลุ่มเรียงตาม score จากมากไปน้อย
+    """
+    order = np.argsort(groups, kind="stable")
+    keep, groups = keep[order], np.asarray(groups)[order]
+    if max_per_group is None:
+        return keep
+    first = np.searchsorted(groups, groups, side="left")
+    return keep[np.arange(len(keep)) - first < max_per_group]
+
+
+def batch_nms(boxes: np.ndarray,
+              scores: np.ndarray,
+              image_ids: np.ndarray,
+              class_ids: Optional[np.ndarray] = None,
+              iou_threshold: float = 0.45,
+              max_per_image: Optional[int] = None,
+              metric: str = "iou",
+              method: str = "auto",
+              strict: bool = False) -> np.ndarray:
+    """
+    NMS ของ candidate จากหลายภาพในการเรียกครั้งเดียว (กลุ่ม = ภาพ หรือ (ภาพ, class))
+
+    Args:
+        boxes: array ขนาด (N, 4) ของทุกภาพรวมกัน
+        scores: array ขนาด (N,)
+        image_ids: array ขนาด (N,) ลำดับภาพใน batch ของแต่ละ box
+        class_ids: array ขนาด (N,) ของ class id (None = ไม่แยก class)
+        iou_threshold: ค่า overlap ที่ถือว่าซ้ำกัน
+        max_per_image: จำนวน box สูงสุดต่อภาพ (None = ไม่จำกัด)
+        metric: "iou" หรือ "ios" (ดู box_iou)
+        method: "greedy", "matrix" หรือ "auto" (ดู nms)
+        strict: True = เก็บเฉพาะ box ที่ overlap < iou_threshold
+
+    Returns:
+        index ของ boxes ที่เก็บไว้ เรียงตามภาพ และภายในภาพเรียงตาม score จากมากไปน้อย
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    image_ids = np.asarray(image_ids, dtype=np.int64)
+    groups = image_ids
+    if class_ids is not None:
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        groups = image_ids * (int(class_ids.max()) + 1) + class_ids
+    keep = batched_nms(boxes, scores, groups, iou_threshold, None, metric, method, strict)
+    return limit_per_group(keep, image_ids[keep], max_per_image)
+
+
+def multiclass_nms(boxes: np.ndarray,
+                   class_scores: np.ndarray,
+                   score_threshold: float = 0.25,
+                   iou_threshold: float = 0.45,
+                   max_detections: Optional[int] = None,
+                   class_agnostic: bool = False,
+                   metric: str = "iou",
+                   method: str = "auto",
+                   strict: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    NMS จาก score matrix ของทุก class ในครั้งเดียว (แทนการวน NMS ทีละ class)
+    box หนึ่งอาจได้ผลมากกว่าหนึ่ง class ถ้า score หลาย class ผ่าน threshold
+
+    Args:
+        boxes: array ขนาด (N, 4) แบบ (x1, y1, x2, y2)
+        class_scores: array ขนาด (N, C)
+        score_threshold: score ขั้นต่ำ (เก็บเฉพาะที่ > ค่านี้)
+        iou_threshold: ค่า overlap ที่ถือว่าซ้ำกัน
+        max_detections: จำนวนผลสูงสุด (None = ไม่จำกัด)
+        class_agnostic: True = ทำ NMS ข้าม class
+        metric: "iou" หรือ "ios" (ดู box_iou)
+        method: "greedy", "matrix" หรือ "auto" (ดู nms)
+        strict: True = เก็บเฉพาะ box ที่ overlap < iou_threshold
+
+    Returns:
+        (box_indices, scores, class_ids) เรียงตาม score จากมากไปน้อย
+        โดย box_indices อ้างอิงแถวของ boxes
+    """
+    box_ids, class_ids = np.nonzero(np.asarray(class_scores) > score_threshold)
+    scores = class_scores[box_ids, class_ids]
+    if box_ids.size == 0:
+        return box_ids.astype(np.int64), scores, class_ids.astype(np.int64)
+
+    if class_agnostic:
+        keep = nms(boxes[box_ids], scores, iou_threshold, max_detections, metric, method, strict)
+    else:
+        keep = batched_nms(boxes[box_ids], scores, class_ids, iou_threshold,
+                           max_detections, metric, method, strict)
+    return box_ids[keep].astype(np.int64), scores[keep], class_ids[keep].astype(np.int64)
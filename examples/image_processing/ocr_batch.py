@@ -0,0 +1,230 @@
+"""
+PWD Vision Works - Batched OCR Preprocessing
+เตรียมภาพป้ายทะเบียนทั้งหมดของเฟรมสำหรับ OCR แบบ batch โดยจัดกลุ่ม crop
+ตาม aspect ratio / ขนาด แล้วสร้าง batch ที่ padding แล้วหนึ่งชุดต่อกลุ่ม
+พร้อม index ของ crop เพื่อกระจายผล OCR กลับไปยัง crop เดิม
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import math
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .preprocessor import ImagePreprocessor, LetterboxTransform
+from ..utils.exceptions import PreprocessingError
+
+logger = logging.getLogger(__name__)
+
+# ขนาด input (width, height) ของแต่ละกลุ่ม: ป้ายบรรทัดเดียว, ป้ายสองบรรทัด (ป้ายไทย), ป้ายจัตุรัส
+DEFAULT_OCR_BUCKETS = ((192, 48), (160, 80), (96, 96))
+
+
+class OCRBatch:
+    """
+    batch ของ crop ที่อยู่ในกลุ่มเดียวกัน
+
+    Attributes:
+        size: ขนาด input ของกลุ่ม (width, height)
+        images: array (N, H, W, C) uint8
+        indices: index ของ crop ต้นฉบับของแต่ละ slot
+        transforms: LetterboxTransform ของแต่ละ slot (พิกัด crop <-> batch)
+    """
+
+    def __init__(self,
+                 size: Tuple[int, int],
+                 images: np.ndarray,
+                 indices: List[int],
+                 transforms: List[LetterboxTransform]):
+        self.size = size
+        self.images = images
+        self.indices = indices
+        self.transforms = transforms
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __repr__(self) -> str:
+        return f"OCRBatch(size={self.size}, crops={self.indices})"
+
+
+class OCRPreprocessor:
+    """
+    เตรียม crop ป้ายทะเบียนสำหรับ OCR (grayscale -> equalizeHist -> adaptive threshold)
+    และจัดเป็น batch ตามกลุ่มขนาด
+    """
+
+    def __init__(self,
+                 buckets: Sequence[Tuple[int, int]] = DEFAULT_OCR_BUCKETS,
+                 channels: int = 3,
+                 block_size: int = 31,
+                 threshold_c: int = 15,
+                 oversample: float = 2.0,
+                 size_weight: float = 0.25,
+                 padding_value: int = 255,
+                 preprocessor: Optional[ImagePreprocessor] = None):
+        """
+        เริ่มต้น OCRPreprocessor
+
+        Args:
+            buckets: ขนาด OCR input (width, height) ของแต่ละกลุ่ม
+            channels: จำนวน channels ของ output (3 = เหมือน preprocess_for_ocr เดิม)
+            block_size: block size ของ adaptive threshold ที่ความละเอียดของ crop ต้นฉบับ
+            threshold_c: ค่า C ของ adaptive threshold
+            oversample: crop ที่สูงกว่า oversample เท่าของ OCR input จะถูกย่อก่อน threshold
+            size_weight: น้ำหนักของความต่างของขนาดเทียบกับ aspect ratio ในการเลือกกลุ่ม
+            padding_value: ค่าสำหรับ padding (255 = พื้นขาวเหมือนพื้นป้ายหลัง threshold)
+            preprocessor: ImagePreprocessor ที่ใช้ร่วมกัน (cache geometry)
+        """
+        if not buckets:
+            raise ValueError("At least one OCR bucket size is required")
+        self.buckets = [tuple(b) for b in buckets]
+        self.channels = channels
+        self.block_size = block_size
+        self.threshold_c = threshold_c
+        self.oversample = oversample
+        self.size_weight = size_weight
+        self.padding_value = padding_value
+        self.preprocessor = preprocessor or ImagePreprocessor(self.buckets[0])
+        self._buffers = {}
+
+    def select_bucket(self, crop_shape: Tuple[int, ...]) -> int:
+        """
+        เลือกกลุ่มที่ aspect ratio และขนาดใกล้เคียง crop มากที่สุด
+
+        Args:
+            crop_shape: ขนาดของ crop (height, width, ...)
+
+        Returns:
+            index ของกลุ่มใน buckets
+        """
+        height, width = crop_shape[:2]
+        log_aspect = math.log(max(width, 1) / max(height, 1))
+        log_height = math.log(max(height, 1))
+        costs = [abs(log_aspect - math.log(bw / bh)) + self.size_weight * abs(log_height - math.log(bh))
+                 for bw, bh in self.buckets]
+        return int(np.argmin(costs))
+
+    def preprocess_crop(self, crop: np.ndarray, target_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        แปลง crop เป็นภาพ binary สำหรับ OCR (เหมือน preprocess_for_ocr เดิมแต่คืน grayscale)
+
+        หาก crop สูงกว่า oversample เท่าของ target จะย่อก่อนทำ threshold
+        และปรับ block size ตามสัดส่วนเพื่อให้ผลลัพธ์ใกล้เคียงกัน
+
+        Args:
+            crop: ภาพป้ายทะเบียน (BGR หรือ grayscale)
+            target_size: ขนาด OCR input (width, height); None = ไม่ย่อ
+
+        Returns:
+            ภาพ binary (H, W) uint8
+        """
+        gray = crop if crop.ndim == 2 else cv2.cvtColor(
+            crop, cv2.COLOR_BGRA2GRAY if crop.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+        block_size = self.block_size
+        if target_size is not None:
+            factor = gray.shape[0] / (target_size[1] * self.oversample)
+            if factor > 1:
+                new_size = (max(1, round(gray.shape[1] / factor)), max(1, round(gray.shape[0] / factor)))
+                gray = cv2.resize(gray, new_size, interpolation=cv2.INTER_AREA)
+                block_size = max(3, int(round(block_size / factor)) | 1)
+
+        gray = cv2.equalizeHist(gray)
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, block_size, self.threshold_c)
+
+    def prepare_batches(self, crops: Sequence[Optional[np.ndarray]]) -> List[OCRBatch]:
+        """
+        เตรียม crop ทั้งหมดของเฟรมเป็น batch แยกตามกลุ่ม
+
+        crop ที่เป็น None หรือว่างจะถูกข้าม (ไม่มีใน indices ของ batch ใด)
+        buffer ของแต่ละกลุ่มถูกใช้ซ้ำระหว่างเฟรม จึงต้องใช้ผลก่อนเรียกครั้งถัดไป
+
+        Args:
+            crops: รายการ crop ป้ายทะเบียน
+
+        Returns:
+            รายการ OCRBatch (หนึ่งชุดต่อกลุ่มที่มี crop)
+
+        Raises:
+            PreprocessingError: หากเตรียม batch ไม่สำเร็จ
+        """
+        try:
+            groups: Dict[int, List[int]] = {}
+            for index, crop in enumerate(crops):
+                if crop is None or not isinstance(crop, np.ndarray) or crop.size == 0:
+                    continue
+                groups.setdefault(self.select_bucket(crop.shape), []).append(index)
+
+            batches = []
+            for bucket, indices in sorted(groups.items()):
+                size = self.buckets[bucket]
+                images = self._get_buffer(size, len(indices))
+                transforms = [self._fill_slot(crops[i], images[slot], size)
+                              for slot, i in enumerate(indices)]
+                batches.append(OCRBatch(size, images, indices, transforms))
+
+            logger.debug(f"OCR batches: {[(b.size, len(b)) for b in batches]}")
+            return batches
+
+        except Exception as e:
+            logger.error(f"OCR batch preprocessing failed: {e}")
+            raise PreprocessingError(f"Failed to prepare OCR batches: {e}") from e
+
+    def _get_buffer(self, size: Tuple[int, int], count: int) -> np.ndarray:
+        """buffer ของกลุ่ม (ขยายเมื่อจำนวน crop มากกว่าที่เคยมี)"""
+        buffer = self._buffers.get(size)
+        if buffer is None or buffer.shape[0] < count:
+            buffer = np.empty((count, size[1], size[0], self.channels), dtype=np.uint8)
+            self._buffers[size] = buffer
+        return buffer[:count]
+
+    def _fill_slot(self, crop: np.ndarray, slot: np.ndarray, size: Tuple[int, int]) -> LetterboxTransform:
+        """threshold crop แล้ว letterbox ลง slot ของ batch"""
+        binary = self.preprocess_crop(crop, size)
+        transform = self.preprocessor.get_letterbox_transform(binary.shape, size)
+        # transform ของ crop ต้นฉบับ (ภาพ binary อาจถูกย่อก่อน แต่ geometry บน slot เหมือนกัน)
+        crop_transform = self.preprocessor.get_letterbox_transform(crop.shape, size)
+
+        slot[:] = self.padding_value
+        roi = slot[transform.pad_y:transform.pad_y + transform.new_height,
+                   transform.pad_x:transform.pad_x + transform.new_width]
+        interpolation = cv2.INTER_AREA if transform.scale_x < 1 else cv2.INTER_LINEAR
+        if self.channels == 1:
+            cv2.resize(binary, (transform.new_width, transform.new_height), dst=roi[:, :, 0],
+                       interpolation=interpolation)
+        else:
+            resized = cv2.resize(binary, (transform.new_width, transform.new_height),
+                                 interpolation=interpolation)
+            cv2.cvtColor(resized, cv2.COLOR_GRAY2BGR, dst=roi)
+        return crop_transform
+
+    @staticmethod
+    def scatter(batches: Sequence[OCRBatch],
+                batch_results: Sequence[Sequence[Any]],
+                num_crops: int,
+                default: Any = None) -> List[Any]:
+        """
+        กระจายผล OCR ของแต่ละ batch กลับไปตามลำดับของ crop เดิม
+
+        Args:
+            batches: OCRBatch จาก prepare_batches
+            batch_results: ผลของแต่ละ batch (หนึ่งรายการต่อ slot)
+            num_crops: จำนวน crop ที่ส่งเข้า prepare_batches
+            default: ค่าสำหรับ crop ที่ถูกข้าม
+
+        Returns:
+            ผล OCR เรียงตาม crop เดิม
+        """
+        results = [default] * num_crops
+        for batch, outputs in zip(batches, batch_results):
+            if len(outputs) != len(batch):
+                raise ValueError(f"Batch {batch.size} has {len(batch)} crops, got {len(outputs)} results")
+            for index, output in zip(batch.indices, outputs):
+                results[index] = output
+        return results
@@ -0,0 +1,656 @@
+"""
+PWD Vision Works - Preprocessing Pipeline
+สร้าง preprocessing chain จาก spec (YAML/dict) แล้ว compile ครั้งเดียว
+เป็นลำดับขั้นตอนที่ fuse แล้ว สำหรับใช้ซ้ำทุกเฟรม
+
+ตัวอย่าง spec (YAML):
+
+    name: plate_detector
+    input_color: BGR
+    keep_alpha: false        # true = ภาพ 4 channels ได้ output 4 channels
+    steps:
+      - op: resize_with_padding
+        target_size: [640, 640]
+        padding_color: [114, 114, 114]
+      - op: convert_color_space
+        target: RGB
+      - op: normalize
+        method: zero_one
+      - op: layout
+        layout: NHWC
+        batch: true
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import time
+import copy
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .preprocessor import ImagePreprocessor, LetterboxTransform
+from ..utils.exceptions import PreprocessingError, InvalidConfigError
+
+logger = logging.getLogger(__name__)
+
+
+# Preset ของ model แต่ละประเภท (เดิมเป็น branch ใน ImagePreprocessor.preprocess_for_model)
+# target_size ที่ไม่ระบุจะใช้ target_size ของ ImagePreprocessor
+# keep_alpha: ภาพ 4 channels (เช่น XRGB8888 จาก picamera2) ได้ output 4 channels เหมือน branch เดิม
+# ของ ssd/resnet/efficientnet (ค่าเริ่มต้นตัด alpha ทิ้งเหลือ 3 channels)
+PIPELINE_PRESETS: Dict[str, Dict[str, Any]] = {
+    "yolo": {
+        "steps": [
+            {"op": "resize_with_padding"},
+            {"op": "normalize", "method": "zero_one"},
+            {"op": "convert_color_space", "target": "RGB"},
+            {"op": "layout", "layout": "NHWC", "batch": True},
+        ],
+    },
+    "ssd": {
+        "keep_alpha": True,
+        "steps": [
+            {"op": "resize_with_padding", "maintain_aspect_ratio": False},
+            {"op": "normalize", "method": "zero_one"},
+            {"op": "layout", "layout": "NHWC", "batch": True},
+        ],
+    },
+    "resnet": {
+        "keep_alpha": True,
+        "steps": [
+            {"op": "resize_with_padding", "maintain_aspect_ratio": False},
+            {"op": "convert_color_space", "target": "RGB"},
+            {"op": "normalize", "method": "imagenet"},
+            {"op": "layout", "layout": "NHWC", "batch": True},
+        ],
+    },
+    "efficientnet": {
+        "keep_alpha": True,
+        "steps": [
+            {"op": "resize_with_padding", "maintain_aspect_ratio": False},
+            {"op": "convert_color_space", "target": "RGB"},
+            {"op": "normalize", "method": "imagenet"},
+            {"op": "layout", "layout": "NHWC", "batch": True},
+        ],
+    },
+    "default": {
+        "steps": [
+            {"op": "resize_with_padding"},
+            {"op": "normalize", "method": "zero_one"},
+            {"op": "layout", "layout": "NHWC", "batch": True},
+        ],
+    },
+}
+
+SUPPORTED_OPS = (
+    "resize_with_padding",
+    "convert_color_space",
+    "enhance_contrast",
+    "apply_gaussian_blur",
+    "apply_noise_reduction",
+    "normalize",
+    "layout",
+)
+
+# การแปลงสีที่เป็นแค่การสลับ channel (เลื่อนไปทำทีหลังได้โดยไม่เปลี่ยนผลลัพธ์)
+_CHANNEL_SWAPS = {("BGR", "RGB"), ("RGB", "BGR")}
+
+_COLOR_CODES = {
+    ("BGR", "RGB"): cv2.COLOR_BGR2RGB,
+    ("RGB", "BGR"): cv2.COLOR_RGB2BGR,
+    ("BGR", "GRAY"): cv2.COLOR_BGR2GRAY,
+    ("RGB", "GRAY"): cv2.COLOR_RGB2GRAY,
+    ("GRAY", "BGR"): cv2.COLOR_GRAY2BGR,
+    ("GRAY", "RGB"): cv2.COLOR_GRAY2RGB,
+    ("BGR", "HSV"): cv2.COLOR_BGR2HSV,
+    ("RGB", "HSV"): cv2.COLOR_RGB2HSV,
+    ("HSV", "BGR"): cv2.COLOR_HSV2BGR,
+    ("HSV", "RGB"): cv2.COLOR_HSV2RGB,
+}
+
+
+def register_preset(name: str, spec: Dict[str, Any]) -> None:
+    """
+    เพิ่ม/แทนที่ preset ของ pipeline
+
+    Args:
+        name: ชื่อ preset (เช่น ชื่อ model_type)
+        spec: pipeline spec
+    """
+    if "steps" not in spec:
+        raise InvalidConfigError(f"Preset '{name}' has no steps")
+    PIPELINE_PRESETS[name.lower()] = copy.deepcopy(spec)
+    logger.info(f"Preprocessing preset registered: {name}")
+
+
+class _CompiledStep:
+    """ขั้นตอนที่ compile แล้ว พร้อม buffer สำหรับผลลัพธ์และสถิติเวลา"""
+
+    def __init__(self, name: str, func: Callable[..., np.ndarray], accepts_out: bool = False):
+        self.name = name
+        self.func = func
+        self.accepts_out = accepts_out
+        self.buffer = None
+        self.total_time = 0.0
+        self.calls = 0
+
+    def output_buffer(self, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        """ดึง buffer ผลลัพธ์ของขั้นตอนนี้ (สร้างใหม่เฉพาะเมื่อขนาดเปลี่ยน)"""
+        if self.buffer is None or self.buffer.shape != shape or self.buffer.dtype != dtype:
+            self.buffer = np.empty(shape, dtype=dtype)
+        return self.buffer
+
+
+class PreprocessPipeline:
+    """
+    Preprocessing pipeline ที่ compile จาก spec ครั้งเดียว
+
+    การ compile:
+    - validate ภาพครั้งเดียวตอนเข้า pipeline
+    - รวมการแปลงสีที่ต่อกันและตัดการแปลงที่หักล้างกัน (เช่น BGR->RGB->BGR)
+    - เลื่อนการสลับ BGR/RGB ไปหลัง resize/blur (ทำบนภาพที่เล็กลง)
+    - fuse resize_with_padding + สลับสี + normalize + layout เป็น preprocess_into ครั้งเดียว
+    - ใช้ buffer ของแต่ละขั้นตอนซ้ำระหว่างเฟรม และบันทึกเวลาต่อขั้นตอน
+    
+    buffer ภายในไม่ได้ป้องกันการเรียกพร้อมกัน ควรใช้ pipeline แยกต่อ thread
+    """
+
+    def __init__(self,
+                 spec: Dict[str, Any],
+                 preprocessor: Optional[ImagePreprocessor] = None,
+                 name: Optional[str] = None,
+                 reuse_output: bool = False):
+        """
+        เริ่มต้นและ compile PreprocessPipeline
+
+        Args:
+            spec: pipeline spec (dict ที่มี "steps")
+            preprocessor: ImagePreprocessor ที่ใช้ร่วม (None = สร้างใหม่)
+            name: ชื่อ pipeline (ค่าเริ่มต้นจาก spec["name"])
+            reuse_output: คืน output buffer ภายในแทนการสร้าง array ใหม่ทุกครั้ง
+                          (ผลลัพธ์จะถูกเขียนทับในการเรียกครั้งถัดไป)
+
+        Raises:
+            InvalidConfigError: หาก spec ไม่ถูกต้อง
+        """
+        self.spec = copy.deepcopy(spec)
+        self.preprocessor = preprocessor or ImagePreprocessor()
+        self.name = name or self.spec.get("name", "pipeline")
+        self.reuse_output = reuse_output
+        self.input_color = str(self.spec.get("input_color", "BGR")).upper()
+        self.keep_alpha = bool(self.spec.get("keep_alpha", False))
+        self.steps: List[_CompiledStep] = []
+        self._last_transform = None
+
+        self._compile()
+        logger.info(f"Preprocess pipeline '{self.name}' compiled: {self.describe()}")
+
+    # ------------------------------------------------------------------ #
+    # Construction
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def from_preset(cls,
+                    preset: str,
+                    preprocessor: Optional[ImagePreprocessor] = None,
+                    **kwargs) -> "PreprocessPipeline":
+        """
+        สร้าง pipeline จาก preset (ชื่อที่ไม่รู้จักใช้ preset "default")
+
+        Args:
+            preset: ชื่อ preset เช่น "yolo", "ssd", "resnet"
+            preprocessor: ImagePreprocessor ที่ใช้ร่วม
+
+        Returns:
+            PreprocessPipeline
+        """
+        spec = PIPELINE_PRESETS.get(preset.lower(), PIPELINE_PRESETS["default"])
+        return cls(spec, preprocessor=preprocessor, name=preset.lower(), **kwargs)
+
+    @classmethod
+    def from_yaml(cls,
+                  source: Union[str, Path],
+                  preprocessor: Optional[ImagePreprocessor] = None,
+                  **kwargs) -> "PreprocessPipeline":
+        """
+        สร้าง pipeline จากไฟล์ YAML หรือข้อความ YAML
+
+        Args:
+            source: พาธไฟล์ .yaml/.yml หรือข้อความ YAML
+            preprocessor: ImagePreprocessor ที่ใช้ร่วม
+
+        Returns:
+            PreprocessPipeline
+        """
+        spec = load_spec(source)
+        if "pipelines" in spec:
+            raise InvalidConfigError("YAML contains multiple pipelines, use load_pipelines()")
+        return cls(spec, preprocessor=preprocessor, **kwargs)
+
+    # ------------------------------------------------------------------ #
+    # Compilation
+    # ------------------------------------------------------------------ #
+    def _compile(self) -> None:
+        """แปลง spec เป็นลำดับ _CompiledStep"""
+        raw_steps = self.spec.get("steps")
+        if not raw_steps:
+            raise InvalidConfigError(f"Pipeline '{self.name}' has no steps")
+
+        steps = []
+        for i, step in enumerate(raw_steps):
+            if not isinstance(step, dict) or "op" not in step:
+                raise InvalidConfigError(f"Step {i} must be a mapping with an 'op' key")
+            if step["op"] not in SUPPORTED_OPS:
+                raise InvalidConfigError(f"Step {i}: unsupported op '{step['op']}'")
+            steps.append(dict(step))
+
+        layout_spec = {"layout": "NHWC", "batch": False}
+        layout_steps = [s for s in steps if s["op"] == "layout"]
+        if len(layout_steps) > 1 or (layout_steps and steps[-1]["op"] != "layout"):
+            raise InvalidConfigError("'layout' must appear at most once, as the last step")
+        if layout_steps:
+            steps.pop()
+            layout_spec.update({k: v for k, v in layout_steps[0].items() if k != "op"})
+        self._layout = str(layout_spec.get("layout", "NHWC")).upper()
+        self._batch = bool(layout_spec.get("batch", False))
+        if self._layout not in ("NHWC", "NCHW"):
+            raise InvalidConfigError(f"Unknown layout: {self._layout}")
+
+        # หาจุดที่ fuse ได้: resize ตัวสุดท้ายที่ตามด้วย normalize/convert(BGR<->RGB) เท่านั้น
+        fuse_from = None
+        for i in range(len(steps) - 1, -1, -1):
+            if steps[i]["op"] == "resize_with_padding":
+                fuse_from = i
+                break
+            if steps[i]["op"] == "convert_color_space" and \
+                    str(steps[i].get("target", "RGB")).upper() in ("RGB", "BGR"):
+                continue
+            if steps[i]["op"] != "normalize":
+                break
+        if fuse_from is not None:
+            normalize_steps = [s for s in steps[fuse_from + 1:] if s["op"] == "normalize"]
+            if len(normalize_steps) > 1:
+                fuse_from = None
+
+        color, pending = self._compile_steps(steps[:fuse_from] if fuse_from is not None else steps,
+                                             self.input_color, None)
+
+        if fuse_from is not None and self._can_fuse(steps[fuse_from + 1:], pending or color):
+            self._add_fused_step(steps[fuse_from], steps[fuse_from + 1:], color, pending)
+            return
+
+        if fuse_from is not None:
+            color, pending = self._compile_steps(steps[fuse_from:], color, pending)
+        if pending is not None:
+            self._add_color_step(color, pending)
+        self._add_layout_step()
+
+    def _compile_steps(self,
+                       steps: List[Dict[str, Any]],
+                       color: str,
+                       pending: Optional[str]) -> Tuple[str, Optional[str]]:
+        """
+        compile ขั้นตอนทีละตัว พร้อมรวม/เลื่อนการแปลงสี
+
+        Args:
+            steps: ขั้นตอนจาก spec
+            color: color space ของข้อมูลจริง
+            pending: การสลับ BGR/RGB ที่เลื่อนไว้
+
+        Returns:
+            (color, pending) หลังขั้นตอนสุดท้าย
+        """
+        for step in steps:
+            op = step["op"]
+            if op == "convert_color_space":
+                target = str(step.get("target", "RGB")).upper()
+                logical = pending or color
+                if target == logical:
+                    continue
+                if target == color:
+                    pending = None          # หักล้างกัน เช่น BGR->RGB->BGR
+                elif (color, target) in _CHANNEL_SWAPS:
+                    pending = target
+                else:
+                    if pending is not None:
+                        self._add_color_step(color, pending)
+                        color, pending = pending, None
+                    if (color, target) not in _COLOR_CODES:
+                        raise InvalidConfigError(f"Unsupported color conversion: {color} to {target}")
+                    self._add_color_step(color, target)
+                    color = target
+            elif op in ("resize_with_padding", "apply_gaussian_blur", "apply_noise_reduction"):
+                # ไม่ขึ้นกับลำดับ channel จึงเลื่อนการสลับสีไปหลังขั้นตอนนี้
+                self._add_op_step(step, color)
+            else:
+                if pending is not None:
+                    self._add_color_step(color, pending)
+                    color, pending = pending, None
+                self._add_op_step(step, color)
+        return color, pending
+
+    @staticmethod
+    def _can_fuse(tail: List[Dict[str, Any]], logical: str) -> bool:
+        """ตรวจว่าขั้นตอนหลัง resize เป็นแค่การสลับ BGR/RGB และ normalize หรือไม่"""
+        for spec in tail:
+            if spec["op"] != "convert_color_space":
+                continue
+            target = str(spec.get("target", "RGB")).upper()
+            if target != logical:
+                if (logical, target) not in _CHANNEL_SWAPS:
+                    return False
+                logical = target
+        return True
+
+    def _add_color_step(self, source: str, target: str) -> None:
+        code = _COLOR_CODES[(source, target)]
+
+        def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+            channels = 1 if target == "GRAY" else 3
+            shape = image.shape[:2] if channels == 1 else image.shape[:2] + (channels,)
+            return cv2.cvtColor(image, code, dst=step.output_buffer(shape, image.dtype))
+
+        self.steps.append(_CompiledStep(f"convert_color_space[{source}->{target}]", run))
+
+    def _add_op_step(self, spec: Dict[str, Any], color: str) -> None:
+        op = spec["op"]
+        pre = self.preprocessor
+
+        if op == "resize_with_padding":
+            target_size = tuple(spec.get("target_size") or pre.target_size)
+            keep_aspect = bool(spec.get("maintain_aspect_ratio", True))
+            padding_color = tuple(spec.get("padding_color", (114, 114, 114)))
+
+            def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                transform = pre.get_letterbox_transform(image.shape, target_size, keep_aspect)
+                self._last_transform = transform
+                out = step.output_buffer((transform.target_height, transform.target_width)
+                                         + image.shape[2:], image.dtype)
+                roi = out[transform.pad_y:transform.pad_y + transform.new_height,
+                          transform.pad_x:transform.pad_x + transform.new_width]
+                cv2.resize(image, (transform.new_width, transform.new_height), dst=roi,
+                           interpolation=cv2.INTER_LINEAR)
+                if transform.has_padding:
+                    pad = padding_color[:image.shape[2]] if image.ndim == 3 else padding_color[0]
+                    y, x = transform.pad_y, transform.pad_x
+                    out[:y] = pad
+                    out[y + transform.new_height:] = pad
+                    out[y:y + transform.new_height, :x] = pad
+                    out[y:y + transform.new_height, x + transform.new_width:] = pad
+                return out
+
+        elif op == "enhance_contrast":
+            method = spec.get("method", "clahe")
+            if method == "clahe":
+                clahe = cv2.createCLAHE(clipLimit=float(spec.get("clip_limit", 2.0)),
+                                        tileGridSize=tuple(spec.get("tile_grid_size", (8, 8))))
+                to_lab = cv2.COLOR_RGB2LAB if color == "RGB" else cv2.COLOR_BGR2LAB
+                from_lab = cv2.COLOR_LAB2RGB if color == "RGB" else cv2.COLOR_LAB2BGR
+
+                def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                    out = step.output_buffer(image.shape, image.dtype)
+                    if image.ndim == 2:
+                        return clahe.apply(image, dst=out)
+                    lab = cv2.cvtColor(image, to_lab, dst=out)
+                    lab[:, :, 0] = clahe.apply(np.ascontiguousarray(lab[:, :, 0]))
+                    return cv2.cvtColor(lab, from_lab, dst=out)
+            elif method == "linear":
+                alpha = float(spec.get("alpha", 1.5))
+                beta = float(spec.get("beta", 0))
+
+                def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                    return cv2.convertScaleAbs(image, dst=step.output_buffer(image.shape, np.uint8),
+                                               alpha=alpha, beta=beta)
+            else:
+                raise InvalidConfigError(f"Unknown contrast enhancement method: {method}")
+
+        elif op == "apply_gaussian_blur":
+            kernel_size = int(spec.get("kernel_size", 5))
+            kernel_size += 1 if kernel_size % 2 == 0 else 0
+            sigma = float(spec.get("sigma", 1.0))
+
+            def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                return cv2.GaussianBlur(image, (kernel_size, kernel_size), sigma,
+                                        dst=step.output_buffer(image.shape, image.dtype))
+
+        elif op == "apply_noise_reduction":
+            method = spec.get("method", "bilateral")
+            if method == "bilateral":
+                def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                    return cv2.bilateralFilter(image, 9, 75, 75,
+                                               dst=step.output_buffer(image.shape, image.dtype))
+            elif method == "gaussian":
+                def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                    return cv2.GaussianBlur(image, (5, 5), 1.0,
+                                            dst=step.output_buffer(image.shape, image.dtype))
+            elif method == "median":
+                def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                    return cv2.medianBlur(image, 5, dst=step.output_buffer(image.shape, image.dtype))
+            else:
+                raise InvalidConfigError(f"Unknown noise reduction method: {method}")
+
+        elif op == "normalize":
+            method = spec.get("method", "zero_one")
+            mean, std = spec.get("custom_mean"), spec.get("custom_std")
+            if method == "custom" and (mean is None or std is None):
+                raise InvalidConfigError("custom_mean and custom_std must be provided for custom normalization")
+            if method not in ("zero_one", "neg_one_one", "imagenet", "custom", "none"):
+                raise InvalidConfigError(f"Unknown normalization method: {method}")
+
+            def run(image: np.ndarray, step: _CompiledStep) -> np.ndarray:
+                channels = 1 if image.ndim == 2 else image.shape[2]
+                out = step.output_buffer(image.shape, np.float32)
+                if image.dtype == np.uint8:
+                    return cv2.LUT(image, pre.get_normalization_lut(method, channels, mean, std), dst=out)
+                scale, bias = pre._channel_affine(method, channels, mean, std)
+                src = image if image.ndim == 3 else image[:, :, None]
+                dst = out if out.ndim == 3 else out[:, :, None]
+                np.multiply(src, scale, out=dst, casting="unsafe")
+                if bias is not None:
+                    np.add(dst, bias, out=dst, casting="unsafe")
+                return out
+
+        else:
+            raise InvalidConfigError(f"Unsupported op: {op}")
+
+        self.steps.append(_CompiledStep(op, run))
+
+    def _add_fused_step(self,
+                        resize_spec: Dict[str, Any],
+                        tail: List[Dict[str, Any]],
+                        color: str,
+                        pending: Optional[str]) -> None:
+        """fuse resize + สลับสี + normalize + layout เป็น preprocess_into ครั้งเดียว"""
+        pre = self.preprocessor
+        target_size = tuple(resize_spec.get("target_size") or pre.target_size)
+        keep_aspect = bool(resize_spec.get("maintain_aspect_ratio", True))
+        padding_color = tuple(resize_spec.get("padding_color", (114, 114, 114)))
+
+        logical = pending or color
+        method, mean, std = "none", None, None
+        for spec in tail:
+            if spec["op"] == "convert_color_space":
+                logical = str(spec.get("target", "RGB")).upper()
+            else:
+                method = spec.get("method", "zero_one")
+                mean, std = spec.get("custom_mean"), spec.get("custom_std")
+                if method == "custom" and (mean is None or std is None):
+                    raise InvalidConfigError("custom_mean and custom_std must be provided for custom normalization")
+
+        swap = (color, logical) in _CHANNEL_SWAPS
+        dtype = np.uint8 if method == "none" else np.float32
+        layout, batch = self._layout, self._batch
+        keep_alpha = self.keep_alpha
+
+        def run(image: np.ndarray, step: _CompiledStep, out: Optional[np.ndarray] = None) -> np.ndarray:
+            channels = 1 if image.ndim == 2 else 3
+            if keep_alpha and image.ndim == 3 and image.shape[2] == 4:
+                channels = 4
+            transform = pre.get_letterbox_transform(image.shape, target_size, keep_aspect)
+            if out is None:
+                shape = pre.allocate_input_buffer((transform.target_width, transform.target_height),
+                                                  channels, layout).shape
+                shape = shape if batch else shape[1:]
+                out = step.output_buffer(shape, dtype) if self.reuse_output else np.empty(shape, dtype)
+            pre._fill_input(image, out, target_size, method, layout, swap, keep_aspect,
+                            padding_color, mean, std, keep_alpha)
+            self._last_transform = transform
+            return out
+
+        name = "fused[resize_with_padding"
+        name += "+swap_rb" if swap else ""
+        name += f"+normalize({method})" if method != "none" else ""
+        name += f"+{layout}{'+batch' if batch else ''}]"
+        self.steps.append(_CompiledStep(name, run, accepts_out=True))
+
+    def _add_layout_step(self) -> None:
+        """จัด layout และเพิ่ม batch dimension (ใช้เมื่อ fuse ไม่ได้)"""
+        layout, batch = self._layout, self._batch
+        if layout == "NHWC" and not batch:
+            return
+
+        def run(image: np.ndarray, step: _CompiledStep, out: Optional[np.ndarray] = None) -> np.ndarray:
+            hwc = image if image.ndim == 3 else image[:, :, None]
+            view = hwc.transpose(2, 0, 1) if layout == "NCHW" else hwc
+            shape = (1,) + view.shape if batch else view.shape
+            if out is None:
+                out = step.output_buffer(shape, image.dtype) if self.reuse_output \
+                    else np.empty(shape, image.dtype)
+            np.copyto(out.reshape(view.shape), view)
+            return out
+
+        self.steps.append(_CompiledStep(f"layout[{layout}{'+batch' if batch else ''}]", run,
+                                        accepts_out=True))
+
+    # ------------------------------------------------------------------ #
+    # Execution
+    # ------------------------------------------------------------------ #
+    def run(self,
+            image: np.ndarray,
+            out: Optional[np.ndarray] = None,
+            return_transform: bool = False
+            ) -> Union[np.ndarray, Tuple[np.ndarray, Optional[LetterboxTransform]]]:
+        """
+        ประมวลผลภาพผ่าน pipeline
+
+        Args:
+            image: ภาพ input (color space ตาม input_color ของ spec)
+            out: buffer ปลายทาง (ใช้ได้เมื่อขั้นตอนสุดท้ายเป็น fused/layout step)
+            return_transform: คืน LetterboxTransform ของ resize มาด้วยหรือไม่
+
+        Returns:
+            ภาพที่ประมวลผลแล้ว หรือ (ภาพ, LetterboxTransform)
+
+        Raises:
+            PreprocessingError: หากประมวลผลไม่สำเร็จ
+        """
+        try:
+            self.preprocessor.validate_image(image)
+            self._last_transform = None
+
+            result = image
+            last = len(self.steps) - 1
+            for i, step in enumerate(self.steps):
+                start = time.perf_counter()
+                if step.accepts_out:
+                    result = step.func(result, step, out if i == last else None)
+                else:
+                    result = step.func(result, step)
+                step.total_time += time.perf_counter() - start
+                step.calls += 1
+
+            if out is not None and result is not out:
+                np.copyto(out, result.reshape(out.shape))
+                result = out
+            elif not self.reuse_output and not self.steps[-1].accepts_out:
+                result = result.copy()
+
+            return (result, self._last_transform) if return_transform else result
+
+        except Exception as e:
+            logger.error(f"Pipeline '{self.name}' failed: {e}")
+            raise PreprocessingError(f"Pipeline '{self.name}' failed: {e}") from e
+
+    __call__ = run
+
+    def describe(self) -> List[str]:
+        """รายชื่อขั้นตอนหลัง compile (แสดงผลของการ fuse/ตัดทิ้ง)"""
+        return [step.name for step in self.steps]
+
+    def get_timings(self) -> Dict[str, Dict[str, float]]:
+        """
+        ดึงเวลาเฉลี่ยต่อขั้นตอน
+
+        Returns:
+            {ชื่อขั้นตอน: {"calls", "avg_ms", "total_ms"}}
+        """
+        timings = {}
+        for i, step in enumerate(self.steps):
+            avg = step.total_time / step.calls if step.calls else 0.0
+            timings[f"{i}:{step.name}"] = {
+                "calls": step.calls,
+                "avg_ms": avg * 1000,
+                "total_ms": step.total_time * 1000,
+            }
+        return timings
+
+    def reset_timings(self) -> None:
+        """รีเซ็ตสถิติเวลา"""
+        for step in self.steps:
+            step.total_time = 0.0
+            step.calls = 0
+
+
+def load_spec(source: Union[str, Path]) -> Dict[str, Any]:
+    """
+    อ่าน spec จากไฟล์ YAML หรือข้อความ YAML
+
+    Args:
+        source: พาธไฟล์หรือข้อความ YAML
+
+    Returns:
+        dict ของ spec
+    """
+    import yaml
+
+    path = Path(source) if not isinstance(source, Path) else source
+    try:
+        is_file = path.suffix.lower() in (".yaml", ".yml") and path.exists()
+    except OSError:
+        is_file = False
+
+    text = path.read_text(encoding="utf-8") if is_file else str(source)
+    spec = yaml.safe_load(text)
+    if not isinstance(spec, dict):
+        raise InvalidConfigError("Pipeline YAML must contain a mapping")
+    return spec
+
+
+def load_pipelines(source: Union[str, Path],
+                   preprocessor: Optional[ImagePreprocessor] = None,
+                   **kwargs) -> Dict[str, PreprocessPipeline]:
+    """
+    โหลดหลาย pipeline จาก YAML ที่มี key "pipelines" (ชื่อ -> spec หรือชื่อ preset)
+
+    Args:
+        source: พาธไฟล์หรือข้อความ YAML
+        preprocessor: ImagePreprocessor ที่ใช้ร่วมทุก pipeline
+
+    Returns:
+        dict ชื่อ -> PreprocessPipeline
+    """
+    spec = load_spec(source)
+    entries = spec.get("pipelines", {spec.get("name", "pipeline"): spec})
+    preprocessor = preprocessor or ImagePreprocessor()
+
+    pipelines = {}
+    for name, entry in entries.items():
+        if isinstance(entry, str):
+            pipelines[name] = PreprocessPipeline.from_preset(entry, preprocessor, **kwargs)
+        else:
+            pipelines[name] = PreprocessPipeline(entry, preprocessor, name=name, **kwargs)
+    return pipelines
@@ -1,9 +1,18 @@
 # postprocessing.py
 
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
 import cv2
 import numpy as np
 from PIL import Image
 
+from .nms import batch_nms
+from .preprocessor import ImagePreprocessor
+from ..utils.exceptions import PostprocessingError
+
+logger = logging.getLogger(__name__)
+
 def threshold_image(image, threshold=127):
     """แปลงภาพเป็น binary ด้วย threshold"""
     _, binary = cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY)
@@ -38,3 +47,219 @@ def morphological_ops(image, operation='dilate', kernel_size=3):
         return cv2.erode(image, kernel, iterations=1)
     else:
         raise ValueError("operation must be 'dilate' or 'erode'")
+
+
+# รูปแบบ head ของ YOLO: v5 = (N, 5 + C) มี objectness, v8 = (4 + C, N) ไม่มี objectness
+YOLO_HEADS = ("auto", "v5", "v8")
+
+
+class ImagePostprocessor:
+    """
+    แปลง raw output ของ YOLO detector (cx, cy, w, h + scores) เป็นผลตรวจจับบนภาพต้นฉบับ
+
+    ทำงานกับ tensor ของทั้ง batch ในครั้งเดียว:
+        1. คำนวณ score สูงสุดต่อ anchor แล้วเลือก top-k ด้วย argpartition (ยังไม่แตะพิกัด box)
+        2. decode box เฉพาะ candidate ที่ผ่าน threshold
+        3. NMS ครั้งเดียวสำหรับทุกภาพและทุก class (แยกกลุ่มด้วย coordinate offset)
+        4. แปลงพิกัดจาก model input กลับไปยังภาพต้นฉบับของแต่ละภาพใน NumPy pass เดียว
+
+    ผลลัพธ์เป็น dictionary แบบเดียวกับ DeGirum: {"bbox", "score", "category_id", "label"}
+    """
+
+    def __init__(self,
+                 input_size: Tuple[int, int] = (640, 640),
+                 head: str = "auto",
+                 top_k: int = 1000,
+                 max_detections: int = 300,
+                 class_agnostic: bool = False,
+                 normalized_boxes: bool = False,
+                 labels: Optional[Union[Dict[int, str], Sequence[str]]] = None,
+                 preprocessor: Optional[ImagePreprocessor] = None):
+        """
+        เริ่มต้น ImagePostprocessor
+
+        Args:
+            input_size: ขนาด model input (width, height) ที่ใช้ letterbox
+            head: "v5", "v8" หรือ "auto" (tensor ที่มิติ attribute มาก่อนมิติ anchor = v8, นอกนั้น v5)
+            top_k: จำนวน candidate สูงสุดต่อภาพก่อน decode box และ NMS
+            max_detections: จำนวนผลลัพธ์สูงสุดต่อภาพ
+            class_agnostic: ทำ NMS ข้าม class
+            normalized_boxes: True = box ของโมเดลเป็นค่า 0-1 ของ model input (คูณด้วย input_size),
+                              False = เป็น pixel ของ model input
+            labels: ชื่อ class ({id: ชื่อ} หรือ list)
+            preprocessor: ImagePreprocessor สำหรับ cache ของ LetterboxTransform
+        """
+        if head not in YOLO_HEADS:
+            raise ValueError(f"Unknown YOLO head '{head}'. Use one of {YOLO_HEADS}")
+        self.input_size = tuple(input_size)
+        self.head = head
+        self.top_k = top_k
+        self.max_detections = max_detections
+        self.class_agnostic = class_agnostic
+        self.normalized_boxes = normalized_boxes
+        self.labels = dict(enumerate(labels)) if isinstance(labels, (list, tuple)) else dict(labels or {})
+        self.preprocessor = preprocessor or ImagePreprocessor(target_size=self.input_size)
+
+    def _as_rows(self, output: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """แปลง output เป็น (B, N, attributes) และบอกว่ามี objectness หรือไม่"""
+        output = np.asarray(output)
+        if output.ndim == 2:
+            output = output[None]
+        elif output.ndim != 3:
+            raise ValueError(f"Expected YOLO output with 2 or 3 dims, got shape {output.shape}")
+
+        channels_first = output.shape[1] < output.shape[2]
+        head = self.head if self.head != "auto" else ("v8" if channels_first else "v5")
+        if channels_first:
+            # (B, 4 + C, N) -> (B, N, 4 + C) เป็น view ไม่ copy
+            output = output.transpose(0, 2, 1)
+        min_attributes = 6 if head == "v5" else 5
+        if output.shape[2] < min_attributes:
+            raise ValueError(f"YOLO {head} output needs >= {min_attributes} attributes, got shape {output.shape}")
+        return output, head == "v5"
+
+    def decode_batch(self,
+                     output: np.ndarray,
+                     confidence_threshold: float = 0.25,
+                     nms_threshold: float = 0.45,
+                     input_size: Optional[Tuple[int, int]] = None
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        decode raw output ของทั้ง batch และทำ NMS (พิกัดยังอยู่ใน model input)
+
+        Args:
+            output: tensor (B, N, 4 + C), (B, N, 5 + C) หรือ (B, 4 + C, N)
+            confidence_threshold: score ขั้นต่ำ
+            nms_threshold: IoU ที่ถือว่าเป็นวัตถุเดียวกัน
+            input_size: ขนาด model input (width, height) สำหรับ box แบบ normalize (ดู normalized_boxes)
+
+        Returns:
+            (image_ids, boxes (x1, y1, x2, y2), scores, class_ids) ของทุกภาพรวมกัน
+        """
+        rows, has_objectness = self._as_rows(output)
+        batch, anchors, _ = rows.shape
+        class_start = 5 if has_objectness else 4
+
+        # 1. score สูงสุดต่อ anchor (O(N * C) ครั้งเดียว) แล้ว top-k ด้วย argpartition ทั้ง batch
+        class_scores = rows[:, :, class_start:]
+        class_ids = class_scores.argmax(axis=2)
+        scores = np.take_along_axis(class_scores, class_ids[..., None], axis=2)[..., 0].astype(np.float32)
+        if has_objectness:
+            scores *= rows[:, :, 4]
+
+        k = min(self.top_k, anchors)
+        if k < anchors:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(anchors), (batch, anchors))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        image_ids, slots = np.nonzero(top_scores > confidence_threshold)
+        if image_ids.size == 0:
+            return (np.empty(0, np.int64), np.empty((0, 4), np.float32),
+                    np.empty(0, np.float32), np.empty(0, np.int64))
+        anchor_ids = top[image_ids, slots]
+
+        # 2. decode box เฉพาะ candidate
+        cxcywh = rows[image_ids, anchor_ids, :4].astype(np.float32)
+        if self.normalized_boxes:
+            width, height = input_size or self.input_size
+            cxcywh *= np.array([width, height, width, height], dtype=np.float32)
+        half = cxcywh[:, 2:] * 0.5
+        boxes = np.concatenate([cxcywh[:, :2] - half, cxcywh[:, :2] + half], axis=1)
+        cand_scores = top_scores[image_ids, slots]
+        cand_classes = class_ids[image_ids, anchor_ids]
+
+        # 3. NMS ครั้งเดียวทั้ง batch: กลุ่ม = (ภาพ, class) หรือภาพเมื่อ class_agnostic
+        keep = batch_nms(boxes, cand_scores, image_ids,
+                         None if self.class_agnostic else cand_classes,
+                         iou_threshold=nms_threshold, max_per_image=self.max_detections)
+
+        return image_ids[keep], boxes[keep], cand_scores[keep], cand_classes[keep]
+
+    def _to_source(self,
+                   image_ids: np.ndarray,
+                   boxes: np.ndarray,
+                   original_shapes: Sequence[Tuple[int, ...]],
+                   input_size: Tuple[int, int]) -> np.ndarray:
+        """แปลง boxes ของทุกภาพกลับไปยังภาพต้นฉบับพร้อมกัน (scale/pad ต่อภาพ)"""
+        transforms = [self.preprocessor.get_letterbox_transform(shape, input_size) for shape in original_shapes]
+        params = np.array([(t.pad_x, t.pad_y, t.scale_x, t.scale_y, t.source_width, t.source_height)
+                           for t in transforms], dtype=np.float32)[image_ids]
+        offset = np.tile(params[:, 0:2], 2)
+        gain = np.tile(params[:, 2:4], 2)
+        limit = np.tile(params[:, 4:6], 2)
+        return np.clip((boxes - offset) / gain, 0, limit)
+
+    def process_batch(self,
+                      output: np.ndarray,
+                      original_shapes: Union[Tuple[int, ...], Sequence[Tuple[int, ...]]],
+                      confidence_threshold: float = 0.25,
+                      nms_threshold: float = 0.45,
+                      input_size: Optional[Tuple[int, int]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        แปลง output ของทั้ง batch เป็นผลตรวจจับของแต่ละภาพ
+
+        Args:
+            output: tensor ของ YOLO head ทั้ง batch
+            original_shapes: shape (height, width) ของแต่ละภาพ หรือ shape เดียวสำหรับทุกภาพ
+            confidence_threshold: score ขั้นต่ำ
+            nms_threshold: IoU ที่ถือว่าเป็นวัตถุเดียวกัน
+            input_size: ขนาด model input (width, height) (None = ค่าของ postprocessor)
+
+        Returns:
+            รายการผลตรวจจับต่อภาพ
+
+        Raises:
+            PostprocessingError: หาก output ไม่ถูกต้อง
+        """
+        try:
+            input_size = tuple(input_size or self.input_size)
+            rows, _ = self._as_rows(output)
+            batch = rows.shape[0]
+            if len(original_shapes) and isinstance(original_shapes[0], (int, np.integer)):
+                original_shapes = [original_shapes] * batch
+            if len(original_shapes) != batch:
+                raise ValueError(f"Got {len(original_shapes)} original shapes for a batch of {batch}")
+
+            image_ids, boxes, scores, class_ids = self.decode_batch(
+                output, confidence_threshold, nms_threshold, input_size)
+            results: List[List[Dict[str, Any]]] = [[] for _ in range(batch)]
+            if image_ids.size == 0:
+                return results
+
+            boxes = self._to_source(image_ids, boxes, original_shapes, input_size)
+            for image_id, box, score, class_id in zip(image_ids.tolist(), boxes.tolist(),
+                                                      scores.tolist(), class_ids.tolist()):
+                results[image_id].append({
+                    "bbox": box,
+                    "score": score,
+                    "category_id": class_id,
+                    "label": self.labels.get(class_id, str(class_id)),
+                })
+            return results
+
+        except Exception as e:
+            logger.error(f"YOLO postprocessing failed: {e}")
+            raise PostprocessingError(f"Failed to decode detections: {e}") from e
+
+    def process_detections(self,
+                           output_tensor: np.ndarray,
+                           original_shape: Tuple[int, ...],
+                           confidence_threshold: float = 0.25,
+                           nms_threshold: float = 0.45,
+                           input_size: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+        """
+        แปลง output ของภาพเดียว (มีหรือไม่มีมิติ batch) เป็นผลตรวจจับ
+
+        Args:
+            output_tensor: tensor ของ YOLO head
+            original_shape: shape (height, width) ของภาพต้นฉบับ
+            confidence_threshold: score ขั้นต่ำ
+            nms_threshold: IoU ที่ถือว่าเป็นวัตถุเดียวกัน
+            input_size: ขนาด model input (width, height)
+
+        Returns:
+            รายการ {"bbox", "score", "category_id", "label"}
+        """
+        return self.process_batch(output_tensor, [tuple(original_shape)], confidence_threshold,
+                                  nms_threshold, input_size)[0]
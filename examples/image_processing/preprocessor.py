@@ -8,8 +8,11 @@ Version: 1.0.0
 
 import cv2
 import numpy as np
+import os
 import logging
-from typing import Tuple, Optional, Union, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Tuple, Optional, Union, List
 from pathlib import Path
 
 from ..utils.exceptions import PreprocessingError, InvalidImageFormatError, ImageResizeError
@@ -17,22 +20,167 @@ from ..utils.exceptions import PreprocessingError, InvalidImageFormatError, Imag
 logger = logging.getLogger(__name__)
 
 
+class LetterboxTransform:
+    """
+    เก็บ geometry ของการ letterbox (scale และ offset) จากภาพต้นฉบับไปยัง model input
+    และแปลงพิกัด box/landmark กลับไปยังภาพต้นฉบับแบบ vectorized
+    """
+    
+    def __init__(self,
+                 source_size: Tuple[int, int],
+                 target_size: Tuple[int, int],
+                 maintain_aspect_ratio: bool = True):
+        """
+        เริ่มต้น LetterboxTransform
+        
+        Args:
+            source_size: ขนาดภาพต้นฉบับ (width, height)
+            target_size: ขนาด model input (width, height)
+            maintain_aspect_ratio: รักษา aspect ratio หรือไม่
+        """
+        self.source_width, self.source_height = source_size
+        self.target_width, self.target_height = target_size
+        self.maintain_aspect_ratio = maintain_aspect_ratio
+        
+        if maintain_aspect_ratio:
+            scale = min(self.target_width / self.source_width,
+                        self.target_height / self.source_height)
+            self.new_width = int(self.source_width * scale)
+            self.new_height = int(self.source_height * scale)
+        else:
+            self.new_width, self.new_height = self.target_width, self.target_height
+        
+        self.pad_x = (self.target_width - self.new_width) // 2
+        self.pad_y = (self.target_height - self.new_height) // 2
+        
+        # scale จริงต่อแกน (รวมผลของการปัดเศษขนาดภาพ)
+        self.scale_x = self.new_width / self.source_width
+        self.scale_y = self.new_height / self.source_height
+        
+        # y = x * gain + offset สำหรับ source -> model (ลำดับ x, y)
+        self._gain = np.array([self.scale_x, self.scale_y], dtype=np.float32)
+        self._offset = np.array([self.pad_x, self.pad_y], dtype=np.float32)
+    
+    @property
+    def is_identity(self) -> bool:
+        """True หากภาพไม่ต้อง resize หรือ pad"""
+        return (self.new_width == self.source_width and self.new_height == self.source_height
+                and self.pad_x == 0 and self.pad_y == 0)
+    
+    @property
+    def has_padding(self) -> bool:
+        """True หากมีบริเวณ padding"""
+        return self.new_width != self.target_width or self.new_height != self.target_height
+    
+    def points_to_source(self, points: np.ndarray, clip: bool = True) -> np.ndarray:
+        """
+        แปลงจุดจาก model space กลับไปยังภาพต้นฉบับ
+        
+        Args:
+            points: array ที่มิติสุดท้ายเป็นคู่ (x, y) ต่อกัน เช่น (N, 2), (N, K, 2)
+                    หรือ landmark แบบแบน (N, 2K)
+            clip: จำกัดพิกัดให้อยู่ในภาพหรือไม่
+            
+        Returns:
+            array float32 รูปร่างเดียวกับ input
+        """
+        points = np.asarray(points, dtype=np.float32)
+        pairs = points.reshape(*points.shape[:-1], -1, 2)
+        mapped = (pairs - self._offset) / self._gain
+        if clip:
+            np.clip(mapped[..., 0], 0, self.source_width, out=mapped[..., 0])
+            np.clip(mapped[..., 1], 0, self.source_height, out=mapped[..., 1])
+        return mapped.reshape(points.shape)
+    
+    def points_to_model(self, points: np.ndarray) -> np.ndarray:
+        """
+        แปลงจุดจากภาพต้นฉบับไปยัง model space
+        
+        Args:
+            points: array ที่มิติสุดท้ายเป็นคู่ (x, y) ต่อกัน
+            
+        Returns:
+            array float32 รูปร่างเดียวกับ input
+        """
+        points = np.asarray(points, dtype=np.float32)
+        pairs = points.reshape(*points.shape[:-1], -1, 2)
+        return (pairs * self._gain + self._offset).reshape(points.shape)
+    
+    def boxes_to_source(self, boxes: np.ndarray, clip: bool = True) -> np.ndarray:
+        """
+        แปลง boxes (x1, y1, x2, y2) จาก model space กลับไปยังภาพต้นฉบับ
+        
+        Args:
+            boxes: array (N, 4) หรือ (..., 4)
+            clip: จำกัดพิกัดให้อยู่ในภาพหรือไม่
+            
+        Returns:
+            array float32 (N, 4)
+        """
+        return self.points_to_source(boxes, clip=clip)
+    
+    def boxes_to_model(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        แปลง boxes (x1, y1, x2, y2) จากภาพต้นฉบับไปยัง model space
+        
+        Args:
+            boxes: array (N, 4) หรือ (..., 4)
+            
+        Returns:
+            array float32 (N, 4)
+        """
+        return self.points_to_model(boxes)
+    
+    def to_dict(self) -> dict:
+        """แปลงเป็น dictionary สำหรับ logging/metadata"""
+        return {
+            "source_size": (self.source_width, self.source_height),
+            "target_size": (self.target_width, self.target_height),
+            "resized_size": (self.new_width, self.new_height),
+            "scale": (self.scale_x, self.scale_y),
+            "padding": (self.pad_x, self.pad_y),
+        }
+    
+    def __repr__(self) -> str:
+        return (f"LetterboxTransform({self.source_width}x{self.source_height} -> "
+                f"{self.target_width}x{self.target_height}, scale=({self.scale_x:.4f}, "
+                f"{self.scale_y:.4f}), pad=({self.pad_x}, {self.pad_y}))")
+
+
 class ImagePreprocessor:
     """
     Class สำหรับการ preprocess ภาพก่อนส่งเข้า AI model
     """
     
-    def __init__(self, target_size: Tuple[int, int] = (640, 640)):
+    def __init__(self, target_size: Tuple[int, int] = (640, 640), num_workers: Optional[int] = None):
         """
         เริ่มต้น ImagePreprocessor
         
         Args:
             target_size: ขนาดเป้าหมาย (width, height)
+            num_workers: จำนวน thread สำหรับ batch preprocessing (None = จำนวน CPU cores)
         """
         self.target_size = target_size
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self._executor = None
+        self._executor_lock = threading.Lock()
         self.mean = np.array([0.485, 0.456, 0.406])  # ImageNet mean
         self.std = np.array([0.229, 0.224, 0.225])   # ImageNet std
         
+        # scratch buffer ต่อ thread สำหรับ preprocess_into (ไม่ต้อง allocate ทุกเฟรม)
+        self._scratch = threading.local()
+        
+        # pipeline ที่ compile แล้วต่อ preset (ดู get_pipeline)
+        self._pipelines = {}
+        
+        # cache ของ lookup table สำหรับ normalize ภาพ uint8
+        self._lut_cache = {}
+        self.max_cached_luts = 32
+        
+        # cache ของ LetterboxTransform ต่อ (input shape, target size)
+        self._transform_cache = {}
+        self.max_cached_transforms = 64
+        
         logger.info(f"ImagePreprocessor initialized with target size: {target_size}")
     
     def validate_image(self, image: np.ndarray) -> bool:
@@ -74,11 +222,41 @@ class ImagePreprocessor:
             logger.error(f"Image validation failed: {e}")
             raise
     
+    def get_letterbox_transform(self,
+                                image_shape: Tuple[int, ...],
+                                target_size: Optional[Tuple[int, int]] = None,
+                                maintain_aspect_ratio: bool = True) -> LetterboxTransform:
+        """
+        ดึง LetterboxTransform จาก cache (สร้างใหม่เฉพาะ shape ที่ยังไม่เคยเห็น)
+        
+        Args:
+            image_shape: shape ของภาพต้นฉบับ (height, width[, channels])
+            target_size: ขนาดเป้าหมาย (width, height)
+            maintain_aspect_ratio: รักษา aspect ratio หรือไม่
+            
+        Returns:
+            LetterboxTransform
+        """
+        target_size = tuple(target_size or self.target_size)
+        height, width = image_shape[:2]
+        key = (height, width, target_size, maintain_aspect_ratio)
+        
+        transform = self._transform_cache.get(key)
+        if transform is None:
+            if len(self._transform_cache) >= self.max_cached_transforms:
+                self._transform_cache.clear()
+            transform = LetterboxTransform((width, height), target_size, maintain_aspect_ratio)
+            self._transform_cache[key] = transform
+            logger.debug(f"Letterbox transform cached: {transform}")
+        return transform
+    
     def resize_with_padding(self, 
                            image: np.ndarray, 
                            target_size: Optional[Tuple[int, int]] = None,
                            maintain_aspect_ratio: bool = True,
-                           padding_color: Tuple[int, int, int] = (114, 114, 114)) -> np.ndarray:
+                           padding_color: Tuple[int, int, int] = (114, 114, 114),
+                           return_transform: bool = False
+                           ) -> Union[np.ndarray, Tuple[np.ndarray, LetterboxTransform]]:
         """
         ปรับขนาดภาพพร้อม padding เพื่อรักษา aspect ratio
         
@@ -87,9 +265,10 @@ class ImagePreprocessor:
             target_size: ขนาดเป้าหมาย (width, height)
             maintain_aspect_ratio: รักษา aspect ratio หรือไม่
             padding_color: สีสำหรับ padding (B, G, R)
+            return_transform: คืน LetterboxTransform มาด้วยหรือไม่
             
         Returns:
-            ภาพที่ปรับขนาดแล้ว
+            ภาพที่ปรับขนาดแล้ว หรือ (ภาพ, LetterboxTransform) หาก return_transform=True
             
         Raises:
             ImageResizeError: หากไม่สามารถปรับขนาดได้
@@ -97,21 +276,16 @@ class ImagePreprocessor:
         try:
             self.validate_image(image)
             
-            target_size = target_size or self.target_size
-            target_width, target_height = target_size
+            transform = self.get_letterbox_transform(image.shape, target_size, maintain_aspect_ratio)
+            target_width, target_height = transform.target_width, transform.target_height
             
             if not maintain_aspect_ratio:
                 # Resize โดยไม่รักษา aspect ratio
                 resized = cv2.resize(image, (target_width, target_height))
-                return resized
+                return (resized, transform) if return_transform else resized
             
-            # คำนวณ scale factor เพื่อรักษา aspect ratio
-            h, w = image.shape[:2]
-            scale = min(target_width / w, target_height / h)
-            
-            # ขนาดใหม่หลังจาก scale
-            new_w = int(w * scale)
-            new_h = int(h * scale)
+            # ขนาดใหม่หลังจาก scale (คำนวณไว้ใน transform)
+            new_w, new_h = transform.new_width, transform.new_height
             
             # Resize ภาพ
             resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
@@ -125,16 +299,13 @@ class ImagePreprocessor:
                                padding_color[0], dtype=image.dtype)
             
             # วาง resized image ตรงกลาง
-            y_offset = (target_height - new_h) // 2
-            x_offset = (target_width - new_w) // 2
+            y_offset = transform.pad_y
+            x_offset = transform.pad_x
             
-            if len(image.shape) == 3:
-                padded[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
-            else:
-                padded[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
+            padded[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
             
             logger.debug(f"Image resized from {image.shape} to {padded.shape}")
-            return padded
+            return (padded, transform) if return_transform else padded
             
         except Exception as e:
             logger.error(f"Image resize failed: {e}")
@@ -146,7 +317,7 @@ class ImagePreprocessor:
                   custom_mean: Optional[np.ndarray] = None,
                   custom_std: Optional[np.ndarray] = None) -> np.ndarray:
         """
-        Normalize ภาพ
+        Normalize ภาพ (ภาพ uint8 ใช้ lookup table ที่คำนวณไว้ล่วงหน้า)
         
         Args:
             image: ภาพ input (BGR format)
@@ -160,6 +331,20 @@ class ImagePreprocessor:
         try:
             self.validate_image(image)
             
+            if image.dtype == np.uint8 and method in ("zero_one", "neg_one_one", "imagenet", "custom") \
+                    and (method != "custom" or (custom_mean is not None and custom_std is not None)):
+                # ภาพ uint8 ใช้ lookup table 256 ค่า ต่อ channel (ได้ float32 ในรอบเดียว)
+                channels = 1 if image.ndim == 2 else image.shape[2]
+                source = image
+                if method == "imagenet" and channels == 3:
+                    # แปลงจาก BGR เป็น RGB สำหรับ ImageNet (บน uint8)
+                    source = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                lut = self.get_normalization_lut(method, channels, custom_mean, custom_std)
+                normalized = cv2.LUT(source, lut)
+                
+                logger.debug(f"Image normalized using method: {method}")
+                return normalized
+            
             # แปลงเป็น float32
             normalized = image.astype(np.float32)
             
@@ -179,15 +364,16 @@ class ImagePreprocessor:
                 if len(normalized.shape) == 3 and normalized.shape[2] == 3:
                     normalized = cv2.cvtColor(normalized, cv2.COLOR_BGR2RGB)
                     
-                    # Apply mean และ std
-                    normalized = (normalized - self.mean) / self.std
+                    # Apply mean และ std (float32 เพื่อไม่ให้ถูก promote เป็น float64)
+                    normalized = (normalized - self.mean.astype(np.float32)) / self.std.astype(np.float32)
                     
             elif method == "custom":
                 if custom_mean is None or custom_std is None:
                     raise ValueError("custom_mean and custom_std must be provided for custom normalization")
                 
                 normalized = normalized / 255.0
-                normalized = (normalized - custom_mean) / custom_std
+                normalized = (normalized - np.asarray(custom_mean, dtype=np.float32)) / \
+                    np.asarray(custom_std, dtype=np.float32)
                 
             else:
                 raise ValueError(f"Unknown normalization method: {method}")
@@ -199,6 +385,584 @@ class ImagePreprocessor:
             logger.error(f"Normalization failed: {e}")
             raise PreprocessingError(f"Failed to normalize image: {e}") from e
     
+    def allocate_input_buffer(self,
+                              target_size: Optional[Tuple[int, int]] = None,
+                              channels: int = 3,
+                              layout: str = "NHWC",
+                              dtype: np.dtype = np.float32,
+                              batch_size: int = 1) -> np.ndarray:
+        """
+        สร้าง buffer สำหรับ model input เพื่อใช้ซ้ำกับ preprocess_into
+        
+        Args:
+            target_size: ขนาดเป้าหมาย (width, height)
+            channels: จำนวน channels
+            layout: "NHWC" หรือ "NCHW"
+            dtype: ชนิดข้อมูลของ buffer (เช่น np.float32, np.uint8)
+            batch_size: จำนวนภาพใน batch
+            
+        Returns:
+            numpy array ขนาด (N, H, W, C) หรือ (N, C, H, W)
+        """
+        target_width, target_height = target_size or self.target_size
+        if layout == "NHWC":
+            shape = (batch_size, target_height, target_width, channels)
+        elif layout == "NCHW":
+            shape = (batch_size, channels, target_height, target_width)
+        else:
+            raise ValueError(f"Unknown layout: {layout}")
+        return np.empty(shape, dtype=dtype)
+    
+    def preprocess_into(self,
+                        image: np.ndarray,
+                        out: Optional[np.ndarray] = None,
+                        target_size: Optional[Tuple[int, int]] = None,
+                        method: str = "zero_one",
+                        layout: str = "NHWC",
+                        swap_rb: bool = True,
+                        maintain_aspect_ratio: bool = True,
+                        padding_color: Tuple[int, int, int] = (114, 114, 114),
+                        custom_mean: Optional[np.ndarray] = None,
+                        custom_std: Optional[np.ndarray] = None,
+                        return_transform: bool = False
+                        ) -> Union[np.ndarray, Tuple[np.ndarray, LetterboxTransform]]:
+        """
+        Letterbox + padding + สลับสี + normalize + จัด layout ในขั้นตอนเดียว
+        โดยเขียนผลลัพธ์ลงใน buffer ที่ผู้เรียกเป็นเจ้าของ (ไม่สร้าง temporary เต็มเฟรม)
+        
+        ผลลัพธ์เทียบเท่ากับ resize_with_padding -> normalize -> expand_dims
+        แต่ resize ลง scratch buffer ที่ใช้ซ้ำ แล้วคูณ scale/บวก bias ต่อ channel
+        ลงตำแหน่งสุดท้ายใน out โดยตรง ส่วน padding เขียนเฉพาะขอบ
+        
+        Args:
+            image: ภาพ input (BGR format, 1/3/4 channels)
+            out: buffer ปลายทาง (1, H, W, C) / (H, W, C) สำหรับ NHWC
+                 หรือ (1, C, H, W) / (C, H, W) สำหรับ NCHW; None = สร้างใหม่
+            target_size: ขนาดเป้าหมาย (width, height)
+            method: วิธี normalize ("zero_one", "neg_one_one", "imagenet", "custom",
+                    "none" = ไม่ normalize สำหรับ quantized model ที่รับ uint8)
+            layout: "NHWC" หรือ "NCHW"
+            swap_rb: แปลง BGR เป็น RGB หรือไม่
+            maintain_aspect_ratio: รักษา aspect ratio หรือไม่
+            padding_color: สีสำหรับ padding (B, G, R)
+            custom_mean: ค่า mean สำหรับ custom normalization (ลำดับ channel ของ output)
+            custom_std: ค่า std สำหรับ custom normalization (ลำดับ channel ของ output)
+            return_transform: คืน LetterboxTransform มาด้วยหรือไม่
+            
+        Returns:
+            out (buffer เดียวกับที่ส่งเข้ามา) หรือ (out, LetterboxTransform)
+            
+        Raises:
+            PreprocessingError: หากไม่สามารถเตรียมภาพได้
+        """
+        try:
+            self.validate_image(image)
+            
+            out, transform = self._fill_input(image, out, target_size, method, layout, swap_rb,
+                                              maintain_aspect_ratio, padding_color,
+                                              custom_mean, custom_std)
+            return (out, transform) if return_transform else out
+            
+        except Exception as e:
+            logger.error(f"Fused preprocessing failed: {e}")
+            raise PreprocessingError(f"Failed to preprocess into buffer: {e}") from e
+    
+    def _fill_input(self,
+                    image: np.ndarray,
+                    out: Optional[np.ndarray],
+                    target_size: Optional[Tuple[int, int]],
+                    method: str,
+                    layout: str,
+                    swap_rb: bool,
+                    maintain_aspect_ratio: bool,
+                    padding_color: Tuple[int, int, int],
+                    custom_mean: Optional[np.ndarray],
+                    custom_std: Optional[np.ndarray],
+                    keep_alpha: bool = False) -> Tuple[np.ndarray, LetterboxTransform]:
+        """
+        ส่วนประมวลผลของ preprocess_into โดยไม่ validate ภาพซ้ำ
+        (ผู้เรียกต้อง validate ภาพก่อน เช่น PreprocessPipeline ที่ validate ครั้งเดียวตอนเข้า)
+        keep_alpha=True คงภาพ 4 channels ไว้ทั้ง 4 channels (ไม่สลับสีและไม่ใช้ mean/std ของ ImageNet)
+        """
+        if image.ndim == 3 and image.shape[2] == 4 and not keep_alpha:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        
+        # ตำแหน่งของภาพหลัง resize (จาก cache)
+        transform = self.get_letterbox_transform(image.shape, target_size, maintain_aspect_ratio)
+        target_width, target_height = transform.target_width, transform.target_height
+        new_w, new_h = transform.new_width, transform.new_height
+        x_offset, y_offset = transform.pad_x, transform.pad_y
+        
+        if out is None:
+            out = self.allocate_input_buffer((target_width, target_height), channels, layout)
+        hwc = self._hwc_view(out, layout, (target_height, target_width, channels))
+        
+        roi = hwc[y_offset:y_offset + new_h, x_offset:x_offset + new_w]
+        scale_vec, bias_vec = self._channel_affine(method, channels, custom_mean, custom_std)
+        swap = swap_rb and channels == 3
+        
+        if method == "none" and not swap and out.dtype == image.dtype and roi.shape[2] == channels \
+                and roi.strides[-1] == roi.itemsize and channels > 1:
+            # resize ลง out โดยตรง (เช่น uint8 NHWC สำหรับ quantized model)
+            cv2.resize(image, (new_w, new_h), dst=roi, interpolation=cv2.INTER_LINEAR)
+        else:
+            resized = cv2.resize(image, (new_w, new_h),
+                                 dst=self._get_scratch("resized", (new_h, new_w) + image.shape[2:],
+                                                       image.dtype),
+                                 interpolation=cv2.INTER_LINEAR)
+            if image.dtype == np.uint8:
+                self._write_with_lut(resized, roi, method, swap, custom_mean, custom_std)
+            else:
+                if resized.ndim == 2:
+                    resized = resized[:, :, None]
+                if swap:
+                    resized = resized[:, :, ::-1]
+                np.multiply(resized, scale_vec, out=roi, casting="unsafe")
+                if bias_vec is not None:
+                    np.add(roi, bias_vec, out=roi, casting="unsafe")
+        
+        self._fill_padding(hwc, transform, padding_color, scale_vec, bias_vec, swap)
+        return out, transform
+    
+    def write_resized_into(self,
+                           resized: np.ndarray,
+                           out: np.ndarray,
+                           transform: LetterboxTransform,
+                           method: str = "zero_one",
+                           layout: str = "NHWC",
+                           swap_rb: bool = True,
+                           padding_color: Tuple[int, int, int] = (114, 114, 114),
+                           custom_mean: Optional[np.ndarray] = None,
+                           custom_std: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        เขียนภาพ uint8 ที่ผู้เรียก resize เป็นขนาด letterbox แล้วลง out
+        พร้อมสลับสี normalize และเติม padding (ขั้นตอนหลัง resize ของ preprocess_into)
+        
+        ใช้เมื่อภาพย่อหนึ่งเป็นต้นทางของหลาย model input (เช่น FanOutPreprocessor)
+        จึงไม่แก้ไข resized
+        
+        Args:
+            resized: ภาพ (new_height, new_width, C) uint8 ตาม transform
+            out: buffer ปลายทาง (ดู preprocess_into)
+            transform: LetterboxTransform ของ out
+            method: วิธี normalize (ดู preprocess_into)
+            layout: "NHWC" หรือ "NCHW"
+            swap_rb: แปลง BGR เป็น RGB หรือไม่
+            padding_color: สีสำหรับ padding (B, G, R)
+            custom_mean: ค่า mean สำหรับ custom normalization
+            custom_std: ค่า std สำหรับ custom normalization
+            
+        Returns:
+            out
+            
+        Raises:
+            ValueError: หากขนาดของ resized หรือ out ไม่ตรงกับ transform
+        """
+        if resized.dtype != np.uint8 or resized.shape[:2] != (transform.new_height, transform.new_width):
+            raise ValueError(f"Resized image {resized.dtype} {resized.shape} does not match "
+                             f"letterbox size {transform.new_width}x{transform.new_height}")
+        channels = 1 if resized.ndim == 2 else resized.shape[2]
+        hwc = self._hwc_view(out, layout, (transform.target_height, transform.target_width, channels))
+        roi = hwc[transform.pad_y:transform.pad_y + transform.new_height,
+                  transform.pad_x:transform.pad_x + transform.new_width]
+        
+        swap = swap_rb and channels == 3
+        if swap:
+            # _write_with_lut สลับสีแบบ in-place จึงสลับลงสำเนาใน scratch แทน
+            swapped = self._get_scratch("swapped", resized.shape, np.uint8)
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=swapped)
+            resized = swapped
+        self._write_with_lut(resized, roi, method, False, custom_mean, custom_std)
+        
+        scale_vec, bias_vec = self._channel_affine(method, channels, custom_mean, custom_std)
+        self._fill_padding(hwc, transform, padding_color, scale_vec, bias_vec, swap)
+        return out
+    
+    def _fill_padding(self,
+                      hwc: np.ndarray,
+                      transform: LetterboxTransform,
+                      padding_color: Tuple[int, int, int],
+                      scale_vec: np.ndarray,
+                      bias_vec: Optional[np.ndarray],
+                      swap: bool) -> None:
+        """เขียนค่า padding (normalize แล้ว) เฉพาะบริเวณขอบรอบภาพที่ resize"""
+        if not transform.has_padding:
+            return
+        channels = hwc.shape[2]
+        x_offset, y_offset = transform.pad_x, transform.pad_y
+        new_w, new_h = transform.new_width, transform.new_height
+        # ภาพ 4 channels ที่คง alpha ไว้: channel ที่ไม่มีสีกำหนดใช้ 0
+        pad = np.asarray((tuple(padding_color) + (0,) * channels)[:channels], dtype=np.float32)
+        if swap:
+            pad = pad[::-1]
+        pad = pad * scale_vec + (bias_vec if bias_vec is not None else 0.0)
+        pad = pad.astype(hwc.dtype)
+        hwc[:y_offset] = pad
+        hwc[y_offset + new_h:] = pad
+        hwc[y_offset:y_offset + new_h, :x_offset] = pad
+        hwc[y_offset:y_offset + new_h, x_offset + new_w:] = pad
+    
+    @staticmethod
+    def split_yuv420(buffer: np.ndarray,
+                     width: int,
+                     height: int,
+                     fmt: str = "I420") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        แยก buffer YUV 4:2:0 แบบต่อเนื่อง (เช่น picamera2 "YUV420" หรือ GStreamer NV12)
+        เป็น Y plane (H, W) และ UV plane แบบ interleaved (H/2, W/2, 2) ลำดับ U, V
+        
+        Y plane เป็น view ของ buffer เสมอ; UV เป็น view สำหรับ NV12
+        และเป็นสำเนาขนาด 1/4 ของเฟรมสำหรับ NV21/I420/YV12
+        
+        Args:
+            buffer: array 1D หรือ 2D (H * 3 / 2, stride) ของ uint8
+            width: ความกว้างของภาพ
+            height: ความสูงของภาพ
+            fmt: "NV12", "NV21", "I420" (YUV420) หรือ "YV12"
+            
+        Returns:
+            (y, uv)
+            
+        Raises:
+            InvalidImageFormatError: หาก buffer หรือ format ไม่ถูกต้อง
+        """
+        fmt = fmt.upper()
+        if fmt == "YUV420":
+            fmt = "I420"
+        if buffer.dtype != np.uint8 or width % 2 or height % 2:
+            raise InvalidImageFormatError(f"YUV420 buffer must be uint8 with even size, "
+                                          f"got {buffer.dtype} {width}x{height}")
+        
+        stride = buffer.shape[1] if buffer.ndim == 2 else width
+        buffer = buffer.reshape(-1)
+        if buffer.size < stride * height * 3 // 2:
+            raise InvalidImageFormatError(f"YUV420 buffer too small for {width}x{height}")
+        
+        y = buffer[:stride * height].reshape(height, stride)[:, :width]
+        chroma = buffer[stride * height:stride * height * 3 // 2]
+        
+        if fmt in ("NV12", "NV21"):
+            uv = chroma.reshape(height // 2, stride // 2, 2)[:, :width // 2]
+            if fmt == "NV21":
+                uv = cv2.merge([uv[:, :, 1].copy(), uv[:, :, 0].copy()])
+        elif fmt in ("I420", "YV12"):
+            quarter = (stride // 2) * (height // 2)
+            first = chroma[:quarter].reshape(height // 2, stride // 2)[:, :width // 2]
+            second = chroma[quarter:2 * quarter].reshape(height // 2, stride // 2)[:, :width // 2]
+            uv = cv2.merge([first, second] if fmt == "I420" else [second, first])
+        else:
+            raise InvalidImageFormatError(f"Unsupported YUV420 format: {fmt}")
+        return y, uv
+    
+    def preprocess_yuv_into(self,
+                            y: np.ndarray,
+                            uv: np.ndarray,
+                            out: Optional[np.ndarray] = None,
+                            target_size: Optional[Tuple[int, int]] = None,
+                            method: str = "zero_one",
+                            layout: str = "NHWC",
+                            swap_rb: bool = True,
+                            maintain_aspect_ratio: bool = True,
+                            padding_color: Tuple[int, int, int] = (114, 114, 114),
+                            full_range: bool = False,
+                            custom_mean: Optional[np.ndarray] = None,
+                            custom_std: Optional[np.ndarray] = None,
+                            return_transform: bool = False
+                            ) -> Union[np.ndarray, Tuple[np.ndarray, LetterboxTransform]]:
+        """
+        เหมือน preprocess_into แต่รับ Y/UV planes (NV12) จากกล้องหรือ GStreamer โดยตรง
+        
+        resize Y และ UV ไปที่ขนาด letterbox ก่อน แล้วจึงแปลงสีที่ขนาดของ model input
+        จึงไม่มีการแปลงสีเต็มเฟรม (เทียบกับ YUV -> RGB -> BGR -> RGB ของเส้นทางเดิม)
+        
+        Args:
+            y: Y plane (H, W) uint8
+            uv: UV plane แบบ interleaved (H/2, W/2, 2) uint8 ลำดับ U, V (ดู split_yuv420)
+            out: buffer ปลายทาง (ดู preprocess_into)
+            target_size: ขนาดเป้าหมาย (width, height)
+            method: วิธี normalize (ดู preprocess_into)
+            layout: "NHWC" หรือ "NCHW"
+            swap_rb: True = output เป็น RGB, False = BGR
+            maintain_aspect_ratio: รักษา aspect ratio หรือไม่
+            padding_color: สีสำหรับ padding (B, G, R)
+            full_range: YUV เป็น full range (0-255) หรือไม่; False = BT.601 limited range (16-235)
+            custom_mean: ค่า mean สำหรับ custom normalization
+            custom_std: ค่า std สำหรับ custom normalization
+            return_transform: คืน LetterboxTransform มาด้วยหรือไม่
+            
+        Returns:
+            out หรือ (out, LetterboxTransform) ในพิกัดของ Y plane
+            
+        Raises:
+            PreprocessingError: หากไม่สามารถเตรียมภาพได้
+        """
+        try:
+            self._validate_yuv(y, uv)
+            
+            transform = self.get_letterbox_transform(y.shape, target_size, maintain_aspect_ratio)
+            if out is None:
+                out = self.allocate_input_buffer((transform.target_width, transform.target_height),
+                                                 3, layout)
+            hwc = self._hwc_view(out, layout, (transform.target_height, transform.target_width, 3))
+            roi = hwc[transform.pad_y:transform.pad_y + transform.new_height,
+                      transform.pad_x:transform.pad_x + transform.new_width]
+            
+            if method == "none" and out.dtype == np.uint8 and roi.strides[-1] == roi.itemsize:
+                # แปลงสีลง out โดยตรง (quantized model)
+                self._convert_yuv(y, uv, (transform.new_width, transform.new_height),
+                                  swap_rb, full_range, dst=roi)
+            else:
+                color = self._convert_yuv(y, uv, (transform.new_width, transform.new_height),
+                                          swap_rb, full_range)
+                # ภาพอยู่ในลำดับสีของ output แล้ว จึงไม่ต้องสลับใน LUT
+                self._write_with_lut(color, roi, method, False, custom_mean, custom_std)
+            
+            scale_vec, bias_vec = self._channel_affine(method, 3, custom_mean, custom_std)
+            self._fill_padding(hwc, transform, padding_color, scale_vec, bias_vec, swap_rb)
+            return (out, transform) if return_transform else out
+            
+        except Exception as e:
+            logger.error(f"YUV preprocessing failed: {e}")
+            raise PreprocessingError(f"Failed to preprocess YUV planes: {e}") from e
+    
+    def yuv_to_color(self,
+                     y: np.ndarray,
+                     uv: np.ndarray,
+                     size: Optional[Tuple[int, int]] = None,
+                     rgb: bool = False,
+                     full_range: bool = False,
+                     dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        แปลง Y/UV planes เป็นภาพสี (ใช้เมื่อจำเป็นต้องมีภาพ BGR เช่น บันทึกหรือวาดผล)
+        
+        Args:
+            y: Y plane (H, W)
+            uv: UV plane (H/2, W/2, 2) ลำดับ U, V
+            size: ขนาดผลลัพธ์ (width, height); None = ขนาดของ Y plane
+            rgb: True = RGB, False = BGR
+            full_range: YUV เป็น full range หรือไม่
+            dst: buffer ปลายทาง (height, width, 3) uint8; None = สร้างใหม่
+            
+        Returns:
+            ภาพสี (H, W, 3) uint8 (dst หากระบุ)
+        """
+        self._validate_yuv(y, uv)
+        size = size or (y.shape[1], y.shape[0])
+        if dst is None:
+            dst = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        elif dst.shape != (size[1], size[0], 3) or dst.dtype != np.uint8:
+            raise ValueError(f"dst must be uint8 {(size[1], size[0], 3)}, got {dst.dtype} {dst.shape}")
+        return self._convert_yuv(y, uv, size, rgb, full_range, dst=dst)
+    
+    def _validate_yuv(self, y: np.ndarray, uv: np.ndarray) -> None:
+        if not isinstance(y, np.ndarray) or not isinstance(uv, np.ndarray):
+            raise InvalidImageFormatError("Y and UV planes must be numpy arrays")
+        if y.dtype != np.uint8 or uv.dtype != np.uint8 or y.ndim != 2 or y.size == 0:
+            raise InvalidImageFormatError(f"Invalid Y plane: {y.shape} {y.dtype}")
+        if uv.shape != (y.shape[0] // 2, y.shape[1] // 2, 2):
+            raise InvalidImageFormatError(f"UV plane shape {uv.shape} does not match Y plane {y.shape}")
+    
+    def _convert_yuv(self,
+                     y: np.ndarray,
+                     uv: np.ndarray,
+                     size: Tuple[int, int],
+                     rgb: bool,
+                     full_range: bool,
+                     dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        resize Y/UV ไปที่ size แล้วแปลงเป็นภาพสี uint8 (ลง dst หรือ scratch buffer)
+        
+        ใช้ COLOR_YCrCb2BGR (BT.601 full range) กับ planes ลำดับ Y, Cr, Cb
+        สำหรับ limited range จะขยายช่วง Y (16-235) และ Cb/Cr (16-240) เป็น 0-255
+        ด้วย lookup table ก่อน ซึ่งให้สูตรเดียวกับ BT.601 limited range
+        (ต่างจาก COLOR_YUV2BGR_NV12 ไม่เกิน 2 ระดับจากการปัดเศษของ lookup table)
+        """
+        width, height = size
+        y_small = cv2.resize(y, size, dst=self._get_scratch("yuv_y", (height, width), np.uint8),
+                             interpolation=cv2.INTER_LINEAR)
+        # ขนาดเท่าภาพต้นฉบับ: ทำซ้ำ chroma แต่ละจุดเป็น 2x2 เหมือน COLOR_YUV2BGR_NV12
+        native = size == (y.shape[1], y.shape[0])
+        uv_small = cv2.resize(uv, size, dst=self._get_scratch("yuv_uv", (height, width, 2), np.uint8),
+                              interpolation=cv2.INTER_NEAREST if native else cv2.INTER_LINEAR)
+        if not full_range:
+            luma_lut, chroma_lut = self._yuv_range_luts()
+            cv2.LUT(y_small, luma_lut, dst=y_small)
+            cv2.LUT(uv_small, chroma_lut, dst=uv_small)
+        
+        # ลำดับ channel ของ COLOR_YCrCb2* คือ Y, Cr (V), Cb (U)
+        ycrcb = self._get_scratch("yuv", (height, width, 3), np.uint8)
+        cv2.mixChannels([y_small, uv_small], [ycrcb], [0, 0, 2, 1, 1, 2])
+        if dst is None:
+            dst = self._get_scratch("resized", (height, width, 3), np.uint8)
+        return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB if rgb else cv2.COLOR_YCrCb2BGR, dst=dst)
+    
+    def _yuv_range_luts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """lookup table สำหรับขยาย limited range (Y 16-235, UV 16-240) เป็น full range"""
+        luts = self._lut_cache.get("yuv_range")
+        if luts is None:
+            values = np.arange(256, dtype=np.float64)
+            luma = np.clip(np.rint((values - 16) * 255 / 219), 0, 255).astype(np.uint8)
+            chroma = np.clip(np.rint((values - 128) * 255 / 224 + 128), 0, 255).astype(np.uint8)
+            luts = (luma, chroma)
+            self._cache_lut("yuv_range", luts)
+        return luts
+    
+    def _hwc_view(self, out: np.ndarray, layout: str, expected_hwc: Tuple[int, int, int]) -> np.ndarray:
+        """คืน view แบบ (H, W, C) ของ buffer ปลายทาง ไม่ว่าจะเป็น layout ใด"""
+        if out.ndim == 4:
+            if out.shape[0] != 1:
+                raise ValueError(f"Output buffer batch dimension must be 1, got {out.shape[0]}")
+            out = out[0]
+        if out.ndim != 3:
+            raise ValueError(f"Output buffer must be 3D or 4D, got shape {out.shape}")
+        
+        if layout == "NHWC":
+            view = out
+        elif layout == "NCHW":
+            view = out.transpose(1, 2, 0)
+        else:
+            raise ValueError(f"Unknown layout: {layout}")
+        
+        if view.shape != expected_hwc:
+            raise ValueError(f"Output buffer shape {out.shape} does not match "
+                             f"{layout} target (H, W, C)={expected_hwc}")
+        return view
+    
+    def _get_scratch(self, name: str, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        """ดึง scratch buffer ของ thread ปัจจุบัน (สร้างใหม่เฉพาะเมื่อขนาดเปลี่ยน)"""
+        scratch = getattr(self._scratch, name, None)
+        if scratch is None or scratch.shape != shape or scratch.dtype != dtype:
+            scratch = np.empty(shape, dtype=dtype)
+            setattr(self._scratch, name, scratch)
+        return scratch
+    
+    def _write_with_lut(self,
+                        resized: np.ndarray,
+                        roi: np.ndarray,
+                        method: str,
+                        swap: bool,
+                        custom_mean: Optional[np.ndarray],
+                        custom_std: Optional[np.ndarray]) -> None:
+        """
+        เขียนภาพ uint8 ที่ resize แล้วลง roi (H, W, C view ของ out) ผ่าน lookup table
+        
+        roi แบบ interleaved (NHWC) ใช้ cv2.LUT ครั้งเดียวทั้งภาพ
+        roi แบบ planar (NCHW) ใช้ LUT ทีละ channel ลงแต่ละ plane
+        """
+        channels = roi.shape[2]
+        lut = self.get_normalization_lut(method, channels, custom_mean, custom_std, dtype=roi.dtype)
+        
+        if channels == 1:
+            cv2.LUT(resized, lut, dst=roi[:, :, 0])
+        elif roi.strides[-1] == roi.itemsize:
+            if swap:
+                # สลับสีบน uint8 scratch (in-place) ถูกกว่าสลับบน float
+                cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=resized)
+            cv2.LUT(resized, lut, dst=roi)
+        else:
+            plane = self._get_scratch("plane", resized.shape[:2], resized.dtype)
+            # key เดียวกับ LUT ต้นทาง (id ของ array ถูกใช้ซ้ำได้หลัง LUT เดิมถูกล้างออกจาก cache)
+            planar_key = ("planar",) + self._lut_key(method, channels, custom_mean, custom_std, roi.dtype)
+            plane_luts = self._lut_cache.get(planar_key)
+            if plane_luts is None:
+                plane_luts = [np.ascontiguousarray(lut[:, :, c]) for c in range(channels)]
+                self._cache_lut(planar_key, plane_luts)
+            for c in range(channels):
+                source_channel = channels - 1 - c if swap else c
+                cv2.extractChannel(resized, source_channel, dst=plane)
+                cv2.LUT(plane, plane_luts[c], dst=roi[:, :, c])
+    
+    def get_normalization_lut(self,
+                              method: str = "imagenet",
+                              channels: int = 3,
+                              custom_mean: Optional[np.ndarray] = None,
+                              custom_std: Optional[np.ndarray] = None,
+                              dtype: np.dtype = np.float32) -> np.ndarray:
+        """
+        ดึง lookup table สำหรับ normalize ภาพ uint8 (คำนวณครั้งเดียวต่อ method/mean/std)
+        
+        Args:
+            method: วิธี normalize ("zero_one", "neg_one_one", "imagenet", "custom", "none")
+            channels: จำนวน channels
+            custom_mean: ค่า mean สำหรับ custom normalization
+            custom_std: ค่า std สำหรับ custom normalization
+            dtype: ชนิดข้อมูลของผลลัพธ์
+            
+        Returns:
+            table (256, 1, C) สำหรับหลาย channels หรือ (256, 1) สำหรับ channel เดียว
+            (ค่าใน channel c ใช้กับ channel c ของภาพ input)
+        """
+        dtype = np.dtype(dtype)
+        key = self._lut_key(method, channels, custom_mean, custom_std, dtype)
+        
+        lut = self._lut_cache.get(key)
+        if lut is None:
+            scale, bias = self._channel_affine(method, channels, custom_mean, custom_std)
+            table = np.arange(256, dtype=np.float64)[:, None] * scale
+            if bias is not None:
+                table = table + bias
+            if np.issubdtype(dtype, np.integer):
+                info = np.iinfo(dtype)
+                table = np.clip(np.rint(table), info.min, info.max)
+            shape = (256, 1) if channels == 1 else (256, 1, channels)
+            lut = np.ascontiguousarray(table.reshape(shape), dtype=dtype)
+            self._cache_lut(key, lut)
+            logger.debug(f"Normalization LUT built: method={method}, channels={channels}")
+        return lut
+    
+    @staticmethod
+    def _lut_key(method: str,
+                 channels: int,
+                 custom_mean: Optional[np.ndarray],
+                 custom_std: Optional[np.ndarray],
+                 dtype: np.dtype) -> tuple:
+        """key ของ LUT ใน _lut_cache ตาม method / channels / dtype / mean / std"""
+        return (method, channels, np.dtype(dtype).str,
+                None if custom_mean is None else tuple(np.ravel(custom_mean).tolist()),
+                None if custom_std is None else tuple(np.ravel(custom_std).tolist()))
+    
+    def _cache_lut(self, key: Any, value: Any) -> None:
+        """เก็บ LUT ลง cache (ล้าง cache เมื่อเต็มเหมือน _transform_cache)"""
+        if len(self._lut_cache) >= self.max_cached_luts:
+            self._lut_cache.clear()
+        self._lut_cache[key] = value
+    
+    def _channel_affine(self,
+                        method: str,
+                        channels: int,
+                        custom_mean: Optional[np.ndarray] = None,
+                        custom_std: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        แปลงวิธี normalize เป็น scale/bias ต่อ channel: y = x * scale + bias
+        
+        Returns:
+            (scale, bias) เป็น float32 ขนาด (C,) โดย bias เป็น None หากเป็นศูนย์
+        """
+        ones = np.ones(channels, dtype=np.float32)
+        if method == "none":
+            return ones, None
+        if method == "zero_one":
+            return ones / 255.0, None
+        if method == "neg_one_one":
+            return ones * (2.0 / 255.0), -ones
+        if method == "imagenet":
+            if channels != 3:
+                # เหมือน normalize(): ใช้ mean/std เฉพาะภาพ 3 channels
+                return ones / 255.0, None
+            mean, std = self.mean, self.std
+        elif method == "custom":
+            if custom_mean is None or custom_std is None:
+                raise ValueError("custom_mean and custom_std must be provided for custom normalization")
+            mean = np.broadcast_to(np.ravel(custom_mean).astype(np.float64), (channels,))
+            std = np.broadcast_to(np.ravel(custom_std).astype(np.float64), (channels,))
+        else:
+            raise ValueError(f"Unknown normalization method: {method}")
+        
+        scale = (1.0 / (255.0 * std)).astype(np.float32)
+        bias = (-mean / std).astype(np.float32)
+        return scale, bias
+    
     def convert_color_space(self, 
                            image: np.ndarray, 
                            source: str = "BGR",
@@ -369,98 +1133,150 @@ class ImagePreprocessor:
             logger.error(f"Noise reduction failed: {e}")
             raise PreprocessingError(f"Failed to reduce noise: {e}") from e
     
-    def preprocess_batch(self, 
-                        images: List[np.ndarray],
-                        target_size: Optional[Tuple[int, int]] = None,
-                        normalize_method: str = "imagenet") -> np.ndarray:
+    def preprocess_batch_into(self,
+                              images: List[np.ndarray],
+                              out: Optional[np.ndarray] = None,
+                              target_size: Optional[Tuple[int, int]] = None,
+                              method: str = "imagenet",
+                              layout: str = "NHWC",
+                              swap_rb: bool = True,
+                              dtype: np.dtype = np.float32,
+                              padding_color: Tuple[int, int, int] = (114, 114, 114)
+                              ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        ประมวลผล batch ของภาพ
+        ประมวลผล batch ลงใน buffer (N, H, W, C) / (N, C, H, W) ที่ allocate ครั้งเดียว
+        โดยแต่ละภาพถูกเขียนลง slot ของตัวเองจาก thread pool (OpenCV/NumPy ปล่อย GIL)
+        
+        ภาพที่ประมวลผลไม่สำเร็จจะไม่ถูกตัดทิ้ง แต่ slot จะถูกเติมศูนย์และ
+        valid mask เป็น False เพื่อให้ index ตรงกับเฟรมของผู้เรียก
         
         Args:
-            images: รายการภาพ
-            target_size: ขนาดเป้าหมาย
-            normalize_method: วิธี normalize
+            images: รายการภาพ (BGR format)
+            out: buffer ปลายทาง; None = สร้างใหม่ (len(images) ภาพ)
+            target_size: ขนาดเป้าหมาย (width, height)
+            method: วิธี normalize (ดู preprocess_into)
+            layout: "NHWC" หรือ "NCHW"
+            swap_rb: แปลง BGR เป็น RGB หรือไม่
+            dtype: ชนิดข้อมูลของ buffer เมื่อสร้างใหม่ (np.float32 หรือ np.uint8)
+            padding_color: สีสำหรับ padding (B, G, R)
             
         Returns:
-            numpy array ของภาพที่ประมวลผลแล้ว
+            (batch, valid_mask) โดย valid_mask เป็น bool array ขนาด (N,)
+            
+        Raises:
+            PreprocessingError: หาก input หรือ buffer ไม่ถูกต้อง
         """
         try:
             if not images:
                 raise ValueError("No images provided")
             
             target_size = target_size or self.target_size
-            processed_images = []
+            if out is None:
+                out = self.allocate_input_buffer(target_size, 3, layout, dtype, batch_size=len(images))
+            elif out.shape[0] < len(images):
+                raise ValueError(f"Output buffer holds {out.shape[0]} images, got {len(images)}")
+            channels = out.shape[3] if layout == "NHWC" else out.shape[1]
             
-            for i, image in enumerate(images):
+            def fill_slot(index: int) -> bool:
+                image = images[index]
                 try:
-                    # Resize with padding
-                    resized = self.resize_with_padding(image, target_size)
-                    
-                    # Normalize
-                    normalized = self.normalize(resized, method=normalize_method)
-                    
-                    processed_images.append(normalized)
-                    
+                    if channels == 3 and isinstance(image, np.ndarray) and image.ndim == 2:
+                        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+                    self.preprocess_into(image, out=out[index], target_size=target_size,
+                                         method=method, layout=layout, swap_rb=swap_rb,
+                                         padding_color=padding_color)
+                    return True
                 except Exception as e:
-                    logger.warning(f"Failed to process image {i}: {e}")
-                    continue
+                    logger.warning(f"Failed to process image {index}: {e}")
+                    out[index] = 0
+                    return False
             
-            if not processed_images:
-                raise PreprocessingError("No images were successfully processed")
-            
-            # Stack เป็น batch
-            batch = np.stack(processed_images, axis=0)
-            logger.info(f"Processed batch of {len(processed_images)} images: {batch.shape}")
+            if len(images) == 1 or self.num_workers <= 1:
+                valid = [fill_slot(i) for i in range(len(images))]
+            else:
+                valid = list(self._get_executor().map(fill_slot, range(len(images))))
             
-            return batch
+            valid_mask = np.array(valid, dtype=bool)
+            logger.debug(f"Processed batch into {out.shape}: {int(valid_mask.sum())}/{len(images)} valid")
+            return out, valid_mask
             
         except Exception as e:
             logger.error(f"Batch preprocessing failed: {e}")
             raise PreprocessingError(f"Failed to preprocess batch: {e}") from e
     
+    def preprocess_batch(self, 
+                        images: List[np.ndarray],
+                        target_size: Optional[Tuple[int, int]] = None,
+                        normalize_method: str = "imagenet",
+                        return_mask: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        ประมวลผล batch ของภาพ
+        
+        Args:
+            images: รายการภาพ
+            target_size: ขนาดเป้าหมาย
+            normalize_method: วิธี normalize
+            return_mask: คืน (batch, valid_mask) แบบ index ตรงกับ images
+                         แทนการตัดภาพที่ล้มเหลวทิ้ง
+            
+        Returns:
+            numpy array float32 ของภาพที่ประมวลผลแล้ว หรือ (batch, valid_mask)
+        """
+        # normalize() สลับเป็น RGB เฉพาะวิธี imagenet
+        batch, valid_mask = self.preprocess_batch_into(
+            images, target_size=target_size, method=normalize_method,
+            swap_rb=(normalize_method == "imagenet"))
+        
+        if not valid_mask.any():
+            raise PreprocessingError("No images were successfully processed")
+        
+        if return_mask:
+            return batch, valid_mask
+        
+        if not valid_mask.all():
+            batch = batch[valid_mask]
+        logger.info(f"Processed batch of {len(batch)} images: {batch.shape}")
+        return batch
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """สร้าง thread pool แบบ lazy (ใช้ร่วมกันทุก batch)"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.num_workers,
+                                                        thread_name_prefix="preprocess")
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """ปิด thread pool ของ batch preprocessing"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+    
     def preprocess_for_model(self, 
                             image: np.ndarray,
                             model_type: str = "yolo") -> np.ndarray:
         """
         เตรียมภาพสำหรับ model เฉพาะ
         
+        ใช้ PreprocessPipeline ที่ compile จาก preset ของ model_type
+        (ดู PIPELINE_PRESETS ใน pipeline.py; ชื่อที่ไม่รู้จักใช้ preset "default")
+        ภาพ 4 channels: ssd/resnet/efficientnet คืน 4 channels เหมือนเดิม
+        ส่วน yolo/default ตัด alpha เหลือ 3 channels
+        
         Args:
             image: ภาพ input
-            model_type: ประเภท model ("yolo", "ssd", "resnet", "efficientnet")
+            model_type: ประเภท model ("yolo", "ssd", "resnet", "efficientnet" หรือ preset ที่ลงทะเบียนไว้)
             
         Returns:
             ภาพที่เตรียมสำหรับ model
         """
         try:
-            if model_type.lower() == "yolo":
-                # YOLO preprocessing
-                resized = self.resize_with_padding(image, self.target_size)
-                normalized = self.normalize(resized, method="zero_one")
-                
-                # YOLO expects RGB format
-                if len(normalized.shape) == 3 and normalized.shape[2] == 3:
-                    normalized = cv2.cvtColor(normalized, cv2.COLOR_BGR2RGB)
-                
-                # Add batch dimension
-                processed = np.expand_dims(normalized, axis=0)
-                
-            elif model_type.lower() == "ssd":
-                # SSD preprocessing
-                resized = self.resize_with_padding(image, self.target_size, maintain_aspect_ratio=False)
-                normalized = self.normalize(resized, method="zero_one")
-                processed = np.expand_dims(normalized, axis=0)
-                
-            elif model_type.lower() in ["resnet", "efficientnet"]:
-                # ImageNet-based models
-                resized = self.resize_with_padding(image, self.target_size, maintain_aspect_ratio=False)
-                normalized = self.normalize(resized, method="imagenet")
-                processed = np.expand_dims(normalized, axis=0)
-                
-            else:
-                # Default preprocessing
-                resized = self.resize_with_padding(image, self.target_size)
-                normalized = self.normalize(resized, method="zero_one")
-                processed = np.expand_dims(normalized, axis=0)
+            processed = self.get_pipeline(model_type).run(image)
+            if image.ndim == 2 and processed.ndim == 4 and processed.shape[-1] == 1:
+                # ภาพ grayscale คืน shape เดิม (1, H, W)
+                processed = processed[..., 0]
             
             logger.debug(f"Image preprocessed for {model_type} model: {processed.shape}")
             return processed
@@ -469,6 +1285,25 @@ class ImagePreprocessor:
             logger.error(f"Model-specific preprocessing failed: {e}")
             raise PreprocessingError(f"Failed to preprocess for {model_type}: {e}") from e
     
+    def get_pipeline(self, model_type: str):
+        """
+        ดึง PreprocessPipeline ของ preset (compile ครั้งแรกแล้วเก็บไว้ใช้ซ้ำ)
+        
+        Args:
+            model_type: ชื่อ preset
+            
+        Returns:
+            PreprocessPipeline
+        """
+        from .pipeline import PreprocessPipeline
+        
+        key = model_type.lower()
+        pipeline = self._pipelines.get(key)
+        if pipeline is None:
+            pipeline = PreprocessPipeline.from_preset(key, preprocessor=self)
+            self._pipelines[key] = pipeline
+        return pipeline
+    
     def get_preprocessing_info(self) -> dict:
         """
         ดึงข้อมูลการตั้งค่าปัจจุบัน
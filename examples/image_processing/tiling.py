@@ -0,0 +1,295 @@
+"""
+PWD Vision Works - Tiled Inference
+แบ่งเฟรมความละเอียดสูงเป็น tile ที่ซ้อนทับกันแล้วเขียนลง batch tensor เดียว
+สำหรับตรวจจับวัตถุขนาดเล็ก (เช่น ป้ายทะเบียนระยะไกล) โดยไม่ต้องเพิ่มความละเอียดของโมเดล
+และรวมผลตรวจจับของทุก tile กลับเป็นพิกัดของเฟรมด้วย NMS ข้าม tile
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import math
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .preprocessor import ImagePreprocessor, LetterboxTransform
+from .nms import batched_nms
+from ..utils.exceptions import PreprocessingError, PostprocessingError
+
+logger = logging.getLogger(__name__)
+
+
+def _axis_starts(start: int, length: int, tile: int, overlap: int) -> List[int]:
+    """ตำแหน่งเริ่มของ tile บนแกนเดียว (กระจายเท่า ๆ กันและ tile สุดท้ายชิดขอบ)"""
+    if length <= tile:
+        return [start]
+    stride = tile - overlap
+    count = math.ceil((length - overlap) / stride)
+    step = (length - tile) / (count - 1)
+    return [start + int(round(i * step)) for i in range(count)]
+
+
+class TileLayout:
+    """
+    ตำแหน่งของ tile แต่ละ slot ใน batch พร้อม LetterboxTransform
+    สำหรับแปลงพิกัดจาก model input ของ tile กลับเป็นพิกัดของเฟรม
+    """
+
+    def __init__(self,
+                 frame_shape: Tuple[int, ...],
+                 regions: np.ndarray,
+                 transforms: List[LetterboxTransform]):
+        """
+        Args:
+            frame_shape: ขนาดของเฟรม (height, width, ...)
+            regions: array ขนาด (N, 4) ของ (x1, y1, x2, y2) ในพิกัดเฟรม
+            transforms: LetterboxTransform ของแต่ละ tile (พิกัด tile <-> model input)
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.regions = regions
+        self.transforms = transforms
+        self.offsets = regions[:, :2].astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def boxes_to_frame(self, boxes: np.ndarray, tile_index: int, clip: bool = True) -> np.ndarray:
+        """
+        แปลง boxes จากพิกัด model input ของ tile เป็นพิกัดเฟรม
+
+        Args:
+            boxes: array (..., 4) แบบ (x1, y1, x2, y2) ในพิกัด model input
+            tile_index: index ของ tile ใน batch
+            clip: จำกัดให้อยู่ในเฟรม
+
+        Returns:
+            boxes ในพิกัดเฟรม (float32)
+        """
+        boxes = self.transforms[tile_index].boxes_to_source(boxes, clip=True)
+        boxes = boxes + np.tile(self.offsets[tile_index], 2)
+        if clip:
+            height, width = self.frame_shape[:2]
+            np.clip(boxes, 0, [width, height, width, height], out=boxes)
+        return boxes
+
+    def __repr__(self) -> str:
+        return f"TileLayout(frame={self.frame_shape[:2]}, tiles={len(self)})"
+
+
+class TilingPreprocessor:
+    """
+    สร้าง tile ที่ซ้อนทับกัน (จำกัดเฉพาะ ROI ได้) ลงใน batch buffer เดียว
+    และรวมผลตรวจจับจากทุก tile ด้วย NMS ข้าม tile
+    """
+
+    def __init__(self,
+                 tile_size: Tuple[int, int] = (640, 640),
+                 overlap: float = 0.2,
+                 roi: Optional[Tuple[int, int, int, int]] = None,
+                 include_full_frame: bool = True,
+                 model_size: Optional[Tuple[int, int]] = None,
+                 preprocessor: Optional[ImagePreprocessor] = None):
+        """
+        เริ่มต้น TilingPreprocessor
+
+        Args:
+            tile_size: ขนาด tile ในพิกัดเฟรม (width, height)
+            overlap: สัดส่วนการซ้อนทับระหว่าง tile (0 - 0.9) หรือจำนวน pixel หากมากกว่า 1
+            roi: บริเวณที่ต้องการแบ่ง tile (x1, y1, x2, y2) เช่น ช่องจราจร; None = ทั้งเฟรม
+            include_full_frame: เพิ่มเฟรมเต็มที่ letterbox แล้วเป็น slot แรก (สำหรับวัตถุขนาดใหญ่)
+            model_size: ขนาด model input (width, height); None = เท่ากับ tile_size
+            preprocessor: ImagePreprocessor ที่ใช้ร่วมกัน (cache geometry และ thread pool)
+        """
+        if overlap < 0 or (overlap >= 0.9 and overlap < 1):
+            raise ValueError(f"Invalid tile overlap: {overlap}")
+
+        self.tile_size = tuple(tile_size)
+        self.overlap = overlap
+        self.roi = tuple(roi) if roi is not None else None
+        self.include_full_frame = include_full_frame
+        self.model_size = tuple(model_size) if model_size is not None else self.tile_size
+        self.preprocessor = preprocessor or ImagePreprocessor(self.model_size)
+        self._region_cache = {}
+
+    def _overlap_pixels(self, tile: int) -> int:
+        if self.overlap >= 1:
+            return min(int(self.overlap), tile - 1)
+        return int(round(tile * self.overlap))
+
+    def compute_regions(self, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        คำนวณตำแหน่ง tile สำหรับขนาดเฟรมนี้ (cache ตามขนาดเฟรม)
+
+        Args:
+            frame_shape: ขนาดของเฟรม (height, width, ...)
+
+        Returns:
+            array ขนาด (N, 4) ของ (x1, y1, x2, y2)
+        """
+        height, width = frame_shape[:2]
+        key = (height, width)
+        regions = self._region_cache.get(key)
+        if regions is not None:
+            return regions
+
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            x1, x2 = max(0, int(x1)), min(width, int(x2))
+            y1, y2 = max(0, int(y1)), min(height, int(y2))
+            if x2 <= x1 or y2 <= y1:
+                raise ValueError(f"ROI {self.roi} is outside the frame {width}x{height}")
+        else:
+            x1, y1, x2, y2 = 0, 0, width, height
+
+        tile_w = min(self.tile_size[0], x2 - x1)
+        tile_h = min(self.tile_size[1], y2 - y1)
+        xs = _axis_starts(x1, x2 - x1, tile_w, self._overlap_pixels(tile_w))
+        ys = _axis_starts(y1, y2 - y1, tile_h, self._overlap_pixels(tile_h))
+
+        tiles = [(x, y, x + tile_w, y + tile_h) for y in ys for x in xs]
+        if self.include_full_frame:
+            tiles.insert(0, (0, 0, width, height))
+
+        regions = np.array(tiles, dtype=np.int32)
+        self._region_cache[key] = regions
+        logger.debug(f"Tiling {width}x{height}: {len(regions)} regions ({len(xs)}x{len(ys)} grid)")
+        return regions
+
+    def num_tiles(self, frame_shape: Tuple[int, ...]) -> int:
+        """จำนวน slot ใน batch สำหรับขนาดเฟรมนี้"""
+        return len(self.compute_regions(frame_shape))
+
+    def allocate_batch(self,
+                       frame_shape: Tuple[int, ...],
+                       layout: str = "NHWC",
+                       dtype: np.dtype = np.float32) -> np.ndarray:
+        """
+        สร้าง batch buffer สำหรับ tile ทั้งหมดของเฟรมขนาดนี้
+
+        Args:
+            frame_shape: ขนาดของเฟรม (height, width, ...)
+            layout: "NHWC" หรือ "NCHW"
+            dtype: ชนิดข้อมูล
+
+        Returns:
+            buffer ขนาด (N, ...) สำหรับ prepare
+        """
+        return self.preprocessor.allocate_input_buffer(self.model_size, 3, layout, dtype,
+                                                       batch_size=self.num_tiles(frame_shape))
+
+    def prepare(self,
+                image: np.ndarray,
+                out: Optional[np.ndarray] = None,
+                method: str = "imagenet",
+                layout: str = "NHWC",
+                swap_rb: bool = True,
+                dtype: np.dtype = np.float32,
+                padding_color: Tuple[int, int, int] = (114, 114, 114)
+                ) -> Tuple[np.ndarray, TileLayout]:
+        """
+        เขียน tile ทั้งหมดของเฟรมลงใน batch buffer
+
+        Args:
+            image: เฟรม (BGR format)
+            out: batch buffer จาก allocate_batch (None = สร้างใหม่)
+            method: วิธี normalize (ดู ImagePreprocessor.preprocess_into)
+            layout: "NHWC" หรือ "NCHW"
+            swap_rb: แปลง BGR เป็น RGB หรือไม่
+            dtype: ชนิดข้อมูลเมื่อสร้าง buffer ใหม่
+            padding_color: สีสำหรับ padding
+
+        Returns:
+            (batch, TileLayout)
+
+        Raises:
+            PreprocessingError: หากเตรียม tile ไม่สำเร็จ
+        """
+        try:
+            self.preprocessor.validate_image(image)
+            regions = self.compute_regions(image.shape)
+            if out is None:
+                out = self.allocate_batch(image.shape, layout, dtype)
+            elif out.shape[0] < len(regions):
+                raise ValueError(f"Batch buffer holds {out.shape[0]} tiles, need {len(regions)}")
+
+            # crop เป็น view ของเฟรม (ไม่คัดลอก) แล้วให้ preprocessor เขียนลงแต่ละ slot
+            crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+            out, valid = self.preprocessor.preprocess_batch_into(
+                crops, out=out, target_size=self.model_size, method=method, layout=layout,
+                swap_rb=swap_rb, padding_color=padding_color)
+            if not valid.all():
+                raise ValueError(f"{int((~valid).sum())} tiles failed to preprocess")
+
+            transforms = [self.preprocessor.get_letterbox_transform(crop.shape, self.model_size)
+                          for crop in crops]
+            return out, TileLayout(image.shape, regions, transforms)
+
+        except PreprocessingError:
+            raise
+        except Exception as e:
+            logger.error(f"Tiling failed: {e}")
+            raise PreprocessingError(f"Failed to prepare tiles: {e}") from e
+
+    def merge(self,
+              layout: TileLayout,
+              tile_detections: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+              iou_threshold: float = 0.5,
+              metric: str = "ios",
+              max_detections: Optional[int] = None
+              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        รวมผลตรวจจับของทุก tile เป็นพิกัดเฟรมแล้วทำ NMS ข้าม tile (แยกตาม class)
+
+        Args:
+            layout: TileLayout จาก prepare
+            tile_detections: ผลของแต่ละ tile เรียงตาม slot เป็น (boxes, scores, class_ids)
+                             โดย boxes อยู่ในพิกัด model input แบบ (x1, y1, x2, y2)
+            iou_threshold: ค่า overlap ที่ถือว่าเป็นวัตถุเดียวกัน
+            metric: "ios" (เหมาะกับ box ที่ถูกตัดที่ขอบ tile) หรือ "iou"
+            max_detections: จำนวนผลลัพธ์สูงสุด
+
+        Returns:
+            (boxes, scores, class_ids) ในพิกัดเฟรม
+        """
+        try:
+            if len(tile_detections) != len(layout):
+                raise ValueError(f"Expected detections for {len(layout)} tiles, got {len(tile_detections)}")
+
+            all_boxes, all_scores, all_classes = [], [], []
+            for index, (boxes, scores, class_ids) in enumerate(tile_detections):
+                if len(boxes) == 0:
+                    continue
+                all_boxes.append(layout.boxes_to_frame(np.asarray(boxes, dtype=np.float32), index))
+                all_scores.append(np.asarray(scores, dtype=np.float32))
+                all_classes.append(np.asarray(class_ids, dtype=np.int64))
+
+            if not all_boxes:
+                return (np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int64))
+
+            boxes = np.concatenate(all_boxes)
+            scores = np.concatenate(all_scores)
+            class_ids = np.concatenate(all_classes)
+            keep = batched_nms(boxes, scores, class_ids, iou_threshold, max_detections, metric)
+            return boxes[keep], scores[keep], class_ids[keep]
+
+        except Exception as e:
+            logger.error(f"Tile merge failed: {e}")
+            raise PostprocessingError(f"Failed to merge tile detections: {e}") from e
+
+    def get_tiling_info(self, frame_shape: Tuple[int, ...]) -> dict:
+        """
+        ดึงข้อมูลการแบ่ง tile
+
+        Returns:
+            Dictionary ของการตั้งค่าและตำแหน่ง tile
+        """
+        return {
+            "tile_size": self.tile_size,
+            "model_size": self.model_size,
+            "overlap": self.overlap,
+            "roi": self.roi,
+            "include_full_frame": self.include_full_frame,
+            "regions": self.compute_regions(frame_shape).tolist(),
+        }
@@ -17,6 +17,20 @@ import numpy as np
     text_score = similar("ABC123", "ABC124")
 """
 
+def _gray_thumbnail(img, size=(128, 128)):
+    """Gray 128x128 image; reuses the cached view when img is a pwd_library Frame."""
+    if hasattr(img, "thumbnail"):
+        return img.thumbnail(size, gray=True)
+    return cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), size)
+
+def _channel_histogram(img, size=(128, 128)):
+    """Normalized channel-0 histogram; reuses the cached view when img is a pwd_library Frame."""
+    if hasattr(img, "histogram"):
+        return img.histogram(channel=0, size=size, normalize=True)
+    img = cv2.resize(img, size)
+    hist = cv2.calcHist([img], [0], None, [256], [0,256])
+    return cv2.normalize(hist, hist).flatten()
+
 def ssim_similarity(img1, img2):
     """
     Compare two images using Structural Similarity Index (SSIM).
@@ -25,10 +39,8 @@ def ssim_similarity(img1, img2):
     if img1 is None or img2 is None:
         return 0
     try:
-        img1_gray = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-        img2_gray = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
-        img1_gray = cv2.resize(img1_gray, (128, 128))
-        img2_gray = cv2.resize(img2_gray, (128, 128))
+        img1_gray = _gray_thumbnail(img1)
+        img2_gray = _gray_thumbnail(img2)
         score, _ = ssim(img1_gray, img2_gray, full=True)
         return score
     except Exception as e:
@@ -45,13 +57,9 @@ def compare_images(img1, img2):
     # Resize to the same shape
     h, w = 128, 128
     try:
-        img1 = cv2.resize(img1, (w, h))
-        img2 = cv2.resize(img2, (w, h))
         # Use histogram comparison
-        hist1 = cv2.calcHist([img1], [0], None, [256], [0,256])
-        hist2 = cv2.calcHist([img2], [0], None, [256], [0,256])
-        hist1 = cv2.normalize(hist1, hist1).flatten()
-        hist2 = cv2.normalize(hist2, hist2).flatten()
+        hist1 = _channel_histogram(img1, (w, h))
+        hist2 = _channel_histogram(img2, (w, h))
         score = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
         return score if 0 <= score <= 1 else max(0, min(1, score))
     except Exception as e:
@@ -0,0 +1,478 @@
+"""
+PWD Vision Works - Frame Admission Control
+ตัวคัดเฟรมระหว่างกล้องกับ inference: เมื่อ inference/OCR ทำงานไม่ทัน จะทิ้งหรือข้ามเฟรมตาม policy
+(latest-only, every-Nth, motion-priority) แทนการประมวลผลเฟรมเก่าต่อคิวจน latency โตไม่จำกัด
+พร้อมติดตามอายุเฟรมในคิว, เวลาให้บริการ และจำนวนเฟรมที่ถูกทิ้งแยกตามเหตุผล
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import math
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Deque, Union
+
+import cv2
+import numpy as np
+
+from .telemetry import LatencyHistogram
+from ..utils.exceptions import InferenceError
+
+logger = logging.getLogger(__name__)
+
+# เหตุผลของการทิ้งเฟรม
+SHED_SUPERSEDED = "superseded"      # มีเฟรมใหม่กว่าในคิว (latest-only)
+SHED_DECIMATED = "decimated"        # ไม่ใช่เฟรมที่ N (every-Nth)
+SHED_NO_MOTION = "no_motion"        # ภาพไม่เปลี่ยนจากเฟรมที่รับล่าสุด (motion-priority)
+SHED_LOW_MOTION = "low_motion"      # คิวเต็มและเฟรมนี้เคลื่อนไหวน้อยที่สุด (motion-priority)
+SHED_QUEUE_FULL = "queue_full"      # คิวเต็ม (เฟรมเก่าสุดถูกทิ้ง)
+SHED_STALE = "stale"                # อยู่ในคิวนานเกิน max_age
+SHED_DEADLINE = "deadline"          # อายุ + เวลาให้บริการที่คาด เกิน max_latency
+SHED_CLOSED = "closed"              # controller ถูกปิด
+
+# ndarray -> grayscale ตามจำนวน channel (ndarray ไม่มี color space จึงถือเป็นลำดับ BGR)
+_GRAY_CODES = {
+    3: cv2.COLOR_BGR2GRAY,
+    4: cv2.COLOR_BGRA2GRAY,
+}
+
+
+class AdmittedFrame:
+    """
+    เฟรมที่ผ่านการคัดเลือก
+
+    Attributes:
+        frame: เฟรม
+        tag: ข้อมูลประจำเฟรมจากผู้ส่ง
+        seq: ลำดับที่ของเฟรมที่ถูก offer
+        timestamp: เวลาที่ถ่ายภาพ (time.monotonic)
+        queue_age: เวลาที่อยู่ในคิวก่อนถูกรับ (วินาที)
+        motion: คะแนนการเคลื่อนไหว (motion-priority เท่านั้น)
+        prepared: ผลของ policy.prepare ที่คำนวณก่อนเข้า lock ของ controller
+    """
+
+    __slots__ = ("frame", "tag", "seq", "timestamp", "offered_at", "queue_age", "motion", "prepared", "_start")
+
+    def __init__(self, frame: Any, tag: Any, seq: int, timestamp: float, motion: Optional[float] = None):
+        self.frame = frame
+        self.tag = tag
+        self.seq = seq
+        self.timestamp = timestamp
+        self.offered_at = time.monotonic()
+        self.queue_age = 0.0
+        self.motion = motion
+        self.prepared = None
+        self._start = None
+
+    @property
+    def age(self) -> float:
+        """อายุของเฟรมนับจากเวลาถ่าย (วินาที)"""
+        return time.monotonic() - self.timestamp
+
+    def __repr__(self) -> str:
+        return f"AdmittedFrame(seq={self.seq}, age={self.age * 1000:.1f}ms)"
+
+
+class AdmissionPolicy:
+    """
+    policy ของการคัดเฟรม
+
+    on_offer ตัดสินว่าจะรับเฟรมเข้าคิวหรือไม่ (คืนเหตุผลเมื่อทิ้ง)
+    select เลือกเฟรมจากคิวให้ผู้ประมวลผล และคืนเฟรมที่ถูกข้ามพร้อมเหตุผล
+    """
+
+    name = "fifo"
+
+    def prepare(self, frame: Any) -> Any:
+        """งานต่อเฟรมที่ไม่ขึ้นกับสถานะของ policy (เรียกนอก lock ของ controller ผลอยู่ใน entry.prepared)"""
+        return None
+
+    def on_offer(self, entry: AdmittedFrame, controller: "AdmissionController") -> Optional[str]:
+        return None
+
+    def select(self, queue: Deque[AdmittedFrame], controller: "AdmissionController"):
+        """คืน (เฟรมที่เลือก, [(เฟรมที่ทิ้ง, เหตุผล)])"""
+        return queue.popleft(), []
+
+    def evict(self, queue: Deque[AdmittedFrame]) -> AdmittedFrame:
+        """เฟรมที่ต้องนำออกเมื่อคิวเต็ม"""
+        return queue.popleft()
+
+
+class LatestOnlyPolicy(AdmissionPolicy):
+    """ประมวลผลเฉพาะเฟรมล่าสุดเสมอ เฟรมที่รอในคิวและมีเฟรมใหม่กว่าจะถูกทิ้ง"""
+
+    name = "latest"
+
+    def select(self, queue, controller):
+        latest = queue.pop()
+        dropped = [(entry, SHED_SUPERSEDED) for entry in queue]
+        queue.clear()
+        return latest, dropped
+
+
+class EveryNthPolicy(AdmissionPolicy):
+    """
+    รับทุกเฟรมที่ N (ข้ามเฟรมที่เหลือ)
+
+    เมื่อ adaptive=True ค่า N จะเพิ่มขึ้นตามอัตราส่วนเวลาให้บริการต่อระยะห่างระหว่างเฟรม
+    เพื่อให้อัตราที่รับไม่เกินความสามารถในการประมวลผล
+    """
+
+    name = "every_nth"
+
+    def __init__(self, n: int = 2, adaptive: bool = False, max_n: int = 30):
+        if n < 1:
+            raise ValueError(f"n must be >= 1, got {n}")
+        self.n = n
+        self.adaptive = adaptive
+        self.max_n = max_n
+        self._counter = 0
+
+    def effective_n(self, controller: "AdmissionController") -> int:
+        n = self.n
+        if self.adaptive and controller.frame_interval > 0 and controller.service_time > 0:
+            n = max(n, int(math.ceil(controller.service_time / controller.frame_interval)))
+        return min(n, self.max_n)
+
+    def on_offer(self, entry, controller):
+        n = self.effective_n(controller)
+        admitted = self._counter % n == 0
+        self._counter += 1
+        return None if admitted else SHED_DECIMATED
+
+
+class MotionPriorityPolicy(AdmissionPolicy):
+    """
+    ให้ความสำคัญกับเฟรมที่มีการเคลื่อนไหว
+
+    คะแนนการเคลื่อนไหวคือค่าเฉลี่ยของผลต่าง (0-255) ระหว่างภาพย่อ grayscale ของเฟรมกับเฟรมที่รับล่าสุด
+    เฟรมที่นิ่งจะถูกทิ้ง ยกเว้นเมื่อไม่ได้รับเฟรมเลยนานเกิน keepalive วินาที
+    เมื่อคิวเต็ม เฟรมที่เคลื่อนไหวน้อยที่สุดจะถูกทิ้งก่อน และผู้ประมวลผลได้เฟรมที่เคลื่อนไหวมากที่สุด
+    (เฟรมที่เก่ากว่าเฟรมที่เลือกจะถูกทิ้ง เพื่อไม่ให้ผลย้อนเวลา)
+    """
+
+    name = "motion"
+
+    def __init__(self, threshold: float = 4.0, keepalive: float = 1.0, thumbnail_size=(64, 36)):
+        """
+        Args:
+            threshold: คะแนนขั้นต่ำที่ถือว่ามีการเคลื่อนไหว
+            keepalive: รับเฟรมอย่างน้อยหนึ่งเฟรมทุก keepalive วินาทีแม้ภาพนิ่ง
+            thumbnail_size: ขนาดภาพย่อที่ใช้เปรียบเทียบ (width, height)
+        """
+        self.threshold = threshold
+        self.keepalive = keepalive
+        self.thumbnail_size = tuple(thumbnail_size)
+        self._reference: Optional[np.ndarray] = None
+        self._last_admitted = -math.inf
+
+    def thumbnail(self, frame: Any) -> np.ndarray:
+        """ภาพย่อ grayscale ของเฟรม (รองรับ Frame ที่มี thumbnail ใน cache)"""
+        if hasattr(frame, "thumbnail"):
+            small = frame.thumbnail(self.thumbnail_size, gray=True)
+        else:
+            channels = 1 if frame.ndim == 2 else frame.shape[2]
+            if channels == 1:
+                gray = frame.reshape(frame.shape[:2])
+            elif channels in _GRAY_CODES:
+                gray = cv2.cvtColor(frame, _GRAY_CODES[channels])
+            else:
+                raise ValueError(f"Unsupported number of channels for motion thumbnail: {channels}")
+            small = cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return small.astype(np.int16)
+
+    def prepare(self, frame):
+        return self.thumbnail(frame)
+
+    def on_offer(self, entry, controller):
+        small = entry.prepared if entry.prepared is not None else self.thumbnail(entry.frame)
+        now = time.monotonic()
+        if self._reference is None:
+            entry.motion = math.inf
+        else:
+            entry.motion = float(np.abs(small - self._reference).mean())
+            if entry.motion < self.threshold and now - self._last_admitted < self.keepalive:
+                return SHED_NO_MOTION
+        self._reference = small
+        self._last_admitted = now
+        return None
+
+    def evict(self, queue):
+        victim = min(queue, key=lambda entry: entry.motion)
+        queue.remove(victim)
+        return victim
+
+    def select(self, queue, controller):
+        best = max(queue, key=lambda entry: (entry.motion, entry.seq))
+        dropped = []
+        while queue[0] is not best:
+            dropped.append((queue.popleft(), SHED_SUPERSEDED))
+        queue.popleft()
+        return best, dropped
+
+
+POLICIES = {
+    "fifo": AdmissionPolicy,
+    "latest": LatestOnlyPolicy,
+    "every_nth": EveryNthPolicy,
+    "motion": MotionPriorityPolicy,
+}
+
+
+class AdmissionController:
+    """
+    คิวเฟรมแบบมีขอบเขตระหว่างกล้อง (offer) กับ inference (take / done)
+
+    ผู้ผลิต (thread ของกล้อง) เรียก offer ทุกเฟรมโดยไม่ถูกบล็อก ส่วนผู้ประมวลผลเรียก take
+    แล้ว done เมื่อเสร็จ (หรือใช้ with controller.next() as item) เพื่อให้ controller รู้เวลาให้บริการ
+    เฟรมที่เป็น Frame จะถูก release() เมื่อ done หรือเมื่อถูกทิ้ง (ปิดได้ด้วย release_frames=False)
+    """
+
+    def __init__(self,
+                 policy: Union[str, AdmissionPolicy] = "latest",
+                 max_queue: int = 2,
+                 max_age: Optional[float] = None,
+                 max_latency: Optional[float] = None,
+                 smoothing: float = 0.2,
+                 name: str = "admission",
+                 release_frames: bool = True,
+                 **policy_kwargs):
+        """
+        เริ่มต้น AdmissionController
+
+        Args:
+            policy: "latest", "every_nth", "motion", "fifo" หรือ AdmissionPolicy
+            max_queue: จำนวนเฟรมสูงสุดในคิว
+            max_age: เฟรมที่อยู่ในคิวนานกว่านี้ (วินาที) จะถูกทิ้งเมื่อ take
+            max_latency: เป้าหมาย glass-to-result latency (วินาที); เฟรมที่อายุ + เวลาให้บริการที่คาด
+                         เกินค่านี้จะถูกทิ้ง (ยกเว้นเฟรมล่าสุดในคิว เพื่อไม่ให้หยุดประมวลผล)
+            smoothing: น้ำหนักของค่าใหม่ใน moving average ของเวลาให้บริการและระยะห่างระหว่างเฟรม
+            name: ชื่อสำหรับ log
+            release_frames: เรียก frame.release() ของ Frame ที่ประมวลผลเสร็จหรือถูกทิ้ง
+            **policy_kwargs: argument ของ policy (เช่น n=3, threshold=5.0)
+        """
+        if max_queue < 1:
+            raise ValueError(f"max_queue must be >= 1, got {max_queue}")
+        if isinstance(policy, str):
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown admission policy '{policy}'. Use one of {list(POLICIES)}")
+            policy = POLICIES[policy](**policy_kwargs)
+        self.policy = policy
+        self.max_queue = max_queue
+        self.max_age = max_age
+        self.max_latency = max_latency
+        self.smoothing = smoothing
+        self.name = name
+        self.release_frames = release_frames
+
+        self._queue: Deque[AdmittedFrame] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._seq = 0
+        self._last_offer: Optional[float] = None
+
+        # moving average (วินาที)
+        self.service_time = 0.0
+        self.frame_interval = 0.0
+
+        self.offered = 0
+        self.admitted = 0
+        self.completed = 0
+        self.shed: Dict[str, int] = {}
+        self.queue_age = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.glass_to_result = LatencyHistogram()
+        self._on_shed: List[Callable[[AdmittedFrame, str], None]] = []
+
+    def add_shed_callback(self, callback: Callable[[AdmittedFrame, str], None]) -> None:
+        """เรียก callback(frame, reason) ทุกครั้งที่เฟรมถูกทิ้ง (เช่น เพื่อคืน buffer ของกล้อง)"""
+        self._on_shed.append(callback)
+
+    def _ema(self, current: float, value: float) -> float:
+        return value if current == 0.0 else current + self.smoothing * (value - current)
+
+    def _release(self, entry: AdmittedFrame) -> None:
+        """ปล่อย cache ของ Frame ที่ออกจาก controller แล้ว"""
+        if self.release_frames and hasattr(entry.frame, "release"):
+            entry.frame.release()
+
+    def _shed(self, entries) -> None:
+        """บันทึกเฟรมที่ถูกทิ้ง (เรียกขณะถือ lock)"""
+        for entry, reason in entries:
+            self.shed[reason] = self.shed.get(reason, 0) + 1
+            for callback in self._on_shed:
+                try:
+                    callback(entry, reason)
+                except Exception as e:
+                    logger.warning(f"Admission '{self.name}' shed callback failed: {e}")
+            self._release(entry)
+
+    def offer(self, frame: Any, timestamp: Optional[float] = None, tag: Any = None) -> bool:
+        """
+        ส่งเฟรมจากกล้อง (ไม่บล็อก)
+
+        Args:
+            frame: เฟรม (np.ndarray หรือ Frame)
+            timestamp: เวลาถ่ายภาพตามนาฬิกา time.monotonic (None = ตอนนี้)
+            tag: ข้อมูลประจำเฟรม
+
+        Returns:
+            True หากเฟรมถูกรับเข้าคิว
+        """
+        # งานหนักต่อเฟรม (เช่น ภาพย่อของ motion-priority) ทำก่อนเข้า lock เพื่อไม่ให้ take รอ
+        prepared = self.policy.prepare(frame)
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise InferenceError(f"Admission controller '{self.name}' is closed")
+            if self._last_offer is not None:
+                self.frame_interval = self._ema(self.frame_interval, now - self._last_offer)
+            self._last_offer = now
+
+            entry = AdmittedFrame(frame, tag, self._seq, now if timestamp is None else timestamp)
+            entry.prepared = prepared
+            self._seq += 1
+            self.offered += 1
+
+            reason = self.policy.on_offer(entry, self)
+            if reason is not None:
+                self._shed([(entry, reason)])
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                self._shed([(self.policy.evict(self._queue), SHED_QUEUE_FULL)])
+            self._queue.append(entry)
+            self._cond.notify()
+            return True
+
+    def _expired(self, entry: AdmittedFrame, now: float) -> Optional[str]:
+        if self.max_age is not None and now - entry.offered_at > self.max_age:
+            return SHED_STALE
+        if self.max_latency is not None and (now - entry.timestamp) + self.service_time > self.max_latency:
+            return SHED_DEADLINE
+        return None
+
+    def take(self, timeout: Optional[float] = None) -> Optional[AdmittedFrame]:
+        """
+        รับเฟรมถัดไปที่ควรประมวลผล (รอจนมีเฟรม)
+
+        Args:
+            timeout: เวลารอสูงสุด (None = รอจนมีเฟรมหรือถูกปิด)
+
+        Returns:
+            AdmittedFrame หรือ None เมื่อหมดเวลาหรือ controller ถูกปิด
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                while not self._queue:
+                    if self._closed:
+                        return None
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+
+                now = time.monotonic()
+                # ทิ้งเฟรมที่หมดอายุ (เก็บเฟรมล่าสุดไว้เสมอเมื่อใช้ max_latency เพื่อไม่ให้ค้าง)
+                expired = []
+                for entry in list(self._queue):
+                    reason = self._expired(entry, now)
+                    if reason == SHED_DEADLINE and entry is self._queue[-1]:
+                        continue
+                    if reason is not None:
+                        self._queue.remove(entry)
+                        expired.append((entry, reason))
+                self._shed(expired)
+                if not self._queue:
+                    continue
+
+                entry, dropped = self.policy.select(self._queue, self)
+                self._shed(dropped)
+                entry.queue_age = now - entry.offered_at
+                entry._start = now
+                self.queue_age.record(entry.queue_age)
+                self.admitted += 1
+                return entry
+
+    def done(self, entry: AdmittedFrame, service_time: Optional[float] = None) -> None:
+        """
+        แจ้งว่าประมวลผลเฟรมเสร็จ (Frame ถูก release ที่นี่)
+
+        Args:
+            entry: เฟรมจาก take
+            service_time: เวลาประมวลผล (None = นับจากตอน take)
+        """
+        now = time.monotonic()
+        if service_time is None:
+            service_time = now - entry._start if entry._start is not None else 0.0
+        with self._cond:
+            self.completed += 1
+            self.service_time = self._ema(self.service_time, service_time)
+            self.service.record(service_time)
+            self.glass_to_result.record(now - entry.timestamp)
+        self._release(entry)
+
+    @contextmanager
+    def next(self, timeout: Optional[float] = None):
+        """
+        รับเฟรมถัดไปภายใน with block และบันทึกเวลาให้บริการเมื่อจบ
+
+        Yields:
+            AdmittedFrame หรือ None เมื่อหมดเวลาหรือ controller ถูกปิด
+        """
+        entry = self.take(timeout)
+        try:
+            yield entry
+        finally:
+            if entry is not None:
+                self.done(entry)
+
+    def close(self) -> None:
+        """ปิด controller: เฟรมที่ค้างในคิวถูกทิ้งและ take ที่รออยู่จะได้ None"""
+        with self._cond:
+            self._closed = True
+            self._shed([(entry, SHED_CLOSED) for entry in self._queue])
+            self._queue.clear()
+            self._cond.notify_all()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติของ controller
+
+        Returns:
+            Dictionary ของจำนวนเฟรม (offered / admitted / completed / shed แยกตามเหตุผล),
+            อายุในคิว, เวลาให้บริการ และ glass-to-result latency
+        """
+        with self._cond:
+            shed_total = sum(self.shed.values())
+            return {
+                "policy": self.policy.name,
+                "offered": self.offered,
+                "admitted": self.admitted,
+                "completed": self.completed,
+                "shed": dict(self.shed),
+                "shed_total": shed_total,
+                "shed_rate": shed_total / self.offered if self.offered else 0.0,
+                "queue_depth": len(self._queue),
+                "frame_interval_ms": self.frame_interval * 1000,
+                "service_time_ms": self.service_time * 1000,
+                "queue_age": self.queue_age.summary((50, 99)),
+                "service": self.service.summary((50, 99)),
+                "glass_to_result": self.glass_to_result.summary((50, 99)),
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
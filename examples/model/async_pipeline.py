@@ -0,0 +1,385 @@
+"""
+PWD Vision Works - Async Inference Pipeline
+pipeline แบบ 3 ขั้น (preprocess -> device -> postprocess) ที่ทำงานซ้อนกันบน thread แยก
+เพื่อให้ CPU เตรียมเฟรมถัดไปและประมวลผลเฟรมก่อนหน้าในขณะที่ accelerator ทำงาน
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+from ..utils.exceptions import InferenceError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+STAGES = ("preprocess", "infer", "postprocess")
+
+
+class AsyncResult(NamedTuple):
+    """ผลของเฟรมหนึ่งจาก AsyncInferencePipeline.results()"""
+    seq: int
+    tag: Any
+    result: Any
+    error: Optional[BaseException]
+    latency: float
+
+
+class _Job:
+    __slots__ = ("seq", "tag", "frame", "slot", "future", "submit_time", "payload", "context")
+
+    def __init__(self, seq: int, tag: Any, frame: Any, slot: int, future: Future):
+        self.seq = seq
+        self.tag = tag
+        self.frame = frame
+        self.slot = slot
+        self.future = future
+        self.submit_time = time.perf_counter()
+        self.payload = None
+        self.context = None
+
+
+class _StageStats:
+    """สถิติของแต่ละขั้น: เวลาทำงานและจำนวนงานที่รอในคิว"""
+
+    def __init__(self):
+        self.busy_time = 0.0
+        self.count = 0
+        self.queue_samples = 0
+        self.queue_total = 0
+        self.queue_max = 0
+
+    def sample_queue(self, depth: int) -> None:
+        self.queue_samples += 1
+        self.queue_total += depth
+        self.queue_max = max(self.queue_max, depth)
+
+    def to_dict(self, elapsed: float) -> Dict[str, float]:
+        return {
+            "processed": self.count,
+            "avg_time_ms": self.busy_time / self.count * 1000 if self.count else 0.0,
+            "utilization": self.busy_time / elapsed if elapsed > 0 else 0.0,
+            "avg_queue": self.queue_total / self.queue_samples if self.queue_samples else 0.0,
+            "max_queue": self.queue_max,
+        }
+
+
+class AsyncInferencePipeline:
+    """
+    pipeline inference แบบ asynchronous ที่จำกัดจำนวนเฟรมที่อยู่ระหว่างประมวลผล (in-flight)
+
+    แต่ละขั้นมี worker thread ตามที่กำหนดใน workers (ค่าเริ่มต้นขั้นละ 1 thread
+    ซึ่งทำให้เฟรมเสร็จตามลำดับ submit เสมอ); ขั้นที่มีหลาย worker ทำหลายเฟรมพร้อมกัน
+    และเฟรมอาจเสร็จไม่ตรงลำดับ ซึ่ง results() จะเรียงคืนให้เมื่อ ordered=True
+    """
+
+    def __init__(self,
+                 preprocess: Callable[[Any], Tuple[Any, Any]],
+                 infer: Callable[[Any], Any],
+                 postprocess: Callable[[Any, Any], Any],
+                 max_in_flight: int = 4,
+                 ordered: bool = True,
+                 workers: Union[int, Dict[str, int]] = 1,
+                 collect_results: bool = True,
+                 release_input: Optional[Callable[[Any], None]] = None,
+                 name: str = "inference"):
+        """
+        เริ่มต้น AsyncInferencePipeline และ thread ของแต่ละขั้น
+
+        Args:
+            preprocess: fn(frame) -> (input tensor, context)
+            infer: fn(input tensor) -> outputs
+            postprocess: fn(outputs, context) -> result
+            max_in_flight: จำนวนเฟรมสูงสุดที่อยู่ใน pipeline (submit จะรอเมื่อเต็ม)
+            ordered: True = results() คืนผลตามลำดับที่ submit, False = ตามลำดับที่เสร็จ
+            workers: จำนวน thread ต่อขั้น (int = ทุกขั้น หรือ dictionary ต่อชื่อขั้น
+                     เช่น {"preprocess": 2, "postprocess": 2}; ขั้นที่ไม่ระบุใช้ 1)
+            collect_results: เก็บผลไว้ให้ results() ตั้งแต่เริ่ม (False = ใช้เฉพาะ Future
+                             จนกว่าจะเรียก enable_results เพื่อไม่ให้ผลค้างในคิว)
+            release_input: fn(input tensor) สำหรับคืน input ที่ preprocess สร้างแล้ว
+                           แต่ไม่ถูกส่งเข้า infer (เฟรมถูกยกเลิกระหว่างทาง)
+            name: ชื่อสำหรับ log และชื่อ thread
+        """
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+        if isinstance(workers, int):
+            workers = {stage: workers for stage in STAGES}
+        unknown = set(workers) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages in workers: {sorted(unknown)}")
+        self.workers = {stage: int(workers.get(stage, 1)) for stage in STAGES}
+        if min(self.workers.values()) < 1:
+            raise ValueError(f"Each stage needs at least one worker, got {self.workers}")
+
+        self.max_in_flight = max_in_flight
+        self.ordered = ordered
+        self.collect_results = collect_results
+        self.name = name
+        self._functions = {"preprocess": preprocess, "infer": infer, "postprocess": postprocess}
+        self._release_input = release_input
+
+        self._free_slots = queue.Queue()
+        for slot in range(max_in_flight):
+            self._free_slots.put(slot)
+        self._queues = {stage: queue.Queue() for stage in STAGES}
+        self._done = queue.Queue()
+        self._pending = {}
+        self._next_seq = 0
+        self._stats = {stage: _StageStats() for stage in STAGES}
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._seq = 0
+        # seq แรกที่ถูกเก็บให้ results() (ดู enable_results)
+        self._collect_from = 0
+        self._live_workers = dict(self.workers)
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._closed = False
+        self._start_time = time.perf_counter()
+
+        self._threads = []
+        for index, stage in enumerate(STAGES):
+            next_stage = STAGES[index + 1] if index + 1 < len(STAGES) else None
+            for worker in range(self.workers[stage]):
+                suffix = f"-{worker}" if self.workers[stage] > 1 else ""
+                thread = threading.Thread(target=self._run_stage, args=(stage, next_stage),
+                                          name=f"{name}-{stage}{suffix}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+        logger.info(f"AsyncInferencePipeline '{name}' started (max_in_flight={max_in_flight}, "
+                    f"ordered={ordered}, workers={self.workers})")
+
+    @property
+    def in_flight(self) -> int:
+        return self.max_in_flight - self._free_slots.qsize()
+
+    def submit(self, frame: Any, tag: Any = None, timeout: Optional[float] = None) -> Future:
+        """
+        ส่งเฟรมเข้า pipeline (รอเมื่อจำนวนเฟรม in-flight เต็ม)
+
+        Args:
+            frame: เฟรม input
+            tag: ข้อมูลประจำเฟรม (เช่น frame id) ที่จะได้คืนพร้อมผล
+            timeout: เวลารอ slot ว่างสูงสุด (None = รอจนได้)
+
+        Returns:
+            Future ของผลลัพธ์หลัง postprocess
+
+        Raises:
+            InferenceError: หาก pipeline ปิดแล้วหรือรอ slot นานเกิน timeout
+            
+        เฟรมที่รอ slot อยู่ขณะ close() ถูกเรียกจะได้ Future ที่ล้มเหลวด้วย InferenceError
+        """
+        if self._closed:
+            raise InferenceError(f"Pipeline '{self.name}' is closed")
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise InferenceError(f"Pipeline '{self.name}' is full ({self.max_in_flight} frames in flight)")
+
+        future = Future()
+        with self._lock:
+            # ตรวจและส่งเข้าคิวภายใต้ lock เดียวกับ close() เพื่อไม่ให้งานตกไปอยู่หลัง _STOP
+            if self._closed:
+                self._free_slots.put(slot)
+                future.set_exception(InferenceError(f"Pipeline '{self.name}' is closed"))
+                return future
+            job = _Job(self._seq, tag, frame, slot, future)
+            self._seq += 1
+            self._submitted += 1
+            self._put("preprocess", job)
+        return future
+
+    def enable_results(self) -> None:
+        """
+        เริ่มเก็บผลไว้ให้ results() (เมื่อสร้างด้วย collect_results=False)
+
+        เฟรมที่ submit ก่อนเรียกจะได้ผลผ่าน Future เท่านั้น (แม้จะยังไม่เสร็จ)
+        results() จึงเริ่มที่เฟรมแรกที่ submit หลังจากนี้
+        """
+        with self._lock:
+            if not self.collect_results:
+                self._collect_from = self._next_seq = self._seq
+                self.collect_results = True
+
+    def results(self, timeout: Optional[float] = None) -> Iterator[AsyncResult]:
+        """
+        คืนผลของเฟรมที่เสร็จแล้ว (ตามลำดับ submit หาก ordered)
+
+        iterator จบเมื่อ pipeline ถูกปิดและผลทั้งหมดถูกส่งออกแล้ว
+        หรือเมื่อไม่มีผลใหม่ภายใน timeout
+
+        Args:
+            timeout: เวลารอผลถัดไปสูงสุด (None = รอจนกว่าจะปิด pipeline)
+
+        Yields:
+            AsyncResult
+        """
+        if not self.collect_results:
+            raise InferenceError("results() requires collect_results=True (or enable_results())")
+
+        while True:
+            try:
+                item = self._done.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is _STOP:
+                # ส่งผลที่เหลือใน reorder buffer แล้วจบ
+                for seq in sorted(self._pending):
+                    yield self._pending.pop(seq)
+                self._done.put(_STOP)
+                return
+            if not self.ordered:
+                yield item
+                continue
+
+            # reorder buffer: เก็บผลที่เสร็จก่อนลำดับไว้จนกว่าเฟรมก่อนหน้าจะเสร็จ
+            self._pending[item.seq] = item
+            # เลื่อนลำดับก่อน yield เพื่อให้ iterator ที่ถูกทิ้งกลางทางไม่ทำให้ results() ครั้งถัดไปค้าง
+            while self._next_seq in self._pending:
+                item = self._pending.pop(self._next_seq)
+                self._next_seq += 1
+                yield item
+
+    def _put(self, stage: str, job: Any) -> None:
+        stage_queue = self._queues[stage]
+        stage_queue.put(job)
+        if job is not _STOP:
+            with self._stats_lock:
+                self._stats[stage].sample_queue(stage_queue.qsize())
+
+    def _run_stage(self, stage: str, next_stage: Optional[str]) -> None:
+        """loop ของ thread แต่ละขั้น"""
+        stage_queue = self._queues[stage]
+        function = self._functions[stage]
+        stats = self._stats[stage]
+
+        while True:
+            job = stage_queue.get()
+            if job is _STOP:
+                # แต่ละ worker ได้ _STOP หนึ่งครั้งหลังงานทั้งหมดของขั้น worker สุดท้ายที่ออก
+                # จึงเป็นผู้ส่ง _STOP ต่อ (worker อื่นทำงานของตัวเองเสร็จแล้วทั้งหมด)
+                with self._lock:
+                    self._live_workers[stage] -= 1
+                    last = self._live_workers[stage] == 0
+                if last:
+                    if next_stage is not None:
+                        for _ in range(self.workers[next_stage]):
+                            self._put(next_stage, _STOP)
+                    elif self.collect_results:
+                        self._done.put(_STOP)
+                return
+
+            if job.future.done():
+                # เฟรมที่ผิดพลาดในขั้นก่อนหน้า (หรือถูกยกเลิก) ไม่ต้องประมวลผลต่อ
+                if stage == "infer" and job.payload is not None and self._release_input is not None:
+                    self._release_input(job.payload)
+                job.payload = None
+                self._pass_on(job, next_stage)
+                continue
+
+            start = time.perf_counter()
+            try:
+                if stage == "preprocess":
+                    job.payload, job.context = function(job.frame)
+                    job.frame = None
+                elif stage == "infer":
+                    job.payload = function(job.payload)
+                else:
+                    job.payload = function(job.payload, job.context)
+            except Exception as e:
+                logger.error(f"Pipeline '{self.name}' {stage} failed for frame {job.seq}: {e}")
+                try:
+                    job.future.set_exception(InferenceError(f"{stage} failed: {e}"))
+                except InvalidStateError:
+                    pass  # ถูกยกเลิกระหว่างประมวลผล
+            finally:
+                with self._stats_lock:
+                    stats.busy_time += time.perf_counter() - start
+                    stats.count += 1
+
+            self._pass_on(job, next_stage)
+
+    def _pass_on(self, job: _Job, next_stage: Optional[str]) -> None:
+        """ส่งงานไปขั้นถัดไป หรือส่งผลและคืน slot เมื่อเป็นขั้นสุดท้าย"""
+        if next_stage is not None:
+            # เฟรมที่ผิดพลาดก็ส่งต่อ เพื่อให้ผลทุกเฟรมออกจากขั้นสุดท้ายเสมอ
+            self._put(next_stage, job)
+            return
+        self._finish(job)
+
+    def _finish(self, job: _Job) -> None:
+        latency = time.perf_counter() - job.submit_time
+        if not job.future.done():
+            try:
+                job.future.set_result(job.payload)
+            except InvalidStateError:
+                pass  # cancel() ชนะระหว่างตรวจ done() กับ set_result
+        error = CancelledError() if job.future.cancelled() else job.future.exception()
+
+        with self._lock:
+            if error is None:
+                self._completed += 1
+            else:
+                self._failed += 1
+            collect = self.collect_results and job.seq >= self._collect_from
+        job.payload = job.context = None
+        self._free_slots.put(job.slot)
+
+        if collect:
+            self._done.put(AsyncResult(job.seq, job.tag, None if error else job.future.result(), error, latency))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติของ pipeline
+
+        Returns:
+            Dictionary ของจำนวนเฟรม, in-flight และการใช้คิวของแต่ละขั้น
+        """
+        elapsed = time.perf_counter() - self._start_time
+        with self._lock:
+            stats = {
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "throughput_fps": self._completed / elapsed if elapsed > 0 else 0.0,
+            }
+        with self._stats_lock:
+            stats["stages"] = {stage: self._stats[stage].to_dict(elapsed) for stage in STAGES}
+        stats["queue_depth"] = {stage: self._queues[stage].qsize() for stage in STAGES}
+        return stats
+
+    def close(self, wait: bool = True) -> None:
+        """
+        ปิด pipeline (เฟรมที่ submit แล้วจะถูกประมวลผลจนเสร็จ)
+
+        Args:
+            wait: รอให้ thread ทั้งหมดจบก่อน return
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in range(self.workers["preprocess"]):
+                self._put("preprocess", _STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        logger.info(f"AsyncInferencePipeline '{self.name}' closed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
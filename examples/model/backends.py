@@ -0,0 +1,575 @@
+"""
+PWD Vision Works - Inference Backends
+interface ของ backend สำหรับ inference (อุปกรณ์ + session) และอุปกรณ์จำลองด้วย NumPy
+เพื่อให้ processor, batching, scheduler และ benchmark ทำงานได้บนเครื่องที่ไม่มี Hailo (เช่น CI)
+
+เลือก backend ได้จาก argument ``backend``, ไฟล์ config ของโมเดล (``PWD_MODEL_CONFIG``)
+หรือ environment variable ``PWD_INFERENCE_BACKEND``
+
+ตัวอย่างไฟล์ config (YAML หรือ JSON):
+
+    models:
+      vehicle_detector:
+        backend: onnx
+        path: models/vehicle_detector.onnx
+        options:
+          intra_op_threads: 4
+      plate_detector:
+        backend: hailo
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+import numpy as np
+
+from ..utils.exceptions import InferenceError, ModelLoadError, InvalidConfigError
+from .model_metadata import ModelMetadataCache
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV = "PWD_INFERENCE_BACKEND"
+MODEL_CONFIG_ENV = "PWD_MODEL_CONFIG"
+DEFAULT_BACKEND = "hailo"
+
+# backend ที่ลงทะเบียนตอน import module ของตัวเอง
+_LAZY_BACKENDS = {"hailo": ".hailo8_processor", "onnx": ".onnx_backend"}
+# backend ตามนามสกุลไฟล์โมเดลเมื่อ config ไม่ได้ระบุ
+SUFFIX_BACKENDS = {".onnx": "onnx"}
+
+# input/output ของโมเดลจำลองเมื่อไม่มี metadata: YOLOv8 head ขนาด 640x640
+# (4 box + 80 classes) x 8400 candidates แบบ channels-first ซึ่ง ImagePostprocessor(head="auto") decode เป็น v8
+DEFAULT_INPUTS = [{"name": "input", "shape": [640, 640, 3]}]
+DEFAULT_OUTPUTS = [{"name": "output", "shape": [84, 8400], "quant": {"scale": 1.0 / 255, "zero_point": 0.0}}]
+
+
+class TensorInfo:
+    """ข้อมูล tensor ที่มี .name และ .shape เหมือน vstream info ของ HailoRT"""
+
+    def __init__(self, name: str, shape: Tuple[int, ...], quant: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.shape = tuple(int(s) for s in shape)
+        self.quant = quant
+
+    def __repr__(self) -> str:
+        return f"TensorInfo({self.name}, {self.shape})"
+
+
+class InferenceBackend:
+    """
+    backend ของ inference: สร้างอุปกรณ์ที่ใช้ร่วมกันหลายโมเดล และ session ของแต่ละโมเดล
+
+    session ที่ได้ต้องมี interface เดียวกับ HailoSession
+    (open, infer, close, is_open, input_infos, input_names, output_names, input_shape)
+    """
+
+    name = "backend"
+    model_suffix = ".hef"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def list_devices(self) -> List[str]:
+        """device id ของอุปกรณ์ที่ใช้ได้"""
+        raise NotImplementedError
+
+    def create_device(self, device_id: str) -> Any:
+        """อุปกรณ์ที่เปิด scheduler ไว้สำหรับหลายโมเดล (ต้องมี release())"""
+        raise NotImplementedError
+
+    def create_session(self,
+                       model_path: Union[str, Path],
+                       batch_size: int = 1,
+                       quantized: bool = False,
+                       device: Any = None,
+                       **kwargs) -> Any:
+        """session ของโมเดล (ยังไม่ open)"""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name})"
+
+
+_BACKENDS: Dict[str, InferenceBackend] = {}
+
+
+def register_backend(backend: InferenceBackend) -> InferenceBackend:
+    """
+    ลงทะเบียน backend ตามชื่อ (แทนที่ตัวเดิมที่ชื่อซ้ำ)
+
+    Args:
+        backend: InferenceBackend
+
+    Returns:
+        backend เดิม
+    """
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(backend: Union[str, InferenceBackend, None] = None) -> InferenceBackend:
+    """
+    ดึง backend ตามชื่อ (None = จาก PWD_INFERENCE_BACKEND หรือ "hailo")
+
+    Args:
+        backend: ชื่อ backend หรือ InferenceBackend
+
+    Returns:
+        InferenceBackend
+
+    Raises:
+        ValueError: หากไม่รู้จักชื่อ backend
+        ImportError: หาก backend ไม่พร้อมใช้งาน (เช่น ไม่ได้ติดตั้ง HailoRT)
+    """
+    if isinstance(backend, InferenceBackend):
+        return backend
+    name = backend or os.environ.get(BACKEND_ENV, DEFAULT_BACKEND)
+    if name in _LAZY_BACKENDS and name not in _BACKENDS:
+        # HailoBackend / OnnxRuntimeBackend ลงทะเบียนตอน import module ของตัวเอง
+        import importlib
+        importlib.import_module(_LAZY_BACKENDS[name], __package__)
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Available: {sorted(_BACKENDS)}")
+    selected = _BACKENDS[name]
+    if not selected.available:
+        raise ImportError(f"Inference backend '{name}' is not available")
+    return selected
+
+
+def load_model_config(source: Union[str, Path, Dict[str, Any], None] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    อ่าน config ของโมเดล {ชื่อโมเดล: {"backend", "path", "options"}}
+
+    Args:
+        source: พาธไฟล์ .json/.yaml/.yml หรือ dictionary (None = จาก PWD_MODEL_CONFIG หากกำหนดไว้)
+
+    Returns:
+        dictionary ของ config แยกตามชื่อโมเดล (ว่างเมื่อไม่มี config)
+
+    Raises:
+        InvalidConfigError: หากอ่านไฟล์ไม่ได้หรือรูปแบบไม่ถูกต้อง
+    """
+    if source is None:
+        source = os.environ.get(MODEL_CONFIG_ENV)
+        if not source:
+            return {}
+    if isinstance(source, dict):
+        config = source
+    else:
+        path = Path(source)
+        try:
+            text = path.read_text(encoding="utf-8")
+            if path.suffix.lower() in (".yaml", ".yml"):
+                import yaml
+                config = yaml.safe_load(text)
+            else:
+                config = json.loads(text)
+        except Exception as e:
+            raise InvalidConfigError(f"Failed to read model config {path}: {e}") from e
+
+    models = config.get("models", config) if isinstance(config, dict) else None
+    if not isinstance(models, dict) or not all(isinstance(entry, dict) for entry in models.values()):
+        raise InvalidConfigError("Model config must map model names to mappings")
+    return models
+
+
+def resolve_model_backend(model_path: Union[str, Path],
+                          config: Union[str, Path, Dict[str, Any], None] = None
+                          ) -> Tuple[InferenceBackend, Path, Dict[str, Any]]:
+    """
+    เลือก backend, ไฟล์โมเดล และ option ของ session สำหรับโมเดลหนึ่ง
+
+    ลำดับการเลือก backend: config ของโมเดล, นามสกุลไฟล์ (.onnx -> "onnx"), PWD_INFERENCE_BACKEND
+
+    Args:
+        model_path: พาธของโมเดล (ชื่อไฟล์ไม่รวมนามสกุลใช้เป็น key ของ config)
+        config: config ของโมเดล (ดู load_model_config)
+
+    Returns:
+        (backend, พาธของโมเดล, option ของ session)
+    """
+    model_path = Path(model_path)
+    entry = load_model_config(config).get(model_path.stem, {})
+    if entry.get("path"):
+        model_path = Path(entry["path"])
+    name = entry.get("backend") or SUFFIX_BACKENDS.get(model_path.suffix.lower())
+    return get_backend(name), model_path, dict(entry.get("options") or {})
+
+
+def list_backends() -> Dict[str, bool]:
+    """ชื่อ backend ที่ลงทะเบียนแล้วและความพร้อมใช้งาน"""
+    return {name: backend.available for name, backend in _BACKENDS.items()}
+
+
+class LatencyModel:
+    """
+    การกระจายของเวลา inference ของโมเดลบนอุปกรณ์จำลอง
+
+    เวลา device = (base_ms + per_frame_ms * batch) * noise โดย noise มาจาก distribution
+    เวลา transfer = ขนาดข้อมูล input + output / bandwidth
+    """
+
+    DISTRIBUTIONS = ("fixed", "lognormal", "gamma")
+
+    def __init__(self,
+                 base_ms: float = 4.0,
+                 per_frame_ms: float = 2.0,
+                 jitter: float = 0.1,
+                 distribution: str = "lognormal",
+                 bandwidth_mb_s: float = 800.0):
+        """
+        Args:
+            base_ms: เวลาคงที่ต่อการเรียกอุปกรณ์
+            per_frame_ms: เวลาเพิ่มต่อภาพใน batch
+            jitter: ความแปรปรวน (sigma ของ lognormal หรือ coefficient of variation ของ gamma)
+            distribution: "fixed", "lognormal" หรือ "gamma"
+            bandwidth_mb_s: แบนด์วิดท์ host <-> device (MB/s); 0 = ไม่จำลอง transfer
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'. Use one of {self.DISTRIBUTIONS}")
+        self.base_ms = base_ms
+        self.per_frame_ms = per_frame_ms
+        self.jitter = jitter
+        self.distribution = distribution
+        self.bandwidth_mb_s = bandwidth_mb_s
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "LatencyModel":
+        """สร้างจาก dictionary (เช่น จาก config file)"""
+        return cls(**config)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    def device_time(self, batch_size: int, rng: np.random.Generator) -> float:
+        """เวลา device (วินาที) ของหนึ่งการเรียก"""
+        mean = (self.base_ms + self.per_frame_ms * batch_size) / 1000
+        if self.jitter <= 0 or self.distribution == "fixed":
+            return mean
+        if self.distribution == "lognormal":
+            # ปรับ mu ให้ค่าเฉลี่ยเท่ากับ mean
+            return mean * float(rng.lognormal(-0.5 * self.jitter ** 2, self.jitter))
+        shape = 1.0 / self.jitter ** 2
+        return float(rng.gamma(shape, mean / shape))
+
+    def transfer_time(self, nbytes: int) -> float:
+        """เวลา transfer (วินาที) ของข้อมูล nbytes"""
+        return nbytes / (self.bandwidth_mb_s * 1e6) if self.bandwidth_mb_s > 0 else 0.0
+
+
+class SimulatedDevice:
+    """
+    อุปกรณ์จำลองที่รับงานพร้อมกันได้ไม่เกิน concurrency งาน (งานที่เกินต้องรอคิว)
+    ใช้ร่วมกันระหว่างหลาย session เพื่อจำลองการแย่งอุปกรณ์ของ scheduler
+    """
+
+    def __init__(self, device_id: str = "sim0", concurrency: int = 1):
+        """
+        Args:
+            device_id: ชื่ออุปกรณ์
+            concurrency: จำนวนงานที่อุปกรณ์ทำพร้อมกันได้
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+        self.device_id = device_id
+        self.concurrency = concurrency
+        self._slots = threading.Semaphore(concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._start_time = time.perf_counter()
+        self.requests = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.max_waiting = 0
+
+    @contextmanager
+    def run(self):
+        """ครอบช่วงที่ใช้อุปกรณ์ (รอ slot ว่าง และนับเวลารอ/เวลาใช้งาน)"""
+        with self._lock:
+            self._waiting += 1
+            self.max_waiting = max(self.max_waiting, self._waiting)
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting -= 1
+            self.wait_time += start - wait_start
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.busy_time += time.perf_counter() - start
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติของอุปกรณ์
+
+        Returns:
+            Dictionary ของจำนวนงาน, utilization และเวลารอคิว
+        """
+        elapsed = time.perf_counter() - self._start_time
+        with self._lock:
+            return {
+                "device_id": self.device_id,
+                "requests": self.requests,
+                "utilization": self.busy_time / (elapsed * self.concurrency) if elapsed > 0 else 0.0,
+                "avg_wait_ms": self.wait_time / self.requests * 1000 if self.requests else 0.0,
+                "max_waiting": self.max_waiting,
+            }
+
+    def release(self) -> None:
+        """เหมือน VDevice.release (ไม่มีทรัพยากรต้องคืน)"""
+
+
+class SimulatedSession:
+    """
+    session จำลองที่มี interface เดียวกับ HailoSession
+
+    shape และ quantization ของ input/output มาจาก metadata ของ HEF (ModelMetadataCache)
+    หรือจากค่าที่กำหนด; output เป็นค่า uint8 สุ่มที่ dequantize ด้วย scale/zero point ของโมเดล
+    """
+
+    def __init__(self,
+                 model_path: Union[str, Path, None] = None,
+                 batch_size: int = 1,
+                 quantized: bool = False,
+                 device: Optional[SimulatedDevice] = None,
+                 latency: Union[LatencyModel, Dict[str, Any], None] = None,
+                 inputs: Optional[List[Dict[str, Any]]] = None,
+                 outputs: Optional[List[Dict[str, Any]]] = None,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            model_path: พาธของโมเดล .hef (None = โมเดลจำลองตาม inputs/outputs)
+            batch_size: batch สูงสุดต่อการเรียก
+            quantized: รับ input เป็น uint8
+            device: อุปกรณ์จำลองที่ใช้ร่วมกัน (None = อุปกรณ์ของ session เอง)
+            latency: LatencyModel หรือ dictionary ของ argument
+            inputs: รายการ {"name", "shape"} (None = จาก metadata หรือค่า default)
+            outputs: รายการ {"name", "shape", "quant"} (None = จาก metadata หรือค่า default)
+            seed: seed ของตัวสุ่ม
+        """
+        self.model_path = Path(model_path) if model_path is not None else Path("simulated.hef")
+        self._has_model_file = model_path is not None
+        self.batch_size = batch_size
+        self.quantized = quantized
+        self.device = device
+        self._own_device = device is None
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel(**(latency or {}))
+        self._input_specs = inputs
+        self._output_specs = outputs
+        self._rng = np.random.default_rng(seed)
+        self._rng_lock = threading.Lock()
+        self._local = threading.local()
+        self._outputs: Dict[str, np.ndarray] = {}
+
+        self.network_group = None
+        self.input_infos: List[TensorInfo] = []
+        self.output_infos: List[TensorInfo] = []
+        self._open = False
+        self.open_time = 0.0
+        self.infer_count = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    @property
+    def input_names(self) -> List[str]:
+        return [info.name for info in self.input_infos]
+
+    @property
+    def output_names(self) -> List[str]:
+        return [info.name for info in self.output_infos]
+
+    @property
+    def input_shape(self) -> Tuple[int, ...]:
+        """shape (H, W, C) ของ input แรก"""
+        return self.input_infos[0].shape
+
+    def _resolve_specs(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """input/output จากค่าที่กำหนด, metadata cache หรือค่า default ตามลำดับ"""
+        inputs, outputs = self._input_specs, self._output_specs
+        if (inputs is None or outputs is None) and self._has_model_file:
+            metadata = ModelMetadataCache.for_model(self.model_path).get(self.model_path)
+            if metadata.has_io_info:
+                inputs = inputs if inputs is not None else metadata.inputs
+                outputs = outputs if outputs is not None else metadata.outputs
+            else:
+                logger.warning(f"No cached I/O metadata for {self.model_path.name}; using default simulated shapes")
+        return inputs or DEFAULT_INPUTS, outputs or DEFAULT_OUTPUTS
+
+    def open(self) -> "SimulatedSession":
+        """
+        เตรียม output ของโมเดลจำลอง
+
+        Returns:
+            session นี้
+
+        Raises:
+            ModelLoadError: หากไม่พบไฟล์โมเดลหรือ metadata ไม่ถูกต้อง
+        """
+        if self._open:
+            return self
+        start_time = time.perf_counter()
+        try:
+            if self._has_model_file and not self.model_path.exists():
+                raise FileNotFoundError(f"Model not found: {self.model_path}")
+            inputs, outputs = self._resolve_specs()
+            self.input_infos = [TensorInfo(spec["name"], spec["shape"]) for spec in inputs]
+            self.output_infos = [TensorInfo(spec["name"], spec["shape"], spec.get("quant")) for spec in outputs]
+
+            # output ของทั้ง batch สร้างครั้งเดียว แล้ว copy ออกทุกครั้งที่ infer (เหมือนการอ่านจาก device)
+            for info in self.output_infos:
+                quant = info.quant or {"scale": 1.0 / 255, "zero_point": 0.0}
+                raw = self._rng.integers(0, 256, (self.batch_size,) + info.shape, dtype=np.uint8)
+                # ค่าส่วนใหญ่ต่ำ (เหมือน score ของ background) เพื่อให้ postprocess ทำงานใกล้เคียงของจริง
+                raw = (raw.astype(np.float32) ** 3 / 255 ** 2).astype(np.uint8)
+                self._outputs[info.name] = ((raw.astype(np.float32) - quant["zero_point"]) * quant["scale"])
+
+            if self.device is None:
+                self.device = SimulatedDevice()
+            self._open = True
+            self.open_time = time.perf_counter() - start_time
+            logger.info(f"Simulated session opened for {self.model_path.name} "
+                        f"(inputs={[i.shape for i in self.input_infos]}, batch_size={self.batch_size})")
+            return self
+
+        except Exception as e:
+            logger.error(f"Failed to open simulated session: {e}")
+            raise ModelLoadError(f"Failed to open simulated session: {e}") from e
+
+    def infer(self, inputs: Union[np.ndarray, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """
+        จำลอง inference: รอตามเวลา transfer และ device แล้วคืน output ตามจำนวนภาพใน batch
+
+        Args:
+            inputs: tensor (N, H, W, C) ของ input แรก หรือ dictionary {ชื่อ input: tensor}
+
+        Returns:
+            dictionary {ชื่อ output: tensor (N, ...)}
+
+        Raises:
+            InferenceError: หาก session ยังไม่เปิดหรือ input ไม่ตรงกับโมเดล
+        """
+        if not self._open:
+            raise InferenceError("Simulated session is not open")
+        if isinstance(inputs, np.ndarray):
+            inputs = {self.input_infos[0].name: inputs}
+
+        batch = None
+        input_bytes = 0
+        for info in self.input_infos:
+            tensor = inputs.get(info.name)
+            if tensor is None:
+                raise InferenceError(f"Missing input '{info.name}'")
+            if tuple(tensor.shape[1:]) != info.shape or not 0 < tensor.shape[0] <= self.batch_size:
+                raise InferenceError(f"Input '{info.name}' has shape {tensor.shape}, "
+                                     f"expected (<= {self.batch_size}, {', '.join(map(str, info.shape))})")
+            batch = tensor.shape[0]
+            input_bytes += tensor.nbytes
+
+        with self._rng_lock:
+            device_time = self.latency.device_time(batch, self._rng)
+        # output ถูกส่งกลับเป็น uint8 แล้วค่อย dequantize บน host
+        output_bytes = sum(output[:batch].size for output in self._outputs.values())
+        transfer_time = self.latency.transfer_time(input_bytes + output_bytes)
+
+        with self.device.run():
+            start = time.perf_counter()
+            time.sleep(transfer_time)
+            results = {name: output[:batch].copy() for name, output in self._outputs.items()}
+            transfer_done = time.perf_counter()
+            time.sleep(device_time)
+            self._local.timings = {"transfer": transfer_done - start, "device": time.perf_counter() - transfer_done}
+
+        self.infer_count += 1
+        return results
+
+    def last_timings(self) -> Dict[str, float]:
+        """เวลา transfer / device (วินาที) ของการ infer ครั้งล่าสุดใน thread นี้"""
+        return dict(getattr(self._local, "timings", {}))
+
+    def close(self) -> None:
+        """ปล่อย output buffer (เรียกซ้ำได้)"""
+        self._outputs = {}
+        self._open = False
+        if self._own_device:
+            self.device = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SimulatedBackend(InferenceBackend):
+    """
+    backend จำลองบน CPU: กำหนด latency และ shape แยกตามโมเดล และจำนวน/ความสามารถของอุปกรณ์
+    """
+
+    name = "simulated"
+
+    def __init__(self,
+                 device_count: int = 1,
+                 device_concurrency: int = 1,
+                 default_latency: Union[LatencyModel, Dict[str, Any], None] = None,
+                 models: Optional[Dict[str, Dict[str, Any]]] = None,
+                 seed: Optional[int] = 0):
+        """
+        Args:
+            device_count: จำนวนอุปกรณ์จำลอง
+            device_concurrency: จำนวนงานที่อุปกรณ์แต่ละตัวทำพร้อมกันได้
+            default_latency: LatencyModel ของโมเดลที่ไม่ได้กำหนดไว้
+            models: {ชื่อโมเดล: {"latency": ..., "inputs": ..., "outputs": ...}}
+            seed: seed ของตัวสุ่ม (None = สุ่มทุกครั้ง)
+        """
+        self.device_count = device_count
+        self.device_concurrency = device_concurrency
+        self.default_latency = default_latency
+        self.models = dict(models or {})
+        self.seed = seed
+
+    def configure_model(self, model_name: str, **config) -> None:
+        """
+        กำหนด latency / inputs / outputs ของโมเดล
+
+        Args:
+            model_name: ชื่อโมเดล (ไม่มี .hef)
+            **config: latency, inputs, outputs
+        """
+        self.models.setdefault(model_name, {}).update(config)
+
+    def list_devices(self) -> List[str]:
+        return [f"sim{i}" for i in range(self.device_count)]
+
+    def create_device(self, device_id: str) -> SimulatedDevice:
+        return SimulatedDevice(device_id, self.device_concurrency)
+
+    def create_session(self,
+                       model_path: Union[str, Path, None] = None,
+                       batch_size: int = 1,
+                       quantized: bool = False,
+                       device: Optional[SimulatedDevice] = None,
+                       **kwargs) -> SimulatedSession:
+        config = dict(self.models.get(Path(model_path).stem, {})) if model_path is not None else {}
+        config.setdefault("latency", self.default_latency)
+        config.update(kwargs)
+        config.setdefault("seed", self.seed)
+        return SimulatedSession(model_path, batch_size, quantized, device=device, **config)
+
+
+register_backend(SimulatedBackend())
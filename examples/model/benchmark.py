@@ -0,0 +1,496 @@
+"""
+PWD Vision Works - Inference Benchmark
+วัด latency (p50/p90/p99/p99.9) และ throughput ของ inference ที่หลายระดับ concurrency และ batch size
+แยกเวลาตามขั้น (preprocess, transfer, device, postprocess) และบันทึกผลเป็น JSON
+พร้อมคำสั่ง compare สำหรับตรวจ regression เทียบกับ baseline
+
+Usage:
+    python -m pwd_library.model.benchmark run --simulated --output current.json
+    python -m pwd_library.model.benchmark run --simulated --model models/yolov8n.hef --device-ms 6
+    python -m pwd_library.model.benchmark run --model models/yolov8n.hef --concurrency 1 2 --batch-sizes 1 4
+    python -m pwd_library.model.benchmark compare baseline.json current.json --tolerance 0.1
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import threading
+from typing import Optional, List, Dict, Any, Sequence
+
+import numpy as np
+
+from ..image_processing.preprocessor import ImagePreprocessor
+from ..utils.tensor_arena import TensorArena
+from .backends import LatencyModel, get_backend
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("preprocess", "transfer", "device", "postprocess")
+PERCENTILES = (50, 90, 99, 99.9)
+REPORT_VERSION = 1
+
+
+def summarize_latencies(seconds: Sequence[float]) -> Dict[str, float]:
+    """
+    สรุป latency เป็น mean / percentile / max (ms)
+
+    Args:
+        seconds: latency ของแต่ละครั้ง (วินาที)
+
+    Returns:
+        Dictionary เช่น {"mean_ms", "p50_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms"}
+    """
+    if len(seconds) == 0:
+        return {}
+    values_ms = np.asarray(seconds, dtype=np.float64) * 1000
+    summary = {"mean_ms": float(values_ms.mean())}
+    for q, value in zip(PERCENTILES, np.percentile(values_ms, PERCENTILES)):
+        summary[f"p{q:g}_ms"] = float(value)
+    summary["max_ms"] = float(values_ms.max())
+    return summary
+
+
+class BenchmarkTarget:
+    """
+    สิ่งที่ถูกวัด: แยก inference เป็น preprocess -> infer -> postprocess
+
+    infer ใส่เวลา "transfer" และ "device" ลงใน timings หากแยกได้
+    (ถ้าไม่ใส่ เวลาทั้งหมดของ infer จะนับเป็น device)
+    """
+
+    name = "target"
+    max_batch_size = 1
+
+    def preprocess(self, images: List[np.ndarray]) -> Any:
+        raise NotImplementedError
+
+    def infer(self, batch: Any, timings: Dict[str, float]) -> Any:
+        raise NotImplementedError
+
+    def postprocess(self, outputs: Any, images: List[np.ndarray]) -> Any:
+        raise NotImplementedError
+
+    def release(self, batch: Any) -> None:
+        """คืน buffer ของ batch (เรียกหลัง infer)"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "max_batch_size": self.max_batch_size}
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessorTarget(BenchmarkTarget):
+    """
+    วัด Hailo8Processor ตาม backend ที่ processor ใช้
+    (บน Hailo transfer รวมอยู่ใน device เพราะ InferVStreams ไม่แยกเวลา)
+    """
+
+    def __init__(self, processor: Any):
+        self.processor = processor
+        self.processor.load_model()
+        self.name = processor.model_path.stem
+        self.max_batch_size = processor.batch_size
+
+    def preprocess(self, images: List[np.ndarray]) -> np.ndarray:
+        processor = self.processor
+        width, height = processor.model_input_size
+        dtype = np.uint8 if processor.quantized else np.float32
+        batch = processor.arena.acquire((processor.batch_size, height, width, 3), dtype)
+        method = processor.input_normalization
+        processor.preprocessor.preprocess_batch_into(images, batch[:len(images)], (width, height),
+                                                     method=method, dtype=dtype)
+        batch[len(images):] = 0
+        return batch
+
+    def infer(self, batch: np.ndarray, timings: Dict[str, float]) -> Dict[str, Any]:
+        outputs = self.processor.session.infer(batch)
+        _record_session_timings(self.processor.session, timings)
+        return outputs
+
+    def release(self, batch: np.ndarray) -> None:
+        self.processor.arena.release(batch)
+
+    def postprocess(self, outputs: Dict[str, Any], images: List[np.ndarray]) -> List[Any]:
+        processor = self.processor
+        return processor.postprocess_batch({name: output[:len(images)] for name, output in outputs.items()},
+                                           [image.shape[:2] for image in images])
+
+    def close(self) -> None:
+        self.processor.cleanup()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "backend": self.processor.backend.name, "max_batch_size": self.max_batch_size,
+                "quantized": self.processor.quantized, "input_size": list(self.processor.model_input_size)}
+
+
+class SessionTarget(BenchmarkTarget):
+    """
+    วัด session ของ backend โดยตรง (HailoSession หรือ SimulatedSession) โดยไม่ผ่าน Hailo8Processor
+
+    preprocess ใช้ ImagePreprocessor จริง ส่วน postprocess นับ candidate ที่ score เกิน threshold
+    """
+
+    def __init__(self, session: Any, name: Optional[str] = None, backend: str = "-",
+                 score_threshold: float = 0.5):
+        """
+        Args:
+            session: session ที่ยังไม่เปิดหรือเปิดแล้ว
+            name: ชื่อในรายงาน (None = ชื่อไฟล์โมเดล)
+            backend: ชื่อ backend ในรายงาน
+            score_threshold: threshold ของ postprocess
+        """
+        self.session = session if session.is_open else session.open()
+        self.name = name or session.model_path.stem
+        self.backend = backend
+        self.max_batch_size = session.batch_size
+        self.score_threshold = score_threshold
+        height, width = self.session.input_shape[:2]
+        self.input_size = (width, height)
+        self.preprocessor = ImagePreprocessor(self.input_size)
+        self.arena = TensorArena(name=f"benchmark-{self.name}")
+
+    def preprocess(self, images: List[np.ndarray]) -> np.ndarray:
+        width, height = self.input_size
+        batch = self.arena.acquire((self.max_batch_size, height, width, self.session.input_shape[2]), np.float32)
+        # session รับ batch ที่เล็กกว่าที่ configure ได้ จึงส่งเฉพาะภาพของ request
+        return self.preprocessor.preprocess_batch_into(images, batch[:len(images)], self.input_size,
+                                                       method="zero_one")[0]
+
+    def infer(self, batch: np.ndarray, timings: Dict[str, float]) -> Dict[str, np.ndarray]:
+        outputs = self.session.infer(batch)
+        _record_session_timings(self.session, timings)
+        return outputs
+
+    def release(self, batch: np.ndarray) -> None:
+        self.arena.release(batch.base if batch.base is not None else batch)
+
+    def postprocess(self, outputs: Dict[str, np.ndarray], images: List[np.ndarray]) -> List[int]:
+        return [sum(int(np.count_nonzero(output[i] > self.score_threshold)) for output in outputs.values())
+                for i in range(len(images))]
+
+    def close(self) -> None:
+        self.session.close()
+
+    def describe(self) -> Dict[str, Any]:
+        info = {"name": self.name, "backend": self.backend, "max_batch_size": self.max_batch_size,
+                "input_size": list(self.input_size)}
+        latency = getattr(self.session, "latency", None)
+        if latency is not None:
+            info["latency_model"] = latency.to_dict()
+        return info
+
+
+def _record_session_timings(session: Any, timings: Dict[str, float]) -> None:
+    """ใช้เวลา transfer / device ที่ session วัดได้เอง (เช่น SimulatedSession)"""
+    last_timings = getattr(session, "last_timings", None)
+    if last_timings is not None:
+        timings.update(last_timings())
+
+
+def _run_request(target: BenchmarkTarget, images: List[np.ndarray]) -> Dict[str, float]:
+    """ประมวลผลหนึ่ง request แล้วคืนเวลาของแต่ละขั้น (วินาที)"""
+    timings = {}
+    start = time.perf_counter()
+    batch = target.preprocess(images)
+    timings["preprocess"] = time.perf_counter() - start
+
+    infer_start = time.perf_counter()
+    try:
+        outputs = target.infer(batch, timings)
+    finally:
+        target.release(batch)
+    infer_time = time.perf_counter() - infer_start
+    timings.setdefault("device", infer_time - timings.get("transfer", 0.0))
+
+    post_start = time.perf_counter()
+    target.postprocess(outputs, images)
+    timings["postprocess"] = time.perf_counter() - post_start
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def run_config(target: BenchmarkTarget,
+               images: Sequence[np.ndarray],
+               concurrency: int = 1,
+               batch_size: int = 1,
+               iterations: int = 200,
+               warmup: int = 20) -> Dict[str, Any]:
+    """
+    วัดหนึ่งชุดการตั้งค่า: concurrency thread ส่ง request ขนาด batch_size ต่อเนื่อง
+
+    Args:
+        target: BenchmarkTarget
+        images: ภาพทดสอบ (วนใช้)
+        concurrency: จำนวน request ที่ส่งพร้อมกัน
+        batch_size: จำนวนภาพต่อ request
+        iterations: จำนวน request ที่วัด
+        warmup: จำนวน request ก่อนเริ่มวัด
+
+    Returns:
+        ผลของการตั้งค่านี้ (latency ต่อ request, throughput เป็นเฟรมต่อวินาที, เวลาแต่ละขั้น)
+    """
+    if batch_size > target.max_batch_size:
+        raise ValueError(f"batch_size {batch_size} exceeds target max_batch_size {target.max_batch_size}")
+
+    def request_images(index: int) -> List[np.ndarray]:
+        return [images[(index * batch_size + j) % len(images)] for j in range(batch_size)]
+
+    for i in range(warmup):
+        _run_request(target, request_images(i))
+
+    samples: List[Dict[str, float]] = []
+    errors = []
+    counter = iter(range(iterations))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            try:
+                timings = _run_request(target, request_images(index))
+                with lock:
+                    samples.append(timings)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    threads = [threading.Thread(target=worker, name=f"benchmark-{i}", daemon=True) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    frames = len(samples) * batch_size
+    result = {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "requests": len(samples),
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "throughput_fps": frames / elapsed if elapsed > 0 else 0.0,
+        "latency": summarize_latencies([s["total"] for s in samples]),
+        "stages": {stage: summarize_latencies([s[stage] for s in samples if stage in s]) for stage in STAGES},
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def run_benchmark(target: BenchmarkTarget,
+                  images: Sequence[np.ndarray],
+                  concurrency_levels: Sequence[int] = (1, 2, 4),
+                  batch_sizes: Sequence[int] = (1,),
+                  iterations: int = 200,
+                  warmup: int = 20) -> Dict[str, Any]:
+    """
+    วัดทุกคู่ของ concurrency และ batch size
+
+    Args:
+        target: BenchmarkTarget
+        images: ภาพทดสอบ
+        concurrency_levels: ระดับ concurrency ที่วัด
+        batch_sizes: batch size ที่วัด (ที่เกิน max_batch_size ของ target จะถูกข้าม)
+        iterations: จำนวน request ต่อการตั้งค่า
+        warmup: จำนวน request warm-up ต่อการตั้งค่า
+
+    Returns:
+        รายงาน (dictionary ที่เขียนเป็น JSON ได้)
+    """
+    if not images:
+        raise ValueError("No test images provided")
+
+    results = []
+    for batch_size in batch_sizes:
+        if batch_size > target.max_batch_size:
+            logger.warning(f"Skipping batch_size={batch_size} (target max {target.max_batch_size})")
+            continue
+        for concurrency in concurrency_levels:
+            logger.info(f"Benchmarking concurrency={concurrency} batch_size={batch_size}")
+            results.append(run_config(target, images, concurrency, batch_size, iterations, warmup))
+
+    return {
+        "version": REPORT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": target.describe(),
+        "host": {
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "settings": {
+            "iterations": iterations,
+            "warmup": warmup,
+            "image_shape": list(images[0].shape),
+        },
+        "results": results,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any],
+                    current: Dict[str, Any],
+                    tolerance: float = 0.10,
+                    latency_metrics: Sequence[str] = ("p50_ms", "p99_ms")) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    เทียบรายงานกับ baseline ตามคู่ (concurrency, batch_size)
+
+    latency ที่สูงกว่า baseline เกิน tolerance หรือ throughput ที่ต่ำกว่าเกิน tolerance ถือเป็น regression
+
+    Args:
+        baseline: รายงาน baseline
+        current: รายงานปัจจุบัน
+        tolerance: สัดส่วนที่ยอมให้ต่างได้ (0.1 = 10%)
+        latency_metrics: metric ของ latency ที่ตรวจ
+
+    Returns:
+        {"regressions": [...], "improvements": [...], "missing": [...]}
+    """
+    def key(result):
+        return result["concurrency"], result["batch_size"]
+
+    current_results = {key(r): r for r in current.get("results", [])}
+    comparison = {"regressions": [], "improvements": [], "missing": []}
+
+    for base in baseline.get("results", []):
+        config = {"concurrency": base["concurrency"], "batch_size": base["batch_size"]}
+        result = current_results.get(key(base))
+        if result is None:
+            comparison["missing"].append(config)
+            continue
+
+        checks = [(f"latency.{m}", base["latency"].get(m), result["latency"].get(m), True) for m in latency_metrics]
+        checks.append(("throughput_fps", base["throughput_fps"], result["throughput_fps"], False))
+        for metric, old, new, lower_is_better in checks:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if lower_is_better else change < -tolerance
+            better = change < -tolerance if lower_is_better else change > tolerance
+            if worse or better:
+                entry = dict(config, metric=metric, baseline=old, current=new, change=change)
+                comparison["regressions" if worse else "improvements"].append(entry)
+
+    return comparison
+
+
+def _load_images(paths: Sequence[str], width: int, height: int, count: int) -> List[np.ndarray]:
+    """อ่านภาพทดสอบ หรือสร้างภาพสุ่มเมื่อไม่ได้ระบุ"""
+    if paths:
+        import cv2
+        images = [cv2.imread(path) for path in paths]
+        missing = [path for path, image in zip(paths, images) if image is None]
+        if missing:
+            raise FileNotFoundError(f"Cannot read images: {missing}")
+        return images
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"Target: {report['target']['name']} ({report['target'].get('backend', '-')})")
+    header = f"{'conc':>5}{'batch':>6}{'fps':>9}{'p50':>8}{'p90':>8}{'p99':>8}{'p99.9':>8}"
+    header += "".join(f"{stage[:5]:>8}" for stage in STAGES)
+    print(header + "   (ms)")
+    for r in report["results"]:
+        latency = r["latency"]
+        line = f"{r['concurrency']:>5}{r['batch_size']:>6}{r['throughput_fps']:>9.1f}"
+        line += "".join(f"{latency.get(f'p{q:g}_ms', 0.0):>8.2f}" for q in PERCENTILES)
+        line += "".join(f"{r['stages'][stage].get('p50_ms', 0.0):>8.2f}" for stage in STAGES)
+        if r["errors"]:
+            line += f"  errors={r['errors']}"
+        print(line)
+
+
+def _print_comparison(comparison: Dict[str, List[Dict[str, Any]]], tolerance: float) -> None:
+    for kind in ("regressions", "improvements"):
+        entries = comparison[kind]
+        print(f"{kind.capitalize()} (> {tolerance:.0%}): {len(entries)}")
+        for e in entries:
+            print(f"  conc={e['concurrency']} batch={e['batch_size']} {e['metric']}: "
+                  f"{e['baseline']:.2f} -> {e['current']:.2f} ({e['change']:+.1%})")
+    for config in comparison["missing"]:
+        print(f"  missing in current report: conc={config['concurrency']} batch={config['batch_size']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inference latency / throughput benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark")
+    run.add_argument("--model", help="path to .hef model (optional with --simulated)")
+    run.add_argument("--backend", help="inference backend (default: $PWD_INFERENCE_BACKEND or hailo)")
+    run.add_argument("--simulated", action="store_true", help="shortcut for --backend simulated")
+    run.add_argument("--device-ms", type=float, default=4.0, help="simulated fixed device time per call")
+    run.add_argument("--per-frame-ms", type=float, default=2.0, help="simulated device time per frame")
+    run.add_argument("--jitter", type=float, default=0.1, help="simulated latency jitter")
+    run.add_argument("--device-concurrency", type=int, default=1, help="simulated concurrent device jobs")
+    run.add_argument("--batch-size", type=int, default=8, help="max batch size the model is configured with")
+    run.add_argument("--quantized", action="store_true", help="send uint8 input")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    run.add_argument("--batch-sizes", type=int, nargs="+", default=[1])
+    run.add_argument("--iterations", type=int, default=200)
+    run.add_argument("--warmup", type=int, default=20)
+    run.add_argument("--images", nargs="*", default=[], help="test images (default: random frames)")
+    run.add_argument("--width", type=int, default=1280)
+    run.add_argument("--height", type=int, default=720)
+    run.add_argument("--output", help="write the JSON report to this file")
+
+    compare = commands.add_parser("compare", help="compare a report against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == "compare":
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        comparison = compare_reports(baseline, current, args.tolerance)
+        _print_comparison(comparison, args.tolerance)
+        return 1 if comparison["regressions"] else 0
+
+    images = _load_images(args.images, args.width, args.height, max(args.batch_sizes))
+    backend = get_backend("simulated" if args.simulated else args.backend)
+    if backend.name == "simulated":
+        backend.default_latency = LatencyModel(args.device_ms, args.per_frame_ms, args.jitter)
+        backend.device_concurrency = args.device_concurrency
+    if args.model:
+        from .hailo8_processor import Hailo8Processor
+        target = ProcessorTarget(Hailo8Processor(args.model, batch_size=args.batch_size,
+                                                 quantized=args.quantized, backend=backend))
+    elif backend.name == "simulated":
+        session = backend.create_session(None, args.batch_size, device=backend.create_device("sim0"))
+        target = SessionTarget(session, name="simulated", backend=backend.name)
+    else:
+        parser.error("--model is required unless --simulated is used")
+
+    try:
+        report = run_benchmark(target, images, args.concurrency, args.batch_sizes, args.iterations, args.warmup)
+    finally:
+        target.close()
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+PWD Vision Works - Cascade Executor
+รันโมเดลแบบต่อทอด (เช่น vehicle -> plate -> OCR) โดยรวม crop ทั้งหมดที่ขั้นหนึ่งสร้างขึ้น
+(ภายในเฟรม หรือข้ามเฟรมในช่วงเวลาสั้นๆ) เป็น batch เดียวสำหรับขั้นถัดไป
+แล้วกระจายผลกลับไปยัง parent ของแต่ละ crop เป็นโครงสร้างต้นไม้
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from ..utils.exceptions import InferenceError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class CascadeStage:
+    """
+    ขั้นหนึ่งของ cascade
+
+    infer_batch รับ input ทั้ง batch และคืนผลหนึ่งรายการต่อ input ตามลำดับเดิม
+    expand สร้าง input ของขั้นถัดไปจาก (input, ผล) ของแต่ละรายการ เช่น crop ของแต่ละกล่อง
+    """
+
+    def __init__(self,
+                 name: str,
+                 infer_batch: Callable[[List[Any]], Sequence[Any]],
+                 expand: Optional[Callable[[Any, Any], Sequence[Any]]] = None,
+                 max_batch: int = 8,
+                 latency_budget: Optional[float] = None):
+        """
+        Args:
+            name: ชื่อขั้น
+            infer_batch: fn(inputs) -> outputs (len เท่ากับ inputs)
+            expand: fn(input, output) -> child inputs ของขั้นถัดไป (None = ขั้นสุดท้าย)
+            max_batch: จำนวนรายการสูงสุดต่อ batch
+            latency_budget: เวลาสูงสุด (วินาที) ที่รายการหนึ่งควรอยู่ในขั้นนี้ (รอรวม batch + ประมวลผล)
+                            ในโหมด submit() ผู้รวม batch จะรอรายการเพิ่มได้ไม่เกิน
+                            latency_budget - เวลาประมวลผล batch โดยเฉลี่ย; None = ไม่รอ (รวมเฉพาะที่ค้างในคิว)
+        """
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        self.name = name
+        self.infer_batch = infer_batch
+        self.expand = expand
+        self.max_batch = max_batch
+        self.latency_budget = latency_budget
+
+    def __repr__(self) -> str:
+        return f"CascadeStage('{self.name}', max_batch={self.max_batch}, latency_budget={self.latency_budget})"
+
+
+class CascadeNode:
+    """
+    ผลของรายการหนึ่งใน cascade
+
+    Attributes:
+        stage: ชื่อขั้น
+        input: input ของรายการ (เฟรม หรือ crop)
+        output: ผลจาก infer_batch
+        children: CascadeNode ของขั้นถัดไปที่สร้างจากรายการนี้
+        parent: CascadeNode ของขั้นก่อนหน้า (None สำหรับ root)
+        tag: ข้อมูลจากผู้ส่ง (root เท่านั้น)
+        error: exception หากขั้นนี้ล้มเหลว
+    """
+
+    __slots__ = ("stage", "level", "input", "output", "children", "parent", "tag", "error",
+                 "enqueued", "_root", "_pending", "_future")
+
+    def __init__(self, stage: str, level: int, input: Any, parent: Optional["CascadeNode"] = None, tag: Any = None):
+        self.stage = stage
+        self.level = level
+        self.input = input
+        self.output = None
+        self.children: List["CascadeNode"] = []
+        self.parent = parent
+        self.tag = tag
+        self.error: Optional[BaseException] = None
+        self.enqueued = time.perf_counter()
+        self._root = parent._root if parent is not None else self
+        self._pending = 0
+        self._future: Optional[Future] = None
+
+    @property
+    def root(self) -> "CascadeNode":
+        return self._root
+
+    def walk(self) -> Iterator["CascadeNode"]:
+        """ไล่ทุก node ในต้นไม้ (depth-first เริ่มจากตัวเอง)"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def at_stage(self, stage: str) -> List["CascadeNode"]:
+        """node ทั้งหมดของขั้นที่กำหนดภายใต้ node นี้"""
+        return [node for node in self.walk() if node.stage == stage]
+
+    def __repr__(self) -> str:
+        return f"CascadeNode('{self.stage}', children={len(self.children)})"
+
+
+class _CascadeStageStats:
+    """สถิติของแต่ละขั้น"""
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.busy_time = 0.0
+        self.batch_time = 0.0       # moving average ของเวลาต่อ batch
+        self.max_batch = 0
+        self.over_budget = 0
+        self.errors = 0
+
+    def record(self, size: int, elapsed: float) -> None:
+        self.batches += 1
+        self.items += size
+        self.busy_time += elapsed
+        self.max_batch = max(self.max_batch, size)
+        self.batch_time = elapsed if self.batches == 1 else self.batch_time + 0.2 * (elapsed - self.batch_time)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch,
+            "avg_batch_ms": self.busy_time / self.batches * 1000 if self.batches else 0.0,
+            "avg_item_ms": self.busy_time / self.items * 1000 if self.items else 0.0,
+            "over_budget": self.over_budget,
+            "errors": self.errors,
+        }
+
+
+class CascadeExecutor:
+    """
+    รัน CascadeStage ต่อกันโดย batch รายการของแต่ละขั้น
+
+    ใช้ได้สองแบบ:
+        run(inputs): แบบ synchronous ทีละขั้น รวม crop ทั้งหมดของ inputs (เช่นทุกรถในเฟรม) เป็น batch
+        submit(input): แบบ asynchronous มี thread ต่อขั้น รวมรายการข้ามเฟรมภายใน latency budget
+                       คืน Future ของ root CascadeNode ที่เสร็จเมื่อทุกขั้นของต้นไม้ประมวลผลครบ
+    """
+
+    def __init__(self, stages: Sequence[CascadeStage], name: str = "cascade"):
+        """
+        Args:
+            stages: ขั้นตามลำดับ (ทุกขั้นยกเว้นขั้นสุดท้ายต้องมี expand)
+            name: ชื่อสำหรับ log และชื่อ thread
+        """
+        if not stages:
+            raise ValueError("Cascade requires at least one stage")
+        for stage in stages[:-1]:
+            if stage.expand is None:
+                raise ValueError(f"Stage '{stage.name}' needs expand() to feed the next stage")
+        self.stages = list(stages)
+        self.name = name
+        self._stats = [_CascadeStageStats() for _ in self.stages]
+        self._lock = threading.Lock()
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+
+    # ------------------------------------------------------------------ common
+
+    def _process(self, level: int, nodes: List[CascadeNode]) -> List[CascadeNode]:
+        """รัน batch ของขั้น level และสร้าง child nodes (raise เมื่อล้มเหลว)"""
+        stage = self.stages[level]
+        start = time.perf_counter()
+        try:
+            outputs = stage.infer_batch([node.input for node in nodes])
+            if len(outputs) != len(nodes):
+                raise InferenceError(f"Stage '{stage.name}' returned {len(outputs)} outputs for {len(nodes)} inputs")
+        except Exception:
+            with self._lock:
+                self._stats[level].errors += 1
+            raise
+        now = time.perf_counter()
+
+        children = []
+        next_stage = self.stages[level + 1].name if level + 1 < len(self.stages) else None
+        for node, output in zip(nodes, outputs):
+            node.output = output
+            if next_stage is not None:
+                node.children = [CascadeNode(next_stage, level + 1, child, node)
+                                 for child in stage.expand(node.input, output) or ()]
+                children.extend(node.children)
+
+        with self._lock:
+            stats = self._stats[level]
+            stats.record(len(nodes), now - start)
+            if stage.latency_budget is not None:
+                stats.over_budget += sum(1 for node in nodes if now - node.enqueued > stage.latency_budget)
+        return children
+
+    # ------------------------------------------------------------- synchronous
+
+    def run(self, inputs: Sequence[Any], tags: Optional[Sequence[Any]] = None) -> List[CascadeNode]:
+        """
+        รัน cascade กับ inputs ทั้งหมดแบบ synchronous
+
+        แต่ละขั้นรวมรายการทั้งหมดที่ขั้นก่อนหน้าสร้างเป็น batch ขนาดไม่เกิน max_batch
+
+        Args:
+            inputs: input ของขั้นแรก (เช่น เฟรม)
+            tags: ข้อมูลประจำแต่ละ input
+
+        Returns:
+            root CascadeNode ต่อ input ตามลำดับเดิม
+
+        Raises:
+            InferenceError: หากขั้นใดล้มเหลว
+        """
+        roots = [CascadeNode(self.stages[0].name, 0, item, tag=tags[i] if tags is not None else None)
+                 for i, item in enumerate(inputs)]
+        level_nodes = roots
+        for level, stage in enumerate(self.stages):
+            next_nodes = []
+            for start in range(0, len(level_nodes), stage.max_batch):
+                try:
+                    next_nodes.extend(self._process(level, level_nodes[start:start + stage.max_batch]))
+                except InferenceError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Cascade '{self.name}' stage '{stage.name}' failed: {e}")
+                    raise InferenceError(f"Cascade stage '{stage.name}' failed: {e}") from e
+            level_nodes = next_nodes
+            if not level_nodes:
+                break
+        return roots
+
+    # ------------------------------------------------------------ asynchronous
+
+    def start(self) -> "CascadeExecutor":
+        """เริ่ม thread ของแต่ละขั้นสำหรับ submit()"""
+        if self._threads:
+            return self
+        self._queues = [queue.Queue() for _ in self.stages]
+        for level, stage in enumerate(self.stages):
+            thread = threading.Thread(target=self._run_stage, args=(level,),
+                                      name=f"{self.name}-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"CascadeExecutor '{self.name}' started: {[s.name for s in self.stages]}")
+        return self
+
+    def submit(self, item: Any, tag: Any = None) -> Future:
+        """
+        ส่ง input เข้าขั้นแรก
+
+        Args:
+            item: input ของขั้นแรก
+            tag: ข้อมูลประจำ input
+
+        Returns:
+            Future ของ root CascadeNode
+        """
+        if not self._threads:
+            self.start()
+        root = CascadeNode(self.stages[0].name, 0, item, tag=tag)
+        root._future = Future()
+        root._pending = 1
+        self._queues[0].put(root)
+        return root._future
+
+    def _batch_window(self, level: int) -> float:
+        """เวลาที่รอรวม batch ได้ก่อนเกิน latency budget"""
+        budget = self.stages[level].latency_budget
+        if budget is None:
+            return 0.0
+        return max(0.0, budget - self._stats[level].batch_time)
+
+    def _run_stage(self, level: int) -> None:
+        stage = self.stages[level]
+        source = self._queues[level]
+        stopping = False
+        while not stopping:
+            node = source.get()
+            if node is _STOP:
+                break
+            batch = [node]
+            deadline = node.enqueued + self._batch_window(level)
+            while len(batch) < stage.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = source.get(timeout=remaining) if remaining > 0 else source.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batch.append(nxt)
+
+            try:
+                children = self._process(level, batch)
+            except Exception as e:
+                logger.error(f"Cascade '{self.name}' stage '{stage.name}' failed: {e}")
+                for node in batch:
+                    node.error = e
+                children = []
+
+            with self._lock:
+                for child in children:
+                    child._root._pending += 1
+                finished = []
+                for node in batch:
+                    node._root._pending -= 1
+                    if node._root._pending == 0:
+                        finished.append(node._root)
+            for child in children:
+                self._queues[level + 1].put(child)
+            for root in finished:
+                self._complete(root)
+
+    @staticmethod
+    def _complete(root: CascadeNode) -> None:
+        failed = next((node for node in root.walk() if node.error is not None), None)
+        if failed is not None:
+            root._future.set_exception(InferenceError(f"Cascade stage '{failed.stage}' failed: {failed.error}"))
+        else:
+            root._future.set_result(root)
+
+    def close(self, wait: bool = True) -> None:
+        """หยุด thread ของทุกขั้น (รายการที่ค้างในคิวก่อน close จะถูกประมวลผลก่อน)"""
+        if not self._threads:
+            return
+        for level, thread in enumerate(self._threads):
+            self._queues[level].put(_STOP)
+            if wait:
+                thread.join()
+        self._threads = []
+        logger.info(f"CascadeExecutor '{self.name}' stopped")
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """สถิติต่อขั้น: จำนวน batch, ขนาด batch เฉลี่ย, เวลาต่อ batch/รายการ และจำนวนรายการที่เกิน budget"""
+        with self._lock:
+            return {stage.name: stats.to_dict() for stage, stats in zip(self.stages, self._stats)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -8,10 +8,12 @@ Version: 1.0.0
 
 import time
 import logging
-import gc
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple, Union
+from typing import Optional, List, Dict, Any, Tuple, Union, Iterator, Callable, Sequence
+from concurrent.futures import Future
 from contextlib import contextmanager
+from collections import OrderedDict
+import threading
 import numpy as np
 
 try:
@@ -22,39 +24,93 @@ except ImportError:
     logging.warning("Hailo platform not available. Please install HailoRT")
 
 from ..utils.exceptions import HailoError, ModelLoadError, InferenceError
+from ..utils.tensor_arena import TensorArena
 from ..image_processing.preprocessor import ImagePreprocessor
 from ..image_processing.postprocessor import ImagePostprocessor
+from .async_pipeline import AsyncInferencePipeline, AsyncResult
+from .model_metadata import ModelMetadata, ModelMetadataCache
+from .benchmark import summarize_latencies
+from .backends import InferenceBackend, get_backend, register_backend, resolve_model_backend
+from .telemetry import (LatencyHistogram, RollingHistogram, TelemetryRingBuffer, TelemetrySampler,
+                        TELEMETRY_FIELDS, make_hailo_reader, read_process_memory)
 
 logger = logging.getLogger(__name__)
 
 
+class _DeviceSlot:
+    """สถานะของอุปกรณ์ Hailo หนึ่งตัวใน HailoModelManager"""
+    
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.vdevice = None
+        self.sessions: "OrderedDict[str, HailoSession]" = OrderedDict()
+        self.session_locks: Dict[str, threading.Lock] = {}
+        # ให้การโหลด/evict บนอุปกรณ์นี้ทำทีละงานโดยไม่ต้องถือ lock ของ registry
+        self.load_lock = threading.Lock()
+        self.in_use: Dict[str, int] = {}
+        self.model_bytes: Dict[str, int] = {}  # ขนาดที่นับเข้า resident_bytes ตอนโหลด
+        self.resident_bytes = 0
+        self.requests = 0
+        self.busy_time = 0.0
+        self.evictions = 0
+    
+    @property
+    def active(self) -> int:
+        return sum(self.in_use.values())
+
+
 class HailoModelManager:
     """
     จัดการโมเดล Hailo และการโหลด
+    
+    ทำหน้าที่เป็น registry ระหว่างทำงาน: เก็บ network group ที่ configure แล้วไว้บนอุปกรณ์
+    ภายใต้งบประมาณ (จำนวนโมเดล/ขนาด) ต่ออุปกรณ์ โดยนำโมเดลที่ไม่ได้ใช้นานที่สุดออกก่อน
+    และกระจาย request ของโมเดลเดียวกันไปยังทุกอุปกรณ์ที่พบจาก detect_hailo_devices
     """
     
-    def __init__(self, model_dir: str = "models/"):
+    def __init__(self,
+                 model_dir: str = "models/",
+                 max_models_per_device: int = 4,
+                 memory_budget_mb: Optional[float] = None,
+                 device_ids: Optional[List[str]] = None,
+                 backend: Union[str, InferenceBackend, None] = None):
         """
         เริ่มต้น HailoModelManager
         
         Args:
             model_dir: ไดเรกทอรีที่เก็บโมเดล
+            max_models_per_device: จำนวน network group สูงสุดที่ค้างไว้บนอุปกรณ์หนึ่งตัว
+            memory_budget_mb: ขนาดรวมของ HEF ที่ค้างไว้ต่ออุปกรณ์ (None = ไม่จำกัด)
+            device_ids: อุปกรณ์ที่ใช้ (None = ทุกอุปกรณ์ของ backend)
+            backend: inference backend ("hailo", "simulated", "onnx" หรือ InferenceBackend;
+                     None = จาก PWD_INFERENCE_BACKEND หรือ "hailo")
         """
+        self.backend = get_backend(backend)
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(exist_ok=True, parents=True)
-        self.loaded_models = {}
+        self.max_models_per_device = max_models_per_device
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.device_ids = device_ids
+        self.metadata = ModelMetadataCache.for_directory(self.model_dir)
+        
+        # model name -> รายการ device id ที่โมเดลถูกโหลดอยู่
+        self.loaded_models: Dict[str, List[str]] = {}
+        self._devices: Optional[List[_DeviceSlot]] = None
+        self._lock = threading.RLock()
+        self._start_time = time.time()
         
         logger.info(f"HailoModelManager initialized with model directory: {self.model_dir}")
     
     def list_available_models(self) -> List[str]:
         """
-        แสดงรายการโมเดลที่มีอยู่
+        แสดงรายการโมเดลที่มีอยู่ (และอัปเดต metadata cache ของโฟลเดอร์)
         
         Returns:
             รายการชื่อไฟล์โมเดล .hef
         """
-        hef_files = list(self.model_dir.glob("*.hef"))
+        hef_files = sorted(self.model_dir.glob(f"*{self.backend.model_suffix}"))
         model_names = [f.stem for f in hef_files]
+        self.metadata.refresh(hef_files, suffix=self.backend.model_suffix)
         
         logger.info(f"Found {len(model_names)} model(s): {model_names}")
         return model_names
@@ -72,8 +128,9 @@ class HailoModelManager:
         Raises:
             FileNotFoundError: หากไม่พบโมเดล
         """
-        if not model_name.endswith('.hef'):
-            model_name = f"{model_name}.hef"
+        suffix = self.backend.model_suffix
+        if not model_name.endswith(suffix):
+            model_name = f"{model_name}{suffix}"
             
         model_path = self.model_dir / model_name
         
@@ -82,6 +139,18 @@ class HailoModelManager:
             
         return model_path
     
+    def get_model_info(self, model_name: str) -> ModelMetadata:
+        """
+        ดึง metadata ของโมเดล (shape, format, quantization, labels) จาก cache โดยไม่แตะอุปกรณ์
+        
+        Args:
+            model_name: ชื่อโมเดล
+            
+        Returns:
+            ModelMetadata
+        """
+        return self.metadata.get(self.get_model_path(model_name))
+    
     def validate_model(self, model_path: Path) -> Dict[str, Any]:
         """
         ตรวจสอบความถูกต้องของโมเดล
@@ -93,18 +162,16 @@ class HailoModelManager:
             ข้อมูลโมเดล
         """
         try:
-            # ตรวจสอบไฟล์
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model file not found: {model_path}")
-            
-            if model_path.stat().st_size == 0:
-                raise ValueError(f"Model file is empty: {model_path}")
-            
-            # TODO: เพิ่มการตรวจสอบ metadata ของโมเดล Hailo
+            # ตรวจสอบไฟล์และอ่าน metadata (parse HEF เฉพาะเมื่อไฟล์เปลี่ยน)
+            metadata = self.metadata.get(model_path)
             model_info = {
                 "path": str(model_path),
-                "size_bytes": model_path.stat().st_size,
+                "size_bytes": metadata.size_bytes,
                 "name": model_path.stem,
+                "sha256": metadata.sha256,
+                "inputs": metadata.inputs,
+                "outputs": metadata.outputs,
+                "num_labels": len(metadata.labels),
                 "valid": True
             }
             
@@ -114,47 +181,510 @@ class HailoModelManager:
         except Exception as e:
             logger.error(f"Model validation failed: {e}")
             raise ModelLoadError(f"Model validation failed: {e}") from e
+    
+    # ------------------------------------------------------------------ #
+    # Runtime registry
+    # ------------------------------------------------------------------ #
+    def _get_devices(self) -> List[_DeviceSlot]:
+        with self._lock:
+            if self._devices is None:
+                device_ids = self.device_ids or self.backend.list_devices()
+                if not device_ids:
+                    raise HailoError(f"No {self.backend.name} devices found")
+                self._devices = [_DeviceSlot(device_id) for device_id in device_ids]
+                logger.info(f"Model registry using {len(self._devices)} device(s): {device_ids}")
+            return self._devices
+    
+    def _select_device(self, model_name: str) -> _DeviceSlot:
+        """
+        เลือกอุปกรณ์สำหรับ request: อุปกรณ์ที่มีโมเดลอยู่แล้วและว่างที่สุดก่อน
+        หากทุกตัวที่มีโมเดลกำลังใช้งาน ให้โหลดเพิ่มบนอุปกรณ์ที่ว่างที่สุด
+        """
+        devices = self._get_devices()
+        resident = [d for d in devices if model_name in d.sessions]
+        idle_resident = [d for d in resident if d.in_use.get(model_name, 0) == 0]
+        if idle_resident:
+            return min(idle_resident, key=lambda d: (d.active, d.busy_time))
+        candidates = [d for d in devices if model_name not in d.sessions] or resident
+        return min(candidates, key=lambda d: (d.active, d.busy_time))
+    
+    def _load_on_device(self, slot: _DeviceSlot, model_name: str, **session_kwargs) -> "HailoSession":
+        """
+        โหลดโมเดลลงอุปกรณ์ (นำโมเดล LRU ที่ไม่ได้ใช้งานออกเมื่อเกินงบประมาณ)
+        
+        ผู้เรียกต้องถือ slot.load_lock แต่ไม่ถือ self._lock: การ configure network group ใช้เวลานาน
+        จึงแตะ registry เฉพาะตอนเลือก victim และตอนลงทะเบียน session
+        """
+        model_path = self.get_model_path(model_name)
+        model_bytes = model_path.stat().st_size
+        
+        victims = []
+        with self._lock:
+            while slot.sessions and (
+                    len(slot.sessions) >= self.max_models_per_device
+                    or (self.memory_budget_bytes is not None
+                        and slot.resident_bytes + model_bytes > self.memory_budget_bytes)):
+                victim = next((name for name in slot.sessions if slot.in_use.get(name, 0) == 0), None)
+                if victim is None:
+                    raise HailoError(f"Device {slot.device_id} budget exhausted and all models are in use")
+                victims.append((victim, self._detach_from_device(slot, victim)))
+                slot.evictions += 1
+        for victim, session in victims:
+            session.close()
+            logger.info(f"Evicted {victim} from device {slot.device_id} (LRU)")
+        
+        if slot.vdevice is None:
+            slot.vdevice = self.backend.create_device(slot.device_id)
+        
+        session = self.backend.create_session(model_path, device=slot.vdevice, **session_kwargs).open()
+        with self._lock:
+            slot.sessions[model_name] = session
+            slot.session_locks[model_name] = threading.Lock()
+            slot.in_use[model_name] = 0
+            slot.model_bytes[model_name] = model_bytes
+            slot.resident_bytes += model_bytes
+            self.loaded_models.setdefault(model_name, []).append(slot.device_id)
+        logger.info(f"Loaded {model_name} on device {slot.device_id}")
+        return session
+    
+    def _detach_from_device(self, slot: _DeviceSlot, model_name: str) -> "HailoSession":
+        """นำโมเดลออกจาก registry ของอุปกรณ์ (ผู้เรียกถือ self._lock และปิด session เอง)"""
+        session = slot.sessions.pop(model_name)
+        slot.session_locks.pop(model_name, None)
+        slot.in_use.pop(model_name, None)
+        slot.resident_bytes -= slot.model_bytes.pop(model_name, 0)
+        devices = self.loaded_models.get(model_name, [])
+        if slot.device_id in devices:
+            devices.remove(slot.device_id)
+        if not devices:
+            self.loaded_models.pop(model_name, None)
+        return session
+    
+    def _unload_from_device(self, slot: _DeviceSlot, model_name: str) -> None:
+        self._detach_from_device(slot, model_name).close()
+    
+    def _checkout(self, slot: _DeviceSlot, model_name: str) -> Optional[Tuple["HailoSession", threading.Lock]]:
+        """นับ request ของโมเดลที่อยู่บนอุปกรณ์แล้ว (ผู้เรียกถือ self._lock; None = ยังไม่ได้โหลด)"""
+        session = slot.sessions.get(model_name)
+        if session is None:
+            return None
+        slot.sessions.move_to_end(model_name)
+        slot.in_use[model_name] += 1
+        slot.requests += 1
+        return session, slot.session_locks[model_name]
+    
+    @contextmanager
+    def session(self, model_name: str, **session_kwargs):
+        """
+        ยืม session ของโมเดลบนอุปกรณ์ที่เหมาะสม (โหลดเมื่อยังไม่อยู่บนอุปกรณ์)
+        
+        Args:
+            model_name: ชื่อโมเดล
+            **session_kwargs: argument ของ HailoSession (batch_size, quantized) เมื่อต้องโหลดใหม่
+            
+        Yields:
+            HailoSession ที่ใช้ได้เฉพาะภายใน with block
+        """
+        with self._lock:
+            slot = self._select_device(model_name)
+            checkout = self._checkout(slot, model_name)
+        if checkout is None:
+            # โหลดนอก self._lock: request ของโมเดลที่โหลดแล้วและอุปกรณ์อื่นไม่ต้องรอ
+            with slot.load_lock:
+                with self._lock:
+                    checkout = self._checkout(slot, model_name)
+                if checkout is None:
+                    self._load_on_device(slot, model_name, **session_kwargs)
+                    with self._lock:
+                        checkout = self._checkout(slot, model_name)
+        session, session_lock = checkout
+        
+        start_time = time.perf_counter()
+        try:
+            with session_lock:
+                yield session
+        finally:
+            with self._lock:
+                slot.in_use[model_name] -= 1
+                slot.busy_time += time.perf_counter() - start_time
+    
+    def infer(self, model_name: str, inputs: Union[np.ndarray, Dict[str, np.ndarray]],
+              **session_kwargs) -> Dict[str, np.ndarray]:
+        """
+        inference ผ่าน registry (เลือกอุปกรณ์ให้อัตโนมัติ)
+        
+        Args:
+            model_name: ชื่อโมเดล
+            inputs: input ของ HailoSession.infer
+            **session_kwargs: argument ของ HailoSession เมื่อต้องโหลดใหม่
+            
+        Returns:
+            output ของโมเดล
+        """
+        with self.session(model_name, **session_kwargs) as session:
+            return session.infer(inputs)
+    
+    def warm_up(self, model_names: Optional[List[str]] = None, num_frames: int = 3,
+                background: bool = True, **session_kwargs) -> Optional[threading.Thread]:
+        """
+        โหลดโมเดลและส่งเฟรมหลอกเข้าอุปกรณ์ เพื่อให้เฟรมจริงเฟรมแรกไม่ช้า
+        
+        Args:
+            model_names: โมเดลที่ต้องการ (None = ทุกโมเดลในโฟลเดอร์ ไม่เกิน max_models_per_device)
+            num_frames: จำนวนเฟรมหลอกต่อโมเดล
+            background: ทำงานบน thread แยก
+            **session_kwargs: argument ของ HailoSession
+            
+        Returns:
+            thread ที่ทำงาน (เมื่อ background=True) หรือ None
+        """
+        if model_names is None:
+            model_names = self.list_available_models()[:self.max_models_per_device]
+        
+        def run():
+            for model_name in model_names:
+                try:
+                    shape = self.get_model_info(model_name).input_shape
+                    if shape is None:
+                        logger.warning(f"Skipping warm-up of {model_name}: input shape unknown")
+                        continue
+                    dtype = np.uint8 if session_kwargs.get("quantized") else np.float32
+                    dummy = np.zeros((session_kwargs.get("batch_size", 1),) + tuple(shape), dtype=dtype)
+                    start_time = time.perf_counter()
+                    for _ in range(num_frames):
+                        self.infer(model_name, dummy, **session_kwargs)
+                    logger.info(f"Warmed up {model_name} in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+                except Exception as e:
+                    logger.warning(f"Warm-up of {model_name} failed: {e}")
+        
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="hailo-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def unload(self, model_name: Optional[str] = None) -> None:
+        """
+        นำโมเดลออกจากทุกอุปกรณ์ (None = ทุกโมเดลและปิด VDevice)
+        
+        Args:
+            model_name: ชื่อโมเดล
+        """
+        for slot in self._devices or []:
+            # load_lock ก่อน self._lock (ลำดับเดียวกับ session) เพื่อไม่ปิดอุปกรณ์ระหว่างที่กำลังโหลด
+            with slot.load_lock, self._lock:
+                names = [model_name] if model_name else list(slot.sessions)
+                for name in names:
+                    if name in slot.sessions:
+                        self._unload_from_device(slot, name)
+                if model_name is None and slot.vdevice is not None:
+                    slot.vdevice.release()
+                    slot.vdevice = None
+    
+    def get_device_utilization(self) -> List[Dict[str, Any]]:
+        """
+        ดึงการใช้งานของแต่ละอุปกรณ์
+        
+        Returns:
+            รายการสถิติต่ออุปกรณ์ (โมเดลที่ค้างอยู่, request, เวลาใช้งาน, utilisation)
+        """
+        elapsed = time.time() - self._start_time
+        with self._lock:
+            return [{
+                "device_id": slot.device_id,
+                "resident_models": list(slot.sessions),
+                "resident_mb": slot.resident_bytes / 1024 / 1024,
+                "active_requests": slot.active,
+                "requests": slot.requests,
+                "busy_seconds": slot.busy_time,
+                "utilization": slot.busy_time / elapsed if elapsed > 0 else 0.0,
+                "evictions": slot.evictions,
+            } for slot in self._devices or []]
 
 
-class Hailo8Processor:
+class HailoSession:
     """
-    ประมวลผล AI ด้วย Hailo8 accelerator
+    session ของ Hailo ที่ถือ VDevice, network group ที่ activate แล้ว และ vstreams
+    ไว้ตลอดอายุของ session (สร้างครั้งเดียวตอน open แทนการสร้างใหม่ทุกเฟรม)
     """
     
-    def __init__(self, model_path: str, batch_size: int = 1):
+    def __init__(self,
+                 model_path: Union[str, Path],
+                 batch_size: int = 1,
+                 quantized: bool = False,
+                 device_count: int = 1,
+                 device_ids: Optional[List[str]] = None,
+                 vdevice: Any = None):
         """
-        เริ่มต้น Hailo8Processor
+        เริ่มต้น HailoSession (ยังไม่เชื่อมต่ออุปกรณ์จนกว่าจะเรียก open)
         
         Args:
             model_path: พาธของโมเดล .hef
-            batch_size: ขนาด batch สำหรับการประมวลผล
+            batch_size: ขนาด batch ที่ configure ให้ network group
+            quantized: ส่ง input เป็น uint8 (ดู Hailo8Processor)
+            device_count: จำนวนอุปกรณ์ใน VDevice
+            device_ids: ระบุอุปกรณ์ที่ต้องการใช้ (จาก detect_hailo_devices)
+            vdevice: VDevice ที่เปิดไว้แล้วและเปิด scheduler (ใช้ร่วมกันหลายโมเดล);
+                     session จะไม่ activate network group เองและไม่ปิด VDevice นี้
         """
         if not HAILO_AVAILABLE:
             raise ImportError("Hailo platform not available")
+        
+        self.model_path = Path(model_path)
+        self.batch_size = batch_size
+        self.quantized = quantized
+        self.device_count = device_count
+        self.device_ids = device_ids
+        
+        self.hef = None
+        self.network_group = None
+        self.input_infos = []
+        self.output_infos = []
+        self._vdevice = None
+        self._shared_vdevice = vdevice
+        self._activation = None
+        self._infer_pipeline = None
+        
+        self.open_time = 0.0
+        self.infer_count = 0
+    
+    @property
+    def is_open(self) -> bool:
+        return self._infer_pipeline is not None
+    
+    @property
+    def input_names(self) -> List[str]:
+        return [info.name for info in self.input_infos]
+    
+    @property
+    def output_names(self) -> List[str]:
+        return [info.name for info in self.output_infos]
+    
+    @property
+    def input_shape(self) -> Tuple[int, ...]:
+        """shape (H, W, C) ของ input แรก"""
+        return tuple(self.input_infos[0].shape)
+    
+    def open(self) -> "HailoSession":
+        """
+        เปิด VDevice, configure และ activate network group แล้วสร้าง vstreams
+        
+        Returns:
+            session นี้
+            
+        Raises:
+            ModelLoadError: หากไม่สามารถเปิด session ได้
+        """
+        if self.is_open:
+            return self
+        
+        start_time = time.perf_counter()
+        try:
+            if not self.model_path.exists():
+                raise FileNotFoundError(f"Model not found: {self.model_path}")
+            
+            if self._shared_vdevice is not None:
+                vdevice = self._shared_vdevice
+            else:
+                params = hailo.VDevice.create_params()
+                params.device_count = self.device_count
+                if self.device_ids:
+                    params.device_ids = self.device_ids
+                self._vdevice = vdevice = hailo.VDevice(params)
             
+            self.hef = hailo.HEF(str(self.model_path))
+            self.input_infos = list(self.hef.get_input_vstream_infos())
+            self.output_infos = list(self.hef.get_output_vstream_infos())
+            
+            configure_params = hailo.ConfigureParams.create_from_hef(
+                self.hef, interface=hailo.HailoStreamInterface.PCIe)
+            for network_params in configure_params.values():
+                network_params.batch_size = self.batch_size
+            self.network_group = vdevice.configure(self.hef, configure_params)[0]
+            
+            # quantized mode ส่ง uint8 ตรงไปยัง device (ไม่ต้อง quantize บน host)
+            input_format = hailo.FormatType.UINT8 if self.quantized else hailo.FormatType.FLOAT32
+            input_params = hailo.InputVStreamParams.make_from_network_group(
+                self.network_group, quantized=self.quantized, format_type=input_format)
+            output_params = hailo.OutputVStreamParams.make_from_network_group(
+                self.network_group, quantized=False, format_type=hailo.FormatType.FLOAT32)
+            
+            if self._shared_vdevice is None:
+                # VDevice ที่ใช้ร่วมกันมี scheduler เป็นผู้ activate network group
+                self._activation = self.network_group.activate(self.network_group.create_params())
+                self._activation.__enter__()
+            self._infer_pipeline = hailo.InferVStreams(self.network_group, input_params, output_params)
+            self._infer_pipeline.__enter__()
+            
+            self.open_time = time.perf_counter() - start_time
+            logger.info(f"Hailo session opened for {self.model_path.name} in {self.open_time * 1000:.1f} ms "
+                        f"(batch_size={self.batch_size})")
+            return self
+            
+        except Exception as e:
+            logger.error(f"Failed to open Hailo session: {e}")
+            self.close()
+            raise ModelLoadError(f"Failed to open Hailo session: {e}") from e
+    
+    def infer(self, inputs: Union[np.ndarray, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """
+        ส่งข้อมูลผ่าน vstreams ที่เปิดไว้แล้ว
+        
+        Args:
+            inputs: tensor (N, H, W, C) ของ input แรก หรือ dictionary {ชื่อ input: tensor}
+            
+        Returns:
+            dictionary {ชื่อ output: tensor (N, ...)}
+            
+        Raises:
+            InferenceError: หาก session ยังไม่เปิดหรือ inference ผิดพลาด
+        """
+        if not self.is_open:
+            raise InferenceError("Hailo session is not open")
+        if isinstance(inputs, np.ndarray):
+            inputs = {self.input_infos[0].name: inputs}
+        
+        try:
+            outputs = self._infer_pipeline.infer(inputs)
+            self.infer_count += 1
+            return outputs
+        except Exception as e:
+            raise InferenceError(f"Hailo session inference failed: {e}") from e
+    
+    def close(self) -> None:
+        """ปิด vstreams, deactivate network group และปล่อย VDevice (เรียกซ้ำได้)"""
+        for name in ("_infer_pipeline", "_activation", "_vdevice"):
+            resource = getattr(self, name)
+            if resource is None:
+                continue
+            try:
+                if name == "_vdevice":
+                    resource.release()
+                else:
+                    resource.__exit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Error closing Hailo session {name}: {e}")
+            setattr(self, name, None)
+        self.network_group = None
+        logger.debug(f"Hailo session closed for {self.model_path.name}")
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class HailoBackend(InferenceBackend):
+    """backend ของอุปกรณ์ Hailo จริงผ่าน HailoRT"""
+    
+    name = "hailo"
+    
+    @property
+    def available(self) -> bool:
+        return HAILO_AVAILABLE
+    
+    def list_devices(self) -> List[str]:
+        return [d["device_id"] for d in detect_hailo_devices()]
+    
+    def create_device(self, device_id: str) -> Any:
+        params = hailo.VDevice.create_params()
+        params.device_ids = [device_id]
+        params.scheduling_algorithm = hailo.HailoSchedulingAlgorithm.ROUND_ROBIN
+        return hailo.VDevice(params)
+    
+    def create_session(self, model_path: Union[str, Path], batch_size: int = 1, quantized: bool = False,
+                       device: Any = None, **kwargs) -> HailoSession:
+        return HailoSession(model_path, batch_size, quantized, vdevice=device, **kwargs)
+
+
+register_backend(HailoBackend())
+
+
+class Hailo8Processor:
+    """
+    ประมวลผล AI ด้วย Hailo8 accelerator (หรือ backend อื่น เช่น อุปกรณ์จำลองสำหรับทดสอบ)
+    """
+    
+    def __init__(self, model_path: str, batch_size: int = 1, quantized: bool = False,
+                 max_in_flight: int = 4, ordered_results: bool = True,
+                 pipeline_workers: int = 1,
+                 arena: Optional[TensorArena] = None,
+                 backend: Union[str, InferenceBackend, None] = None,
+                 session_options: Optional[Dict[str, Any]] = None,
+                 model_config: Union[str, Path, Dict[str, Any], None] = None,
+                 postprocess_options: Optional[Dict[str, Any]] = None):
+        """
+        เริ่มต้น Hailo8Processor
+        
+        Args:
+            model_path: พาธของโมเดล .hef (หรือ .onnx สำหรับ backend "onnx")
+            batch_size: ขนาด batch สำหรับการประมวลผล
+            quantized: ส่ง input เป็น uint8 RGB โดยไม่ normalize บน host
+                       (ใช้กับ HEF ที่มี normalization อยู่ในโมเดล, ลดข้อมูลที่ส่งไป device 4 เท่า)
+            max_in_flight: จำนวนเฟรมสูงสุดที่อยู่ระหว่างประมวลผลใน submit()
+            ordered_results: results() คืนผลตามลำดับที่ submit (False = ตามลำดับที่เสร็จ)
+            pipeline_workers: จำนวน thread ของขั้น preprocess และ postprocess ใน submit()
+                              (ขั้น device ใช้ thread เดียวเสมอ; มากกว่า 1 ทำให้เฟรมเสร็จไม่ตรงลำดับได้)
+            arena: TensorArena สำหรับ input buffer (ใช้ร่วมกันระหว่าง processor ได้)
+            backend: inference backend ("hailo", "simulated", "onnx" หรือ InferenceBackend;
+                     None = เลือกตาม model_config, นามสกุลไฟล์ หรือ PWD_INFERENCE_BACKEND)
+            session_options: argument เพิ่มเติมของ session (เช่น intra_op_threads ของ "onnx")
+            model_config: config ของโมเดล (พาธไฟล์หรือ dictionary; None = จาก PWD_MODEL_CONFIG)
+                          ใช้เลือก backend, ไฟล์โมเดล และ option ของ session เมื่อไม่ได้ระบุ backend
+            postprocess_options: argument ของ ImagePostprocessor (เช่น head, normalized_boxes, labels)
+            
+        Raises:
+            ImportError: หาก backend ที่เลือกไม่พร้อมใช้งาน (เช่น "hailo" โดยไม่มี HailoRT)
+        """
+        if backend is None:
+            self.backend, model_path, self.session_options = resolve_model_backend(model_path, model_config)
+        else:
+            self.backend, self.session_options = get_backend(backend), {}
+        self.session_options.update(session_options or {})
         self.model_path = Path(model_path)
         self.batch_size = batch_size
-        self.model = None
+        self.quantized = quantized
+        self.session: Optional[HailoSession] = None
         self.network_group = None
-        self.input_vstream_params = None
-        self.output_vstream_params = None
-        self.input_vstreams = None
-        self.output_vstreams = None
+        self._input_buffer = None
+        self.max_in_flight = max_in_flight
+        self.ordered_results = ordered_results
+        self.pipeline_workers = pipeline_workers
+        self._async_pipeline: Optional[AsyncInferencePipeline] = None
+        self.arena = arena or TensorArena(name=self.model_path.stem)
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self._load_lock = threading.Lock()
+        
+        # metadata จาก cache ข้างไฟล์โมเดล: รู้ขนาด input ได้ก่อนเปิดอุปกรณ์
+        self.metadata: Optional[ModelMetadata] = None
+        try:
+            self.metadata = ModelMetadataCache.for_model(self.model_path).get(self.model_path)
+        except ModelLoadError as e:
+            logger.warning(f"Model metadata unavailable: {e}")
         
         # Performance metrics
         self.inference_count = 0
         self.total_inference_time = 0.0
         self.error_count = 0
+        self._stats_lock = threading.Lock()
         
         # Preprocessor และ Postprocessor
         self.preprocessor = ImagePreprocessor()
-        self.postprocessor = ImagePostprocessor()
+        self.postprocessor = ImagePostprocessor(preprocessor=self.preprocessor, **(postprocess_options or {}))
         
         logger.info(f"Hailo8Processor initialized with model: {self.model_path}")
     
     def load_model(self) -> bool:
         """
-        โหลดโมเดล Hailo
+        โหลดโมเดล Hailo และเปิด session ที่ใช้ตลอดอายุของ processor
         
         Returns:
             True หากโหลดสำเร็จ
@@ -162,73 +692,168 @@ class Hailo8Processor:
         Raises:
             ModelLoadError: หากไม่สามารถโหลดโมเดลได้
         """
-        try:
-            if not self.model_path.exists():
-                raise FileNotFoundError(f"Model not found: {self.model_path}")
-            
-            logger.info(f"Loading Hailo model: {self.model_path}")
-            
-            # สร้าง VDevice
-            params = hailo.VDevice.create_params()
-            params.device_count = 1
+        # lock กันการเปิด session ซ้อนกับ warm-up ที่ทำงานเบื้องหลัง
+        with self._load_lock:
+            if self.session is not None and self.session.is_open:
+                return True
             
-            with hailo.VDevice(params) as device:
-                # อ่านโมเดล HEF
-                hef = hailo.HEF(str(self.model_path))
-                
-                # สร้าง network group
-                configure_params = hailo.ConfigureParams.create_from_hef(hef, interface=hailo.Interface.PCIe)
-                self.network_group = device.configure(hef, configure_params)[0]
-                
-                # ตั้งค่า input/output streams
-                self.input_vstream_params = hailo.InputVStreamParams.make_from_network_group(
-                    self.network_group, quantized=False, format_type=hailo.FormatType.FLOAT32)
-                self.output_vstream_params = hailo.OutputVStreamParams.make_from_network_group(
-                    self.network_group, quantized=False, format_type=hailo.FormatType.FLOAT32)
-                
+            try:
+                logger.info(f"Loading Hailo model: {self.model_path}")
+                self.session = self.backend.create_session(self.model_path, self.batch_size, self.quantized,
+                                                           **self.session_options).open()
+                self.network_group = self.session.network_group
                 logger.info("Hailo model loaded successfully")
                 return True
                 
-        except Exception as e:
-            logger.error(f"Failed to load Hailo model: {e}")
-            raise ModelLoadError(f"Model load failed: {e}") from e
+            except ModelLoadError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to load Hailo model: {e}")
+                raise ModelLoadError(f"Model load failed: {e}") from e
+    
+    def open(self) -> "Hailo8Processor":
+        """เปิด session (เหมือน load_model) สำหรับใช้โดยไม่ผ่าน with"""
+        self.load_model()
+        return self
+    
+    def close(self) -> None:
+        """ปิด session และปล่อยอุปกรณ์ (เหมือน cleanup)"""
+        self.cleanup()
     
     def preprocess_image(self, image: np.ndarray, target_size: Tuple[int, int] = (640, 640)) -> np.ndarray:
         """
         เตรียมภาพสำหรับ inference
         
+        ใช้ preprocess_into เขียนลง input buffer เดิมซ้ำทุกเฟรม
+        (buffer จะถูกเขียนทับในการเรียกครั้งถัดไป)
+        
         Args:
             image: ภาพต้นฉบับ (BGR format)
             target_size: ขนาดเป้าหมาย (width, height)
             
         Returns:
-            ภาพที่เตรียมแล้ว
+            ภาพที่เตรียมแล้ว (1, H, W, C) float32 หรือ uint8 RGB ใน quantized mode
         """
         try:
-            # ใช้ preprocessor
-            processed_image = self.preprocessor.resize_with_padding(image, target_size)
-            processed_image = self.preprocessor.normalize(processed_image)
-            
-            # แปลงเป็น format ที่ Hailo ต้องการ
-            if len(processed_image.shape) == 3:
-                processed_image = np.expand_dims(processed_image, axis=0)  # Add batch dimension
-            
-            return processed_image.astype(np.float32)
+            self._input_buffer = self._fill_input_buffer(image, self._input_buffer, target_size)
+            return self._input_buffer
             
         except Exception as e:
             logger.error(f"Preprocessing failed: {e}")
             raise InferenceError(f"Preprocessing failed: {e}") from e
     
+    def _fill_input_buffer(self, image: np.ndarray, buffer: Optional[np.ndarray],
+                           target_size: Tuple[int, int]) -> np.ndarray:
+        """เขียนภาพลง buffer (สร้างใหม่เมื่อขนาดหรือชนิดข้อมูลไม่ตรง) แล้วคืน buffer"""
+        shape, dtype = self._input_spec(image, target_size)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+        
+        return self.preprocessor.preprocess_into(image, out=buffer, target_size=target_size,
+                                                 method=self.input_normalization)
+    
+    def _input_spec(self, image: np.ndarray, target_size: Tuple[int, int],
+                    batch_size: int = 1) -> Tuple[Tuple[int, ...], np.dtype]:
+        """(shape, dtype) ของ input tensor สำหรับภาพนี้"""
+        channels = 1 if image.ndim == 2 else 3
+        dtype = np.uint8 if self.quantized else np.float32
+        return (batch_size, target_size[1], target_size[0], channels), np.dtype(dtype)
+    
+    def _acquire_input(self, image: np.ndarray) -> np.ndarray:
+        """ยืม input buffer จาก arena แล้วเขียนภาพลงไป (ผู้เรียกต้องคืนด้วย arena.release)"""
+        target_size = self.model_input_size
+        buffer = self.arena.acquire(*self._input_spec(image, target_size))
+        try:
+            return self._fill_input_buffer(image, buffer, target_size)
+        except Exception:
+            self.arena.release(buffer)
+            raise
+    
+    @property
+    def input_normalization(self) -> str:
+        """วิธี normalize input: ไม่ normalize ใน quantized mode, ตามที่ session กำหนด หรือ imagenet"""
+        if self.quantized:
+            return "none"
+        return getattr(self.session, "normalization", None) or "imagenet"
+    
+    @property
+    def model_input_size(self) -> Tuple[int, int]:
+        """ขนาด input ของโมเดล (width, height) จาก session, metadata cache หรือ (640, 640)"""
+        if self.session is not None and self.session.input_infos:
+            height, width = self.session.input_shape[:2]
+            return width, height
+        if self.metadata is not None and self.metadata.input_size is not None:
+            return self.metadata.input_size
+        return (640, 640)
+    
+    def warm_up(self, num_frames: int = 3, background: bool = True) -> Optional[threading.Thread]:
+        """
+        เปิด session และส่งเฟรมหลอกเข้าอุปกรณ์ เพื่อให้เฟรมจริงเฟรมแรกไม่ช้า
+        
+        Args:
+            num_frames: จำนวนเฟรมหลอก
+            background: ทำงานบน thread แยก (ใช้ wait_warm_up เพื่อรอ)
+            
+        Returns:
+            thread ที่ทำงาน (เมื่อ background=True) หรือ None
+        """
+        def run():
+            try:
+                start_time = time.perf_counter()
+                self.load_model()
+                width, height = self.model_input_size
+                channels = self.metadata.input_shape[2] if self.metadata and self.metadata.has_io_info else 3
+                dtype = np.uint8 if self.quantized else np.float32
+                with self.arena.lease((self.batch_size, height, width, channels), dtype) as dummy:
+                    dummy.fill(0)
+                    for _ in range(num_frames):
+                        self.session.infer(dummy)
+                logger.info(f"Warm-up of {self.model_path.stem} finished in "
+                            f"{(time.perf_counter() - start_time) * 1000:.1f} ms")
+            except Exception as e:
+                logger.warning(f"Warm-up of {self.model_path.stem} failed: {e}")
+        
+        if not background:
+            run()
+            return None
+        self._warm_up_thread = threading.Thread(target=run, name=f"{self.model_path.stem}-warm-up", daemon=True)
+        self._warm_up_thread.start()
+        return self._warm_up_thread
+    
+    def wait_warm_up(self, timeout: Optional[float] = None) -> bool:
+        """
+        รอให้ warm-up ที่ทำงานเบื้องหลังเสร็จ
+        
+        Args:
+            timeout: เวลารอสูงสุด (None = รอจนเสร็จ)
+            
+        Returns:
+            True หากไม่มี warm-up ค้างอยู่
+        """
+        if self._warm_up_thread is not None:
+            self._warm_up_thread.join(timeout)
+            if self._warm_up_thread.is_alive():
+                return False
+            self._warm_up_thread = None
+        return True
+    
     @contextmanager
-    def inference_context(self):
+    def inference_context(self, image: np.ndarray):
         """
-        Context manager สำหรับการจัดการหน่วยความจำระหว่าง inference
+        Context manager ที่ยืม input buffer จาก arena และคืนเมื่อจบ inference
+        (buffer ถูกใช้ซ้ำในเฟรมถัดไป จึงไม่มี array ขนาดใหญ่ให้ gc ต้องเก็บ)
+        
+        Args:
+            image: ภาพ input (BGR format)
+            
+        Yields:
+            input tensor ที่เตรียมแล้ว
         """
+        buffer = self._acquire_input(image)
         try:
-            yield
+            yield buffer
         finally:
-            # ทำความสะอาดหน่วยความจำ
-            gc.collect()
+            self.arena.release(buffer)
     
     def predict(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
@@ -243,79 +868,169 @@ class Hailo8Processor:
         Raises:
             InferenceError: หากการ inference ผิดพลาด
         """
-        if self.network_group is None:
+        if self.session is None or not self.session.is_open:
             raise InferenceError("Model not loaded")
         
         try:
-            with self.inference_context():
-                start_time = time.perf_counter()
-                
-                # Preprocessing
-                processed_image = self.preprocess_image(image)
-                
-                # Create input/output streams
-                with hailo.InputVStreams(self.network_group, self.input_vstream_params) as input_vstreams:
-                    with hailo.OutputVStreams(self.network_group, self.output_vstream_params) as output_vstreams:
-                        
-                        # ส่งข้อมูลเข้า network
-                        input_data = {input_vstreams[0].name: processed_image}
-                        
-                        # Run inference
-                        output_data = self.network_group.wait_for_async_ready(input_data, timeout_ms=1000)
-                        
-                        # Post-processing
-                        results = self.postprocess_output(output_data, image.shape[:2])
-                        
-                        # Update metrics
-                        inference_time = time.perf_counter() - start_time
-                        self.inference_count += 1
-                        self.total_inference_time += inference_time
-                        
-                        logger.debug(f"Inference completed in {inference_time:.4f}s")
-                        return results
-                        
+            start_time = time.perf_counter()
+            
+            # Preprocessing ลง buffer จาก arena แล้ว run inference ผ่าน vstreams ของ session
+            with self.inference_context(image) as processed_image:
+                output_data = self.session.infer(processed_image)
+            
+            # Post-processing
+            results = self.postprocess_output(output_data, image.shape[:2])
+            
+            # Update metrics
+            inference_time = time.perf_counter() - start_time
+            self.inference_count += 1
+            self.total_inference_time += inference_time
+            
+            logger.debug(f"Inference completed in {inference_time:.4f}s")
+            return results
+            
         except Exception as e:
             self.error_count += 1
             logger.error(f"Inference failed: {e}")
             raise InferenceError(f"Inference failed: {e}") from e
     
+    def submit(self, image: np.ndarray, tag: Any = None, timeout: Optional[float] = None) -> Future:
+        """
+        ส่งภาพเข้า pipeline แบบ asynchronous (preprocess / device / postprocess ทำงานซ้อนกัน)
+        
+        Args:
+            image: ภาพ input (BGR format)
+            tag: ข้อมูลประจำเฟรมที่จะได้คืนจาก results()
+            timeout: เวลารอสูงสุดเมื่อมีเฟรม in-flight ครบ max_in_flight
+            
+        Returns:
+            Future ของผลการ inference (รายการ detection)
+            
+        Raises:
+            InferenceError: หากยังไม่โหลดโมเดลหรือ pipeline เต็มเกิน timeout
+        """
+        return self._get_async_pipeline().submit(image, tag, timeout)
+    
+    def results(self, timeout: Optional[float] = None) -> Iterator[AsyncResult]:
+        """
+        คืนผลของเฟรมที่ submit (ตามลำดับหาก ordered_results)
+        
+        Args:
+            timeout: เวลารอผลถัดไปสูงสุด (None = รอจนกว่าจะเรียก close)
+            
+        เริ่มเก็บผลเมื่อเรียกครั้งแรก (เฟรมที่เสร็จก่อนหน้าได้ผลผ่าน Future เท่านั้น)
+        ผู้ที่ใช้เฉพาะ submit(...).result() จึงไม่มีผลค้างอยู่ในคิว
+        
+        Yields:
+            AsyncResult(seq, tag, result, error, latency)
+        """
+        pipeline = self._get_async_pipeline()
+        pipeline.enable_results()
+        return pipeline.results(timeout)
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติการใช้คิวของ pipeline แบบ asynchronous
+        
+        Returns:
+            Dictionary ของสถิติ (ว่างหากยังไม่เคย submit)
+        """
+        if self._async_pipeline is None:
+            return {}
+        return self._async_pipeline.get_stats()
+    
+    def _get_async_pipeline(self) -> AsyncInferencePipeline:
+        if self.session is None or not self.session.is_open:
+            raise InferenceError("Model not loaded")
+        if self._async_pipeline is None:
+            self._async_pipeline = AsyncInferencePipeline(
+                self._async_preprocess, self._async_infer, self._async_postprocess,
+                max_in_flight=self.max_in_flight, ordered=self.ordered_results,
+                workers={"preprocess": self.pipeline_workers, "infer": 1,
+                         "postprocess": self.pipeline_workers},
+                collect_results=False, release_input=self.arena.release,
+                name=self.model_path.stem)
+        return self._async_pipeline
+    
+    def _async_preprocess(self, image: np.ndarray) -> Tuple[np.ndarray, Tuple[Tuple[int, int], float]]:
+        # แต่ละเฟรมยืม buffer ของตัวเองจาก arena จึงไม่ทับ input ที่ device ยังใช้อยู่
+        return self._acquire_input(image), (image.shape[:2], time.perf_counter())
+    
+    def _async_infer(self, buffer: np.ndarray) -> Dict[str, np.ndarray]:
+        try:
+            return self.session.infer(buffer)
+        finally:
+            self.arena.release(buffer)
+    
+    def _async_postprocess(self, output_data: Dict, context: Tuple[Tuple[int, int], float]) -> List[Dict[str, Any]]:
+        original_shape, start_time = context
+        results = self.postprocess_output(output_data, original_shape)
+        with self._stats_lock:
+            # postprocess อาจทำงานหลาย thread (pipeline_workers > 1)
+            self.inference_count += 1
+            self.total_inference_time += time.perf_counter() - start_time
+        return results
+    
     def batch_predict(self, images: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
         """
-        ทำการ inference แบบ batch
+        ทำการ inference แบบ batch: รวมภาพสูงสุด batch_size ภาพเป็น tensor เดียว
+        แล้วส่งเข้า device ในการเรียกครั้งเดียว (HEF ต้อง compile ด้วย batch > 1)
+        
+        batch สุดท้ายที่ไม่ครบจะถูกเติมศูนย์ และผลของ slot ที่เติมจะถูกตัดทิ้ง
         
         Args:
-            images: รายการภาพ
+            images: รายการภาพ (BGR format)
             
         Returns:
-            ผลการ inference สำหรับแต่ละภาพ
+            ผลการ inference สำหรับแต่ละภาพ (ภาพที่ preprocess ไม่สำเร็จได้รายการว่าง)
+            
+        Raises:
+            InferenceError: หากยังไม่โหลดโมเดลหรือการ inference ผิดพลาด
         """
         if not images:
             return []
+        if self.session is None or not self.session.is_open:
+            raise InferenceError("Model not loaded")
+        
+        # จำนวน channel ตาม _input_spec เหมือน predict (ภาพ grayscale ใช้ 1 channel)
+        sample = next((image for image in images if isinstance(image, np.ndarray)), None)
+        if sample is None:
+            return [[] for _ in images]
         
         results = []
-        batch_size = min(self.batch_size, len(images))
+        batch_size = self.batch_size
+        method = self.input_normalization
         
+        batch_buffer = self.arena.acquire(*self._input_spec(sample, self.model_input_size, batch_size))
         try:
             for i in range(0, len(images), batch_size):
-                batch = images[i:i+batch_size]
+                chunk = images[i:i + batch_size]
+                start_time = time.perf_counter()
                 
-                # Process batch
-                batch_results = []
-                for image in batch:
-                    result = self.predict(image)
-                    batch_results.append(result)
+                batch, valid = self.preprocessor.preprocess_batch_into(
+                    chunk, out=batch_buffer, target_size=self.model_input_size,
+                    method=method, dtype=batch_buffer.dtype)
+                if len(chunk) < batch_size:
+                    batch[len(chunk):] = 0
                 
-                results.extend(batch_results)
+                output_data = self.session.infer(batch)
                 
-                # Yield control occasionally
-                if i % (batch_size * 4) == 0:
-                    time.sleep(0.001)  # Prevent CPU hogging
+                # postprocess ทั้ง batch ในครั้งเดียว แล้วทิ้งผลของภาพที่ preprocess ไม่สำเร็จ
+                chunk_outputs = {name: output[:len(chunk)] for name, output in output_data.items()}
+                chunk_results = self.postprocess_batch(chunk_outputs, [image.shape[:2] for image in chunk])
+                results.extend(detections if valid[j] else [] for j, detections in enumerate(chunk_results))
+                
+                self.inference_count += len(chunk)
+                self.total_inference_time += time.perf_counter() - start_time
             
             return results
             
         except Exception as e:
+            self.error_count += 1
             logger.error(f"Batch inference failed: {e}")
             raise InferenceError(f"Batch inference failed: {e}") from e
+        finally:
+            self.arena.release(batch_buffer)
     
     def postprocess_output(self, output_data: Dict, original_shape: Tuple[int, int]) -> List[Dict[str, Any]]:
         """
@@ -328,29 +1043,40 @@ class Hailo8Processor:
         Returns:
             ผลการตรวจจับที่ประมวลผลแล้ว
         """
-        try:
-            # ใช้ postprocessor สำหรับการประมวลผล
-            # TODO: ปรับแต่งตามประเภทโมเดล (YOLO, SSD, etc.)
-            
-            results = []
+        return self.postprocess_batch(output_data, [original_shape])[0]
+    
+    def postprocess_batch(self, output_data: Dict,
+                          original_shapes: Sequence[Tuple[int, int]]) -> List[List[Dict[str, Any]]]:
+        """
+        ประมวลผล output ของทั้ง batch ในครั้งเดียว (decode, NMS และแปลงพิกัดกลับทุกภาพพร้อมกัน)
+        
+        Args:
+            output_data: ข้อมูลจาก network output (มิติแรกเป็น batch)
+            original_shapes: ขนาดภาพต้นฉบับ (height, width) ของแต่ละภาพ
             
+        Returns:
+            ผลการตรวจจับของแต่ละภาพ
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in original_shapes]
+        try:
             for output_name, output_tensor in output_data.items():
-                # ตัวอย่างการประมวลผลสำหรับ object detection
-                if output_tensor.ndim >= 2:
-                    # Process detections
-                    detections = self.postprocessor.process_detections(
-                        output_tensor, 
-                        original_shape,
+                # raw head ของ object detection (NMS output ของ HailoRT เป็น list จึงไม่ผ่านตรงนี้)
+                if isinstance(output_tensor, np.ndarray) and output_tensor.ndim >= 2:
+                    detections = self.postprocessor.process_batch(
+                        output_tensor,
+                        original_shapes,
                         confidence_threshold=0.5,
-                        nms_threshold=0.4
+                        nms_threshold=0.4,
+                        input_size=self.model_input_size
                     )
-                    results.extend(detections)
+                    for image_results, image_detections in zip(results, detections):
+                        image_results.extend(image_detections)
             
             return results
             
         except Exception as e:
             logger.error(f"Post-processing failed: {e}")
-            return []
+            return [[] for _ in original_shapes]
     
     def get_performance_stats(self) -> Dict[str, float]:
         """
@@ -379,6 +1105,15 @@ class Hailo8Processor:
             "total_errors": self.error_count
         }
     
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติ buffer ของ tensor arena (จำนวน allocate / reuse และ high-water mark)
+        
+        Returns:
+            สถิติของ arena
+        """
+        return self.arena.get_stats()
+    
     def reset_stats(self) -> None:
         """รีเซ็ตสถิติประสิทธิภาพ"""
         self.inference_count = 0
@@ -391,15 +1126,14 @@ class Hailo8Processor:
         ทำความสะอาดทรัพยากร
         """
         try:
-            if self.input_vstreams:
-                self.input_vstreams = None
-            if self.output_vstreams:
-                self.output_vstreams = None
-            if self.network_group:
-                self.network_group = None
-            
-            # Force garbage collection
-            gc.collect()
+            if self._async_pipeline is not None:
+                self._async_pipeline.close()
+                self._async_pipeline = None
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+            self.network_group = None
+            self.arena.clear()
             
             logger.info("Hailo8Processor cleaned up")
             
@@ -419,34 +1153,136 @@ class Hailo8Processor:
 class HailoHealthMonitor:
     """
     ติดตามสุขภาพของ Hailo processor
+    
+    latency ถูกเก็บใน histogram แบบ log bucket (หน่วยความจำคงที่) ทั้งตลอดอายุและแบบ rolling
+    1 นาที / 15 นาที ส่วนอุณหภูมิ, พลังงาน, utilization และหน่วยความจำถูกอ่านโดย thread เบื้องหลัง
+    ลง ring buffer ขนาดคงที่ (เรียก start_sampler เพื่อเริ่ม)
     """
     
-    def __init__(self):
+    WINDOWS = {"1m": (60.0, 12), "15m": (900.0, 15)}
+    
+    def __init__(self,
+                 sample_interval: float = 5.0,
+                 telemetry_capacity: int = 720,
+                 telemetry_readers: Optional[List[Callable[[], Dict[str, Optional[float]]]]] = None,
+                 temperature_warning_c: float = 85.0,
+                 latency_degradation_ratio: float = 2.0):
+        """
+        เริ่มต้น HailoHealthMonitor
+        
+        Args:
+            sample_interval: ระยะห่างระหว่างการอ่าน telemetry (วินาที)
+            telemetry_capacity: จำนวนตัวอย่าง telemetry ที่เก็บ (720 x 5 วินาที = 1 ชั่วโมง)
+            telemetry_readers: ฟังก์ชันอ่านค่าของอุปกรณ์เพิ่มเติม (None = อุปกรณ์ Hailo ที่พบ)
+            temperature_warning_c: อุณหภูมิที่ถือว่าเสี่ยงต่อ thermal throttling
+            latency_degradation_ratio: p99 ของ 1 นาทีที่สูงกว่า 15 นาทีกี่เท่าจึงเตือน
+        """
         self.inference_count = 0
         self.error_count = 0
         self.start_time = time.time()
         self.last_check_time = time.time()
+        self.temperature_warning_c = temperature_warning_c
+        self.latency_degradation_ratio = latency_degradation_ratio
+        
+        # Latency distribution
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self._windows = {name: RollingHistogram(window, slots) for name, (window, slots) in self.WINDOWS.items()}
+        self._busy_time = 0.0
+        self._last_busy = (time.monotonic(), 0.0)
         
         # Temperature และ performance tracking
-        self.temperature_readings = []
-        self.memory_usage_readings = []
+        self.telemetry = TelemetryRingBuffer(telemetry_capacity)
+        if telemetry_readers is None:
+            telemetry_readers = self._default_readers()
+        self.sampler = TelemetrySampler([self._read_utilization, read_process_memory] + list(telemetry_readers),
+                                        self.telemetry, sample_interval)
+    
+    @staticmethod
+    def _default_readers() -> List[Callable[[], Dict[str, Optional[float]]]]:
+        """ตัวอ่านอุณหภูมิ/พลังงานของอุปกรณ์ Hailo ที่พบ (ว่างหากไม่มี HailoRT)"""
+        if not HAILO_AVAILABLE:
+            return []
+        try:
+            devices = [hailo.Device(d["device_id"]) for d in detect_hailo_devices()]
+            return [make_hailo_reader(devices)] if devices else []
+        except Exception as e:
+            logger.warning(f"Hailo telemetry unavailable: {e}")
+            return []
+    
+    def _read_utilization(self) -> Dict[str, Optional[float]]:
+        """สัดส่วนเวลาที่ใช้ inference ตั้งแต่ตัวอย่างก่อนหน้า (เกิน 1 ได้เมื่อมี request พร้อมกันหลายตัว)"""
+        now = time.monotonic()
+        with self._lock:
+            busy = self._busy_time
+        last_time, last_busy = self._last_busy
+        self._last_busy = (now, busy)
+        elapsed = now - last_time
+        return {"utilization": (busy - last_busy) / elapsed} if elapsed > 0 else {}
+    
+    @property
+    def temperature_readings(self) -> List[float]:
+        """อุณหภูมิที่อยู่ใน ring buffer (เก่าไปใหม่)"""
+        column = self.telemetry.to_array()[:, 1 + TELEMETRY_FIELDS.index("temperature")]
+        return [float(v) for v in column if not np.isnan(v)]
+    
+    @property
+    def memory_usage_readings(self) -> List[float]:
+        """หน่วยความจำของ process (MB) ที่อยู่ใน ring buffer (เก่าไปใหม่)"""
+        column = self.telemetry.to_array()[:, 1 + TELEMETRY_FIELDS.index("memory_mb")]
+        return [float(v) for v in column if not np.isnan(v)]
+    
+    def start_sampler(self) -> "HailoHealthMonitor":
+        """เริ่ม thread อ่าน telemetry เบื้องหลัง"""
+        self.sampler.start()
+        return self
+    
+    def stop_sampler(self) -> None:
+        """หยุด thread อ่าน telemetry"""
+        self.sampler.stop()
     
     def log_inference(self, success: bool = True, inference_time: float = 0.0) -> None:
         """
-        บันทึกการ inference
+        บันทึกการ inference (เรียกได้ทุกเฟรม: O(1) และไม่ allocate)
         
         Args:
             success: True หากสำเร็จ
-            inference_time: เวลาที่ใช้ในการ inference
+            inference_time: เวลาที่ใช้ในการ inference (วินาที)
         """
-        self.inference_count += 1
-        if not success:
-            self.error_count += 1
+        with self._lock:
+            self.inference_count += 1
+            if not success:
+                self.error_count += 1
             
-        # Log performance metrics
-        if inference_time > 0:
-            # สามารถเพิ่มการติดตาม latency distribution
-            pass
+            # Log performance metrics
+            if inference_time > 0:
+                now = time.monotonic()
+                index = self.latency.bucket_index(inference_time)
+                self.latency.record(inference_time, index)
+                for window in self._windows.values():
+                    window.record(inference_time, now, index)
+                self._busy_time += inference_time
+    
+    def get_latency_percentiles(self, window: Optional[str] = "1m",
+                                percentiles: Sequence[float] = (50, 90, 99, 99.9)) -> Dict[str, float]:
+        """
+        ดึง percentile ของ latency
+        
+        Args:
+            window: "1m", "15m" หรือ None (ตลอดอายุ)
+            percentiles: percentile ที่ต้องการ
+            
+        Returns:
+            Dictionary {"count", "mean_ms", "p50_ms", ..., "max_ms"}
+        """
+        with self._lock:
+            if window is None:
+                histogram = self.latency.copy()
+            elif window in self._windows:
+                histogram = self._windows[window].snapshot(time.monotonic())
+            else:
+                raise ValueError(f"Unknown window '{window}'. Use one of {list(self._windows)} or None")
+        return histogram.summary(percentiles)
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -469,23 +1305,47 @@ class HailoHealthMonitor:
             "success_rate": success_rate,
             "avg_fps": fps,
             "runtime_seconds": runtime,
-            "last_check": self.last_check_time
+            "last_check": self.last_check_time,
+            "latency": {window or "all": self.get_latency_percentiles(window)
+                        for window in (None,) + tuple(self._windows)},
         }
     
     def check_system_health(self) -> Dict[str, Any]:
         """
         ตรวจสอบสุขภาพระบบ Hailo
         
+        status เป็น "warning" เมื่ออุณหภูมิถึงเกณฑ์ (เสี่ยง thermal throttling)
+        หรือ p99 ของ 1 นาทีล่าสุดสูงกว่า 15 นาทีเกิน latency_degradation_ratio เท่า
+        
         Returns:
             ข้อมูลสุขภาพระบบ
         """
         try:
-            # TODO: เพิ่มการตรวจสอบ temperature, memory usage, etc.
+            if not self.sampler.running:
+                # ไม่มี sampler เบื้องหลัง: อ่านค่าปัจจุบันหนึ่งครั้ง
+                self.sampler.sample_once()
+            latest = self.telemetry.latest()
+            recent = self.get_latency_percentiles("1m", (99,))
+            baseline = self.get_latency_percentiles("15m", (99,))
+            
+            warnings = []
+            temperature = latest.get("temperature")
+            if temperature is not None and temperature >= self.temperature_warning_c:
+                warnings.append(f"temperature {temperature:.1f}C >= {self.temperature_warning_c:.1f}C")
+            if (recent["count"] and baseline["count"] > recent["count"]
+                    and recent["p99_ms"] > baseline["p99_ms"] * self.latency_degradation_ratio):
+                warnings.append(f"p99 latency {recent['p99_ms']:.1f} ms (1m) vs {baseline['p99_ms']:.1f} ms (15m)")
+            
             health_info = {
                 "timestamp": time.time(),
-                "status": "healthy",
-                "temperature": None,  # จะได้จาก Hailo API
-                "memory_usage": None,
+                "status": "warning" if warnings else "healthy",
+                "warnings": warnings,
+                "temperature": temperature,
+                "power": latest.get("power"),
+                "utilization": latest.get("utilization"),
+                "memory_usage": latest.get("memory_mb"),
+                "p99_latency_ms": {"1m": recent["p99_ms"], "15m": baseline["p99_ms"]},
+                "telemetry_15m": self.telemetry.summary(since=time.time() - 900),
                 "device_available": HAILO_AVAILABLE
             }
             
@@ -504,14 +1364,17 @@ class HailoHealthMonitor:
 # Utility functions
 def benchmark_inference(processor: Hailo8Processor, 
                        test_images: List[np.ndarray],
-                       iterations: int = 100) -> Dict[str, float]:
+                       iterations: int = 100,
+                       warmup: int = 10) -> Dict[str, float]:
     """
-    วัดประสิทธิภาพการ inference
+    วัดประสิทธิภาพการ inference แบบ predict ทีละเฟรม
+    (วัดละเอียดตามขั้น / concurrency / batch size ได้ด้วย model.benchmark)
     
     Args:
         processor: Hailo8Processor instance
         test_images: ภาพทดสอบ
         iterations: จำนวนครั้งในการทดสอบ
+        warmup: จำนวนครั้งที่รันก่อนเริ่มวัด
         
     Returns:
         ผลการทดสอบประสิทธิภาพ
@@ -519,7 +1382,13 @@ def benchmark_inference(processor: Hailo8Processor,
     if not test_images:
         raise ValueError("No test images provided")
     
-    logger.info(f"Starting benchmark with {iterations} iterations")
+    logger.info(f"Starting benchmark with {iterations} iterations ({warmup} warm-up)")
+    
+    for i in range(warmup):
+        try:
+            processor.predict(test_images[i % len(test_images)])
+        except Exception as e:
+            logger.warning(f"Warm-up iteration {i} failed: {e}")
     
     times = []
     errors = 0
@@ -555,6 +1424,7 @@ def benchmark_inference(processor: Hailo8Processor,
         "fps": 1.0 / avg_time if avg_time > 0 else 0.0,
         "error_rate": errors / iterations
     }
+    results.update({key: value for key, value in summarize_latencies(times).items() if key.startswith("p")})
     
     logger.info(f"Benchmark completed: {results}")
     return results
@@ -0,0 +1,395 @@
+"""
+PWD Vision Works - Model Metadata Cache
+cache ของ metadata ของโมเดล .hef (shape, format, quantization, label map) บนดิสก์ข้างไฟล์โมเดล
+เพื่อให้การเริ่มต้นโปรแกรมไม่ต้อง parse HEF ใหม่ทุกครั้ง และตอบคำถามเรื่องโมเดลได้โดยไม่แตะอุปกรณ์
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+try:
+    import hailo_platform as hailo
+    HAILO_AVAILABLE = True
+except ImportError:
+    HAILO_AVAILABLE = False
+
+from ..utils.exceptions import ModelLoadError
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = ".model_metadata.json"
+CACHE_VERSION = 2  # 2: entry ใช้ชื่อไฟล์ (รวมนามสกุล) เป็น key
+
+# ไฟล์ label ที่ค้นหาข้างโมเดล ({stem} = ชื่อโมเดล) ตามลำดับ
+LABEL_FILE_PATTERNS = ("{stem}.labels.json", "labels_{stem}.json", "{stem}.labels.txt", "{stem}.txt")
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    คำนวณ SHA-256 ของไฟล์แบบอ่านทีละ chunk
+
+    Args:
+        path: พาธของไฟล์
+        chunk_size: ขนาดของแต่ละ chunk (bytes)
+
+    Returns:
+        hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_labels(path: Union[str, Path]) -> Dict[int, str]:
+    """
+    อ่าน label map จากไฟล์ JSON ({"0": "person", ...} หรือ list) หรือ text (หนึ่งชื่อต่อบรรทัด)
+
+    Args:
+        path: พาธของไฟล์ label
+
+    Returns:
+        dictionary {class id: ชื่อ}
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".json":
+            data = json.load(f)
+            if isinstance(data, list):
+                return {i: str(name) for i, name in enumerate(data)}
+            return {int(k): str(v) for k, v in data.items()}
+        return {i: line.strip() for i, line in enumerate(f.read().splitlines()) if line.strip()}
+
+
+class ModelMetadata:
+    """
+    metadata ของโมเดลหนึ่งตัว
+
+    Attributes:
+        name: ชื่อโมเดล (ไม่มี .hef)
+        path: พาธของไฟล์โมเดล
+        size_bytes, mtime_ns, sha256: key ของ cache
+        inputs / outputs: รายการ {"name", "shape", "format", "order", "quant": {"scale", "zero_point"}}
+        labels: label map {class id: ชื่อ}
+        labels_path: ไฟล์ที่อ่าน labels มา (None หากไม่มี)
+    """
+
+    def __init__(self,
+                 name: str,
+                 path: str,
+                 size_bytes: int,
+                 mtime_ns: int,
+                 sha256: str,
+                 inputs: Optional[List[Dict[str, Any]]] = None,
+                 outputs: Optional[List[Dict[str, Any]]] = None,
+                 labels: Optional[Dict[int, str]] = None,
+                 labels_path: Optional[str] = None,
+                 labels_mtime_ns: Optional[int] = None,
+                 parsed_at: Optional[float] = None):
+        self.name = name
+        self.path = path
+        self.size_bytes = size_bytes
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.labels = labels or {}
+        self.labels_path = labels_path
+        self.labels_mtime_ns = labels_mtime_ns
+        self.parsed_at = parsed_at if parsed_at is not None else time.time()
+
+    @property
+    def has_io_info(self) -> bool:
+        """True หากมีข้อมูล input/output (parse HEF สำเร็จ)"""
+        return bool(self.inputs)
+
+    @property
+    def input_shape(self) -> Optional[Tuple[int, ...]]:
+        """shape (H, W, C) ของ input แรก"""
+        return tuple(self.inputs[0]["shape"]) if self.inputs else None
+
+    @property
+    def input_size(self) -> Optional[Tuple[int, int]]:
+        """ขนาด input แรก (width, height)"""
+        shape = self.input_shape
+        return (shape[1], shape[0]) if shape and len(shape) >= 2 else None
+
+    @property
+    def input_names(self) -> List[str]:
+        return [info["name"] for info in self.inputs]
+
+    @property
+    def output_names(self) -> List[str]:
+        return [info["name"] for info in self.outputs]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data["labels"] = {str(k): v for k, v in self.labels.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelMetadata":
+        data = dict(data)
+        data["labels"] = {int(k): v for k, v in data.get("labels", {}).items()}
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return (f"ModelMetadata({self.name}, inputs={[tuple(i['shape']) for i in self.inputs]}, "
+                f"outputs={len(self.outputs)}, labels={len(self.labels)})")
+
+
+def _vstream_info_to_dict(info: Any) -> Dict[str, Any]:
+    """แปลง vstream info ของ HEF เป็น dictionary ที่เก็บเป็น JSON ได้"""
+    entry = {"name": info.name, "shape": [int(s) for s in info.shape]}
+    fmt = getattr(info, "format", None)
+    if fmt is not None:
+        entry["format"] = str(getattr(fmt, "type", fmt)).split(".")[-1]
+        entry["order"] = str(getattr(fmt, "order", "")).split(".")[-1] or None
+    quant = getattr(info, "quant_info", None)
+    if quant is not None:
+        entry["quant"] = {
+            "scale": float(getattr(quant, "qp_scale", 1.0)),
+            "zero_point": float(getattr(quant, "qp_zp", 0.0)),
+        }
+    return entry
+
+
+class ModelMetadataCache:
+    """
+    cache ของ ModelMetadata ที่เก็บเป็นไฟล์ JSON ในโฟลเดอร์เดียวกับโมเดล
+
+    entry ถูกใช้ทันทีหากขนาดและ mtime ของไฟล์ตรงกัน หากไม่ตรง (เช่น ไฟล์ถูก copy หรือ touch)
+    จะตรวจ SHA-256 ของเนื้อไฟล์ก่อนตัดสินใจ parse HEF ใหม่
+    การ parse HEF ทำบน host เท่านั้น ไม่เปิด VDevice
+    """
+
+    _instances: Dict[Path, "ModelMetadataCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model_dir: Union[str, Path], cache_file: str = CACHE_FILE_NAME):
+        """
+        เริ่มต้น ModelMetadataCache
+
+        Args:
+            model_dir: โฟลเดอร์ของโมเดล
+            cache_file: ชื่อไฟล์ cache ในโฟลเดอร์ของโมเดล
+        """
+        self.model_dir = Path(model_dir)
+        self.cache_path = self.model_dir / cache_file
+        self._entries: Dict[str, ModelMetadata] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @classmethod
+    def for_directory(cls, model_dir: Union[str, Path]) -> "ModelMetadataCache":
+        """cache ที่ใช้ร่วมกันภายใน process ของโฟลเดอร์โมเดล"""
+        model_dir = Path(model_dir).resolve()
+        with cls._instances_lock:
+            cache = cls._instances.get(model_dir)
+            if cache is None:
+                cache = cls._instances[model_dir] = cls(model_dir)
+            return cache
+
+    @classmethod
+    def for_model(cls, model_path: Union[str, Path]) -> "ModelMetadataCache":
+        """cache ที่ใช้ร่วมกันของโฟลเดอร์ที่โมเดลอยู่"""
+        return cls.for_directory(Path(model_path).resolve().parent)
+
+    def _load(self) -> None:
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            version = data.get("version")
+            if version not in (1, CACHE_VERSION):
+                logger.info(f"Ignoring model metadata cache with version {version}")
+                return
+            entries = [ModelMetadata.from_dict(entry) for entry in data["models"].values()]
+            # version 1 ใช้ชื่อโมเดล (stem) เป็น key: เปลี่ยนเป็นชื่อไฟล์โดยไม่ต้อง parse ใหม่
+            self._entries = {Path(entry.path).name: entry for entry in entries}
+            self._dirty = version != CACHE_VERSION
+            logger.debug(f"Loaded metadata for {len(self._entries)} model(s) from {self.cache_path}")
+        except Exception as e:
+            # cache เสียหายไม่ควรทำให้โหลดโมเดลไม่ได้ แค่ parse ใหม่
+            logger.warning(f"Failed to read model metadata cache {self.cache_path}: {e}")
+            self._entries = {}
+
+    def save(self) -> None:
+        """เขียน cache ลงดิสก์ (เขียนไฟล์ชั่วคราวแล้ว rename เพื่อไม่ให้ไฟล์ขาดกลางทาง)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": CACHE_VERSION,
+                "models": {name: entry.to_dict() for name, entry in sorted(self._entries.items())},
+            }
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except OSError as e:
+                # โฟลเดอร์โมเดลอาจเป็น read-only: ใช้ cache ในหน่วยความจำต่อไป
+                logger.warning(f"Failed to write model metadata cache {self.cache_path}: {e}")
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+    def get(self, model_path: Union[str, Path], save: bool = True) -> ModelMetadata:
+        """
+        ดึง metadata ของโมเดล (parse HEF เฉพาะเมื่อไฟล์เปลี่ยน)
+
+        Args:
+            model_path: พาธของไฟล์ .hef
+            save: เขียน cache ลงดิสก์หากมีการเปลี่ยนแปลง
+
+        Returns:
+            ModelMetadata
+
+        Raises:
+            ModelLoadError: หากไม่พบไฟล์หรืออ่านไม่ได้
+        """
+        model_path = Path(model_path)
+        try:
+            stat = model_path.stat()
+        except OSError as e:
+            raise ModelLoadError(f"Model file not found: {model_path}") from e
+        if stat.st_size == 0:
+            raise ModelLoadError(f"Model file is empty: {model_path}")
+
+        with self._lock:
+            entry = self._entries.get(model_path.name)
+            if entry is not None and entry.size_bytes == stat.st_size and entry.mtime_ns == stat.st_mtime_ns \
+                    and (entry.has_io_info or not self._parses_io(model_path)):
+                self.hits += 1
+            else:
+                sha256 = file_sha256(model_path)
+                if entry is not None and entry.sha256 == sha256 and entry.has_io_info:
+                    # เนื้อไฟล์เหมือนเดิม: ปรับเฉพาะ key
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    entry = self._parse(model_path, sha256)
+                entry.size_bytes, entry.mtime_ns, entry.path = stat.st_size, stat.st_mtime_ns, str(model_path)
+                self._entries[model_path.name] = entry
+                self._dirty = True
+
+            self._refresh_labels(entry, model_path)
+            if save:
+                self.save()
+            return entry
+
+    def refresh(self, model_paths: List[Path], suffix: Optional[str] = None) -> Dict[str, ModelMetadata]:
+        """
+        อัปเดต cache ให้ตรงกับรายการโมเดล (entry ของไฟล์ที่ถูกลบจะถูกนำออก)
+
+        Args:
+            model_paths: รายการไฟล์โมเดลในโฟลเดอร์
+            suffix: นามสกุลที่ model_paths ครอบคลุม (เช่น ".onnx"); นำออกเฉพาะ entry
+                    ของนามสกุลนี้ เพื่อไม่ให้ backend หนึ่งลบ entry ของอีก backend
+                    ในโฟลเดอร์เดียวกัน (None = นำออกทุก entry ที่ไม่อยู่ในรายการ)
+
+        Returns:
+            dictionary {ชื่อโมเดล: ModelMetadata} ของโมเดลที่อ่านได้
+        """
+        results = {}
+        with self._lock:
+            for path in model_paths:
+                try:
+                    results[path.stem] = self.get(path, save=False)
+                except ModelLoadError as e:
+                    logger.warning(f"Skipping model {path.name}: {e}")
+            listed = {p.name for p in model_paths}
+            for name in list(self._entries):
+                if name in listed or (suffix is not None and Path(name).suffix.lower() != suffix.lower()):
+                    continue
+                del self._entries[name]
+                self._dirty = True
+            self.save()
+        return results
+
+    def invalidate(self, model_name: Optional[str] = None) -> None:
+        """ลบ entry ของโมเดล (ชื่อไฟล์ หรือชื่อโมเดลสำหรับทุกนามสกุล; None = ทั้งหมด) เพื่อบังคับให้ parse ใหม่"""
+        with self._lock:
+            if model_name is None:
+                self._entries.clear()
+            else:
+                for name in [n for n in self._entries if n == model_name or Path(n).stem == model_name]:
+                    del self._entries[name]
+            self._dirty = True
+            self.save()
+
+    @staticmethod
+    def _parses_io(model_path: Path) -> bool:
+        """True หากอ่าน input/output ของไฟล์นี้ได้ (HEF เมื่อมี HailoRT; ไฟล์อื่น เช่น .onnx เก็บเฉพาะข้อมูลไฟล์)"""
+        return HAILO_AVAILABLE and model_path.suffix.lower() == ".hef"
+
+    def _parse(self, model_path: Path, sha256: str) -> ModelMetadata:
+        """อ่าน vstream info จาก HEF (ไม่แตะอุปกรณ์)"""
+        inputs, outputs = [], []
+        if self._parses_io(model_path):
+            start_time = time.perf_counter()
+            try:
+                hef = hailo.HEF(str(model_path))
+                inputs = [_vstream_info_to_dict(info) for info in hef.get_input_vstream_infos()]
+                outputs = [_vstream_info_to_dict(info) for info in hef.get_output_vstream_infos()]
+                logger.info(f"Parsed HEF metadata for {model_path.name} in "
+                            f"{(time.perf_counter() - start_time) * 1000:.1f} ms")
+            except Exception as e:
+                raise ModelLoadError(f"Failed to parse HEF {model_path}: {e}") from e
+        else:
+            logger.debug(f"No I/O parser for {model_path.name}; caching file info only")
+
+        stat = model_path.stat()
+        return ModelMetadata(model_path.stem, str(model_path), stat.st_size, stat.st_mtime_ns, sha256,
+                             inputs=inputs, outputs=outputs)
+
+    def _refresh_labels(self, entry: ModelMetadata, model_path: Path) -> None:
+        """อ่าน label map ใหม่เมื่อไฟล์ label เปลี่ยน (ไฟล์ label ไม่อยู่ใน key ของ HEF)"""
+        label_path = next((model_path.parent / pattern.format(stem=model_path.stem)
+                           for pattern in LABEL_FILE_PATTERNS
+                           if (model_path.parent / pattern.format(stem=model_path.stem)).is_file()), None)
+        if label_path is None:
+            if entry.labels_path is not None:
+                entry.labels, entry.labels_path, entry.labels_mtime_ns = {}, None, None
+                self._dirty = True
+            return
+
+        mtime_ns = label_path.stat().st_mtime_ns
+        if entry.labels_path == str(label_path) and entry.labels_mtime_ns == mtime_ns:
+            return
+        try:
+            entry.labels = load_labels(label_path)
+            entry.labels_path, entry.labels_mtime_ns = str(label_path), mtime_ns
+            self._dirty = True
+        except Exception as e:
+            logger.warning(f"Failed to read labels {label_path}: {e}")
+
+    def get_cache_info(self) -> Dict[str, Any]:
+        """
+        ดึงข้อมูลของ cache
+
+        Returns:
+            Dictionary ของพาธ, จำนวน entry และ hit/miss
+        """
+        with self._lock:
+            return {
+                "cache_path": str(self.cache_path),
+                "models": sorted(self._entries),  # ชื่อไฟล์
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,427 @@
+"""
+PWD Vision Works - ONNX Runtime Backend
+backend สำหรับเครื่องที่ไม่มี Hailo (x86 mini-PC, CI) ที่รัน ONNX export ของโมเดลเดียวกัน
+ด้วย CPU execution provider ของ ONNX Runtime ผ่าน interface เดียวกับ HailoSession
+(ใช้กับ Hailo8Processor ได้โดยเลือก backend="onnx")
+
+- กำหนดจำนวน thread (intra-op / inter-op) ได้
+- IO binding กับ buffer ที่จองไว้ล่วงหน้าต่อขนาด batch
+- cache โมเดลที่ผ่าน graph optimization แล้วไว้บนดิสก์ (โหลดครั้งถัดไปไม่ต้อง optimize ใหม่)
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import time
+import logging
+import platform
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+from ..utils.exceptions import InferenceError, ModelLoadError
+from .backends import InferenceBackend, TensorInfo, register_backend
+from .model_metadata import file_sha256
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+CACHE_DIR_NAME = ".ort_cache"
+
+# ชนิดข้อมูลของ ONNX -> numpy
+_ONNX_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+    "tensor(double)": np.float64,
+    "tensor(uint8)": np.uint8,
+    "tensor(int8)": np.int8,
+    "tensor(int32)": np.int32,
+    "tensor(int64)": np.int64,
+}
+
+
+def _graph_optimization_level(level: str) -> Any:
+    if level not in OPTIMIZATION_LEVELS:
+        raise ValueError(f"Unknown optimization level '{level}'. Use one of {OPTIMIZATION_LEVELS}")
+    return {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[level]
+
+
+def _static_dim(dim: Any) -> Optional[int]:
+    """ขนาดของมิติ (None เมื่อเป็นมิติแบบ dynamic)"""
+    return int(dim) if isinstance(dim, (int, np.integer)) and dim > 0 else None
+
+
+class CpuDevice:
+    """อุปกรณ์ CPU ที่ HailoModelManager ใช้ร่วมกันระหว่างโมเดล (ไม่มีทรัพยากรต้องปล่อย)"""
+
+    def __init__(self, device_id: str = "cpu"):
+        self.device_id = device_id
+
+    def release(self) -> None:
+        pass
+
+
+class OnnxSession:
+    """
+    session ของโมเดล ONNX ที่มี interface เดียวกับ HailoSession
+
+    input รับเป็น NHWC (เหมือนที่ Hailo8Processor เตรียมให้ HEF) แล้วแปลงเป็น layout
+    และชนิดข้อมูลของโมเดลลงใน buffer ที่ bind ไว้กับ session; input_shape รายงานเป็น (H, W, C)
+    """
+
+    def __init__(self,
+                 model_path: Union[str, Path],
+                 batch_size: int = 1,
+                 quantized: bool = False,
+                 device: Any = None,
+                 intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None,
+                 parallel: bool = False,
+                 optimization_level: str = "all",
+                 cache_dir: Union[str, Path, None] = None,
+                 use_io_binding: bool = True,
+                 copy_outputs: bool = True,
+                 normalization: str = "zero_one",
+                 input_size: Optional[Tuple[int, int]] = None,
+                 providers: Optional[List[str]] = None):
+        """
+        เริ่มต้น OnnxSession (ยังไม่โหลดโมเดลจนกว่าจะเรียก open)
+
+        Args:
+            model_path: พาธของโมเดล .onnx
+            batch_size: batch สูงสุดต่อการเรียก
+            quantized: รับ input เป็น uint8 (ค่า 0-255 ถูกแปลงเป็นชนิดข้อมูลของโมเดลโดยไม่ normalize)
+            device: CpuDevice ที่ใช้ร่วมกัน (ไม่มีผลต่อการทำงาน)
+            intra_op_threads: จำนวน thread ภายใน operator (None = ค่าเริ่มต้นของ ONNX Runtime)
+            inter_op_threads: จำนวน thread ระหว่าง operator (ใช้เมื่อ parallel=True)
+            parallel: ใช้ ORT_PARALLEL execution mode
+            optimization_level: "disable", "basic", "extended" หรือ "all"
+            cache_dir: โฟลเดอร์เก็บโมเดลที่ optimize แล้ว (None = .ort_cache ข้างไฟล์โมเดล, False = ไม่ cache)
+            use_io_binding: bind input/output กับ buffer ที่จองไว้แทนการ copy ผ่าน session.run
+            copy_outputs: คืน copy ของ output (False = คืน buffer ที่ถูกเขียนทับใน infer ครั้งถัดไป)
+            normalization: วิธี normalize ที่ Hailo8Processor ใช้เตรียม input ของโมเดลนี้
+            input_size: ขนาด input (width, height) เมื่อโมเดลมีขนาดภาพแบบ dynamic
+            providers: execution providers (None = CPUExecutionProvider)
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime not available. Please install onnxruntime")
+
+        self.model_path = Path(model_path)
+        self.batch_size = batch_size
+        self.quantized = quantized
+        self.device = device
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.parallel = parallel
+        self.optimization_level = optimization_level
+        self.cache_dir = cache_dir
+        self.use_io_binding = use_io_binding
+        self.copy_outputs = copy_outputs
+        self.normalization = normalization
+        self.input_size = input_size
+        self.providers = providers or ["CPUExecutionProvider"]
+
+        self.network_group = None
+        self.input_infos: List[TensorInfo] = []
+        self.output_infos: List[TensorInfo] = []
+        self._session = None
+        self._layouts: Dict[str, str] = {}
+        self._dtypes: Dict[str, np.dtype] = {}
+        self._bindings: Dict[int, Tuple[Any, Dict[str, np.ndarray], Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.open_time = 0.0
+        self.infer_count = 0
+        self.cache_hit = False
+        self.optimized_model_path: Optional[Path] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    @property
+    def input_names(self) -> List[str]:
+        return [info.name for info in self.input_infos]
+
+    @property
+    def output_names(self) -> List[str]:
+        return [info.name for info in self.output_infos]
+
+    @property
+    def input_shape(self) -> Tuple[int, ...]:
+        """shape (H, W, C) ของ input แรก"""
+        return self.input_infos[0].shape
+
+    def _cache_path(self) -> Optional[Path]:
+        """
+        ไฟล์โมเดลที่ optimize แล้ว
+
+        key มาจากเนื้อไฟล์, เวอร์ชัน ONNX Runtime, ระดับ optimization และสถาปัตยกรรม CPU
+        (โมเดลที่ optimize ระดับ "all" อาจมี kernel เฉพาะฮาร์ดแวร์)
+        """
+        if self.cache_dir is False or self.optimization_level == "disable":
+            return None
+        cache_dir = Path(self.cache_dir) if self.cache_dir else self.model_path.parent / CACHE_DIR_NAME
+        key = f"{file_sha256(self.model_path)[:16]}-ort{ort.__version__}-{self.optimization_level}-{platform.machine() or 'cpu'}"
+        return cache_dir / f"{self.model_path.stem}.{key}.onnx"
+
+    def _session_options(self, cache_path: Optional[Path]) -> Any:
+        options = ort.SessionOptions()
+        if self.intra_op_threads is not None:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads is not None:
+            options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if self.parallel
+                                  else ort.ExecutionMode.ORT_SEQUENTIAL)
+
+        if cache_path is not None and cache_path.exists():
+            # โมเดลใน cache ผ่าน optimization แล้ว ไม่ต้องทำซ้ำ
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            self.cache_hit = True
+        else:
+            options.graph_optimization_level = _graph_optimization_level(self.optimization_level)
+            if cache_path is not None:
+                try:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    options.optimized_model_filepath = str(cache_path)
+                except OSError as e:
+                    logger.warning(f"Cannot write ONNX optimization cache {cache_path.parent}: {e}")
+        return options
+
+    def _tensor_info(self, node: Any, is_input: bool) -> TensorInfo:
+        """TensorInfo ที่ไม่มีมิติ batch; input แบบ NCHW ถูกรายงานเป็น (H, W, C)"""
+        shape = list(node.shape[1:])
+        if is_input and len(shape) == 3:
+            channels_first = _static_dim(shape[0]) in (1, 3) and _static_dim(shape[2]) not in (1, 3)
+            self._layouts[node.name] = "NCHW" if channels_first else "NHWC"
+            if channels_first:
+                shape = [shape[1], shape[2], shape[0]]
+            if self.input_size is not None:
+                shape[0], shape[1] = self.input_size[1], self.input_size[0]
+            elif _static_dim(shape[0]) is None or _static_dim(shape[1]) is None:
+                raise ModelLoadError(f"Input '{node.name}' of {self.model_path.name} has dynamic spatial size; "
+                                     f"set input_size")
+        self._dtypes[node.name] = np.dtype(_ONNX_DTYPES.get(node.type, np.float32))
+        return TensorInfo(node.name, [_static_dim(dim) or 0 for dim in shape])
+
+    def open(self) -> "OnnxSession":
+        """
+        โหลดโมเดลด้วย ONNX Runtime (ใช้โมเดลที่ optimize แล้วจาก cache หากมี)
+
+        Returns:
+            session นี้
+
+        Raises:
+            ModelLoadError: หากไม่พบไฟล์หรือโหลดโมเดลไม่ได้
+        """
+        if self.is_open:
+            return self
+        start_time = time.perf_counter()
+        try:
+            if not self.model_path.exists():
+                raise FileNotFoundError(f"Model not found: {self.model_path}")
+            cache_path = self._cache_path()
+            self.cache_hit = False
+            options = self._session_options(cache_path)
+            source = cache_path if self.cache_hit else self.model_path
+            self._session = ort.InferenceSession(str(source), sess_options=options, providers=self.providers)
+            self.optimized_model_path = cache_path if cache_path is not None and cache_path.exists() else None
+
+            self.input_infos = [self._tensor_info(node, True) for node in self._session.get_inputs()]
+            self.output_infos = [self._tensor_info(node, False) for node in self._session.get_outputs()]
+            self.open_time = time.perf_counter() - start_time
+            logger.info(f"ONNX session opened for {self.model_path.name} in {self.open_time * 1000:.1f} ms "
+                        f"(cache {'hit' if self.cache_hit else 'miss'}, "
+                        f"inputs={[i.shape for i in self.input_infos]}, batch_size={self.batch_size})")
+            return self
+
+        except ModelLoadError:
+            self.close()
+            raise
+        except Exception as e:
+            logger.error(f"Failed to open ONNX session: {e}")
+            self.close()
+            raise ModelLoadError(f"Failed to open ONNX session: {e}") from e
+
+    def _model_input_shape(self, info: TensorInfo, batch: int) -> Tuple[int, ...]:
+        height, width, channels = info.shape
+        if self._layouts.get(info.name) == "NCHW":
+            return (batch, channels, height, width)
+        return (batch, height, width, channels)
+
+    def _binding(self, batch: int) -> Tuple[Any, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """IO binding พร้อม input/output buffer ของ batch ขนาดนี้ (สร้างครั้งแรกที่ใช้)"""
+        entry = self._bindings.get(batch)
+        if entry is not None:
+            return entry
+        binding = self._session.io_binding()
+        input_buffers = {}
+        for info in self.input_infos:
+            shape = (self._model_input_shape(info, batch) if len(info.shape) == 3
+                     else (batch,) + info.shape)
+            buffer = np.zeros(shape, dtype=self._dtypes[info.name])
+            binding.bind_cpu_input(info.name, buffer)
+            input_buffers[info.name] = buffer
+        output_buffers = {}
+        for info in self.output_infos:
+            if all(info.shape):
+                buffer = np.empty((batch,) + info.shape, dtype=self._dtypes[info.name])
+                binding.bind_output(info.name, "cpu", 0, buffer.dtype, buffer.shape, buffer.ctypes.data)
+                output_buffers[info.name] = buffer
+            else:
+                # output แบบ dynamic: ให้ ONNX Runtime จองเอง
+                binding.bind_output(info.name, "cpu")
+        entry = (binding, input_buffers, output_buffers)
+        self._bindings[batch] = entry
+        return entry
+
+    def _write_input(self, info: TensorInfo, tensor: np.ndarray, out: np.ndarray) -> None:
+        """แปลง NHWC -> layout/ชนิดข้อมูลของโมเดล ลง buffer"""
+        if tensor.ndim == 4 and self._layouts.get(info.name) == "NCHW":
+            tensor = tensor.transpose(0, 3, 1, 2)
+        np.copyto(out, tensor, casting="unsafe")
+
+    def infer(self, inputs: Union[np.ndarray, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """
+        รัน inference บน CPU
+
+        Args:
+            inputs: tensor (N, H, W, C) ของ input แรก หรือ dictionary {ชื่อ input: tensor}
+
+        Returns:
+            dictionary {ชื่อ output: tensor (N, ...)}
+
+        Raises:
+            InferenceError: หาก session ยังไม่เปิด หรือ input ไม่ตรงกับโมเดล หรือ inference ผิดพลาด
+        """
+        if not self.is_open:
+            raise InferenceError("ONNX session is not open")
+        if isinstance(inputs, np.ndarray):
+            inputs = {self.input_infos[0].name: inputs}
+
+        batch = None
+        for info in self.input_infos:
+            tensor = inputs.get(info.name)
+            if tensor is None:
+                raise InferenceError(f"Missing input '{info.name}'")
+            if tuple(tensor.shape[1:]) != info.shape or not 0 < tensor.shape[0] <= self.batch_size:
+                raise InferenceError(f"Input '{info.name}' has shape {tensor.shape}, "
+                                     f"expected (<= {self.batch_size}, {', '.join(map(str, info.shape))})")
+            batch = tensor.shape[0]
+
+        try:
+            start = time.perf_counter()
+            if self.use_io_binding:
+                # binding และ buffer ใช้ร่วมกันทุก thread จึงต้องรันทีละงาน
+                with self._lock:
+                    binding, input_buffers, output_buffers = self._binding(batch)
+                    for info in self.input_infos:
+                        self._write_input(info, inputs[info.name], input_buffers[info.name])
+                    binding.synchronize_inputs()
+                    self._session.run_with_iobinding(binding)
+                    binding.synchronize_outputs()
+                    if output_buffers and len(output_buffers) == len(self.output_infos):
+                        results = {name: buffer.copy() if self.copy_outputs else buffer
+                                   for name, buffer in output_buffers.items()}
+                    else:
+                        results = dict(zip(self.output_names, binding.copy_outputs_to_cpu()))
+            else:
+                feeds = {}
+                for info in self.input_infos:
+                    buffer = np.empty(self._model_input_shape(info, batch) if len(info.shape) == 3
+                                      else inputs[info.name].shape, dtype=self._dtypes[info.name])
+                    self._write_input(info, inputs[info.name], buffer)
+                    feeds[info.name] = buffer
+                results = dict(zip(self.output_names, self._session.run(None, feeds)))
+            self._local.timings = {"device": time.perf_counter() - start}
+            self.infer_count += 1
+            return results
+
+        except Exception as e:
+            raise InferenceError(f"ONNX session inference failed: {e}") from e
+
+    def last_timings(self) -> Dict[str, float]:
+        """เวลา (วินาที) ของการ infer ครั้งล่าสุดใน thread นี้"""
+        return dict(getattr(self._local, "timings", {}))
+
+    def close(self) -> None:
+        """ปล่อย session และ buffer (เรียกซ้ำได้)"""
+        self._bindings = {}
+        self._session = None
+        logger.debug(f"ONNX session closed for {self.model_path.name}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    backend บน CPU ด้วย ONNX Runtime: ค่าเริ่มต้นของ session กำหนดได้ทั้ง backend และแยกตามโมเดล
+    """
+
+    name = "onnx"
+    model_suffix = ".onnx"
+
+    def __init__(self, models: Optional[Dict[str, Dict[str, Any]]] = None, **session_defaults):
+        """
+        Args:
+            models: {ชื่อโมเดล: argument ของ OnnxSession}
+            **session_defaults: argument ของ OnnxSession สำหรับทุกโมเดล (เช่น intra_op_threads=4)
+        """
+        self.models = dict(models or {})
+        self.session_defaults = session_defaults
+
+    @property
+    def available(self) -> bool:
+        return ONNXRUNTIME_AVAILABLE
+
+    def configure_model(self, model_name: str, **config) -> None:
+        """
+        กำหนด argument ของ OnnxSession สำหรับโมเดล
+
+        Args:
+            model_name: ชื่อโมเดล (ไม่มี .onnx)
+            **config: argument ของ OnnxSession
+        """
+        self.models.setdefault(model_name, {}).update(config)
+
+    def list_devices(self) -> List[str]:
+        return ["cpu"]
+
+    def create_device(self, device_id: str) -> CpuDevice:
+        return CpuDevice(device_id)
+
+    def create_session(self,
+                       model_path: Union[str, Path],
+                       batch_size: int = 1,
+                       quantized: bool = False,
+                       device: Any = None,
+                       **kwargs) -> OnnxSession:
+        model_path = Path(model_path)
+        if model_path.suffix != ".onnx" and model_path.with_suffix(".onnx").exists():
+            # ชื่อโมเดลเดียวกับ HEF: ใช้ ONNX export ที่อยู่ข้างกัน
+            model_path = model_path.with_suffix(".onnx")
+        config = dict(self.session_defaults)
+        config.update(self.models.get(model_path.stem, {}))
+        config.update(kwargs)
+        return OnnxSession(model_path, batch_size, quantized, device=device, **config)
+
+
+register_backend(OnnxRuntimeBackend())
@@ -0,0 +1,326 @@
+"""
+PWD Vision Works - Inference Telemetry
+histogram ของ latency แบบ log bucket (หน่วยความจำคงที่) พร้อมหน้าต่างเวลาแบบ rolling
+และตัวเก็บตัวอย่าง telemetry ของอุปกรณ์ (อุณหภูมิ, พลังงาน, utilization) ลง ring buffer
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, Callable, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_FIELDS = ("temperature", "power", "utilization", "memory_mb")
+
+
+class LatencyHistogram:
+    """
+    histogram ของ latency แบบ log bucket: ความละเอียดสัมพัทธ์คงที่ (~12% ต่อ bucket ที่ 20 bucket/decade)
+    ตั้งแต่ min_seconds ถึง max_seconds โดยใช้หน่วยความจำคงที่ไม่ว่าจะบันทึกกี่ครั้ง
+    """
+
+    def __init__(self, min_seconds: float = 1e-5, max_seconds: float = 100.0, buckets_per_decade: int = 20):
+        """
+        Args:
+            min_seconds: ขอบล่างของ bucket แรก (ค่าที่ต่ำกว่าจะนับใน bucket แรก)
+            max_seconds: ขอบบนของ bucket สุดท้าย (ค่าที่สูงกว่าจะนับใน bucket สุดท้าย)
+            buckets_per_decade: จำนวน bucket ต่อ 10 เท่า
+        """
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.buckets_per_decade = buckets_per_decade
+        self._log_min = math.log10(min_seconds)
+        self.num_buckets = int(math.ceil((math.log10(max_seconds) - self._log_min) * buckets_per_decade))
+        # list ของ int: การเพิ่มค่าทีละ bucket เร็วกว่า numpy scalar indexing หลายเท่า
+        self.counts = [0] * self.num_buckets
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def bucket_index(self, seconds: float) -> int:
+        """index ของ bucket ที่ค่า seconds ตกอยู่"""
+        if seconds <= self.min_seconds:
+            return 0
+        index = int((math.log10(seconds) - self._log_min) * self.buckets_per_decade)
+        return index if index < self.num_buckets else self.num_buckets - 1
+
+    def record(self, seconds: float, index: Optional[int] = None) -> None:
+        """
+        บันทึก latency หนึ่งค่า
+
+        Args:
+            seconds: latency (วินาที)
+            index: bucket ที่คำนวณไว้แล้ว (ใช้เมื่อบันทึกค่าเดียวกันลงหลาย histogram)
+        """
+        self.counts[self.bucket_index(seconds) if index is None else index] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """รวม histogram อื่นที่มี bucket เหมือนกัน"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def reset(self) -> None:
+        self.counts = [0] * self.num_buckets
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def bucket_lower(self, index: int) -> float:
+        """ขอบล่างของ bucket (วินาที)"""
+        return 10 ** (self._log_min + index / self.buckets_per_decade)
+
+    def percentile(self, q: float) -> float:
+        """
+        ค่า percentile โดยประมาณ (interpolate แบบ log ภายใน bucket ที่มีค่าลำดับนั้น ไม่เกิน max ที่บันทึก)
+
+        Args:
+            q: percentile (0-100)
+
+        Returns:
+            latency (วินาที) หรือ 0.0 หากยังไม่มีข้อมูล
+        """
+        if self.total == 0:
+            return 0.0
+        rank = max(1.0, q / 100.0 * self.total)
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, rank))
+        before = cumulative[index - 1] if index > 0 else 0
+        fraction = (rank - before) / self.counts[index]
+        value = self.bucket_lower(index) * 10 ** (fraction / self.buckets_per_decade)
+        return float(min(value, self.max))
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99, 99.9)) -> Dict[str, float]:
+        """
+        สรุปเป็น count / mean / percentile / max (ms)
+
+        Returns:
+            Dictionary เช่น {"count", "mean_ms", "p50_ms", ..., "max_ms"}
+        """
+        summary = {"count": self.total, "mean_ms": self.sum / self.total * 1000 if self.total else 0.0}
+        for q in percentiles:
+            summary[f"p{q:g}_ms"] = self.percentile(q) * 1000
+        summary["max_ms"] = self.max * 1000
+        return summary
+
+    def copy(self) -> "LatencyHistogram":
+        other = LatencyHistogram(self.min_seconds, self.max_seconds, self.buckets_per_decade)
+        other.merge(self)
+        return other
+
+
+class RollingHistogram:
+    """
+    histogram ของช่วงเวลาล่าสุด window_seconds แบ่งเป็น num_slots ช่อง
+    ช่องที่เก่ากว่าหน้าต่างจะถูกล้างและใช้ซ้ำ (ความละเอียดของขอบหน้าต่าง = window / num_slots)
+    """
+
+    def __init__(self, window_seconds: float, num_slots: int, **histogram_kwargs):
+        """
+        Args:
+            window_seconds: ความยาวหน้าต่าง (วินาที)
+            num_slots: จำนวนช่องย่อย
+            **histogram_kwargs: argument ของ LatencyHistogram
+        """
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / num_slots
+        self.slots = [LatencyHistogram(**histogram_kwargs) for _ in range(num_slots)]
+        self._slot_ids = [-1] * num_slots
+
+    def _slot(self, now: float) -> LatencyHistogram:
+        slot_id = int(now // self.slot_seconds)
+        position = slot_id % len(self.slots)
+        if self._slot_ids[position] != slot_id:
+            self.slots[position].reset()
+            self._slot_ids[position] = slot_id
+        return self.slots[position]
+
+    def record(self, seconds: float, now: float, index: Optional[int] = None) -> None:
+        self._slot(now).record(seconds, index)
+
+    def snapshot(self, now: float) -> LatencyHistogram:
+        """histogram รวมของช่องที่ยังอยู่ในหน้าต่าง"""
+        current = int(now // self.slot_seconds)
+        merged = LatencyHistogram(self.slots[0].min_seconds, self.slots[0].max_seconds,
+                                  self.slots[0].buckets_per_decade)
+        for slot_id, histogram in zip(self._slot_ids, self.slots):
+            if 0 <= current - slot_id < len(self.slots):
+                merged.merge(histogram)
+        return merged
+
+
+class TelemetryRingBuffer:
+    """ring buffer ขนาดคงที่ของตัวอย่าง telemetry (timestamp + TELEMETRY_FIELDS)"""
+
+    def __init__(self, capacity: int = 720):
+        """
+        Args:
+            capacity: จำนวนตัวอย่างสูงสุด (ตัวอย่างเก่าสุดถูกเขียนทับ)
+        """
+        self.capacity = capacity
+        self._data = np.full((capacity, 1 + len(TELEMETRY_FIELDS)), np.nan, dtype=np.float64)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, sample: Dict[str, Optional[float]]) -> None:
+        row = [timestamp] + [np.nan if sample.get(f) is None else float(sample[f]) for f in TELEMETRY_FIELDS]
+        with self._lock:
+            self._data[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def to_array(self, since: Optional[float] = None) -> np.ndarray:
+        """
+        ตัวอย่างเรียงตามเวลา
+
+        Args:
+            since: เฉพาะตัวอย่างที่ timestamp >= since
+
+        Returns:
+            array (N, 1 + len(TELEMETRY_FIELDS)) คอลัมน์แรกเป็น timestamp
+        """
+        with self._lock:
+            if self._size < self.capacity:
+                data = self._data[:self._size].copy()
+            else:
+                data = np.concatenate([self._data[self._next:], self._data[:self._next]])
+        return data if since is None else data[data[:, 0] >= since]
+
+    def latest(self) -> Dict[str, Optional[float]]:
+        """ตัวอย่างล่าสุด (ค่าที่ไม่มีเป็น None)"""
+        with self._lock:
+            if self._size == 0:
+                return {}
+            row = self._data[(self._next - 1) % self.capacity]
+        return {"timestamp": float(row[0]),
+                **{f: None if np.isnan(v) else float(v) for f, v in zip(TELEMETRY_FIELDS, row[1:])}}
+
+    def summary(self, since: Optional[float] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """min / mean / max ของแต่ละค่าในช่วงเวลา"""
+        data = self.to_array(since)
+        result = {}
+        for column, name in enumerate(TELEMETRY_FIELDS, start=1):
+            values = data[:, column]
+            values = values[~np.isnan(values)]
+            result[name] = ({"min": float(values.min()), "mean": float(values.mean()), "max": float(values.max())}
+                            if len(values) else {"min": None, "mean": None, "max": None})
+        return result
+
+
+class TelemetrySampler:
+    """
+    thread เบื้องหลังที่อ่าน telemetry ทุก interval วินาทีแล้วเขียนลง TelemetryRingBuffer
+    """
+
+    def __init__(self,
+                 readers: Sequence[Callable[[], Dict[str, Optional[float]]]],
+                 buffer: Optional[TelemetryRingBuffer] = None,
+                 interval: float = 5.0):
+        """
+        Args:
+            readers: ฟังก์ชันที่คืน dictionary ของค่าบางส่วนใน TELEMETRY_FIELDS (รวมผลตามลำดับ)
+            buffer: ring buffer ปลายทาง
+            interval: ระยะห่างระหว่างการอ่าน (วินาที)
+        """
+        self.readers = list(readers)
+        self.buffer = buffer if buffer is not None else TelemetryRingBuffer()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.read_errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def sample_once(self) -> Dict[str, Optional[float]]:
+        """อ่าน telemetry หนึ่งครั้งแล้วเขียนลง buffer"""
+        sample = {}
+        for reader in self.readers:
+            try:
+                sample.update(reader())
+            except Exception as e:
+                # อ่านไม่ได้ชั่วคราว (เช่น อุปกรณ์ไม่ว่าง) ไม่ควรหยุด sampler
+                self.read_errors += 1
+                logger.debug(f"Telemetry read failed: {e}")
+        self.buffer.append(time.time(), sample)
+        return sample
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sample_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "TelemetrySampler":
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def read_process_memory() -> Dict[str, Optional[float]]:
+    """resident memory ของ process (MB) จาก /proc (ว่างหากอ่านไม่ได้ เช่น ไม่ใช่ Linux)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return {"memory_mb": resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024}
+    except (OSError, ValueError, IndexError, AttributeError):
+        return {}
+
+
+def make_hailo_reader(devices: Sequence[Any]) -> Callable[[], Dict[str, Optional[float]]]:
+    """
+    สร้างฟังก์ชันอ่านอุณหภูมิและพลังงานจาก hailo_platform.Device
+
+    Args:
+        devices: รายการ hailo_platform.Device (หรือ object ที่มี .control แบบเดียวกัน)
+
+    Returns:
+        ฟังก์ชันที่คืน {"temperature": °C สูงสุดของทุกอุปกรณ์, "power": W รวม}
+    """
+    controls = [getattr(device, "control", device) for device in devices]
+
+    def read() -> Dict[str, Optional[float]]:
+        temperatures, powers = [], []
+        for control in controls:
+            temperature = control.get_chip_temperature()
+            temperatures += [getattr(temperature, name) for name in ("ts0_temperature", "ts1_temperature")
+                             if getattr(temperature, name, None) is not None]
+            if hasattr(control, "power_measurement"):
+                try:
+                    powers.append(float(control.power_measurement()))
+                except Exception:
+                    # บางบอร์ดไม่มีวงจรวัดพลังงาน
+                    pass
+        sample = {}
+        if temperatures:
+            sample["temperature"] = float(max(temperatures))
+        if powers:
+            sample["power"] = sum(powers)
+        return sample
+
+    return read
@@ -0,0 +1,184 @@
+"""
+PWD Vision Works - NMS Benchmark
+เปรียบเทียบ latency ของ NMS ใน image_processing.nms กับ loop แบบเดิมของ postprocessor
+(greedy ทีละ box, วน NMS ทีละ class และวนทีละภาพ) ที่จำนวน candidate ต่าง ๆ
+
+Usage:
+    python nms_benchmark.py --sizes 100 1000 10000 --classes 80 --batch 4
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import argparse
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pwd_library.image_processing.nms import nms, batched_nms, batch_nms
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def make_candidates(count: int, num_classes: int, rng: np.random.Generator,
+                    size: int = 640) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    สร้าง candidate จำลองแบบ detector จริง (box หลายอันกระจุกรอบวัตถุเดียวกัน)
+
+    Args:
+        count: จำนวน candidate
+        num_classes: จำนวน class
+        rng: random generator
+        size: ขนาดภาพ (pixel)
+
+    Returns:
+        (boxes (N, 4), scores (N,), class_ids (N,))
+    """
+    objects = max(count // 20, 1)
+    centers = rng.uniform(0, size, (objects, 2))
+    owner = rng.integers(0, objects, count)
+    xy = centers[owner] + rng.normal(0, 6, (count, 2))
+    wh = rng.uniform(24, 160, (objects, 2))[owner] * rng.uniform(0.85, 1.15, (count, 2))
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1).astype(np.float32)
+    scores = rng.uniform(0.25, 1.0, count).astype(np.float32)
+    class_ids = rng.integers(0, num_classes, objects)[owner]
+    return boxes, scores, class_ids
+
+
+def legacy_nms(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> List[int]:
+    """greedy NMS แบบเดิมของ postprocessor (RetinaFace/SCRFD/DamoYOLO)"""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[1:][iou <= threshold]
+    return keep
+
+
+def legacy_per_class(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                     num_classes: int, threshold: float) -> List[int]:
+    """NMS แบบเดิมของ DamoYOLO: วนทุก class แล้วทำ greedy NMS แยกกัน"""
+    keep = []
+    for class_idx in range(num_classes):
+        idx = np.flatnonzero(class_ids == class_idx)
+        if idx.size:
+            keep.extend(idx[legacy_nms(boxes[idx], scores[idx], threshold)])
+    return keep
+
+
+def measure(step: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """
+    วัด latency ของหนึ่งวิธี
+
+    Args:
+        step: ฟังก์ชันที่ทำ NMS หนึ่งครั้ง (คืนค่า index ที่เก็บไว้)
+        iterations: จำนวนรอบ
+
+    Returns:
+        ผลการวัด (mean_ms, p50_ms, p99_ms, kept)
+    """
+    kept = len(step())  # warm-up
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    times_ms = np.array(times) * 1000
+    return {
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p99_ms": float(np.percentile(times_ms, 99)),
+        "kept": kept,
+    }
+
+
+def run_benchmark(count: int, num_classes: int, batch: int, iterations: int,
+                  iou_threshold: float, matrix_limit: int,
+                  seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+    """
+    รัน benchmark ทุกวิธีที่จำนวน candidate หนึ่งค่า
+
+    Args:
+        count: จำนวน candidate (ต่อภาพ)
+        num_classes: จำนวน class สำหรับกรณี class-aware
+        batch: จำนวนภาพสำหรับกรณี batch หลายภาพ
+        iterations: จำนวนรอบ
+        iou_threshold: ค่า IoU threshold
+        matrix_limit: จำนวน candidate สูงสุดที่วัด matrix NMS (IoU matrix ใช้หน่วยความจำ N^2)
+        seed: random seed
+
+    Returns:
+        ผลการวัดแยกตามวิธี
+    """
+    rng = np.random.default_rng(seed)
+    boxes, scores, class_ids = make_candidates(count, num_classes, rng)
+    results = {}
+
+    # class เดียว (RetinaFace/SCRFD)
+    results["single/legacy_loop"] = measure(lambda: legacy_nms(boxes, scores, iou_threshold), iterations)
+    results["single/greedy"] = measure(
+        lambda: nms(boxes, scores, iou_threshold, method="greedy"), iterations)
+    if count <= matrix_limit:
+        results["single/matrix"] = measure(
+            lambda: nms(boxes, scores, iou_threshold, method="matrix"), iterations)
+
+    # หลาย class (DamoYOLO)
+    results["classes/legacy_loop"] = measure(
+        lambda: legacy_per_class(boxes, scores, class_ids, num_classes, iou_threshold), iterations)
+    results["classes/grouped_greedy"] = measure(
+        lambda: batched_nms(boxes, scores, class_ids, iou_threshold, method="greedy"), iterations)
+    if count <= matrix_limit:
+        results["classes/offset_matrix"] = measure(
+            lambda: batched_nms(boxes, scores, class_ids, iou_threshold, method="matrix"), iterations)
+
+    # หลายภาพ (วนทีละภาพ เทียบกับ batch_nms ครั้งเดียว)
+    images = [make_candidates(count, num_classes, rng) for _ in range(batch)]
+    all_boxes = np.concatenate([image[0] for image in images])
+    all_scores = np.concatenate([image[1] for image in images])
+    all_classes = np.concatenate([image[2] for image in images])
+    image_ids = np.repeat(np.arange(batch), count)
+
+    def per_image():
+        keep = []
+        for b, s, c in images:
+            keep.extend(batched_nms(b, s, c, iou_threshold))
+        return keep
+
+    results[f"batch{batch}/per_image"] = measure(per_image, iterations)
+    results[f"batch{batch}/batch_nms"] = measure(
+        lambda: batch_nms(all_boxes, all_scores, image_ids, all_classes, iou_threshold), iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared NMS implementations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--classes", type=int, default=80)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--matrix-limit", type=int, default=2000)
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        results = run_benchmark(count, args.classes, args.batch, args.iterations,
+                                args.iou, args.matrix_limit)
+        print(f"\n{count} candidates, {args.classes} classes, {args.iterations} iterations")
+        print(f"{'method':<26}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'kept':>8}")
+        for name, r in results.items():
+            print(f"{name:<26}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['kept']:>8}")
+
+
+if __name__ == "__main__":
+    main()
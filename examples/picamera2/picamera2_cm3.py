@@ -21,6 +21,7 @@ except ImportError:
     logging.warning("picamera2 not available. Please install: pip install picamera2")
 
 from ..utils.exceptions import CameraError, CameraInitializationError, FrameCaptureError
+from ..image_processing.preprocessor import ImagePreprocessor
 
 logger = logging.getLogger(__name__)
 
@@ -165,13 +166,15 @@ class PiCameraManager:
     
     def start_video_stream(self, 
                           resolution: Tuple[int, int] = (640, 480),
-                          framerate: int = 30) -> bool:
+                          framerate: int = 30,
+                          format: str = "RGB888") -> bool:
         """
         เริ่ม video streaming
         
         Args:
             resolution: ความละเอียดสำหรับ streaming
             framerate: อัตราเฟรม
+            format: รูปแบบสี (RGB888 หรือ YUV420 สำหรับ get_yuv_frame)
             
         Returns:
             True หากเริ่ม streaming สำเร็จ
@@ -187,7 +190,7 @@ class PiCameraManager:
             
             # ตั้งค่า video configuration
             video_config = self.picam2.create_video_configuration(
-                main={"size": resolution, "format": "RGB888"},
+                main={"size": resolution, "format": format},
                 controls={"FrameRate": framerate}
             )
             
@@ -227,6 +230,26 @@ class PiCameraManager:
             logger.error(f"Failed to get frame: {e}")
             raise FrameCaptureError(f"Frame capture failed: {e}") from e
     
+    def get_yuv_frame(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ดึงเฟรม YUV420 จาก video stream โดยไม่แปลงสี
+        (ต้องเริ่ม stream ด้วย format="YUV420")
+        
+        Returns:
+            (y, uv) สำหรับ ImagePreprocessor.preprocess_yuv_into หรือ Frame(y, uv=uv)
+        """
+        if not self.is_initialized:
+            raise FrameCaptureError("Camera not initialized or not in video mode")
+            
+        try:
+            width, height = self.current_config["main"]["size"]
+            buffer = self.picam2.capture_array()
+            return ImagePreprocessor.split_yuv420(buffer, width, height, "I420")
+            
+        except Exception as e:
+            logger.error(f"Failed to get YUV frame: {e}")
+            raise FrameCaptureError(f"YUV frame capture failed: {e}") from e
+    
     def set_camera_controls(self, **controls) -> bool:
         """
         ตั้งค่า camera controls
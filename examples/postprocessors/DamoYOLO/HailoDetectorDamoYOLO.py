@@ -45,7 +45,26 @@ class PostProcessor:
         # Prepare priors
         self.mlvl_priors = self._generate_priors()
         project = np.linspace(0, self.reg_max, self.reg_max + 1)
-        self.y = project[:, None]  # Shape: (reg_max+1, 1)
+        self.y = project[:, None]  # Shape: (reg_max+1, 1), used by integral()
+        self.project = project.astype(np.float32)  # Shape: (reg_max+1,)
+
+        # Offset of each level in mlvl_priors, keyed by its number of priors,
+        # so output tensors are matched to their level by size
+        self._level_offsets = {}
+        offset = 0
+        for stride in self.strides:
+            count = (self.input_shape[0] // stride) * (self.input_shape[1] // stride)
+            self._level_offsets[count] = offset
+            offset += count
+        self.num_priors = offset
+
+        # Workspace reused across frames; only the first K rows (K = number of
+        # candidate priors in the frame) are written
+        self._ws_scores = np.empty((self.num_priors, self.num_classes), dtype=np.float32)
+        self._ws_dist = np.empty(
+            (self.num_priors, 4, self.reg_max + 1), dtype=np.float32
+        )
+        self._ws_priors = np.empty(self.num_priors, dtype=np.int64)
 
     def distance2bbox(self, points, distance, max_shape=None):
         """Decode distance prediction to bounding box."""
@@ -69,7 +88,12 @@ class PostProcessor:
         return np.stack([x1, y1, x2, y2], axis=-1)
 
     def integral(self, x):
-        """Integral layer for calculating bounding box locations."""
+        """
+        Integral layer for calculating bounding box locations.
+
+        Kept for compatibility: forward() applies the integral to candidate priors only
+        (see decode_candidates).
+        """
         x = np.matmul(x, self.y).reshape(1, -1, 4)
         return x
 
@@ -120,54 +144,154 @@ class PostProcessor:
         return np.concatenate(priors_list, axis=1)
 
     def prepare_model_outputs(self, tensor_list, details_list):
-        """Prepare model outputs for postprocessing by dequantizing the outputs."""
+        """
+        Prepare model outputs for postprocessing by dequantizing the outputs.
+
+        Kept for compatibility: forward() no longer dequantizes whole tensors. This
+        dequantizes the levels found by split_model_outputs (in prior order).
+
+        Returns:
+        - cls_scores (list): Class scores per level, shape [1, num_priors, num_classes + 1].
+        - bbox_preds (list): Bbox distributions per level, shape [1, num_priors, 4 * (reg_max + 1)].
+        """
         cls_scores = []
         bbox_preds = []
+        for _, cls_data, cls_quant, bbox_data, bbox_quant in self.split_model_outputs(
+            tensor_list, details_list
+        ):
+            for data, (scale, zero_point), outputs in (
+                (cls_data, cls_quant, cls_scores),
+                (bbox_data, bbox_quant, bbox_preds),
+            ):
+                outputs.append(((data.astype(np.float32) - zero_point) * scale)[None])
+        return cls_scores, bbox_preds
+
+    def split_model_outputs(self, tensor_list, details_list):
+        """
+        Pair class-score and bbox-distribution outputs per level without dequantizing.
+
+        Returns:
+        - levels (list): (prior_offset, cls_data, cls_quant, bbox_data, bbox_quant) per level
+          in prior order, where data keeps its original (quantized) dtype and quant is
+          (scale, zero_point). Candidates then keep the prior order of the dense decode, so
+          tied scores resolve the same way whatever order the outputs arrive in.
+        """
+        cls_outputs = {}
+        bbox_outputs = {}
+        bbox_channels = 4 * (self.reg_max + 1)
 
         for data, tensor_info in zip(tensor_list, details_list):
             scale, zero_point = tensor_info["quantization"]
-            dequantized_data = (data.astype(np.float32) - zero_point) * scale
+            if data.shape[-1] == bbox_channels:  # Bounding box distributions
+                data = data.reshape(-1, bbox_channels)
+                bbox_outputs[data.shape[0]] = (data, (scale, zero_point))
+            else:  # Class scores (num_classes + 1 channels)
+                data = data.reshape(-1, self.num_classes + 1)
+                cls_outputs[data.shape[0]] = (data, (scale, zero_point))
+
+        levels = []
+        for count, (cls_data, cls_quant) in cls_outputs.items():
+            if count not in self._level_offsets or count not in bbox_outputs:
+                raise ValueError(
+                    f"Output with {count} priors does not match any level of "
+                    f"strides {self.strides.tolist()} at input {self.input_shape}"
+                )
+            bbox_data, bbox_quant = bbox_outputs[count]
+            levels.append(
+                (self._level_offsets[count], cls_data, cls_quant, bbox_data, bbox_quant)
+            )
+        levels.sort(key=lambda level: level[0])
+        return levels
 
-            # Separate class scores and bounding box predictions based on output shape
-            if dequantized_data.shape[-1] == 4 * (
-                self.reg_max + 1
-            ):  # Bounding box predictions
-                bbox_preds.append(dequantized_data)
-            else:  # Class scores
-                cls_scores.append(dequantized_data)
+    def select_candidates(self, cls_data, quantization):
+        """
+        Find priors whose best class score can exceed the confidence threshold.
 
-        return cls_scores, bbox_preds
+        For integer tensors the threshold is moved into the quantized domain, so the
+        check runs on the raw uint8/uint16 values without dequantizing the tensor.
+
+        Args:
+        - cls_data (np.ndarray): Class scores of one level, shape [num_priors, num_classes + 1].
+        - quantization (tuple): (scale, zero_point) of the tensor.
+
+        Returns:
+        - candidates (np.ndarray): Prior indices within the level.
+        """
+        scale, zero_point = quantization
+        scores = cls_data[:, : self.num_classes]
+        if np.issubdtype(scores.dtype, np.integer) and scale > 0:
+            # (q - zp) * scale > thr  <=>  q > thr / scale + zp. The bound is loosened by
+            # one step so float rounding never drops a candidate; the exact threshold is
+            # applied to the dequantized scores afterwards.
+            q_threshold = np.floor(self.conf_threshold / scale + zero_point) - 1
+            return np.flatnonzero(scores.max(axis=1) > q_threshold)
+        best = (scores.max(axis=1).astype(np.float32) - zero_point) * scale
+        return np.flatnonzero(best > self.conf_threshold)
+
+    def decode_candidates(self, levels):
+        """
+        Dequantize scores and decode boxes only for candidate priors.
+
+        The DFL softmax, the integral and distance2bbox run on candidate rows, which
+        are written into the preallocated workspace.
+
+        Args:
+        - levels (list): Output of split_model_outputs.
+
+        Returns:
+        - boxes (np.ndarray): Decoded boxes, shape [K, 4].
+        - scores (np.ndarray): Class scores, shape [K, num_classes] (workspace view).
+        """
+        count = 0
+        for offset, cls_data, cls_quant, bbox_data, bbox_quant in levels:
+            candidates = self.select_candidates(cls_data, cls_quant)
+            k = candidates.size
+            if k == 0:
+                continue
+            end = count + k
+
+            scale, zero_point = cls_quant
+            scores = self._ws_scores[count:end]
+            scores[...] = cls_data[candidates, : self.num_classes]
+            scores -= zero_point
+            scores *= scale
+
+            scale, zero_point = bbox_quant
+            dist = self._ws_dist[count:end]
+            dist.reshape(k, -1)[...] = bbox_data[candidates]
+            dist -= zero_point
+            dist *= scale
+            dist -= dist.max(axis=2, keepdims=True)  # Stable softmax over the bins
+            np.exp(dist, out=dist)
+            dist /= dist.sum(axis=2, keepdims=True)
+
+            self._ws_priors[count:end] = candidates + offset
+            count = end
+
+        if count == 0:
+            return np.empty((0, 4), dtype=np.float32), self._ws_scores[:0]
+
+        priors = self.mlvl_priors[0, self._ws_priors[:count]]
+        distances = self._ws_dist[:count] @ self.project  # Integral: [K, 4]
+        distances *= priors[:, 2, None]
+        boxes = self.distance2bbox(
+            priors[None, :, :2], distances[None], max_shape=self.input_shape
+        )[0]
+        return boxes, self._ws_scores[:count]
 
     def forward(self, tensor_list, details_list):
-        """Process model outputs to decode bounding boxes and class scores."""
-        cls_scores, bbox_preds = self.prepare_model_outputs(tensor_list, details_list)
-        cls_scores_new = []
-        bbox_preds_new = []
-
-        for cls_score, bbox_pred in zip(cls_scores, bbox_preds):
-            N, HW, C = bbox_pred.shape
-            bbox_pred = np.exp(bbox_pred.reshape(N, HW, 4, self.reg_max + 1)) / np.sum(
-                np.exp(bbox_pred.reshape(N, HW, 4, self.reg_max + 1)),
-                axis=3,
-                keepdims=True,
-            )
-            bbox_pred = bbox_pred.reshape(N, HW * 4, self.reg_max + 1)
-            bbox_preds_new.append(bbox_pred)
-            cls_score = cls_score.reshape(N, -1, self.num_classes + 1)
-            cls_scores_new.append(cls_score)
-        new_cls_scores = np.concatenate(cls_scores_new, axis=1)[
-            :, :, : self.num_classes
-        ]  # Keep only num_classes
-        new_bbox_preds = np.concatenate(bbox_preds_new, axis=1)
-        new_bbox_preds = self.integral(new_bbox_preds)
-        new_bbox_preds = new_bbox_preds * self.mlvl_priors[..., 2, None]
-        decoded_boxes = self.distance2bbox(
-            self.mlvl_priors[..., :2], new_bbox_preds, max_shape=self.input_shape
-        )
+        """
+        Process model outputs to decode bounding boxes and class scores.
+
+        Candidate priors are found from the class scores first; boxes are decoded only
+        for them (batch size 1, as called by DeGirum PySDK).
+        """
+        levels = self.split_model_outputs(tensor_list, details_list)
+        decoded_boxes, new_cls_scores = self.decode_candidates(levels)
 
         # Apply NMS and return the final bounding boxes, scores, and class indices
         selected_bboxes, selected_scores, selected_class_indices = self.apply_nms(
-            decoded_boxes, new_cls_scores
+            decoded_boxes[None], new_cls_scores[None]
         )
         results = []
         for box, score, cls in zip(
@@ -216,104 +340,97 @@ class PostProcessor:
 
     def nms_per_class(self, bboxes, scores):
         """
-        Apply NMS per class to handle bounding boxes separately for each class.
+        Apply NMS to the bounding boxes of a single class.
+
+        Kept for compatibility: apply_nms() handles all classes in one pass and does
+        not call this method. Delegates to the same greedy NMS (IoU < threshold survives).
 
         Args:
         - bboxes (np.ndarray): Bounding boxes for each class, shape [num_boxes, 4].
         - scores (np.ndarray): Confidence scores for each bounding box, shape [num_boxes].
-        - iou_threshold (float): IoU threshold for NMS.
 
         Returns:
         - selected_bboxes (np.ndarray): Bounding boxes after NMS.
         - selected_scores (np.ndarray): Confidence scores after NMS.
-        - selected_class_indices (np.ndarray): Class indices for each bounding box.
+        - selected_class_indices (np.ndarray): Class index placeholders (-1) for each bounding box.
         """
-        # Sort the bounding boxes by their confidence scores in descending order
-        indices = np.argsort(scores)[::-1]
-
-        # List to hold the selected boxes, their scores, and class indices
-        selected_bboxes = []
-        selected_scores = []
-        selected_class_indices = []
-
-        while len(indices) > 0:
-            # Get the current box with the highest score
-            current = indices[0]
-            selected_bboxes.append(bboxes[current])
-            selected_scores.append(scores[current])
-            selected_class_indices.append(
-                np.full_like(current, -1)
-            )  # Initially, class index placeholder
-
-            if len(indices) == 1:
-                break
-
-            # Compute IoU for the remaining boxes with the current box
-            remaining_boxes = bboxes[indices[1:]]
-            iou = self.compute_iou(bboxes[current], remaining_boxes)
-
-            # Keep boxes whose IoU is less than the threshold
-            indices = indices[1:][iou < self.nms_iou_thresh]
-
-        return (
-            np.array(selected_bboxes),
-            np.array(selected_scores),
-            np.array(selected_class_indices),
-        )
+        keep = self._grouped_nms(bboxes, scores, np.zeros(len(scores), dtype=np.int64))
+        return bboxes[keep], scores[keep], np.full(len(keep), -1, dtype=np.int64)
 
     def apply_nms(self, bboxes, scores):
         """
-        Apply NMS for multiple classes by handling each class independently.
+        Apply class-aware NMS for all classes in a single pass.
+
+        Every (box, class) pair whose score exceeds the confidence threshold is a
+        candidate; boxes of different classes never suppress each other. As in the
+        original per-class loop, a box is suppressed when its IoU reaches the
+        threshold (IoU < threshold survives) and results are grouped by class.
 
         Args:
         - bboxes (np.ndarray): Bounding boxes, shape [1, num_boxes, 4].
         - scores (np.ndarray): Confidence scores, shape [1, num_boxes, num_classes].
 
         Returns:
-        - final_bboxes (np.ndarray): Bounding boxes after NMS for each class.
-        - final_scores (np.ndarray): Scores after NMS for each class.
+        - final_bboxes (np.ndarray): Bounding boxes after NMS, by class then score.
+        - final_scores (np.ndarray): Scores after NMS.
         - final_class_indices (np.ndarray): Class indices after NMS for each bounding box.
         """
-        final_bboxes = []
-        final_scores = []
-        final_class_indices = []
-
         # Extract the batch dimension (assuming batch size is 1)
         bboxes = bboxes[0]  # Shape: [num_boxes, 4]
-        scores = scores[0]  # Shape: [num_boxes, num_classes]
-
-        # Process each class independently
-        for class_idx in range(self.num_classes):
-            # Select the boxes and scores for the current class
-            class_mask = (
-                scores[:, class_idx] > self.conf_threshold
-            )  # Filter based on confidence threshold
-            class_bboxes = bboxes[class_mask]
-            class_scores = scores[class_mask, class_idx]
-
-            # Apply NMS for the current class
-            if (
-                class_bboxes.size > 0
-            ):  # Check if there are any valid bounding boxes for this class
-                selected_bboxes, selected_scores, selected_class_indices_ = (
-                    self.nms_per_class(class_bboxes, class_scores)
-                )
-                if selected_bboxes.size > 0:  # Check if any boxes survived NMS
-                    final_bboxes.append(selected_bboxes)
-                    final_scores.append(selected_scores)
-                    final_class_indices.append(
-                        np.full_like(selected_class_indices_, class_idx)
-                    )
-
-        # Ensure that final_bboxes, final_scores, and final_class_indices are consistent
-        if final_bboxes:  # Check if there are any results for the classes
-            final_bboxes = np.concatenate(final_bboxes, axis=0)
-            final_scores = np.concatenate(final_scores, axis=0)
-            final_class_indices = np.concatenate(final_class_indices, axis=0)
-        else:
-            # If no boxes survived NMS, return empty arrays
-            final_bboxes = np.empty((0, 4))
-            final_scores = np.empty((0,))
-            final_class_indices = np.empty((0,))
-
-        return final_bboxes, final_scores, final_class_indices
+        scores = scores[0, :, : self.num_classes]  # Shape: [num_boxes, num_classes]
+
+        # Every (box, class) pair above the threshold is a candidate
+        box_ids, class_ids = np.nonzero(scores > self.conf_threshold)
+        candidate_scores = scores[box_ids, class_ids]
+        keep = self._grouped_nms(bboxes[box_ids], candidate_scores, class_ids)
+        return bboxes[box_ids[keep]], candidate_scores[keep], class_ids[keep]
+
+    def _grouped_nms(self, boxes, scores, class_ids):
+        """
+        Greedy NMS for all classes together instead of one loop per class.
+
+        Each round keeps the highest-scoring remaining box of every class and removes
+        the boxes of that class whose IoU with it reaches the threshold. The number of
+        rounds is the largest number of boxes kept for one class, and boxes are only
+        compared within their class, so the result is the same as the per-class loop.
+
+        Args:
+        - boxes (np.ndarray): Candidate boxes, shape [K, 4].
+        - scores (np.ndarray): Candidate scores, shape [K].
+        - class_ids (np.ndarray): Candidate class indices, shape [K].
+
+        Returns:
+        - keep (np.ndarray): Indices of kept candidates ordered by class, then by score
+          (equal scores: higher index first).
+        """
+        if len(boxes) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Classes in descending order, then scores and indices in descending order
+        order = np.lexsort((scores, class_ids))[::-1]
+        x1, y1, x2, y2 = (np.ascontiguousarray(boxes[order, k]) for k in range(4))
+        areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        groups = class_ids[order]
+        alive = np.arange(len(order))
+
+        keep = []
+        while alive.size > 0:
+            # First alive candidate of each class is its best remaining box
+            alive_groups = groups[alive]
+            is_head = np.ones(alive.size, dtype=bool)
+            is_head[1:] = alive_groups[1:] != alive_groups[:-1]
+            heads = alive[is_head]
+            keep.append(heads)
+
+            rest = alive[~is_head]
+            if rest.size == 0:
+                break
+            head = heads[np.cumsum(is_head)[~is_head] - 1]
+            w = np.minimum(x2[head], x2[rest]) - np.maximum(x1[head], x1[rest])
+            h = np.minimum(y2[head], y2[rest]) - np.maximum(y1[head], y1[rest])
+            inter = np.maximum(w, 0) * np.maximum(h, 0)
+            iou = inter / np.maximum(areas[head] + areas[rest] - inter, 1e-9)
+            alive = rest[iou < self.nms_iou_thresh]
+
+        keep = order[np.concatenate(keep)]
+        return keep[np.lexsort((-keep, -scores[keep], class_ids[keep]))]
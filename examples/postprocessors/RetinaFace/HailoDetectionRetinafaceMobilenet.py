@@ -171,27 +171,29 @@ class PostProcessor:
         return exp_logits / np.sum(exp_logits, axis=1, keepdims=True)
 
     def nms(self, boxes, scores, threshold):
-        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
-        areas = (x2 - x1) * (y2 - y1)
-        order = scores.argsort()[::-1]
+        """
+        Greedy NMS over face candidates.
+
+        Coordinates are split into contiguous arrays once and only the boxes still
+        alive are compared each round. Boxes with equal scores keep the higher index
+        first (stable sort), matching pwd_library.image_processing.nms.nms.
+        """
+        order = np.argsort(scores, kind="stable")[::-1]
+        x1, y1, x2, y2 = (np.ascontiguousarray(boxes[order, k]) for k in range(4))
+        areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        alive = np.arange(len(order))
 
         keep = []
-        while order.size > 0:
-            i = order[0]
+        while alive.size > 0:
+            i = alive[0]
             keep.append(i)
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
-
-            w = np.maximum(0.0, xx2 - xx1)
-            h = np.maximum(0.0, yy2 - yy1)
-            inter = w * h
-            iou = inter / (areas[i] + areas[order[1:]] - inter)
-
-            inds = np.where(iou <= threshold)[0]
-            order = order[inds + 1]
-        return keep
+            rest = alive[1:]
+            w = np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])
+            h = np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])
+            inter = np.maximum(w, 0) * np.maximum(h, 0)
+            iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+            alive = rest[iou <= threshold]
+        return order[np.asarray(keep, dtype=np.int64)]
 
     def forward(self, tensor_list, details_list):
         """
@@ -109,70 +109,104 @@ class PostProcessor:
         else:
             detection_landmarks = None
 
-        # Step 5: Process each batch independently
+        # Step 5: Score filtering and NMS for all images in a single pass
+        scores = class_preds.reshape(batch_size, -1)
+        image_ids, anchor_ids = np.nonzero(scores >= self.score_threshold)
+        candidate_boxes = detection_boxes[image_ids, anchor_ids]
+        candidate_scores = scores[image_ids, anchor_ids]
+        keep = self._apply_non_max_suppression(
+            candidate_boxes, candidate_scores, image_ids
+        )
+        final_boxes = candidate_boxes[keep]
+        final_scores = candidate_scores[keep]
+        final_landmarks = (
+            detection_landmarks[image_ids[keep], anchor_ids[keep]]
+            if detection_landmarks is not None
+            else None
+        )
+
+        # Step 6: Prepare results (ordered by image, then by score)
         new_inference_results = []
-        for batch_idx in range(batch_size):
-            boxes = detection_boxes[batch_idx]
-            scores = class_preds[batch_idx].squeeze(-1)
-            landmarks = (
-                detection_landmarks[batch_idx]
-                if detection_landmarks is not None
-                else None
+        for i in range(len(final_boxes)):
+            category_id = 0  # Assuming single class for SCRFD
+            label = self._label_dictionary.get(
+                str(category_id), f"class_{category_id}"
             )
+            result = {
+                "bbox": final_boxes[
+                    i
+                ].tolist(),  # Keep bbox as a list, not flattened
+                "category_id": category_id,
+                "label": label,
+                "score": float(final_scores[i]),
+                "landmarks": [],
+            }
+
+            # Add landmarks in the desired format
+            if final_landmarks is not None:
+                for landmark_idx in range(0, len(final_landmarks[i]), 2):
+                    landmark_entry = {
+                        "category_id": landmark_idx // 2,
+                        "connect": [],
+                        "landmark": [
+                            float(final_landmarks[i][landmark_idx]),
+                            float(final_landmarks[i][landmark_idx + 1]),
+                        ],
+                        "score": float(
+                            final_scores[i]
+                        ),  # Optionally assign the detection score
+                    }
+                    result["landmarks"].append(landmark_entry)
+
+            new_inference_results.append(result)
 
-            # Filter by score threshold
-            mask = scores >= self.score_threshold
-            filtered_boxes = boxes[mask]
-            filtered_scores = scores[mask]
-            filtered_landmarks = landmarks[mask] if landmarks is not None else None
+        return new_inference_results
 
-            # Apply Non-Maximum Suppression
-            keep_indices = self._apply_non_max_suppression(
-                filtered_boxes, filtered_scores
-            )
-            final_boxes = filtered_boxes[keep_indices]
-            final_scores = filtered_scores[keep_indices]
-            final_landmarks = (
-                filtered_landmarks[keep_indices]
-                if filtered_landmarks is not None
-                else None
-            )
+    def _apply_non_max_suppression(self, boxes, scores, image_ids):
+        """
+        Apply Non-Maximum Suppression (NMS) to every image of the batch at once.
 
-            # Prepare results for this batch
-            for i in range(len(final_boxes)):
-                category_id = 0  # Assuming single class for SCRFD
-                label = self._label_dictionary.get(
-                    str(category_id), f"class_{category_id}"
-                )
-                result = {
-                    "bbox": final_boxes[
-                        i
-                    ].tolist(),  # Keep bbox as a list, not flattened
-                    "category_id": category_id,
-                    "label": label,
-                    "score": float(final_scores[i]),
-                    "landmarks": [],
-                }
-
-                # Add landmarks in the desired format
-                if final_landmarks is not None:
-                    for landmark_idx in range(0, len(final_landmarks[i]), 2):
-                        landmark_entry = {
-                            "category_id": landmark_idx // 2,
-                            "connect": [],
-                            "landmark": [
-                                float(final_landmarks[i][landmark_idx]),
-                                float(final_landmarks[i][landmark_idx + 1]),
-                            ],
-                            "score": float(
-                                final_scores[i]
-                            ),  # Optionally assign the detection score
-                        }
-                        result["landmarks"].append(landmark_entry)
-
-                new_inference_results.append(result)
+        Each round keeps the best remaining box of every image and drops the boxes of
+        the same image that overlap it, so the number of rounds is the largest number
+        of faces kept in one image rather than the total over the batch. Results are
+        the same as running greedy NMS image by image (equal scores: higher index
+        first, as in pwd_library.image_processing.nms.batch_nms).
 
-        return new_inference_results
+        Returns:
+            np.ndarray: Indices of kept boxes, ordered by image, then by score.
+        """
+        if len(boxes) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Images in descending order, then scores and indices in descending order
+        order = np.lexsort((scores, image_ids))[::-1]
+        x1, y1, x2, y2 = (np.ascontiguousarray(boxes[order, k]) for k in range(4))
+        areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        groups = image_ids[order]
+        alive = np.arange(len(order))
+
+        keep = []
+        while alive.size > 0:
+            # First alive box of each image is its best remaining box
+            alive_groups = groups[alive]
+            is_head = np.ones(alive.size, dtype=bool)
+            is_head[1:] = alive_groups[1:] != alive_groups[:-1]
+            heads = alive[is_head]
+            keep.append(heads)
+
+            rest = alive[~is_head]
+            if rest.size == 0:
+                break
+            head = heads[np.cumsum(is_head)[~is_head] - 1]
+            w = np.minimum(x2[head], x2[rest]) - np.maximum(x1[head], x1[rest])
+            h = np.minimum(y2[head], y2[rest]) - np.maximum(y1[head], y1[rest])
+            inter = np.maximum(w, 0) * np.maximum(h, 0)
+            iou = inter / np.maximum(areas[head] + areas[rest] - inter, 1e-9)
+            alive = rest[iou <= self.nms_iou_thresh]
+
+        keep = order[np.concatenate(keep)]
+        # Image ascending, then score descending (equal scores: higher index first)
+        return keep[np.lexsort((-keep, -scores[keep], image_ids[keep]))]
 
     def _collect_predictions(self, outputs):
         """Collect predictions for boxes, classes, and optionally landmarks."""
@@ -228,30 +262,3 @@ class PostProcessor:
 
             predictions.extend([px, py])
         return np.stack(predictions, axis=-1)
-
-    def _apply_non_max_suppression(self, boxes, scores):
-        """Apply Non-Maximum Suppression (NMS) to remove redundant detections."""
-        if len(boxes) == 0:
-            return []
-
-        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
-        areas = (x2 - x1) * (y2 - y1)
-        order = scores.argsort()[::-1]
-
-        keep = []
-        while order.size > 0:
-            i = order[0]
-            keep.append(i)
-
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
-
-            inter_area = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
-            union_area = areas[i] + areas[order[1:]] - inter_area
-            iou = inter_area / union_area
-
-            order = order[1:][iou <= self.nms_iou_thresh]
-
-        return keep
@@ -0,0 +1,129 @@
+"""
+PWD Vision Works - Preprocessing Benchmark
+เปรียบเทียบ latency และ memory ที่ allocate ต่อเฟรม ระหว่าง
+chain เดิม (resize_with_padding -> normalize -> expand_dims -> astype)
+กับ ImagePreprocessor.preprocess_into ที่เขียนลง buffer เดิมซ้ำ
+
+Usage:
+    python preprocess_benchmark.py --width 1920 --height 1080 --iterations 200
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import argparse
+import time
+import tracemalloc
+import logging
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def measure(step: Callable[[], np.ndarray], iterations: int, frame_nbytes: int) -> Dict[str, float]:
+    """
+    วัด latency และ peak memory ที่ allocate ระหว่างประมวลผลหนึ่งเฟรม
+
+    Args:
+        step: ฟังก์ชันที่ประมวลผลหนึ่งเฟรม
+        iterations: จำนวนรอบ
+        frame_nbytes: ขนาด model input (float32) สำหรับคำนวณจำนวน temporary
+
+    Returns:
+        ผลการวัด
+    """
+    # warm-up (ให้ scratch/output buffer ถูกสร้างก่อนวัด)
+    for _ in range(5):
+        step()
+
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+
+    # วัด allocation แยกจาก latency เพราะ tracemalloc ทำให้ช้าลง
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(iterations, 20)):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = step()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+        peaks.append(peak - base)
+    tracemalloc.stop()
+
+    times_ms = np.array(times) * 1000
+    peak_bytes = float(np.median(peaks))
+    return {
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p99_ms": float(np.percentile(times_ms, 99)),
+        "peak_alloc_mb": peak_bytes / 1024 / 1024,
+        "full_frame_temporaries": peak_bytes / frame_nbytes,
+    }
+
+
+def run_benchmark(frame_size: Tuple[int, int], target_size: Tuple[int, int],
+                  iterations: int, layout: str) -> Dict[str, Dict[str, float]]:
+    """
+    รัน benchmark ทั้งสองแบบบนภาพสุ่ม
+
+    Args:
+        frame_size: ขนาดภาพต้นฉบับ (width, height)
+        target_size: ขนาด model input (width, height)
+        iterations: จำนวนรอบ
+        layout: "NHWC" หรือ "NCHW" สำหรับ preprocess_into
+
+    Returns:
+        ผลการวัดแยกตามวิธี
+    """
+    preprocessor = ImagePreprocessor(target_size)
+    width, height = frame_size
+    frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    frame_nbytes = target_size[0] * target_size[1] * 3 * 4
+
+    def legacy_chain():
+        processed = preprocessor.resize_with_padding(frame, target_size)
+        processed = preprocessor.normalize(processed)
+        processed = np.expand_dims(processed, axis=0)
+        return processed.astype(np.float32)
+
+    buffer = preprocessor.allocate_input_buffer(target_size, layout=layout)
+
+    def fused_into():
+        return preprocessor.preprocess_into(frame, out=buffer, target_size=target_size,
+                                            method="imagenet", layout=layout)
+
+    return {
+        "legacy_chain": measure(legacy_chain, iterations, frame_nbytes),
+        f"preprocess_into_{layout}": measure(fused_into, iterations, frame_nbytes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ImagePreprocessor.preprocess_into")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--target", type=int, nargs=2, default=(640, 640), metavar=("W", "H"))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--layout", choices=["NHWC", "NCHW"], default="NHWC")
+    args = parser.parse_args()
+
+    results = run_benchmark((args.width, args.height), tuple(args.target), args.iterations, args.layout)
+
+    print(f"Frame {args.width}x{args.height} -> {args.target[0]}x{args.target[1]}, "
+          f"{args.iterations} iterations")
+    print(f"{'method':<24}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'alloc MB':>10}{'temps':>8}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['peak_alloc_mb']:>10.2f}{r['full_frame_temporaries']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
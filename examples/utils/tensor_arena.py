@@ -0,0 +1,164 @@
+"""
+PWD Vision Works - Tensor Arena
+pool ของ numpy buffer ที่จัดกลุ่มตาม (shape, dtype) เพื่อให้ inference ใน steady state
+ไม่ต้อง allocate array ขนาดใหญ่ใหม่ทุกเฟรม (และไม่ต้องพึ่ง gc.collect)
+
+Author: PWD Vision Works
+Version: 1.0.0
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .exceptions import ResourceError
+
+logger = logging.getLogger(__name__)
+
+
+class _KeyStats:
+    """สถิติของ buffer หนึ่งกลุ่ม (shape, dtype)"""
+
+    def __init__(self, nbytes: int):
+        self.nbytes = nbytes
+        self.allocations = 0
+        self.reuses = 0
+        self.in_use = 0
+        self.high_water = 0
+
+
+class TensorArena:
+    """
+    แจก buffer ตาม (shape, dtype) และนำกลับมาใช้ใหม่เมื่อถูก release
+
+    buffer ที่ได้จาก acquire มีค่าเดิมค้างอยู่ (ไม่ถูกล้าง) ผู้ใช้ต้องเขียนทับเอง
+    """
+
+    def __init__(self, name: str = "default", max_free_per_key: int = 8):
+        """
+        เริ่มต้น TensorArena
+
+        Args:
+            name: ชื่อสำหรับ log
+            max_free_per_key: จำนวน buffer ว่างสูงสุดที่เก็บไว้ต่อกลุ่ม (ที่เกินจะถูกปล่อยคืน)
+        """
+        self.name = name
+        self.max_free_per_key = max_free_per_key
+        self._free: Dict[Tuple, List[np.ndarray]] = {}
+        self._leased: Dict[int, Tuple] = {}
+        self._stats: Dict[Tuple, _KeyStats] = {}
+        self._lock = threading.Lock()
+        self._bytes_in_use = 0
+        self._high_water_bytes = 0
+
+    @staticmethod
+    def _key(shape: Tuple[int, ...], dtype: Any) -> Tuple:
+        return tuple(int(s) for s in shape), np.dtype(dtype).str
+
+    def acquire(self, shape: Tuple[int, ...], dtype: Any = np.float32) -> np.ndarray:
+        """
+        ยืม buffer ขนาด shape ชนิด dtype (ใช้ buffer ที่ว่างอยู่ก่อน)
+
+        Args:
+            shape: ขนาดของ buffer
+            dtype: ชนิดข้อมูล
+
+        Returns:
+            numpy array (ค่าไม่ได้ถูกล้าง)
+        """
+        key = self._key(shape, dtype)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _KeyStats(int(np.prod(key[0])) * np.dtype(dtype).itemsize)
+
+            free = self._free.get(key)
+            if free:
+                buffer = free.pop()
+                stats.reuses += 1
+            else:
+                buffer = np.empty(key[0], dtype=dtype)
+                stats.allocations += 1
+                logger.debug(f"TensorArena '{self.name}': allocated {key[0]} {key[1]}")
+
+            self._leased[id(buffer)] = key
+            stats.in_use += 1
+            stats.high_water = max(stats.high_water, stats.in_use)
+            self._bytes_in_use += stats.nbytes
+            self._high_water_bytes = max(self._high_water_bytes, self._bytes_in_use)
+            return buffer
+
+    def release(self, buffer: np.ndarray) -> None:
+        """
+        คืน buffer ให้ arena (ต้องเป็น array เดียวกับที่ได้จาก acquire ไม่ใช่ view)
+
+        Args:
+            buffer: buffer ที่ยืมไป
+
+        Raises:
+            ResourceError: หาก buffer ไม่ได้มาจาก arena นี้หรือถูกคืนไปแล้ว
+        """
+        with self._lock:
+            key = self._leased.pop(id(buffer), None)
+            if key is None:
+                raise ResourceError(f"Buffer was not leased from arena '{self.name}'")
+            stats = self._stats[key]
+            stats.in_use -= 1
+            self._bytes_in_use -= stats.nbytes
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_free_per_key:
+                free.append(buffer)
+
+    @contextmanager
+    def lease(self, shape: Tuple[int, ...], dtype: Any = np.float32):
+        """
+        ยืม buffer ภายใน with block แล้วคืนอัตโนมัติ
+
+        Args:
+            shape: ขนาดของ buffer
+            dtype: ชนิดข้อมูล
+
+        Yields:
+            numpy array
+        """
+        buffer = self.acquire(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def clear(self) -> None:
+        """ปล่อย buffer ว่างทั้งหมด (buffer ที่ยังถูกยืมอยู่ไม่ได้รับผลกระทบ)"""
+        with self._lock:
+            self._free.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ดึงสถิติของ arena
+
+        Returns:
+            Dictionary ของจำนวนการ allocate / reuse และ high-water mark ต่อกลุ่ม
+        """
+        with self._lock:
+            free_bytes = sum(self._stats[key].nbytes * len(free) for key, free in self._free.items())
+            return {
+                "name": self.name,
+                "bytes_in_use": self._bytes_in_use,
+                "bytes_free": free_bytes,
+                "high_water_bytes": self._high_water_bytes,
+                "allocations": sum(s.allocations for s in self._stats.values()),
+                "reuses": sum(s.reuses for s in self._stats.values()),
+                "buffers": {
+                    f"{shape}:{dtype}": {
+                        "nbytes": s.nbytes,
+                        "allocations": s.allocations,
+                        "reuses": s.reuses,
+                        "in_use": s.in_use,
+                        "high_water": s.high_water,
+                        "free": len(self._free.get((shape, dtype), [])),
+                    } for (shape, dtype), s in self._stats.items()
+                },
+            }
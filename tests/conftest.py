@@ -0,0 +1,28 @@
+# tests/conftest.py
+"""
+ให้ import โมดูลของ library เป็น `pwd_library.*` ได้เมื่อรัน pytest จาก repo โดยตรง
+(โค้ดของ library อยู่ใน examples/ เมื่อไม่ได้ติดตั้งเป็น submodule ชื่อ pwd_library)
+"""
+
+import importlib.machinery
+import importlib.util
+import sys
+from pathlib import Path
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _register_library() -> None:
+    try:
+        if importlib.util.find_spec("pwd_library.image_processing") is not None:
+            return
+    except ImportError:
+        pass
+    for name in [n for n in sys.modules if n == "pwd_library" or n.startswith("pwd_library.")]:
+        del sys.modules[name]
+    spec = importlib.machinery.ModuleSpec("pwd_library", None, is_package=True)
+    spec.submodule_search_locations = [str(LIBRARY_ROOT)]
+    sys.modules["pwd_library"] = importlib.util.module_from_spec(spec)
+
+
+_register_library()
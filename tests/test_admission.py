@@ -0,0 +1,86 @@
+# tests/test_admission.py
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.frame import Frame
+from pwd_library.model.admission import (AdmissionController, MotionPriorityPolicy, SHED_NO_MOTION,
+                                        SHED_SUPERSEDED)
+from pwd_library.utils.exceptions import InvalidImageFormatError
+
+
+def _frame(frame_id):
+    return Frame(np.full((48, 64, 3), frame_id, np.uint8), frame_id=frame_id)
+
+
+def test_frames_are_released_when_done_or_shed():
+    controller = AdmissionController(policy="latest", max_queue=4)
+    old, new = _frame(0), _frame(1)
+    controller.offer(old)
+    controller.offer(new)
+
+    item = controller.take(timeout=0)
+    assert item.frame is new
+    assert controller.shed == {SHED_SUPERSEDED: 1}
+    with pytest.raises(InvalidImageFormatError):
+        old.image
+
+    # ขั้นต่าง ๆ ของเฟรมเดียวกันใช้ view ที่ cache ร่วมกัน
+    assert item.frame.gray is item.frame.gray
+    controller.done(item)
+    assert new.cache_bytes == 0
+    with pytest.raises(InvalidImageFormatError):
+        new.image
+
+
+def test_release_frames_can_be_disabled():
+    controller = AdmissionController(policy="fifo", release_frames=False)
+    frame = _frame(0)
+    controller.offer(frame)
+    with controller.next(timeout=0) as item:
+        assert item.frame is frame
+    assert frame.image.shape == (48, 64, 3)
+
+
+def test_motion_thumbnail_picks_conversion_by_channel_count():
+    policy = MotionPriorityPolicy(thumbnail_size=(16, 12))
+    bgr = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    expected = policy.thumbnail(bgr)
+    assert expected.shape == (12, 16) and expected.dtype == np.int16
+
+    np.testing.assert_array_equal(policy.thumbnail(cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA)), expected)
+    np.testing.assert_array_equal(policy.thumbnail(gray), expected)
+    np.testing.assert_array_equal(policy.thumbnail(gray[:, :, None]), expected)
+    with pytest.raises(ValueError):
+        policy.thumbnail(np.zeros((48, 64, 2), np.uint8))
+
+
+def test_motion_policy_admits_bgra_frames():
+    controller = AdmissionController(policy="motion", max_queue=4, threshold=4.0, keepalive=60.0)
+    still = np.zeros((48, 64, 4), np.uint8)
+    moved = still.copy()
+    moved[:, :32, :3] = 255
+    assert controller.offer(still)
+    assert not controller.offer(still.copy())
+    assert controller.offer(moved)
+    assert controller.shed == {SHED_NO_MOTION: 1}
+
+
+def test_thumbnail_is_computed_outside_the_controller_lock():
+    class ProbingPolicy(MotionPriorityPolicy):
+        def prepare(self, frame):
+            # thread อื่นต้องเข้า lock ของ controller ได้ระหว่างคำนวณภาพย่อ
+            probe = threading.Thread(target=controller.get_stats)
+            probe.start()
+            probe.join(2)
+            blocked.append(probe.is_alive())
+            return super().prepare(frame)
+
+    blocked = []
+    controller = AdmissionController(policy=ProbingPolicy())
+    controller.offer(np.zeros((48, 64, 3), np.uint8))
+    assert blocked == [False]
+    assert controller.take(timeout=0).prepared.shape == (36, 64)
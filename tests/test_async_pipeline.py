@@ -0,0 +1,145 @@
+# tests/test_async_pipeline.py
+import itertools
+import threading
+import time
+
+import pytest
+
+from pwd_library.model.async_pipeline import AsyncInferencePipeline
+from pwd_library.utils.exceptions import InferenceError
+
+
+def make_pipeline(released=None, infer_gate=None, **kwargs):
+    def preprocess(frame):
+        return {"frame": frame}, frame
+
+    def infer(tensor):
+        if infer_gate is not None:
+            infer_gate.wait()
+        return tensor["frame"] * 10
+
+    def postprocess(output, context):
+        return output + 1
+
+    return AsyncInferencePipeline(preprocess, infer, postprocess,
+                                  release_input=released.append if released is not None else None,
+                                  **kwargs)
+
+
+def test_future_only_use_does_not_accumulate_results():
+    with make_pipeline(collect_results=False, max_in_flight=4) as pipeline:
+        futures = [pipeline.submit(i) for i in range(300)]
+        assert [f.result(timeout=5) for f in futures] == [i * 10 + 1 for i in range(300)]
+        assert pipeline._done.qsize() == 0
+
+
+def test_enable_results_collects_later_frames_in_order():
+    with make_pipeline(collect_results=False) as pipeline:
+        for future in [pipeline.submit(i) for i in range(5)]:
+            future.result(timeout=5)
+        with pytest.raises(InferenceError):
+            next(pipeline.results(timeout=0.1))
+
+        pipeline.enable_results()
+        for i in range(5, 10):
+            pipeline.submit(i, tag=i)
+        # ทั้งแบบ next() บน iterator ใหม่ทุกครั้ง และแบบวนต่อเนื่อง
+        results = [next(pipeline.results(timeout=5)) for _ in range(2)]
+        results += list(itertools.islice(pipeline.results(timeout=5), 3))
+        assert [r.tag for r in results] == list(range(5, 10))
+        assert [r.result for r in results] == [i * 10 + 1 for i in range(5, 10)]
+
+
+def test_cancelled_frame_releases_preprocessed_input():
+    released = []
+    gate = threading.Event()
+    with make_pipeline(released=released, infer_gate=gate, max_in_flight=4) as pipeline:
+        first = pipeline.submit(1)
+        second = pipeline.submit(2)
+        # รอจนเฟรมที่สองผ่าน preprocess แล้ว (เฟรมแรกค้างอยู่ใน infer)
+        deadline = time.time() + 5
+        while pipeline.get_stats()["stages"]["preprocess"]["processed"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert second.cancel()
+        gate.set()
+        assert first.result(timeout=5) == 11
+    assert released == [{"frame": 2}]
+    assert pipeline.get_stats()["failed"] == 1
+    assert pipeline.in_flight == 0
+
+
+def test_cancel_race_does_not_kill_stage_threads():
+    with make_pipeline(max_in_flight=2) as pipeline:
+        futures = []
+        for i in range(200):
+            future = pipeline.submit(i)
+            future.cancel()
+            futures.append(future)
+        last = pipeline.submit(999)
+        assert last.result(timeout=5) == 9991
+        assert all(thread.is_alive() for thread in pipeline._threads)
+
+
+def test_submit_racing_close_fails_future_and_returns_slot():
+    gate = threading.Event()
+    pipeline = make_pipeline(infer_gate=gate, max_in_flight=1)
+    first = pipeline.submit(1)
+    outcome = {}
+
+    def blocked_submit():
+        try:
+            outcome["future"] = pipeline.submit(2)
+        except InferenceError as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=blocked_submit)
+    thread.start()
+    time.sleep(0.1)  # ให้ submit รอ slot อยู่ก่อนปิด
+    pipeline.close(wait=False)
+    gate.set()
+    thread.join(timeout=5)
+    pipeline.close()
+
+    assert first.result(timeout=5) == 11
+    if "future" in outcome:
+        with pytest.raises(InferenceError):
+            outcome["future"].result(timeout=5)
+    else:
+        assert isinstance(outcome["error"], InferenceError)
+    assert pipeline.in_flight == 0
+    assert not any(thread.is_alive() for thread in pipeline._threads)
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_parallel_postprocess_delivers_in_completion_order_unless_ordered(ordered):
+    gate = threading.Event()
+
+    def postprocess(output, frame):
+        if frame == 0:
+            gate.wait(5)  # เฟรมแรกเสร็จหลังเฟรมที่สอง
+        return frame
+
+    pipeline = AsyncInferencePipeline(lambda frame: (frame, frame), lambda tensor: tensor, postprocess,
+                                      ordered=ordered, workers={"postprocess": 2})
+    with pipeline:
+        pipeline.submit(0, tag=0)
+        pipeline.submit(1, tag=1)
+        results = pipeline.results(timeout=5)
+        if ordered:
+            gate.set()
+            assert [next(results).tag, next(results).tag] == [0, 1]
+        else:
+            assert next(results).tag == 1
+            gate.set()
+            assert next(results).tag == 0
+    assert len(pipeline._threads) == 4
+
+
+def test_close_with_several_workers_finishes_every_frame():
+    pipeline = make_pipeline(max_in_flight=8, workers=3)
+    futures = [pipeline.submit(i) for i in range(100)]
+    pipeline.close()
+    expected = [i * 10 + 1 for i in range(100)]
+    assert [f.result(timeout=0) for f in futures] == expected
+    assert [r.result for r in pipeline.results(timeout=1)] == expected
+    assert not any(thread.is_alive() for thread in pipeline._threads)
@@ -0,0 +1,108 @@
+# tests/test_benchmark.py
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from pwd_library.model.benchmark import (BenchmarkTarget, compare_reports, main, run_benchmark, run_config,
+                                         summarize_latencies)
+
+
+class CountingTarget(BenchmarkTarget):
+    """target ที่ไม่มี device จริง ใช้นับการเรียกแต่ละขั้น"""
+
+    name = "counting"
+    max_batch_size = 2
+
+    def __init__(self, fail_every=0):
+        self.fail_every = fail_every
+        self.calls = 0
+        self.leased = 0
+        self.lock = threading.Lock()
+
+    def preprocess(self, images):
+        with self.lock:
+            self.leased += 1
+        return np.stack(images)
+
+    def infer(self, batch, timings):
+        with self.lock:
+            self.calls += 1
+            failed = self.fail_every and self.calls % self.fail_every == 0
+        timings["transfer"] = 0.0
+        if failed:
+            raise RuntimeError("device busy")
+        return batch.sum()
+
+    def release(self, batch):
+        with self.lock:
+            self.leased -= 1
+
+    def postprocess(self, outputs, images):
+        return outputs
+
+
+def report(p50, p99, fps, configs=((1, 1),)):
+    return {"results": [{"concurrency": c, "batch_size": b, "throughput_fps": fps,
+                         "latency": {"p50_ms": p50, "p99_ms": p99}} for c, b in configs]}
+
+
+def test_summarize_latencies_reports_milliseconds():
+    summary = summarize_latencies([0.001 * i for i in range(1, 101)])
+    assert summary["mean_ms"] == pytest.approx(50.5)
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert summary["p99.9_ms"] == pytest.approx(99.901)
+    assert summary["max_ms"] == pytest.approx(100.0)
+    assert summarize_latencies([]) == {}
+
+
+def test_run_config_counts_requests_errors_and_releases_batches():
+    target = CountingTarget(fail_every=4)
+    images = [np.full((2, 2, 3), i, np.uint8) for i in range(3)]
+    result = run_config(target, images, concurrency=2, batch_size=2, iterations=12, warmup=0)
+
+    assert (result["requests"], result["errors"]) == (9, 3)
+    assert result["first_error"] == "device busy"
+    assert target.leased == 0
+    assert set(result["stages"]) == {"preprocess", "transfer", "device", "postprocess"}
+
+    with pytest.raises(ValueError):
+        run_config(target, images, batch_size=3)
+
+
+def test_run_benchmark_skips_batch_sizes_above_target_limit():
+    result = run_benchmark(CountingTarget(), [np.zeros((4, 4, 3), np.uint8)], concurrency_levels=(1, 2),
+                           batch_sizes=(1, 4), iterations=3, warmup=1)
+    assert [(r["concurrency"], r["batch_size"]) for r in result["results"]] == [(1, 1), (2, 1)]
+    assert result["settings"]["image_shape"] == [4, 4, 3]
+    json.dumps(result)
+
+    with pytest.raises(ValueError):
+        run_benchmark(CountingTarget(), [])
+
+
+def test_compare_reports_classifies_changes_beyond_tolerance():
+    baseline = report(10.0, 20.0, 100.0, configs=((1, 1), (2, 1)))
+    current = report(12.0, 19.0, 120.0)
+
+    comparison = compare_reports(baseline, current, tolerance=0.1)
+    assert [(e["metric"], round(e["change"], 2)) for e in comparison["regressions"]] == [("latency.p50_ms", 0.2)]
+    assert [e["metric"] for e in comparison["improvements"]] == ["throughput_fps"]
+    assert comparison["missing"] == [{"concurrency": 2, "batch_size": 1}]
+
+
+def test_simulated_run_and_compare_cli(tmp_path, capsys):
+    output = tmp_path / "current.json"
+    assert main(["run", "--simulated", "--device-ms", "0.1", "--per-frame-ms", "0.1", "--jitter", "0",
+                 "--concurrency", "1", "--batch-sizes", "1", "2", "--batch-size", "2", "--iterations", "3",
+                 "--warmup", "1", "--width", "32", "--height", "24", "--output", str(output)]) == 0
+    current = json.loads(output.read_text(encoding="utf-8"))
+    assert [r["batch_size"] for r in current["results"]] == [1, 2]
+    assert all(r["errors"] == 0 for r in current["results"])
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report(1e-3, 1e-3, 1e6, configs=((1, 1),))), encoding="utf-8")
+    assert main(["compare", str(baseline), str(output)]) == 1
+    assert main(["compare", str(output), str(output)]) == 0
+    assert "Regressions" in capsys.readouterr().out
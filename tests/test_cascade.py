@@ -0,0 +1,128 @@
+# tests/test_cascade.py
+import threading
+
+import pytest
+
+from pwd_library.model.cascade import CascadeExecutor, CascadeStage
+from pwd_library.utils.exceptions import InferenceError
+
+
+class Recorder:
+    """บันทึก batch ที่แต่ละขั้นได้รับ"""
+
+    def __init__(self, fn, fail_on=None):
+        self.fn = fn
+        self.fail_on = fail_on
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, inputs):
+        with self.lock:
+            self.batches.append(list(inputs))
+        if self.fail_on is not None and self.fail_on in inputs:
+            raise RuntimeError(f"bad input {self.fail_on}")
+        return [self.fn(item) for item in inputs]
+
+
+def make_stages(vehicle_fail=None, plate_fail=None, max_batch=3):
+    # เฟรมเป็น string เช่น "f0" มีรถตามจำนวน int ท้ายชื่อ, รถแต่ละคันมีป้ายหนึ่งป้าย
+    vehicles = Recorder(lambda frame: [f"{frame}/car{i}" for i in range(int(frame[1:]))], fail_on=vehicle_fail)
+    plates = Recorder(lambda car: f"{car}/plate", fail_on=plate_fail)
+    ocr = Recorder(lambda plate: plate.upper())
+    stages = [CascadeStage("vehicle", vehicles, expand=lambda frame, cars: cars),
+              CascadeStage("plate", plates, expand=lambda car, plate: [plate], max_batch=max_batch),
+              CascadeStage("ocr", ocr, max_batch=max_batch)]
+    return stages, (vehicles, plates, ocr)
+
+
+def test_stage_validation():
+    with pytest.raises(ValueError):
+        CascadeExecutor([])
+    with pytest.raises(ValueError):
+        CascadeExecutor([CascadeStage("a", list), CascadeStage("b", list)])
+    with pytest.raises(ValueError):
+        CascadeStage("a", list, max_batch=0)
+
+
+def test_run_batches_children_of_all_frames_and_builds_tree():
+    stages, (vehicles, plates, ocr) = make_stages()
+    executor = CascadeExecutor(stages)
+    roots = executor.run(["f2", "f0", "f3"], tags=["a", "b", "c"])
+
+    assert vehicles.batches == [["f2", "f0", "f3"]]
+    assert [len(batch) for batch in plates.batches] == [3, 2]
+    assert plates.batches[0] == ["f2/car0", "f2/car1", "f3/car0"]
+    assert [root.tag for root in roots] == ["a", "b", "c"]
+    assert roots[1].children == []
+
+    texts = [node.output for node in roots[2].at_stage("ocr")]
+    assert texts == ["F3/CAR0/PLATE", "F3/CAR1/PLATE", "F3/CAR2/PLATE"]
+    for node in roots[2].at_stage("ocr"):
+        assert node.root is roots[2] and node.parent.parent is roots[2]
+
+    stats = executor.get_stats()
+    assert stats["plate"]["items"] == 5 and stats["plate"]["max_batch_size"] == 3
+    assert stats["ocr"]["batches"] == 2
+
+
+def test_run_stops_when_a_stage_produces_no_children():
+    stages, (_, plates, ocr) = make_stages()
+    roots = CascadeExecutor(stages).run(["f0", "f0"])
+    assert plates.batches == [] and ocr.batches == []
+    assert all(root.children == [] for root in roots)
+
+
+def test_run_wraps_stage_failures_and_output_count_mismatch():
+    stages, _ = make_stages(plate_fail="f1/car0")
+    executor = CascadeExecutor(stages)
+    with pytest.raises(InferenceError, match="plate"):
+        executor.run(["f1"])
+    assert executor.get_stats()["plate"]["errors"] == 1
+
+    short = CascadeExecutor([CascadeStage("short", lambda inputs: inputs[:-1])])
+    with pytest.raises(InferenceError, match="returned 1 outputs for 2 inputs"):
+        short.run([1, 2])
+
+
+def test_submit_resolves_each_root_after_all_descendants():
+    stages, (_, plates, ocr) = make_stages()
+    with CascadeExecutor(stages).start() as executor:
+        futures = [executor.submit(frame, tag=frame) for frame in ("f2", "f0", "f1")]
+        roots = [future.result(timeout=5) for future in futures]
+
+    assert [root.tag for root in roots] == ["f2", "f0", "f1"]
+    assert [node.output for node in roots[0].at_stage("ocr")] == ["F2/CAR0/PLATE", "F2/CAR1/PLATE"]
+    assert roots[1].children == []
+    assert sorted(item for batch in ocr.batches for item in batch) == [
+        "f1/car0/plate", "f2/car0/plate", "f2/car1/plate"]
+    assert not executor._threads
+
+
+def test_submit_failure_fails_only_the_affected_root():
+    stages, _ = make_stages(vehicle_fail="f3")
+    stages[0].max_batch = 1
+    executor = CascadeExecutor(stages)
+    bad, good = executor.submit("f3"), executor.submit("f1")
+    with pytest.raises(InferenceError, match="vehicle"):
+        bad.result(timeout=5)
+    assert good.result(timeout=5).at_stage("ocr")[0].output == "F1/CAR0/PLATE"
+    executor.close()
+
+
+def test_close_drains_queued_items_before_stopping():
+    release = threading.Event()
+    stages, _ = make_stages()
+    vehicle = stages[0].infer_batch
+    stages[0].infer_batch = lambda inputs: (release.wait(5), vehicle(inputs))[1]
+    executor = CascadeExecutor(stages).start()
+    futures = [executor.submit(f"f{n}") for n in (1, 2, 3, 4)]
+
+    closer = threading.Thread(target=executor.close)
+    closer.start()
+    release.set()
+    closer.join(timeout=5)
+
+    assert not closer.is_alive()
+    assert all(future.done() for future in futures)
+    assert [len(future.result().at_stage("ocr")) for future in futures] == [1, 2, 3, 4]
+    executor.close()
@@ -0,0 +1,185 @@
+# tests/test_damoyolo.py
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+MODULE_PATH = (Path(__file__).resolve().parents[1]
+               / "examples" / "postprocessors" / "DamoYOLO" / "HailoDetectorDamoYOLO.py")
+INPUT = 320
+STRIDES = (8, 16, 32)
+
+
+def load_module():
+    spec = importlib.util.spec_from_file_location("damoyolo_postprocessor", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def postprocessor(tmp_path_factory):
+    labels = tmp_path_factory.mktemp("damoyolo") / "labels.json"
+    labels.write_text(json.dumps({str(i): f"class_{i}" for i in range(80)}))
+    config = {
+        "PRE_PROCESS": [{"InputW": INPUT, "InputH": INPUT}],
+        "POST_PROCESS": [{"LabelsPath": str(labels)}],
+    }
+    return load_module().PostProcessor(json.dumps(config))
+
+
+def legacy_nms(boxes, scores, threshold):
+    """greedy loop แบบเดิมของ nms_per_class (iou < threshold รอด, score เท่ากัน: index มากก่อน)"""
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(scores, kind="stable")[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[1:][iou < threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def make_outputs(rng, objects=20, float_out=False):
+    """output จำลองของ 3 level (cls และ bbox แยก tensor) แบบ uint8 หรือ float ที่ dequantize แล้ว"""
+    tensors, details = [], []
+    for stride in STRIDES:
+        hw = (INPUT // stride) ** 2
+        cls = (rng.random((1, hw, 81)) ** 12 * 60).astype(np.uint8)
+        hot = rng.integers(0, hw, objects)
+        cls[0, hot, rng.integers(0, 80, objects)] = rng.integers(60, 255, objects)
+        box = rng.integers(60, 200, (1, hw, 68)).astype(np.uint8)
+        if float_out:
+            tensors += [cls / np.float32(255), (box.astype(np.float32) - 128) * np.float32(0.08)]
+            details += [{"quantization": (1.0, 0)}, {"quantization": (1.0, 0)}]
+        else:
+            tensors += [cls, box]
+            details += [{"quantization": (1 / 255, 0)}, {"quantization": (0.08, 128)}]
+    return tensors, details
+
+
+def dense_forward(pp, tensors, details):
+    """decode แบบเดิม: dequantize และถอด box ทุก prior ก่อนทำ NMS"""
+    cls_list, box_list = [], []
+    for data, info in zip(tensors, details):
+        scale, zero_point = info["quantization"]
+        data = (data.astype(np.float32) - zero_point) * scale
+        (box_list if data.shape[-1] == 68 else cls_list).append(data)
+
+    distances = []
+    for box in box_list:
+        bins = box.reshape(1, -1, 4, pp.reg_max + 1)
+        bins = np.exp(bins - bins.max(axis=-1, keepdims=True))
+        bins /= bins.sum(axis=-1, keepdims=True)
+        distances.append((bins @ pp.project).reshape(1, -1, 4))
+    distances = np.concatenate(distances, axis=1) * pp.mlvl_priors[..., 2, None]
+    boxes = pp.distance2bbox(pp.mlvl_priors[..., :2], distances, max_shape=pp.input_shape)
+    scores = np.concatenate(cls_list, axis=1)[:, :, :pp.num_classes]
+    return pp.apply_nms(boxes, scores)
+
+
+def assert_same_detections(results, expected):
+    bboxes, scores, class_ids = expected
+    assert [r["category_id"] for r in results] == class_ids.tolist()
+    np.testing.assert_allclose([r["score"] for r in results], scores, rtol=1e-6)
+    np.testing.assert_allclose(np.array([r["bbox"] for r in results]).reshape(-1, 4),
+                               bboxes, atol=1e-2)
+
+
+@pytest.mark.parametrize("case", [{}, {"float_out": True}, {"objects": 0}, {"objects": 150}])
+def test_sparse_decode_matches_dense(postprocessor, case):
+    tensors, details = make_outputs(np.random.default_rng(len(case)), **case)
+    expected = dense_forward(postprocessor, tensors, details)
+
+    results = postprocessor.forward(tensors, details)
+    assert len(results) == len(expected[0])
+    assert_same_detections(results, expected)
+    assert all(r["label"] == f"class_{r['category_id']}" for r in results)
+
+    # tensor ถูกจับคู่กับ level ตามจำนวน prior ไม่ใช่ตามลำดับ
+    order = [4, 5, 2, 3, 0, 1]
+    shuffled = postprocessor.forward([tensors[i] for i in order], [details[i] for i in order])
+    assert shuffled == results
+
+
+def test_sparse_decode_keeps_scores_at_threshold_boundary(postprocessor):
+    tensors, details = make_outputs(np.random.default_rng(9), objects=0)
+    # 0.3 * 255 = 76.5 -> q = 76 ต้องตกไป และ q = 77 ขึ้นไปต้องผ่าน
+    for q in range(70, 84):
+        tensors[0][0, q * 7, 3] = q
+    expected = dense_forward(postprocessor, tensors, details)
+
+    results = postprocessor.forward(tensors, details)
+    assert sorted(round(r["score"] * 255) for r in results) == list(range(77, 84))
+    assert_same_detections(results, expected)
+
+
+def test_mismatched_output_size_raises(postprocessor):
+    tensors, details = make_outputs(np.random.default_rng(1))
+    tensors[0] = tensors[0][:, :-1]
+    tensors[1] = tensors[1][:, :-1]
+    with pytest.raises(ValueError):
+        postprocessor.forward(tensors, details)
+
+
+def test_apply_nms_matches_per_class_loop(postprocessor):
+    rng = np.random.default_rng(4)
+    centers = rng.uniform(0, INPUT, (12, 2))[rng.integers(0, 12, 300)] + rng.normal(0, 4, (300, 2))
+    wh = rng.uniform(20, 80, (300, 2))
+    boxes = np.concatenate([centers - wh / 2, centers + wh / 2], axis=1).astype(np.float32)
+    scores = (rng.uniform(0, 1, (300, 80)) ** 6).astype(np.float32)
+
+    # loop แบบเดิม: วนทุก class, ตัดด้วย score > conf และ IoU < threshold
+    expected_boxes, expected_scores, expected_classes = [], [], []
+    for class_id in range(80):
+        idx = np.flatnonzero(scores[:, class_id] > postprocessor.conf_threshold)
+        keep = idx[legacy_nms(boxes[idx], scores[idx, class_id], postprocessor.nms_iou_thresh)]
+        expected_boxes.append(boxes[keep])
+        expected_scores.append(scores[keep, class_id])
+        expected_classes += [class_id] * len(keep)
+
+    bboxes, final_scores, class_ids = postprocessor.apply_nms(boxes[None], scores[None])
+    np.testing.assert_array_equal(bboxes, np.concatenate(expected_boxes))
+    np.testing.assert_array_equal(final_scores, np.concatenate(expected_scores))
+    assert class_ids.tolist() == expected_classes
+
+
+def test_compatibility_methods_delegate_to_the_new_decode(postprocessor):
+    tensors, details = make_outputs(np.random.default_rng(6))
+    order = [2, 3, 0, 1, 4, 5]
+    cls_scores, bbox_preds = postprocessor.prepare_model_outputs(
+        [tensors[i] for i in order], [details[i] for i in order])
+
+    # dequantize แล้วและเรียงตาม level (stride 8, 16, 32) ไม่ว่า output จะมาลำดับใด
+    assert [c.shape[1] for c in cls_scores] == [(INPUT // s) ** 2 for s in STRIDES]
+    for level, (cls, box) in enumerate(zip(cls_scores, bbox_preds)):
+        np.testing.assert_allclose(cls, tensors[2 * level] / 255, rtol=1e-6)
+        np.testing.assert_allclose(box, (tensors[2 * level + 1].astype(np.float32) - 128) * 0.08, rtol=1e-6)
+
+    bins = np.full((1, 8, 17), 1 / 17)
+    np.testing.assert_allclose(postprocessor.integral(bins), np.full((1, 2, 4), 8.0))
+
+    iou = postprocessor.compute_iou(np.array([0, 0, 10, 10.0]), np.array([[0, 0, 10, 10.0], [5, 0, 15, 10]]))
+    np.testing.assert_allclose(iou, [1.0, 1 / 3])
+
+
+def test_nms_per_class_matches_legacy_loop(postprocessor):
+    rng = np.random.default_rng(2)
+    centers = rng.uniform(0, INPUT, (8, 2))[rng.integers(0, 8, 200)] + rng.normal(0, 4, (200, 2))
+    wh = rng.uniform(20, 80, (200, 2))
+    boxes = np.concatenate([centers - wh / 2, centers + wh / 2], axis=1).astype(np.float32)
+    scores = np.round(rng.uniform(0, 1, 200) * 16).astype(np.float32) / 16
+
+    keep = legacy_nms(boxes, scores, postprocessor.nms_iou_thresh)
+    bboxes, selected_scores, class_indices = postprocessor.nms_per_class(boxes, scores)
+    np.testing.assert_array_equal(bboxes, boxes[keep])
+    np.testing.assert_array_equal(selected_scores, scores[keep])
+    assert class_indices.tolist() == [-1] * len(keep)
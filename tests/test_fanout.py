@@ -0,0 +1,81 @@
+# tests/test_fanout.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.fanout import FanOutPreprocessor
+from pwd_library.image_processing.frame import Frame
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+from pwd_library.utils.exceptions import PreprocessingError
+
+SPECS = [
+    {"name": "vehicle", "size": (96, 96)},
+    {"name": "plate", "size": (64, 32), "layout": "NCHW", "method": "imagenet"},
+    {"name": "ocr", "size": (40, 40), "dtype": np.uint8, "method": "none", "swap_rb": False},
+]
+
+
+@pytest.fixture
+def bgr():
+    return np.random.default_rng(0).integers(0, 256, (72, 120, 3), dtype=np.uint8)
+
+
+def run_fresh(image):
+    # instance ใหม่ทุกครั้ง: level buffer ต้องไม่มีผลของเฟรมก่อนหน้าค้างอยู่
+    return {name: out for name, (out, _) in FanOutPreprocessor(SPECS).run(image).items()}
+
+
+def assert_same(results, expected):
+    assert results.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_array_equal(results[name], expected[name])
+
+
+def test_largest_target_matches_preprocess_into(bgr):
+    fanout = FanOutPreprocessor(SPECS)
+    out, transform = fanout.run(bgr)["vehicle"]
+    expected, expected_transform = ImagePreprocessor((96, 96)).preprocess_into(bgr, return_transform=True)
+    np.testing.assert_array_equal(out, expected)
+    assert transform.to_dict() == expected_transform.to_dict()
+
+
+@pytest.mark.parametrize("code, color", [
+    (cv2.COLOR_BGR2BGRA, "BGRA"),
+    (cv2.COLOR_BGR2RGB, "RGB"),
+    (cv2.COLOR_BGR2RGBA, "RGBA"),
+])
+def test_color_frame_matches_bgr_array(bgr, code, color):
+    expected = run_fresh(bgr)
+    assert_same(run_fresh(Frame(cv2.cvtColor(bgr, code), color=color)), expected)
+    assert_same(run_fresh(cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA)), expected)
+
+
+def test_gray_frame_matches_gray_array(bgr):
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    expected = run_fresh(gray)
+    assert_same(run_fresh(Frame(gray, color="GRAY")), expected)
+    assert_same(run_fresh(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)), expected)
+
+
+def test_nv12_frame_matches_preprocess_yuv_into():
+    rng = np.random.default_rng(1)
+    y = rng.integers(16, 236, (72, 120), dtype=np.uint8)
+    uv = rng.integers(16, 241, (36, 60, 2), dtype=np.uint8)
+    out, _ = FanOutPreprocessor(SPECS).run(Frame(y, uv=uv))["vehicle"]
+    expected = ImagePreprocessor((96, 96)).preprocess_yuv_into(y, uv)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_input_is_not_modified_and_buffers_rotate(bgr):
+    original = bgr.copy()
+    fanout = FanOutPreprocessor(SPECS, pool_size=2)
+    first = fanout.run(bgr)["vehicle"][0]
+    second = fanout.run(bgr)["vehicle"][0]
+    third = fanout.run(bgr)["vehicle"][0]
+    np.testing.assert_array_equal(bgr, original)
+    assert first is not second and first is third
+
+
+def test_invalid_input_raises():
+    with pytest.raises(PreprocessingError):
+        FanOutPreprocessor(SPECS).run(np.zeros((72, 120, 3), np.float32))
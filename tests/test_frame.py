@@ -0,0 +1,88 @@
+# tests/test_frame.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.frame import Frame
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+from pwd_library.utils.exceptions import InvalidImageFormatError
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (96, 128, 3), dtype=np.uint8)
+
+
+def test_views_are_computed_once_and_shared(image):
+    frame = Frame(image)
+    gray = frame.gray
+    assert frame.gray is gray
+    np.testing.assert_array_equal(gray, cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    assert frame.jpeg(quality=90) is frame.jpeg(quality=90)
+    assert frame.get_cache_info()["hits"] == 2
+    assert frame.get_cache_info()["misses"] == 2
+
+
+@pytest.mark.parametrize("color, code", [("RGB", cv2.COLOR_BGR2RGB), ("BGRA", cv2.COLOR_BGR2BGRA)])
+def test_gray_uses_frame_color(image, color, code):
+    expected = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    np.testing.assert_array_equal(Frame(cv2.cvtColor(image, code), color=color).gray, expected)
+
+
+def test_pyramid_levels_build_on_each_other(image):
+    frame = Frame(image)
+    level2 = frame.pyramid(2)
+    assert level2.shape == (24, 32, 3)
+    half = cv2.resize(image, (64, 48), interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(level2, cv2.resize(half, (32, 24), interpolation=cv2.INTER_AREA))
+    assert frame.pyramid(1) is frame.pyramid(1)
+    assert frame.pyramid(0) is image
+
+
+def test_cache_is_bounded_by_bytes(image):
+    frame = Frame(image, max_cache_bytes=image.nbytes // 2)
+    frame.pyramid(1)  # 1/4 ของภาพ
+    frame.gray  # 1/3 ของภาพ: รวมเกินกำหนด ต้องลบ pyramid ทิ้ง
+    info = frame.get_cache_info()
+    assert info["cache_bytes"] <= frame.max_cache_bytes
+    assert info["views"] == ["gray"]
+
+    # view ที่ใหญ่กว่าทั้ง cache ไม่ถูกเก็บ
+    frame.get("big", lambda: np.zeros(image.nbytes, np.uint8))
+    assert "big" not in frame.get_cache_info()["views"]
+
+
+def test_release_drops_image_and_views(image):
+    with Frame(image) as frame:
+        frame.gray
+    assert frame.cache_bytes == 0
+    with pytest.raises(InvalidImageFormatError):
+        frame.image
+    with pytest.raises(InvalidImageFormatError):
+        frame.gray
+
+
+def test_letterboxed_and_model_input_match_preprocessor(image):
+    preprocessor = ImagePreprocessor((64, 64))
+    frame = Frame(image, preprocessor=preprocessor)
+    letterboxed, transform = frame.letterboxed((64, 64))
+    expected, expected_transform = preprocessor.resize_with_padding(image, (64, 64), return_transform=True)
+    np.testing.assert_array_equal(letterboxed, expected)
+    assert transform.to_dict() == expected_transform.to_dict()
+    assert frame.letterboxed((64, 64))[0] is letterboxed
+
+    out = frame.fill_model_input(target_size=(64, 64))
+    np.testing.assert_array_equal(out, preprocessor.preprocess_into(image, target_size=(64, 64)))
+
+
+def test_nv12_frame_gray_is_the_y_plane():
+    rng = np.random.default_rng(1)
+    y = rng.integers(16, 236, (96, 128), dtype=np.uint8)
+    uv = rng.integers(16, 241, (48, 64, 2), dtype=np.uint8)
+    frame = Frame.from_yuv(np.concatenate([y.ravel(), uv.ravel()]), 128, 96, fmt="NV12")
+    assert frame.is_yuv and frame.shape == (96, 128, 3)
+    np.testing.assert_array_equal(frame.gray, y)
+    assert frame.image.shape == (96, 128, 3)
+    assert frame.pyramid(1).shape == (48, 64, 3)
+    with pytest.raises(InvalidImageFormatError):
+        Frame(y).planes
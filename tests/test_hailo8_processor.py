@@ -0,0 +1,94 @@
+# tests/test_hailo8_processor.py
+import numpy as np
+import pytest
+
+from pwd_library.model.backends import SimulatedBackend
+from pwd_library.model.hailo8_processor import Hailo8Processor
+from pwd_library.utils.exceptions import InferenceError
+
+NO_LATENCY = {"base_ms": 0.0, "per_frame_ms": 0.0, "distribution": "fixed", "bandwidth_mb_s": 0}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    model_path = tmp_path / "det.hef"
+    model_path.write_bytes(b"hef")
+    backend = SimulatedBackend(default_latency=NO_LATENCY, models={"det": {
+        "inputs": [{"name": "input", "shape": [64, 64, 3]}],
+        # YOLOv8 channels-first: 4 box (normalize 0-1) + 2 classes, 96 anchors
+        "outputs": [{"name": "output", "shape": [6, 96]}],
+    }})
+    with Hailo8Processor(str(model_path), batch_size=2, backend=backend,
+                         postprocess_options={"normalized_boxes": True}) as processor:
+        yield processor
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (48, 80, 3), dtype=np.uint8) for _ in range(3)]
+
+
+def expected_detections(processor, row, shape):
+    """ผลที่ได้จาก postprocess output ของ session โดยตรง (output ของจำลองคงที่ต่อ slot ของ batch)"""
+    output = processor.session.infer(np.zeros((2, 64, 64, 3), np.float32))["output"][row:row + 1]
+    return processor.postprocessor.process_batch(output, [shape], confidence_threshold=0.5,
+                                                 nms_threshold=0.4, input_size=(64, 64))[0]
+
+
+def test_predict_decodes_session_output(processor, images):
+    results = processor.predict(images[0])
+    assert results, "simulated output should contain detections above 0.5"
+    assert results == expected_detections(processor, 0, images[0].shape[:2])
+    for detection in results:
+        x1, y1, x2, y2 = detection["bbox"]
+        assert 0 <= x1 <= x2 <= 80 and 0 <= y1 <= y2 <= 48
+    assert processor.inference_count == 1
+
+
+def test_batch_predict_splits_and_pads_batches(processor, images):
+    results = processor.batch_predict(images)
+    shape = images[0].shape[:2]
+    assert len(results) == 3 and results[1]
+    assert results[0] == expected_detections(processor, 0, shape)
+    assert results[1] == expected_detections(processor, 1, shape)
+    # ภาพที่ 3 อยู่ใน batch ที่ไม่ครบ (slot ที่เติมศูนย์ถูกตัดทิ้ง)
+    assert results[2] == results[0]
+    assert results[0] == processor.predict(images[0])
+    assert processor.arena.get_stats()["bytes_in_use"] == 0
+
+
+def test_submit_matches_predict_and_returns_buffers(processor, images):
+    futures = [processor.submit(image, tag=i) for i, image in enumerate(images)]
+    results = [future.result(timeout=5) for future in futures]
+    assert results == [processor.predict(image) for image in images]
+    assert processor.get_queue_stats()["completed"] == len(images)
+    assert processor.arena.get_stats()["bytes_in_use"] == 0
+
+
+def test_predict_requires_loaded_model(tmp_path, images):
+    model_path = tmp_path / "det.hef"
+    model_path.write_bytes(b"hef")
+    processor = Hailo8Processor(str(model_path), backend=SimulatedBackend(default_latency=NO_LATENCY))
+    with pytest.raises(InferenceError):
+        processor.predict(images[0])
+    with pytest.raises(InferenceError):
+        processor.submit(images[0])
+
+
+def test_batch_predict_uses_grayscale_input_spec(tmp_path):
+    model_path = tmp_path / "gray.hef"
+    model_path.write_bytes(b"hef")
+    backend = SimulatedBackend(default_latency=NO_LATENCY, models={"gray": {
+        "inputs": [{"name": "input", "shape": [64, 64, 1]}],
+        "outputs": [{"name": "output", "shape": [6, 96]}],
+    }})
+    rng = np.random.default_rng(1)
+    frames = [rng.integers(0, 256, (48, 80), dtype=np.uint8) for _ in range(3)]
+    with Hailo8Processor(str(model_path), batch_size=2, backend=backend,
+                         postprocess_options={"normalized_boxes": True}) as processor:
+        results = processor.batch_predict(frames)
+        assert len(results) == 3 and results[0]
+        assert results[0] == processor.predict(frames[0])
+        assert processor.batch_predict([None]) == [[]]
+        assert processor.arena.get_stats()["buffers"].keys() == {"(2, 64, 64, 1):<f4", "(1, 64, 64, 1):<f4"}
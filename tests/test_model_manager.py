@@ -0,0 +1,86 @@
+# tests/test_model_manager.py
+import threading
+
+from pwd_library.model.backends import SimulatedBackend
+from pwd_library.model.hailo8_processor import HailoModelManager
+
+
+def test_eviction_releases_bytes_charged_at_load(tmp_path):
+    (tmp_path / "a.hef").write_bytes(b"a" * 1000)
+    (tmp_path / "b.hef").write_bytes(b"b" * 300)
+    manager = HailoModelManager(str(tmp_path), max_models_per_device=1,
+                                backend=SimulatedBackend(default_latency={"base_ms": 0.0, "per_frame_ms": 0.0, "distribution": "fixed", "bandwidth_mb_s": 0}))
+    (slot,) = manager._get_devices()
+
+    with manager.session("a"):
+        pass
+    assert slot.resident_bytes == 1000
+
+    # ไฟล์ถูกแทนที่ด้วยขนาดอื่นระหว่างที่โมเดลยังค้างอยู่บนอุปกรณ์
+    (tmp_path / "a.hef").write_bytes(b"a" * 10)
+    with manager.session("b"):
+        pass
+    assert slot.resident_bytes == 300
+
+    (tmp_path / "b.hef").unlink()
+    manager.unload()
+    assert slot.resident_bytes == 0
+
+
+class SlowOpenBackend(SimulatedBackend):
+    """backend จำลองที่การเปิด session ของโมเดล "slow" ค้างจนกว่าจะ set event"""
+
+    def __init__(self):
+        super().__init__(default_latency={"base_ms": 0.0, "per_frame_ms": 0.0, "distribution": "fixed",
+                                          "bandwidth_mb_s": 0})
+        self.loading = threading.Event()
+        self.release = threading.Event()
+        self.opened = []
+
+    def create_session(self, model_path, *args, **kwargs):
+        session = super().create_session(model_path, *args, **kwargs)
+        if model_path.stem == "slow":
+            open_session = session.open
+
+            def slow_open():
+                self.loading.set()
+                assert self.release.wait(5)
+                return open_session()
+            session.open = slow_open
+        self.opened.append(model_path.stem)
+        return session
+
+
+def test_loading_does_not_block_resident_models(tmp_path):
+    for name in ("fast", "slow"):
+        (tmp_path / f"{name}.hef").write_bytes(b"x" * 100)
+    backend = SlowOpenBackend()
+    manager = HailoModelManager(str(tmp_path), backend=backend)
+    with manager.session("fast"):
+        pass
+
+    def use_slow():
+        with manager.session("slow"):
+            pass
+
+    loaders = [threading.Thread(target=use_slow) for _ in range(2)]
+    for loader in loaders:
+        loader.start()
+    assert backend.loading.wait(5)
+
+    served = threading.Event()
+
+    def use_fast():
+        with manager.session("fast"):
+            manager.get_device_utilization()
+            served.set()
+
+    threading.Thread(target=use_fast, daemon=True).start()
+    assert served.wait(2), "resident model waited for another model's load"
+
+    backend.release.set()
+    for loader in loaders:
+        loader.join(5)
+    assert backend.opened == ["fast", "slow"]
+    (slot,) = manager._get_devices()
+    assert slot.requests == 4 and slot.resident_bytes == 200
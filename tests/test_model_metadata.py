@@ -0,0 +1,57 @@
+# tests/test_model_metadata.py
+import json
+
+from pwd_library.model.model_metadata import CACHE_FILE_NAME, ModelMetadataCache
+
+
+def write_models(directory, *names):
+    paths = []
+    for name in names:
+        path = directory / name
+        path.write_bytes(name.encode() * 16)
+        paths.append(path)
+    return paths
+
+
+def test_refresh_with_suffix_keeps_other_backends_entries(tmp_path):
+    hef_paths = write_models(tmp_path, "a.hef", "b.hef")
+    onnx_paths = write_models(tmp_path, "a.onnx")
+
+    cache = ModelMetadataCache(tmp_path)
+    cache.refresh(hef_paths, suffix=".hef")
+    cache.refresh(onnx_paths, suffix=".onnx")
+
+    assert cache.get_cache_info()["models"] == ["a.hef", "a.onnx", "b.hef"]
+    assert cache.get(tmp_path / "a.hef").path == str(tmp_path / "a.hef")
+
+    # โหลดจากดิสก์ใหม่: ทุก entry ยังใช้ได้โดยไม่ต้องอ่านไฟล์ใหม่
+    reloaded = ModelMetadataCache(tmp_path)
+    for path in hef_paths + onnx_paths:
+        reloaded.get(path)
+    assert reloaded.misses == 0
+
+
+def test_refresh_prunes_deleted_models_of_listed_suffix(tmp_path):
+    a_hef, b_hef = write_models(tmp_path, "a.hef", "b.hef")
+    onnx_paths = write_models(tmp_path, "a.onnx")
+    cache = ModelMetadataCache(tmp_path)
+    cache.refresh([a_hef, b_hef], suffix=".hef")
+    cache.refresh(onnx_paths, suffix=".onnx")
+
+    b_hef.unlink()
+    cache.refresh([a_hef], suffix=".hef")
+
+    assert cache.get_cache_info()["models"] == ["a.hef", "a.onnx"]
+
+
+def test_version_1_cache_is_rekeyed_by_file_name(tmp_path):
+    (path,) = write_models(tmp_path, "a.hef")
+    cache = ModelMetadataCache(tmp_path)
+    entry = cache.get(path).to_dict()
+    (tmp_path / CACHE_FILE_NAME).write_text(json.dumps({"version": 1, "models": {"a": entry}}))
+
+    migrated = ModelMetadataCache(tmp_path)
+    migrated.get(path)
+
+    assert migrated.get_cache_info()["models"] == ["a.hef"]
+    assert migrated.misses == 0
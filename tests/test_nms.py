@@ -0,0 +1,178 @@
+# tests/test_nms.py
+import ast
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.nms import batch_nms, batched_nms, multiclass_nms, nms
+
+
+def legacy_nms(boxes, scores, threshold, strict=False, stable=False):
+    """greedy loop แบบเดิมของ RetinaFace/SCRFD (strict=True คือแบบของ DamoYOLO: iou < threshold)"""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = (np.argsort(scores, kind="stable") if stable else scores.argsort())[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[1:][iou < threshold if strict else iou <= threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def candidates(rng, count, ties=False):
+    """box หลายอันกระจุกรอบวัตถุเดียวกันแบบ detector จริง"""
+    objects = max(count // 10, 1)
+    centers = rng.uniform(0, 640, (objects, 2))[rng.integers(0, objects, count)]
+    centers += rng.normal(0, 4, (count, 2))
+    wh = rng.uniform(20, 120, (count, 2))
+    boxes = np.concatenate([centers - wh / 2, centers + wh / 2], axis=1).astype(np.float32)
+    scores = rng.integers(1, 8, count) / 8 if ties else rng.uniform(0, 1, count)
+    return boxes, scores.astype(np.float32)
+
+
+@pytest.mark.parametrize("count", [1, 12, 150, 600])
+@pytest.mark.parametrize("method", ["greedy", "matrix", "auto"])
+@pytest.mark.parametrize("strict", [False, True])
+def test_nms_matches_legacy_loop(count, method, strict):
+    boxes, scores = candidates(np.random.default_rng(count), count)
+    expected = legacy_nms(boxes, scores, 0.45, strict)
+    np.testing.assert_array_equal(nms(boxes, scores, 0.45, method=method, strict=strict), expected)
+
+
+@pytest.mark.parametrize("method", ["greedy", "matrix"])
+def test_tied_scores_keep_highest_index_first(method):
+    boxes, scores = candidates(np.random.default_rng(7), 200, ties=True)
+    expected = legacy_nms(boxes, scores, 0.45, stable=True)
+    np.testing.assert_array_equal(nms(boxes, scores, 0.45, method=method), expected)
+
+
+def test_threshold_boundary():
+    # IoU ของสองกล่องนี้เท่ากับ 0.5 พอดี
+    boxes = np.array([[0, 0, 30, 10], [10, 0, 40, 10]], np.float32)
+    scores = np.array([0.9, 0.8], np.float32)
+    for method in ("greedy", "matrix"):
+        assert nms(boxes, scores, 0.5, method=method).tolist() == [0, 1]
+        assert nms(boxes, scores, 0.5, method=method, strict=True).tolist() == [0]
+
+
+@pytest.mark.parametrize("method", ["greedy", "matrix"])
+@pytest.mark.parametrize("ties", [False, True])
+def test_batched_nms_matches_per_class_loop(method, ties):
+    rng = np.random.default_rng(3)
+    boxes, scores = candidates(rng, 400, ties)
+    class_ids = rng.integers(0, 6, len(boxes))
+
+    kept = []
+    for class_id in range(6):
+        idx = np.flatnonzero(class_ids == class_id)
+        kept.extend(idx[legacy_nms(boxes[idx], scores[idx], 0.5, True, stable=ties)])
+    expected = sorted(kept, key=lambda i: (-scores[i], -i))
+
+    result = batched_nms(boxes, scores, class_ids, 0.5, method=method, strict=True)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_batch_nms_matches_per_image_loop():
+    rng = np.random.default_rng(5)
+    images = [candidates(rng, count) for count in (80, 0, 300)]
+    boxes = np.concatenate([b for b, _ in images])
+    scores = np.concatenate([s for _, s in images])
+    image_ids = np.repeat(np.arange(len(images)), [len(b) for b, _ in images])
+
+    expected, offset = [], 0
+    for b, s in images:
+        if len(b):
+            expected.extend(offset + legacy_nms(b, s, 0.45)[:20])
+        offset += len(b)
+
+    np.testing.assert_array_equal(batch_nms(boxes, scores, image_ids, max_per_image=20), expected)
+
+
+def test_multiclass_nms_matches_per_class_loop():
+    rng = np.random.default_rng(11)
+    boxes, _ = candidates(rng, 300)
+    class_scores = rng.uniform(0, 1, (300, 4)).astype(np.float32) ** 4
+
+    expected = []
+    for class_id in range(4):
+        idx = np.flatnonzero(class_scores[:, class_id] > 0.3)
+        keep = idx[legacy_nms(boxes[idx], class_scores[idx, class_id], 0.6, strict=True)]
+        expected.extend((int(i), class_id) for i in keep)
+
+    box_ids, scores, class_ids = multiclass_nms(boxes, class_scores, 0.3, 0.6, strict=True)
+    assert sorted(zip(box_ids.tolist(), class_ids.tolist())) == sorted(expected)
+    np.testing.assert_array_equal(scores, class_scores[box_ids, class_ids])
+    assert np.all(np.diff(scores) <= 0)
+
+
+POSTPROCESSORS = Path(__file__).resolve().parents[1] / "examples" / "postprocessors"
+
+
+def load_postprocessor(relative_path, **attributes):
+    """โหลด postprocessor แบบไฟล์เดี่ยว (เหมือน DeGirum PySDK) โดยไม่เรียก __init__ ที่ต้องใช้ config"""
+    spec = importlib.util.spec_from_file_location(Path(relative_path).stem, POSTPROCESSORS / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    postprocessor = object.__new__(module.PostProcessor)
+    postprocessor.__dict__.update(attributes)
+    return module, postprocessor
+
+
+@pytest.mark.parametrize("relative_path", [
+    "RetinaFace/HailoDetectionRetinafaceMobilenet.py",
+    "SCRFD/HailoDetectionScrfd.py",
+    "DamoYOLO/HailoDetectorDamoYOLO.py",
+])
+def test_postprocessors_are_self_contained(relative_path):
+    # PySDK deploy ไฟล์เดียว: import ได้เฉพาะ standard library และ NumPy
+    tree = ast.parse((POSTPROCESSORS / relative_path).read_text())
+    imported = {alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names}
+    imported |= {node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)}
+    assert imported <= {"json", "numpy"}
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_retinaface_nms_matches_shared_nms(ties):
+    _, postprocessor = load_postprocessor("RetinaFace/HailoDetectionRetinafaceMobilenet.py")
+    for count in (0, 1, 40, 500):
+        boxes, scores = candidates(np.random.default_rng(count), count, ties)
+        np.testing.assert_array_equal(postprocessor.nms(boxes, scores, 0.4), nms(boxes, scores, 0.4))
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_scrfd_nms_matches_shared_batch_nms(ties):
+    _, postprocessor = load_postprocessor("SCRFD/HailoDetectionScrfd.py", nms_iou_thresh=0.4)
+    rng = np.random.default_rng(8)
+    boxes, scores = candidates(rng, 600, ties)
+    image_ids = np.sort(rng.integers(0, 4, len(boxes)))
+    expected = batch_nms(boxes, scores, image_ids, iou_threshold=0.4)
+    np.testing.assert_array_equal(postprocessor._apply_non_max_suppression(boxes, scores, image_ids), expected)
+    assert len(postprocessor._apply_non_max_suppression(boxes[:0], scores[:0], image_ids[:0])) == 0
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_damoyolo_nms_matches_shared_multiclass_nms(ties):
+    _, postprocessor = load_postprocessor("DamoYOLO/HailoDetectorDamoYOLO.py", num_classes=6,
+                                          conf_threshold=0.3, nms_iou_thresh=0.6)
+    rng = np.random.default_rng(12)
+    boxes, _ = candidates(rng, 400)
+    class_scores = rng.uniform(0, 1, (400, 6)) ** 3
+    if ties:
+        class_scores = np.round(class_scores * 8) / 8
+    class_scores = class_scores.astype(np.float32)
+
+    box_ids, scores, class_ids = multiclass_nms(boxes, class_scores, 0.3, 0.6, strict=True)
+    by_class = np.argsort(class_ids, kind="stable")
+    bboxes, final_scores, final_classes = postprocessor.apply_nms(boxes[None], class_scores[None])
+    np.testing.assert_array_equal(bboxes, boxes[box_ids[by_class]])
+    np.testing.assert_array_equal(final_scores, scores[by_class])
+    np.testing.assert_array_equal(final_classes, class_ids[by_class])
@@ -0,0 +1,68 @@
+# tests/test_ocr_batch.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.ocr_batch import OCRPreprocessor
+
+
+def plate(rng, width, height):
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def crops():
+    rng = np.random.default_rng(0)
+    # ป้ายบรรทัดเดียว, ป้ายสองบรรทัด, ไม่มีป้าย, ป้ายบรรทัดเดียว, ป้ายจัตุรัส, crop ว่าง
+    return [plate(rng, 200, 50), plate(rng, 140, 80), None, plate(rng, 96, 24),
+            plate(rng, 60, 60), np.empty((0, 0, 3), np.uint8)]
+
+
+def test_crops_are_grouped_by_shape_and_skipped_when_empty(crops):
+    batches = OCRPreprocessor().prepare_batches(crops)
+    assert [(batch.size, batch.indices) for batch in batches] == [
+        ((192, 48), [0, 3]), ((160, 80), [1]), ((96, 96), [4])]
+    for batch in batches:
+        assert batch.images.shape == (len(batch), batch.size[1], batch.size[0], 3)
+
+
+def test_slots_are_letterboxed_with_white_padding(crops):
+    ocr = OCRPreprocessor()
+    batch = ocr.prepare_batches(crops)[1]  # ป้ายสองบรรทัด 140x80 ลง 160x80
+    image, transform = batch.images[0], batch.transforms[0]
+    assert transform.has_padding
+
+    roi = image[transform.pad_y:transform.pad_y + transform.new_height,
+                transform.pad_x:transform.pad_x + transform.new_width]
+    expected = cv2.resize(ocr.preprocess_crop(crops[1], (160, 80)), (transform.new_width, transform.new_height))
+    np.testing.assert_array_equal(roi, cv2.cvtColor(expected, cv2.COLOR_GRAY2BGR))
+
+    mask = np.ones(image.shape[:2], bool)
+    mask[transform.pad_y:transform.pad_y + transform.new_height,
+         transform.pad_x:transform.pad_x + transform.new_width] = False
+    assert mask.any() and (image[mask] == 255).all()
+
+
+def test_large_crops_are_downscaled_before_threshold():
+    crop = plate(np.random.default_rng(1), 800, 200)
+    binary = OCRPreprocessor().preprocess_crop(crop, (192, 48))
+    assert binary.shape == (96, 384)  # oversample 2 เท่าของความสูง 48
+    assert set(np.unique(binary)) <= {0, 255}
+
+
+def test_single_channel_output_and_buffer_reuse(crops):
+    ocr = OCRPreprocessor(channels=1)
+    first = ocr.prepare_batches(crops)
+    assert first[0].images.shape == (2, 48, 192, 1)
+    second = ocr.prepare_batches(crops[:1])
+    assert np.shares_memory(first[0].images, second[0].images)
+
+
+def test_scatter_restores_crop_order(crops):
+    batches = OCRPreprocessor().prepare_batches(crops)
+    batch_results = [[f"text-{i}" for i in batch.indices] for batch in batches]
+    results = OCRPreprocessor.scatter(batches, batch_results, len(crops), default="")
+    assert results == ["text-0", "text-1", "", "text-3", "text-4", ""]
+
+    with pytest.raises(ValueError):
+        OCRPreprocessor.scatter(batches, [["only-one"]] * len(batches), len(crops))
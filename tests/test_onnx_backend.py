@@ -0,0 +1,120 @@
+# tests/test_onnx_backend.py
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper  # noqa: E402
+
+from pwd_library.model.onnx_backend import OnnxRuntimeBackend, OnnxSession  # noqa: E402
+from pwd_library.utils.exceptions import InferenceError, ModelLoadError  # noqa: E402
+
+SCALE = np.array([1.0, 2.0, 3.0], np.float32)
+
+
+def write_model(path, height=8, width=6):
+    """โมเดล NCHW เล็กๆ: ค่าเฉลี่ยต่อช่องสีคูณ SCALE และภาพที่คูณ 2"""
+    nodes = [helper.make_node("ReduceMean", ["images"], ["mean"], axes=[2, 3], keepdims=0),
+             helper.make_node("Mul", ["mean", "scale"], ["scores"]),
+             helper.make_node("Add", ["images", "images"], ["doubled"])]
+    graph = helper.make_graph(
+        nodes, "tiny",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, height, width])],
+        [helper.make_tensor_value_info("scores", TensorProto.FLOAT, ["batch", 3]),
+         helper.make_tensor_value_info("doubled", TensorProto.FLOAT, ["batch", 3, height, width])],
+        [helper.make_tensor("scale", TensorProto.FLOAT, [3], SCALE)])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return path
+
+
+def expected(images):
+    return images.mean(axis=(1, 2)) * SCALE, 2 * images.transpose(0, 3, 1, 2)
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    return write_model(tmp_path / "tiny.onnx")
+
+
+@pytest.fixture
+def images():
+    return np.random.default_rng(0).random((4, 8, 6, 3), dtype=np.float32)
+
+
+def test_nchw_model_is_reported_and_fed_as_nhwc(model_path, images):
+    with OnnxSession(model_path, batch_size=4, cache_dir=False) as session:
+        assert session.input_shape == (8, 6, 3)
+        assert session.output_names == ["scores", "doubled"]
+        outputs = session.infer(images)
+    scores, doubled = expected(images)
+    np.testing.assert_allclose(outputs["scores"], scores, rtol=1e-6)
+    np.testing.assert_array_equal(outputs["doubled"], doubled)
+
+
+@pytest.mark.parametrize("batch", [1, 3])
+def test_io_binding_matches_plain_run(model_path, images, batch):
+    with OnnxSession(model_path, batch_size=4, cache_dir=False, use_io_binding=True) as bound, \
+            OnnxSession(model_path, batch_size=4, cache_dir=False, use_io_binding=False) as plain:
+        # uint8 ถูกแปลงเป็น float ของโมเดลโดยไม่ normalize ทั้งสองทาง
+        frames = (images[:batch] * 255).astype(np.uint8)
+        for tensor in (images[:batch], frames):
+            a, b = bound.infer(tensor), plain.infer(tensor)
+            for name in ("scores", "doubled"):
+                np.testing.assert_array_equal(a[name], b[name])
+        assert set(bound._bindings) == {batch} and not plain._bindings
+
+
+def test_bound_outputs_are_reused_only_without_copy(model_path, images):
+    with OnnxSession(model_path, batch_size=4, cache_dir=False, copy_outputs=False) as session:
+        first = session.infer(images[:2])["scores"]
+        second = session.infer(images[2:])["scores"]
+        assert first is second
+        np.testing.assert_allclose(first, expected(images[2:])[0], rtol=1e-6)
+
+    with OnnxSession(model_path, batch_size=4, cache_dir=False) as session:
+        first = session.infer(images[:2])["scores"]
+        session.infer(images[2:])
+        np.testing.assert_allclose(first, expected(images[:2])[0], rtol=1e-6)
+
+
+def test_invalid_input_and_closed_session_raise(model_path, images):
+    session = OnnxSession(model_path, batch_size=2, cache_dir=False)
+    with pytest.raises(InferenceError):
+        session.infer(images[:1])
+    session.open()
+    with pytest.raises(InferenceError, match="expected"):
+        session.infer(images[:3])
+    with pytest.raises(InferenceError, match="expected"):
+        session.infer(images[:, :4])
+    with pytest.raises(InferenceError, match="Missing input"):
+        session.infer({"other": images[:1]})
+    session.close()
+    assert not session.is_open
+
+
+def test_optimized_model_cache_is_reused(model_path, tmp_path, images):
+    cache_dir = tmp_path / "cache"
+    first = OnnxSession(model_path, cache_dir=cache_dir).open()
+    assert not first.cache_hit and first.optimized_model_path.exists()
+    second = OnnxSession(model_path, cache_dir=cache_dir).open()
+    assert second.cache_hit
+    np.testing.assert_array_equal(first.infer(images[:1])["scores"], second.infer(images[:1])["scores"])
+
+
+def test_dynamic_spatial_size_needs_input_size(tmp_path, images):
+    path = write_model(tmp_path / "dynamic.onnx", height="h", width="w")
+    with pytest.raises(ModelLoadError, match="input_size"):
+        OnnxSession(path, cache_dir=False).open()
+    with OnnxSession(path, batch_size=4, cache_dir=False, input_size=(6, 8)) as session:
+        assert session.input_shape == (8, 6, 3)
+        np.testing.assert_array_equal(session.infer(images)["doubled"], expected(images)[1])
+
+
+def test_backend_prefers_onnx_export_and_merges_model_config(model_path):
+    backend = OnnxRuntimeBackend(models={"tiny": {"use_io_binding": False}}, cache_dir=False, intra_op_threads=1)
+    session = backend.create_session(model_path.with_suffix(".hef"), batch_size=2, copy_outputs=False)
+    assert session.model_path == model_path
+    assert (session.use_io_binding, session.copy_outputs, session.intra_op_threads) == (False, False, 1)
+    assert session.batch_size == 2 and session.cache_dir is False
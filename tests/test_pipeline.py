@@ -0,0 +1,38 @@
+# tests/test_pipeline.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.pipeline import PreprocessPipeline
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+
+
+@pytest.fixture
+def xrgb():
+    return np.random.default_rng(0).integers(0, 256, (90, 160, 4), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("model_type", ["ssd", "resnet", "efficientnet"])
+def test_four_channel_presets_keep_alpha(xrgb, model_type):
+    processed = ImagePreprocessor((64, 64)).preprocess_for_model(xrgb, model_type)
+    assert processed.shape == (1, 64, 64, 4)
+
+    # เหมือน branch เดิม: resize ไม่รักษา aspect ratio แล้วหาร 255 (ไม่สลับสี ไม่ใช้ mean/std)
+    expected = cv2.resize(xrgb, (64, 64), interpolation=cv2.INTER_LINEAR) / 255.0
+    np.testing.assert_allclose(processed[0], expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("model_type", ["yolo", "default"])
+def test_four_channel_letterbox_presets_drop_alpha(xrgb, model_type):
+    processed = ImagePreprocessor((64, 64)).preprocess_for_model(xrgb, model_type)
+    assert processed.shape == (1, 64, 64, 3)
+
+
+def test_keep_alpha_with_letterbox_padding(xrgb):
+    spec = {"keep_alpha": True, "steps": [
+        {"op": "resize_with_padding", "target_size": [64, 64]},
+        {"op": "normalize", "method": "none"},
+    ]}
+    processed = PreprocessPipeline(spec).run(xrgb)
+    assert processed.shape == (64, 64, 4)
+    assert processed[0, 0].tolist() == [114, 114, 114, 0]
@@ -0,0 +1,52 @@
+# tests/test_postprocessor.py
+import numpy as np
+
+from pwd_library.image_processing.postprocessor import ImagePostprocessor
+from pwd_library.model.backends import DEFAULT_OUTPUTS
+
+
+def _v8_output(boxes, class_scores):
+    """สร้าง output แบบ YOLOv8 channels-first (1, 4 + C, N) เติม anchor ว่างให้ N > 4 + C"""
+    rows = np.zeros((32, 4 + class_scores.shape[1]), np.float32)
+    rows[:len(boxes)] = np.concatenate([boxes, class_scores], axis=1)
+    return rows.T[None]
+
+
+def test_normalized_boxes_is_explicit():
+    boxes = np.array([[0.5, 0.5, 0.25, 0.25], [100.0, 100.0, 40.0, 40.0]])
+    scores = np.array([[0.9, 0.0], [0.0, 0.8]])
+    output = _v8_output(boxes, scores)
+
+    _, pixel_boxes, _, _ = ImagePostprocessor(input_size=(640, 640)).decode_batch(output)
+    # ค่าน้อยไม่ถูกเดาว่าเป็น normalize อีกต่อไป
+    np.testing.assert_allclose(pixel_boxes[0], [0.375, 0.375, 0.625, 0.625])
+    np.testing.assert_allclose(pixel_boxes[1], [80, 80, 120, 120])
+
+    _, scaled, _, _ = ImagePostprocessor(input_size=(640, 640), normalized_boxes=True).decode_batch(
+        _v8_output(boxes[:1], scores[:1]))
+    np.testing.assert_allclose(scaled[0], [240, 240, 400, 400])
+
+
+def test_simulated_default_output_decodes_as_v8():
+    (spec,) = DEFAULT_OUTPUTS
+    attributes, anchors = spec["shape"]
+    output = np.zeros((1, attributes, anchors), np.float32)
+    output[0, :4, 7] = [320, 320, 64, 64]
+    output[0, 4, 7] = 0.9  # class 0 (ถ้าเดาเป็น v5 จะกลายเป็น objectness)
+
+    postprocessor = ImagePostprocessor()
+    rows, has_objectness = postprocessor._as_rows(output)
+    assert rows.shape == (1, anchors, attributes)
+    assert not has_objectness
+
+    _, _, scores, class_ids = postprocessor.decode_batch(output)
+    np.testing.assert_allclose(scores, [0.9], rtol=1e-6)
+    assert class_ids.tolist() == [0]
+
+
+def test_v5_head_uses_objectness():
+    rows = np.zeros((1, 32, 7), np.float32)
+    rows[0, 0] = [320, 320, 64, 64, 0.5, 0.2, 0.9]
+    _, _, scores, class_ids = ImagePostprocessor(head="v5").decode_batch(rows, confidence_threshold=0.25)
+    np.testing.assert_allclose(scores, [0.45], rtol=1e-6)
+    assert class_ids.tolist() == [1]
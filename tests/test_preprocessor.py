@@ -0,0 +1,200 @@
+# tests/test_preprocessor.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.preprocessor import ImagePreprocessor, LetterboxTransform
+from pwd_library.utils.exceptions import PreprocessingError
+
+# ผลต่างสูงสุดที่ยอมรับเทียบกับเส้นทางเดิม resize_with_padding -> normalize (float32)
+TOLERANCE = 2e-7
+# ภาพ float คำนวณ x * scale + bias ใน float32 ต่างจาก (x / 255 - mean) / std ได้ ~2 ULP ที่ |x| ~ 2.6
+FLOAT_TOLERANCE = 5e-7
+
+
+@pytest.fixture
+def preprocessor():
+    return ImagePreprocessor((64, 48), num_workers=2)
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (37, 53, 3), dtype=np.uint8)
+
+
+def reference(preprocessor, image, method):
+    return preprocessor.normalize(preprocessor.resize_with_padding(image), method)
+
+
+def as_hwc(out, layout):
+    return out[0] if layout == "NHWC" else out[0].transpose(1, 2, 0)
+
+
+@pytest.mark.parametrize("layout", ["NHWC", "NCHW"])
+@pytest.mark.parametrize("method", ["zero_one", "neg_one_one", "imagenet"])
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32])
+def test_fused_path_matches_resize_then_normalize(preprocessor, image, method, layout, dtype):
+    source = image.astype(dtype)
+    # normalize() สลับเป็น RGB เฉพาะวิธี imagenet
+    out = preprocessor.preprocess_into(source, method=method, layout=layout, swap_rb=method == "imagenet")
+    expected = reference(preprocessor, source, method)
+    tolerance = TOLERANCE if dtype == np.uint8 else FLOAT_TOLERANCE
+    np.testing.assert_allclose(as_hwc(out, layout), expected, rtol=0, atol=tolerance)
+
+
+def test_custom_normalization_matches_reference(preprocessor, image):
+    mean, std = [0.5, 0.4, 0.3], [0.2, 0.25, 0.3]
+    out = preprocessor.preprocess_into(image, method="custom", swap_rb=False, custom_mean=mean, custom_std=std)
+    expected = preprocessor.normalize(preprocessor.resize_with_padding(image), "custom", mean, std)
+    np.testing.assert_allclose(out[0], expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_writes_into_caller_buffer_and_reports_transform(preprocessor, image):
+    out = preprocessor.allocate_input_buffer(layout="NCHW")
+    out.fill(np.nan)
+    result, transform = preprocessor.preprocess_into(image, out=out, layout="NCHW", return_transform=True)
+    assert result is out
+    assert not np.isnan(out).any()
+    assert (transform.pad_x, transform.pad_y, transform.new_width, transform.new_height) == (0, 2, 64, 44)
+    np.testing.assert_allclose(out[0, :, 0, :], 114 / 255.0, rtol=TOLERANCE)
+
+    with pytest.raises(PreprocessingError):
+        preprocessor.preprocess_into(image, out=np.empty((1, 48, 64, 3), np.float32), layout="NCHW")
+
+
+def test_uint8_passthrough_matches_letterbox(preprocessor, image):
+    out = preprocessor.allocate_input_buffer(dtype=np.uint8)
+    preprocessor.preprocess_into(image, out=out, method="none")
+    expected = cv2.cvtColor(preprocessor.resize_with_padding(image), cv2.COLOR_BGR2RGB)
+    np.testing.assert_array_equal(out[0], expected)
+
+    preprocessor.preprocess_into(image, out=out, method="none", swap_rb=False)
+    np.testing.assert_array_equal(out[0], preprocessor.resize_with_padding(image))
+
+
+def test_gray_and_bgra_inputs(preprocessor, image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    out = preprocessor.preprocess_into(gray)
+    assert out.shape == (1, 48, 64, 1)
+    np.testing.assert_allclose(out[0, :, :, 0], reference(preprocessor, gray, "zero_one"), atol=TOLERANCE)
+
+    bgra = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    np.testing.assert_array_equal(preprocessor.preprocess_into(bgra), preprocessor.preprocess_into(image))
+
+
+@pytest.mark.parametrize("source_size", [(1920, 1080), (720, 1280), (640, 640), (37, 53)])
+@pytest.mark.parametrize("keep_aspect", [True, False])
+def test_letterbox_round_trip(source_size, keep_aspect):
+    transform = LetterboxTransform(source_size, (640, 640), keep_aspect)
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(0, 1, (50, 2)) * source_size
+    boxes = np.concatenate([xy, xy + 5], axis=1).astype(np.float32)
+    landmarks = rng.uniform(0, 1, (50, 5, 2)).astype(np.float32) * source_size
+
+    np.testing.assert_allclose(transform.boxes_to_source(transform.boxes_to_model(boxes), clip=False),
+                               boxes, rtol=1e-5)
+    np.testing.assert_allclose(transform.points_to_source(transform.points_to_model(landmarks), clip=False),
+                               landmarks, rtol=1e-5)
+    flat = landmarks.reshape(50, 10)
+    assert transform.points_to_model(flat).shape == (50, 10)
+    np.testing.assert_allclose(transform.points_to_model(flat), transform.points_to_model(landmarks).reshape(50, 10))
+
+
+def test_letterbox_geometry_and_clipping():
+    transform = LetterboxTransform((1920, 1080), (640, 640))
+    assert (transform.new_width, transform.new_height, transform.pad_x, transform.pad_y) == (640, 360, 0, 140)
+    assert transform.has_padding and not transform.is_identity
+    assert LetterboxTransform((640, 640), (640, 640)).is_identity
+
+    model_box = np.array([[0, 140, 640, 500]], np.float32)
+    np.testing.assert_allclose(transform.boxes_to_source(model_box), [[0, 0, 1920, 1080]], atol=1e-3)
+    outside = np.array([[-10, 100, 700, 520]], np.float32)
+    np.testing.assert_allclose(transform.boxes_to_source(outside), [[0, 0, 1920, 1080]])
+    assert transform.boxes_to_source(outside, clip=False)[0, 0] < 0
+
+
+def test_letterbox_transform_is_cached_per_shape(preprocessor, image):
+    first = preprocessor.get_letterbox_transform(image.shape)
+    assert preprocessor.get_letterbox_transform(image.shape[:2]) is first
+    assert preprocessor.get_letterbox_transform(image.shape, (32, 32)) is not first
+    _, transform = preprocessor.resize_with_padding(image, return_transform=True)
+    assert transform is first
+
+    preprocessor.max_cached_transforms = 2
+    preprocessor.get_letterbox_transform((10, 10))
+    assert len(preprocessor._transform_cache) <= 2
+
+
+def test_batch_masks_failed_images_and_keeps_slots_aligned(preprocessor, image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    images = [image, None, np.empty((0, 0, 3), np.uint8), gray, image[::-1].copy()]
+    out = preprocessor.allocate_input_buffer(batch_size=6)
+    out.fill(7.0)
+
+    batch, valid = preprocessor.preprocess_batch_into(images, out=out, method="zero_one")
+    assert batch is out
+    np.testing.assert_array_equal(valid, [True, False, False, True, True])
+    assert not batch[1].any() and not batch[2].any()
+    assert (batch[5] == 7.0).all()
+    for index in (0, 4):
+        np.testing.assert_array_equal(batch[index], preprocessor.preprocess_into(images[index])[0])
+    np.testing.assert_array_equal(batch[3], preprocessor.preprocess_into(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))[0])
+
+
+def test_batch_thread_pool_matches_serial(image):
+    images = [np.roll(image, shift, axis=1) for shift in range(8)]
+    parallel = ImagePreprocessor((64, 48), num_workers=4)
+    serial = ImagePreprocessor((64, 48), num_workers=1)
+    for layout in ("NHWC", "NCHW"):
+        a, _ = parallel.preprocess_batch_into(images, layout=layout, dtype=np.uint8, method="none")
+        b, _ = serial.preprocess_batch_into(images, layout=layout, dtype=np.uint8, method="none")
+        assert a.dtype == np.uint8
+        np.testing.assert_array_equal(a, b)
+    parallel.shutdown()
+
+
+def test_batch_rejects_small_buffer_and_all_failed(preprocessor, image):
+    with pytest.raises(PreprocessingError):
+        preprocessor.preprocess_batch_into([image, image], out=preprocessor.allocate_input_buffer())
+    with pytest.raises(PreprocessingError):
+        preprocessor.preprocess_batch_into([])
+
+    batch = preprocessor.preprocess_batch([image, None, image])
+    assert batch.shape == (2, 48, 64, 3)
+    batch, valid = preprocessor.preprocess_batch([image, None, image], return_mask=True)
+    assert batch.shape[0] == 3 and valid.tolist() == [True, False, True]
+    with pytest.raises(PreprocessingError):
+        preprocessor.preprocess_batch([None])
+
+
+@pytest.mark.parametrize("method", ["zero_one", "neg_one_one", "imagenet"])
+def test_uint8_lut_normalization_matches_float_path(preprocessor, image, method):
+    lut_result = preprocessor.normalize(image, method)
+    float_result = preprocessor.normalize(image.astype(np.float32), method)
+    assert lut_result.dtype == np.float32
+    np.testing.assert_allclose(lut_result, float_result, rtol=0, atol=FLOAT_TOLERANCE)
+
+
+def test_lut_is_cached_and_clipped_for_integer_dtypes(preprocessor):
+    lut = preprocessor.get_normalization_lut("zero_one", 3)
+    assert preprocessor.get_normalization_lut("zero_one", 3) is lut
+    assert lut.shape == (256, 1, 3)
+    assert preprocessor.get_normalization_lut("zero_one", 1).shape == (256, 1)
+
+    int_lut = preprocessor.get_normalization_lut("neg_one_one", 1, dtype=np.int8)
+    assert int_lut.dtype == np.int8 and set(np.unique(int_lut)) == {-1, 0, 1}
+
+
+def test_lut_cache_is_bounded_and_planar_tables_follow_their_source(preprocessor, image):
+    preprocessor.max_cached_luts = 3
+    methods = [("zero_one", None, None), ("neg_one_one", None, None), ("imagenet", None, None)]
+    methods += [("custom", [0.1 * i] * 3, [0.5] * 3) for i in range(6)]
+    for _ in range(2):
+        for method, mean, std in methods:
+            planar = preprocessor.preprocess_into(image, layout="NCHW", method=method,
+                                                  custom_mean=mean, custom_std=std)
+            interleaved = preprocessor.preprocess_into(image, layout="NHWC", method=method,
+                                                       custom_mean=mean, custom_std=std)
+            np.testing.assert_array_equal(planar[0].transpose(1, 2, 0), interleaved[0])
+            assert len(preprocessor._lut_cache) <= 3
+    assert all(isinstance(key[1], str) for key in preprocessor._lut_cache if key[0] == "planar")
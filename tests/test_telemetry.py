@@ -0,0 +1,101 @@
+# tests/test_telemetry.py
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pwd_library.model.telemetry import (LatencyHistogram, RollingHistogram, TelemetryRingBuffer,
+                                         TelemetrySampler, make_hailo_reader)
+
+
+def test_bucket_math_covers_range_with_clamped_ends():
+    histogram = LatencyHistogram(min_seconds=1e-5, max_seconds=100.0, buckets_per_decade=20)
+    assert histogram.num_buckets == 140
+    assert histogram.bucket_index(1e-3) == 40
+    assert histogram.bucket_lower(40) == pytest.approx(1e-3)
+    assert histogram.bucket_index(1.12e-3) == 40 and histogram.bucket_index(1.13e-3) == 41
+    assert histogram.bucket_index(1e-9) == 0
+    assert histogram.bucket_index(1e4) == 139
+
+
+def test_percentiles_are_within_one_bucket_and_capped_at_max():
+    histogram = LatencyHistogram()
+    values = np.linspace(0.001, 0.1, 1000)
+    for value in values:
+        histogram.record(float(value))
+
+    for q in (50, 90, 99):
+        assert histogram.percentile(q) == pytest.approx(np.percentile(values, q), rel=0.13)
+    assert histogram.percentile(100) == pytest.approx(0.1)
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["mean_ms"] == pytest.approx(values.mean() * 1000)
+    assert summary["max_ms"] == pytest.approx(100.0)
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_merge_and_copy_add_counts():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.001)
+    b.record(0.5, index=b.bucket_index(0.5))
+    merged = a.copy()
+    merged.merge(b)
+    assert merged.total == 2 and merged.max == 0.5
+    assert a.total == 1 and sum(merged.counts) == 2
+
+
+def test_rolling_histogram_drops_slots_outside_window():
+    rolling = RollingHistogram(window_seconds=10.0, num_slots=5)
+    rolling.record(0.001, now=0.5)
+    rolling.record(0.002, now=3.0)
+    rolling.record(0.003, now=11.0)  # ช่องเดียวกับ now=0.5 ถูกล้างแล้วใช้ซ้ำ
+
+    assert rolling.snapshot(now=11.0).total == 2
+    assert rolling.snapshot(now=13.9).total == 1
+    assert rolling.snapshot(now=30.0).total == 0
+
+
+def test_ring_buffer_wraps_in_time_order():
+    ring = TelemetryRingBuffer(capacity=3)
+    assert ring.latest() == {}
+    for t in range(5):
+        ring.append(float(t), {"temperature": 40.0 + t, "power": None if t % 2 else 2.0})
+
+    assert len(ring) == 3
+    np.testing.assert_array_equal(ring.to_array()[:, 0], [2.0, 3.0, 4.0])
+    np.testing.assert_array_equal(ring.to_array(since=3.0)[:, 1], [43.0, 44.0])
+    assert ring.latest() == {"timestamp": 4.0, "temperature": 44.0, "power": 2.0,
+                             "utilization": None, "memory_mb": None}
+
+    summary = ring.summary()
+    assert summary["temperature"] == {"min": 42.0, "mean": 43.0, "max": 44.0}
+    assert summary["power"]["mean"] == 2.0
+    assert summary["utilization"] == {"min": None, "mean": None, "max": None}
+
+
+def test_sampler_merges_readers_and_counts_failures():
+    def broken():
+        raise OSError("device busy")
+
+    sampler = TelemetrySampler([lambda: {"temperature": 50.0}, broken, lambda: {"power": 1.5}],
+                               buffer=TelemetryRingBuffer(capacity=4), interval=60.0)
+    assert sampler.sample_once() == {"temperature": 50.0, "power": 1.5}
+    assert sampler.read_errors == 1
+
+    sampler.start()
+    assert sampler.running
+    sampler.stop(timeout=5.0)
+    assert not sampler.running and len(sampler.buffer) == 2
+
+
+def test_hailo_reader_takes_hottest_sensor_and_total_power():
+    def control(ts0, ts1, power=None):
+        temperature = SimpleNamespace(ts0_temperature=ts0, ts1_temperature=ts1)
+        attrs = {"get_chip_temperature": lambda: temperature}
+        if power is not None:
+            attrs["power_measurement"] = lambda: power
+        return SimpleNamespace(**attrs)
+
+    read = make_hailo_reader([SimpleNamespace(control=control(51.0, 53.5, 1.25)), control(55.0, None, 0.75)])
+    assert read() == {"temperature": 55.0, "power": 2.0}
+    assert make_hailo_reader([control(40.0, 41.0)])() == {"temperature": 41.0}
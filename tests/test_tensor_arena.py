@@ -0,0 +1,58 @@
+# tests/test_tensor_arena.py
+import numpy as np
+import pytest
+
+from pwd_library.utils.exceptions import ResourceError
+from pwd_library.utils.tensor_arena import TensorArena
+
+
+def test_released_buffer_is_reused_for_same_shape_and_dtype():
+    arena = TensorArena()
+    first = arena.acquire((2, 3), np.float32)
+    arena.release(first)
+    again = arena.acquire([2, 3], "float32")
+    assert again is first
+
+    stats = arena.get_stats()
+    assert (stats["allocations"], stats["reuses"]) == (1, 1)
+    assert stats["bytes_in_use"] == first.nbytes
+
+
+def test_shape_or_dtype_mismatch_allocates_new_buffer():
+    arena = TensorArena()
+    buffer = arena.acquire((2, 3), np.float32)
+    arena.release(buffer)
+
+    other_shape = arena.acquire((3, 2), np.float32)
+    other_dtype = arena.acquire((2, 3), np.uint8)
+    assert other_shape is not buffer and other_shape.shape == (3, 2)
+    assert other_dtype is not buffer and other_dtype.dtype == np.uint8
+    assert arena.get_stats()["allocations"] == 3
+    assert arena.acquire((2, 3), np.float32) is buffer
+
+
+def test_release_rejects_foreign_views_and_double_release():
+    arena = TensorArena(name="test")
+    buffer = arena.acquire((4,), np.float32)
+    with pytest.raises(ResourceError):
+        arena.release(np.empty(4, np.float32))
+    with pytest.raises(ResourceError):
+        arena.release(buffer[:2])
+    arena.release(buffer)
+    with pytest.raises(ResourceError):
+        arena.release(buffer)
+
+
+def test_free_list_cap_high_water_and_clear():
+    arena = TensorArena(max_free_per_key=1)
+    with arena.lease((8,), np.float64) as a, arena.lease((8,), np.float64) as b:
+        assert a is not b
+    stats = arena.get_stats()
+    assert stats["high_water_bytes"] == 128 and stats["bytes_in_use"] == 0
+    assert stats["buffers"]["(8,):<f8"]["free"] == 1
+    assert stats["bytes_free"] == 64
+
+    arena.clear()
+    assert arena.get_stats()["bytes_free"] == 0
+    arena.acquire((8,), np.float64)
+    assert arena.get_stats()["allocations"] == 3
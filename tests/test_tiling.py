@@ -0,0 +1,76 @@
+# tests/test_tiling.py
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+from pwd_library.image_processing.tiling import TilingPreprocessor
+from pwd_library.utils.exceptions import PostprocessingError
+
+
+@pytest.fixture
+def frame():
+    return np.random.default_rng(0).integers(0, 256, (300, 500, 3), dtype=np.uint8)
+
+
+def test_regions_cover_the_frame_with_overlap():
+    tiler = TilingPreprocessor((200, 200), overlap=0.25, include_full_frame=False)
+    regions = tiler.compute_regions((300, 500, 3))
+    assert (regions[:, 2] - regions[:, 0] == 200).all() and (regions[:, 3] - regions[:, 1] == 200).all()
+    assert regions[:, 0].min() == 0 and regions[:, 2].max() == 500
+    assert regions[:, 1].min() == 0 and regions[:, 3].max() == 300
+    xs = np.unique(regions[:, 0])
+    assert (np.diff(xs) <= 150).all()  # ซ้อนกันอย่างน้อย 25%
+    assert tiler.compute_regions((300, 500, 3)) is regions
+
+
+def test_roi_and_full_frame_slot():
+    tiler = TilingPreprocessor((100, 100), overlap=0, roi=(50, 100, 350, 250))
+    regions = tiler.compute_regions((300, 500, 3))
+    assert regions[0].tolist() == [0, 0, 500, 300]
+    tiles = regions[1:]
+    assert tiles[:, 0].min() == 50 and tiles[:, 2].max() == 350
+    assert tiles[:, 1].min() == 100 and tiles[:, 3].max() == 250
+    with pytest.raises(ValueError):
+        TilingPreprocessor(roi=(600, 0, 700, 100)).compute_regions((300, 500, 3))
+
+
+def test_prepare_writes_each_tile_like_preprocess_into(frame):
+    tiler = TilingPreprocessor((200, 200), overlap=0.2, model_size=(96, 96))
+    batch, layout = tiler.prepare(frame, method="zero_one")
+    assert batch.shape == (len(layout), 96, 96, 3)
+
+    preprocessor = ImagePreprocessor((96, 96))
+    for slot, (x1, y1, x2, y2) in enumerate(layout.regions):
+        expected = preprocessor.preprocess_into(frame[y1:y2, x1:x2], target_size=(96, 96))
+        np.testing.assert_allclose(batch[slot], expected[0], atol=1e-6)
+
+
+def test_merge_maps_to_frame_and_removes_cross_tile_duplicates(frame):
+    tiler = TilingPreprocessor((200, 200), overlap=0.5, include_full_frame=False)
+    _, layout = tiler.prepare(frame)
+    plate = np.array([220, 110, 260, 130], np.float32)  # อยู่ใน 4 tile
+
+    detections = []
+    for slot, (x1, y1, x2, y2) in enumerate(layout.regions):
+        inside = plate[0] >= x1 and plate[2] <= x2 and plate[1] >= y1 and plate[3] <= y2
+        if inside:
+            local = plate - np.array([x1, y1, x1, y1], np.float32)
+            model_boxes = layout.transforms[slot].boxes_to_model(local[None])
+            # class อื่นที่ตำแหน่งเดียวกันต้องไม่ถูกตัด
+            detections.append((np.repeat(model_boxes, 2, axis=0), np.array([0.5 + slot / 100, 0.3]),
+                               np.array([0, 1])))
+        else:
+            detections.append((np.empty((0, 4)), np.empty(0), np.empty(0)))
+    assert sum(len(d[0]) for d in detections) == 8
+
+    boxes, scores, class_ids = tiler.merge(layout, detections)
+    assert sorted(class_ids.tolist()) == [0, 1]
+    np.testing.assert_allclose(boxes, np.repeat(plate[None], 2, axis=0), atol=1e-3)
+    assert scores[class_ids == 0][0] == pytest.approx(max(d[1][0] for d in detections if len(d[1])))
+
+
+def test_merge_checks_tile_count(frame):
+    tiler = TilingPreprocessor((200, 200))
+    _, layout = tiler.prepare(frame)
+    with pytest.raises(PostprocessingError):
+        tiler.merge(layout, [])
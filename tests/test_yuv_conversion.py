@@ -0,0 +1,63 @@
+# tests/test_yuv_conversion.py
+import cv2
+import numpy as np
+import pytest
+
+from pwd_library.image_processing.preprocessor import ImagePreprocessor
+
+
+def make_nv12(bgr):
+    """BGR -> (NV12 buffer, Y plane, interleaved UV plane) ด้วย OpenCV"""
+    height, width = bgr.shape[:2]
+    i420 = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    y = i420[:height]
+    u = i420[height:height + height // 4].reshape(height // 2, width // 2)
+    v = i420[height + height // 4:].reshape(height // 2, width // 2)
+    uv = np.ascontiguousarray(np.dstack([u, v]))
+    nv12 = np.vstack([y, uv.reshape(height // 2, width)])
+    return nv12, y, uv
+
+
+@pytest.mark.parametrize("rgb", [False, True])
+def test_yuv_to_color_matches_cv2_nv12(rgb):
+    rng = np.random.default_rng(0)
+    bgr = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    nv12, y, uv = make_nv12(bgr)
+    expected = cv2.cvtColor(nv12, cv2.COLOR_YUV2RGB_NV12 if rgb else cv2.COLOR_YUV2BGR_NV12)
+
+    result = ImagePreprocessor().yuv_to_color(y, uv, rgb=rgb)
+
+    assert np.abs(result.astype(int) - expected).max() <= 2
+
+
+@pytest.mark.parametrize("bgr, expected", [
+    ((0, 0, 255), (0, 1, 255)),      # red
+    ((0, 255, 0), (1, 255, 0)),      # green
+    ((255, 0, 0), (255, 0, 0)),      # blue
+    ((255, 255, 255), (255, 255, 255)),
+])
+def test_yuv_to_color_primary_colours(bgr, expected):
+    solid = np.full((16, 16, 3), bgr, dtype=np.uint8)
+    nv12, y, uv = make_nv12(solid)
+    reference = cv2.cvtColor(nv12, cv2.COLOR_YUV2BGR_NV12)[0, 0]
+
+    result = ImagePreprocessor().yuv_to_color(y, uv)[0, 0]
+
+    assert np.abs(result.astype(int) - reference).max() <= 2
+    assert np.abs(result.astype(int) - expected).max() <= 2
+
+
+def test_preprocess_yuv_into_matches_letterboxed_nv12():
+    rng = np.random.default_rng(1)
+    # ภาพเรียบ (gradient) เพื่อให้ผลต่างจาก interpolation ของ chroma มีค่าน้อย
+    gradient = np.linspace(0, 255, 96, dtype=np.float32)
+    bgr = np.dstack([np.tile(gradient, (64, 1)), np.tile(gradient[::-1], (64, 1)),
+                     np.full((64, 96), rng.integers(0, 256), np.float32)]).astype(np.uint8)
+    nv12, y, uv = make_nv12(bgr)
+    preprocessor = ImagePreprocessor((48, 48))
+    expected = preprocessor.resize_with_padding(cv2.cvtColor(nv12, cv2.COLOR_YUV2RGB_NV12), (48, 48))
+
+    out = preprocessor.allocate_input_buffer((48, 48), dtype=np.uint8)
+    result = preprocessor.preprocess_yuv_into(y, uv, out=out, target_size=(48, 48), method="none")
+
+    assert np.abs(result[0].astype(int) - expected).max() <= 4